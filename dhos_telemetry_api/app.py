@@ -5,12 +5,18 @@ from connexion import FlaskApp
 from flask import Flask
 from flask_batteries_included import augment_app as fbi_augment_app
 from flask_batteries_included.config import is_not_production_environment
+from flask_batteries_included.helpers.error_handler import catch_bad_request
 from flask_batteries_included.sqldb import db, init_db
 from she_logging import logger
+from sqlalchemy.exc import DataError
 
 from dhos_telemetry_api import blueprint_development
-from dhos_telemetry_api.blueprint_api import api_blueprint
+from dhos_telemetry_api.blueprint_api import api_blueprint, controller
+from dhos_telemetry_api.config import init_config
+from dhos_telemetry_api.helpers.admission import init_admission
+from dhos_telemetry_api.helpers.capture import init_capture
 from dhos_telemetry_api.helpers.cli import add_cli_command
+from dhos_telemetry_api.helpers.ingest import init_ingest
 
 
 def create_app(
@@ -31,9 +37,24 @@ def create_app(
         testing=testing,
     )
 
+    # Load the service-specific configuration
+    init_config(app)
+
     # Configure the SQL database
     init_db(app=app, testing=testing)
 
+    # Identifiers are native UUIDs in Postgres, which rejects malformed values.
+    app.register_error_handler(DataError, catch_bad_request)
+
+    # Write-behind queue for new records, if ASYNC_INGEST is enabled
+    init_ingest(app, controller.INGEST_BUILDERS)
+
+    # Request shape capture, if REQUEST_CAPTURE_FILE is set
+    init_capture(app)
+
+    # Admission control for API requests, if ADMISSION_MAX_IN_FLIGHT is set
+    init_admission(app)
+
     # API blueprint registration
     app.register_blueprint(api_blueprint)
     app.logger.info("Registered API blueprint")
@@ -1,7 +1,15 @@
-from typing import Dict
+from datetime import date
+from typing import Dict, List, Optional
 
-from flask import Blueprint, Response, jsonify, make_response, request
-from flask_batteries_included.helpers import schema
+from flask import (
+    Blueprint,
+    Response,
+    jsonify,
+    make_response,
+    request,
+    stream_with_context,
+)
+from flask_batteries_included.helpers import schema, timestamp
 from flask_batteries_included.helpers.security import protected_route
 from flask_batteries_included.helpers.security.endpoint_security import (
     and_,
@@ -11,8 +19,13 @@ from flask_batteries_included.helpers.security.endpoint_security import (
 )
 
 from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import device_sketch
 from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
 from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.installation_rollup import (
+    DesktopDailyRollup,
+    MobileDailyRollup,
+)
 from dhos_telemetry_api.models.mobile import Mobile
 
 api_blueprint = Blueprint("api", __name__)
@@ -50,6 +63,12 @@ def create_patient_installation(patient_id: str) -> Response:
           content:
             application/json:
               schema: PatientInstallationResponse
+        '202':
+          description: >-
+            New patient installation queued for writing, when asynchronous ingest is enabled
+          content:
+            application/json:
+              schema: QueuedRecordResponse
         default:
           description: >-
               Error, e.g. 400 Bad Request, 503 Service Unavailable
@@ -58,6 +77,9 @@ def create_patient_installation(patient_id: str) -> Response:
               schema: Error
     """
     _json = schema.post(**Mobile.schema())
+    queued = controller.enqueue_record("mobile", patient_id, _json)
+    if queued is not None:
+        return make_response(jsonify(queued), 202)
     return jsonify(
         controller.create_mobile_installation(
             patient_id=patient_id, installation_data=_json
@@ -65,6 +87,65 @@ def create_patient_installation(patient_id: str) -> Response:
     )
 
 
+@api_blueprint.route(
+    "/dhos/v1/patient/<patient_id>/device_registration", methods=["POST"]
+)
+@protected_route(
+    and_(
+        scopes_present(required_scopes="write:gdm_telemetry"),
+        match_keys(patient_id="patient_id"),
+    )
+)
+def register_patient_device(patient_id: str, registration_data: Dict) -> Response:
+    """
+    ---
+    post:
+      summary: Register patient device
+      description: >-
+        Create a new patient installation together with the blood glucose meters
+        paired with it, in one transaction. The meters' mobile_id is set to the new
+        installation's UUID.
+      tags: [patient]
+      parameters:
+        - in: path
+          name: patient_id
+          required: true
+          schema:
+            type: string
+            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+                x-body-name: registration_data
+                $ref: '#/components/schemas/DeviceRegistrationRequest'
+      responses:
+        '201':
+          description: New patient installation and blood glucose meters
+          content:
+            application/json:
+              schema: DeviceRegistrationResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    registration_data["installation"] = schema.post(
+        json_in=registration_data["installation"], **Mobile.schema()
+    )
+    return make_response(
+        jsonify(
+            controller.register_mobile_device(
+                patient_id=patient_id, registration_data=registration_data
+            )
+        ),
+        201,
+    )
+
+
 @api_blueprint.route(
     "/dhos/v1/patient/<patient_id>/installation/<installation_id>", methods=["PATCH"]
 )
@@ -234,6 +315,83 @@ def get_latest_patient_installation(patient_id: str) -> Response:
     )
 
 
+@api_blueprint.route("/dhos/v1/patient/<patient_id>/telemetry", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def export_patient_telemetry(patient_id: str) -> Response:
+    """
+    ---
+    get:
+      summary: Export patient telemetry
+      description: >-
+        Stream all of a patient's installations and blood glucose meter
+        verifications as one JSON object, for example to answer
+        a subject access request. The response is sent in chunks as records are
+        read, so its size isn't limited by server memory.
+      tags: [patient]
+      parameters:
+        - in: path
+          name: patient_id
+          required: true
+          schema:
+            type: string
+            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+      responses:
+        '200':
+          description: >-
+            The patient's telemetry, with `patient_id`, `mobile` and
+            `blood_glucose_meter` keys
+          content:
+            application/json:
+              schema:
+                type: object
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return Response(
+        stream_with_context(controller.export_patient_data(patient_id=patient_id)),
+        mimetype="application/json",
+    )
+
+
+@api_blueprint.route("/dhos/v1/patient/<patient_id>/telemetry", methods=["DELETE"])
+@protected_route(scopes_present(required_scopes="delete:gdm_telemetry_all"))
+def erase_patient_telemetry(patient_id: str) -> Response:
+    """
+    ---
+    delete:
+      summary: Erase patient telemetry
+      description: >-
+        Delete all of a patient's installations and blood glucose meter
+        verifications in one transaction, for example to handle
+        a right to erasure request.
+      tags: [patient]
+      parameters:
+        - in: path
+          name: patient_id
+          required: true
+          schema:
+            type: string
+            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+      responses:
+        '200':
+          description: Number of rows deleted per table
+          content:
+            application/json:
+              schema: ErasureResult
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(controller.erase_patient_data(patient_id=patient_id))
+
+
 @api_blueprint.route("/dhos/v1/clinician/<clinician_id>/installation", methods=["POST"])
 @protected_route(
     and_(
@@ -266,6 +424,12 @@ def create_clinician_installation(clinician_id: str) -> Response:
           content:
             application/json:
               schema: ClinicianInstallationResponse
+        '202':
+          description: >-
+            New clinician installation queued for writing, when asynchronous ingest is enabled
+          content:
+            application/json:
+              schema: QueuedRecordResponse
         default:
           description: >-
               Error, e.g. 400 Bad Request, 503 Service Unavailable
@@ -274,6 +438,9 @@ def create_clinician_installation(clinician_id: str) -> Response:
               schema: Error
     """
     _json = schema.post(**Desktop.schema())
+    queued = controller.enqueue_record("desktop", clinician_id, _json)
+    if queued is not None:
+        return make_response(jsonify(queued), 202)
 
     return jsonify(
         controller.create_desktop_installation(
@@ -451,42 +618,33 @@ def update_clinician_installation(clinician_id: str, installation_id: str) -> Re
     )
 
 
-@api_blueprint.route(
-    "/dhos/v1/patient/<patient_id>/blood_glucose_meter", methods=["POST"]
-)
-@protected_route(
-    and_(
-        scopes_present(required_scopes="write:gdm_telemetry"),
-        match_keys(patient_id="patient_id"),
-    )
-)
-def create_blood_glucose_meter(patient_id: str, meter_data: Dict) -> Response:
+@api_blueprint.route("/dhos/v1/clinician/<clinician_id>/telemetry", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def export_clinician_telemetry(clinician_id: str) -> Response:
     """
     ---
-    post:
-      summary: Create patient blood glucose meter
-      description: Create a patient blood glucose meter using the details in the request body
-      tags: [blood-glucose-meter]
+    get:
+      summary: Export clinician telemetry
+      description: >-
+        Stream all of a clinician's installations as one JSON object, for example to answer
+        a subject access request. The response is sent in chunks as records are
+        read, so its size isn't limited by server memory.
+      tags: [clinician]
       parameters:
         - in: path
-          name: patient_id
+          name: clinician_id
           required: true
           schema:
             type: string
             example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
-      requestBody:
-        required: true
-        content:
-          application/json:
-            schema:
-                x-body-name: meter_data
-                $ref: '#/components/schemas/BloodGlucoseMeterRequest'
       responses:
-        '201':
-          description: New blood glucose meter
+        '200':
+          description: >-
+            The clinician's telemetry, with `clinician_id` and `desktop` keys
           content:
             application/json:
-              schema: BloodGlucoseMeterResponse
+              schema:
+                type: object
         default:
           description: >-
               Error, e.g. 400 Bad Request, 503 Service Unavailable
@@ -494,61 +652,132 @@ def create_blood_glucose_meter(patient_id: str, meter_data: Dict) -> Response:
             application/json:
               schema: Error
     """
-    return make_response(
-        jsonify(
-            controller.create_blood_glucose_meter(
-                patient_id=patient_id, meter_data=meter_data
-            )
+    return Response(
+        stream_with_context(
+            controller.export_clinician_data(clinician_id=clinician_id)
         ),
-        201,
+        mimetype="application/json",
     )
 
 
-@api_blueprint.route(
-    "/dhos/v1/patient/<patient_id>/blood_glucose_meter/<meter_id>",
-    methods=["PATCH"],
-)
-@protected_route(
-    and_(
-        scopes_present(required_scopes="write:gdm_telemetry"),
-        match_keys(patient_id="patient_id"),
-    )
-)
-def update_blood_glucose_meter(
-    patient_id: str, meter_id: str, meter_data: Dict
-) -> Response:
+@api_blueprint.route("/dhos/v1/clinician/<clinician_id>/telemetry", methods=["DELETE"])
+@protected_route(scopes_present(required_scopes="delete:gdm_telemetry_all"))
+def erase_clinician_telemetry(clinician_id: str) -> Response:
     """
     ---
-    patch:
-      summary: Update patient blood glucose meter
-      description: Update a patient blood glucose meter using the details in the request body
-      tags: [blood-glucose-meter]
+    delete:
+      summary: Erase clinician telemetry
+      description: >-
+        Delete all of a clinician's installations in one transaction, for example to handle
+        a right to erasure request.
+      tags: [clinician]
       parameters:
         - in: path
-          name: patient_id
+          name: clinician_id
           required: true
           schema:
             type: string
             example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
-        - in: path
-          name: meter_id
+      responses:
+        '200':
+          description: Number of rows deleted per table
+          content:
+            application/json:
+              schema: ErasureResult
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(controller.erase_clinician_data(clinician_id=clinician_id))
+
+
+@api_blueprint.route("/dhos/v1/patient_installations", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def search_patient_installations(
+    unique_device_code: str, prefix: bool = False, limit: int = 100
+) -> Response:
+    """
+    ---
+    get:
+      summary: Search patient installations by device
+      description: >-
+        Get the patient installations with a unique device code, or with `prefix`,
+        with a unique device code starting with the one given, most recent first.
+      tags: [patient]
+      parameters:
+        - in: query
+          name: unique_device_code
           required: true
           schema:
             type: string
-            example: 85:65:78:65:78
+            example: 0987654321
+        - in: query
+          name: prefix
+          description: Match values starting with the one given instead of equal to it
+          required: false
+          schema:
+            type: boolean
+            default: false
+        - in: query
+          name: limit
+          description: Maximum number of results
+          required: false
+          schema:
+            type: integer
+            minimum: 1
+            maximum: 1000
+            default: 100
+      responses:
+        '200':
+          description: Matching patient installations
+          content:
+            application/json:
+              schema:
+                type: array
+                items: PatientInstallationResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_installations_by_device_code(
+            Mobile, unique_device_code, prefix=prefix, limit=limit
+        )
+    )
+
+
+@api_blueprint.route("/dhos/v1/patient_installations", methods=["PATCH"])
+@protected_route(scopes_present(required_scopes="write:gdm_telemetry_all"))
+def bulk_update_patient_installations(update_data: Dict) -> Response:
+    """
+    ---
+    patch:
+      summary: Bulk update patient installations
+      description: >-
+        Update many patient installations at once, either with a list of per-row changes or
+        with one set of changes for every row matching a filter. Rows are updated
+        in batches of 500, each in its own transaction, and all changes are
+        validated before any are written.
+      tags: [patient]
       requestBody:
         required: true
         content:
           application/json:
             schema:
-                x-body-name: meter_data
-                $ref: '#/components/schemas/BloodGlucoseMeterUpdate'
+                x-body-name: update_data
+                $ref: '#/components/schemas/BulkUpdateRequest'
       responses:
         '200':
-          description: New blood glucose meter
+          description: Number of rows updated
           content:
             application/json:
-              schema: BloodGlucoseMeterUpdate
+              schema: BulkUpdateResult
         default:
           description: >-
               Error, e.g. 400 Bad Request, 503 Service Unavailable
@@ -556,48 +785,67 @@ def update_blood_glucose_meter(
             application/json:
               schema: Error
     """
-    return jsonify(
-        controller.update_blood_glucose_meter(
-            meter_id=meter_id, patient_id=patient_id, update_data=meter_data
-        )
-    )
+    return jsonify(controller.bulk_update_records(Mobile, update_data))
 
 
-@api_blueprint.route(
-    "/dhos/v1/patient/<patient_id>/blood_glucose_meter/<meter_id>", methods=["GET"]
-)
-@protected_route(
-    and_(
-        scopes_present(required_scopes="read:gdm_telemetry"),
-        match_keys(patient_id="patient_id"),
-    )
-)
-def get_blood_glucose_meter(patient_id: str, meter_id: str) -> Response:
+@api_blueprint.route("/dhos/v1/clinician_installations", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def search_clinician_installations(
+    network: Optional[str] = None,
+    unique_device_code: Optional[str] = None,
+    prefix: bool = False,
+    limit: int = 100,
+) -> Response:
     """
     ---
     get:
-      summary: Get patient blood glucose meter
-      description: Get a patient blood glucose meter by UUID
-      tags: [blood-glucose-meter]
+      summary: Search clinician installations by network or device
+      description: >-
+        Get the clinician installations whose IP address is within a CIDR range, for
+        example a hospital site's network, ordered by clinician and most recent
+        first. Alternatively get the clinician installations with a unique device
+        code (or with `prefix`, starting with it), most recent first. Exactly one of
+        `network` and `unique_device_code` must be given; `prefix` only applies to
+        device searches.
+      tags: [clinician]
       parameters:
-        - in: path
-          name: meter_id
-          required: true
+        - in: query
+          name: network
+          description: IPv4 or IPv6 network in CIDR notation
+          required: false
           schema:
             type: string
-            example: 85:65:78:65:78
-        - in: path
-          name: patient_id
-          required: true
+            example: 10.20.0.0/16
+        - in: query
+          name: unique_device_code
+          required: false
           schema:
             type: string
-            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+            example: 0987654321
+        - in: query
+          name: prefix
+          description: Match values starting with the one given instead of equal to it
+          required: false
+          schema:
+            type: boolean
+            default: false
+        - in: query
+          name: limit
+          description: Maximum number of results
+          required: false
+          schema:
+            type: integer
+            minimum: 1
+            maximum: 1000
+            default: 100
       responses:
         '200':
-          description: Blood glucose meter
+          description: Matching clinician installations
           content:
             application/json:
-              schema: BloodGlucoseMeterResponse
+              schema:
+                type: array
+                items: ClinicianInstallationResponse
         default:
           description: >-
               Error, e.g. 400 Bad Request, 503 Service Unavailable
@@ -605,6 +853,941 @@ def get_blood_glucose_meter(patient_id: str, meter_id: str) -> Response:
             application/json:
               schema: Error
     """
-    return jsonify(
-        controller.get_blood_glucose_meter(patient_id=patient_id, meter_id=meter_id)
+    if network is not None and unique_device_code is None:
+        return jsonify(
+            controller.get_clinician_installations_in_network(network, limit=limit)
+        )
+    if unique_device_code is not None and network is None:
+        return jsonify(
+            controller.get_installations_by_device_code(
+                Desktop, unique_device_code, prefix=prefix, limit=limit
+            )
+        )
+    raise ValueError("Exactly one of network and unique_device_code is required")
+
+
+@api_blueprint.route("/dhos/v1/clinician_installations", methods=["PATCH"])
+@protected_route(scopes_present(required_scopes="write:gdm_telemetry_all"))
+def bulk_update_clinician_installations(update_data: Dict) -> Response:
+    """
+    ---
+    patch:
+      summary: Bulk update clinician installations
+      description: >-
+        Update many clinician installations at once, either with a list of per-row changes or
+        with one set of changes for every row matching a filter. Rows are updated
+        in batches of 500, each in its own transaction, and all changes are
+        validated before any are written.
+      tags: [clinician]
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+                x-body-name: update_data
+                $ref: '#/components/schemas/BulkUpdateRequest'
+      responses:
+        '200':
+          description: Number of rows updated
+          content:
+            application/json:
+              schema: BulkUpdateResult
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(controller.bulk_update_records(Desktop, update_data))
+
+
+@api_blueprint.route("/dhos/v1/blood_glucose_meters", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def search_blood_glucose_meters(
+    serial_number: str, prefix: bool = False, limit: int = 100
+) -> Response:
+    """
+    ---
+    get:
+      summary: Search blood glucose meters by serial number
+      description: >-
+        Get the blood glucose meter verifications for a meter serial number, or with
+        `prefix`, for serial numbers starting with the one given, most recent first.
+      tags: [blood-glucose-meter]
+      parameters:
+        - in: query
+          name: serial_number
+          required: true
+          schema:
+            type: string
+            example: SN132654
+        - in: query
+          name: prefix
+          description: Match values starting with the one given instead of equal to it
+          required: false
+          schema:
+            type: boolean
+            default: false
+        - in: query
+          name: limit
+          description: Maximum number of results
+          required: false
+          schema:
+            type: integer
+            minimum: 1
+            maximum: 1000
+            default: 100
+      responses:
+        '200':
+          description: Matching blood glucose meter verifications
+          content:
+            application/json:
+              schema:
+                type: array
+                items: BloodGlucoseMeterResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_meters_by_serial_number(
+            serial_number, prefix=prefix, limit=limit
+        )
+    )
+
+
+@api_blueprint.route("/dhos/v1/blood_glucose_meters", methods=["PATCH"])
+@protected_route(scopes_present(required_scopes="write:gdm_telemetry_all"))
+def bulk_update_blood_glucose_meters(update_data: Dict) -> Response:
+    """
+    ---
+    patch:
+      summary: Bulk update blood glucose meters
+      description: >-
+        Update many blood glucose meter verifications at once, either with a list of per-row changes or
+        with one set of changes for every row matching a filter. Rows are updated
+        in batches of 500, each in its own transaction, and all changes are
+        validated before any are written.
+      tags: [blood-glucose-meter]
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+                x-body-name: update_data
+                $ref: '#/components/schemas/BulkUpdateRequest'
+      responses:
+        '200':
+          description: Number of rows updated
+          content:
+            application/json:
+              schema: BulkUpdateResult
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(controller.bulk_update_records(BloodGlucoseMeter, update_data))
+
+
+@api_blueprint.route(
+    "/dhos/v1/patient/<patient_id>/blood_glucose_meter", methods=["POST"]
+)
+@protected_route(
+    and_(
+        scopes_present(required_scopes="write:gdm_telemetry"),
+        match_keys(patient_id="patient_id"),
+    )
+)
+def create_blood_glucose_meter(patient_id: str, meter_data: Dict) -> Response:
+    """
+    ---
+    post:
+      summary: Create patient blood glucose meter
+      description: Create a patient blood glucose meter using the details in the request body
+      tags: [blood-glucose-meter]
+      parameters:
+        - in: path
+          name: patient_id
+          required: true
+          schema:
+            type: string
+            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+                x-body-name: meter_data
+                $ref: '#/components/schemas/BloodGlucoseMeterRequest'
+      responses:
+        '201':
+          description: New blood glucose meter
+          content:
+            application/json:
+              schema: BloodGlucoseMeterResponse
+        '202':
+          description: >-
+            New blood glucose meter queued for writing, when asynchronous ingest is enabled
+          content:
+            application/json:
+              schema: QueuedRecordResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    queued = controller.enqueue_record("blood_glucose_meter", patient_id, meter_data)
+    if queued is not None:
+        return make_response(jsonify(queued), 202)
+    return make_response(
+        jsonify(
+            controller.create_blood_glucose_meter(
+                patient_id=patient_id, meter_data=meter_data
+            )
+        ),
+        201,
+    )
+
+
+@api_blueprint.route(
+    "/dhos/v1/patient/<patient_id>/blood_glucose_meter/<meter_id>",
+    methods=["PATCH"],
+)
+@protected_route(
+    and_(
+        scopes_present(required_scopes="write:gdm_telemetry"),
+        match_keys(patient_id="patient_id"),
+    )
+)
+def update_blood_glucose_meter(
+    patient_id: str, meter_id: str, meter_data: Dict
+) -> Response:
+    """
+    ---
+    patch:
+      summary: Update patient blood glucose meter
+      description: Update a patient blood glucose meter using the details in the request body
+      tags: [blood-glucose-meter]
+      parameters:
+        - in: path
+          name: patient_id
+          required: true
+          schema:
+            type: string
+            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+        - in: path
+          name: meter_id
+          required: true
+          schema:
+            type: string
+            example: 85:65:78:65:78
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+                x-body-name: meter_data
+                $ref: '#/components/schemas/BloodGlucoseMeterUpdate'
+      responses:
+        '200':
+          description: New blood glucose meter
+          content:
+            application/json:
+              schema: BloodGlucoseMeterUpdate
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.update_blood_glucose_meter(
+            meter_id=meter_id, patient_id=patient_id, update_data=meter_data
+        )
+    )
+
+
+@api_blueprint.route(
+    "/dhos/v1/patient/<patient_id>/blood_glucose_meter", methods=["GET"]
+)
+@protected_route(
+    and_(
+        scopes_present(required_scopes="read:gdm_telemetry"),
+        match_keys(patient_id="patient_id"),
+    )
+)
+def get_latest_blood_glucose_meters(patient_id: str) -> Response:
+    """
+    ---
+    get:
+      summary: Get latest patient blood glucose meters
+      description: >-
+        Get the latest verification of each of a patient's blood glucose meters,
+        one per serial number
+      tags: [blood-glucose-meter]
+      parameters:
+        - in: path
+          name: patient_id
+          required: true
+          schema:
+            type: string
+            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+      responses:
+        '200':
+          description: Latest blood glucose meter verifications
+          content:
+            application/json:
+              schema:
+                type: array
+                items: BloodGlucoseMeterResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(controller.get_latest_blood_glucose_meters(patient_id=patient_id))
+
+
+@api_blueprint.route(
+    "/dhos/v1/patient/<patient_id>/installation/<installation_id>/blood_glucose_meter",
+    methods=["GET"],
+)
+@protected_route(
+    and_(
+        scopes_present(required_scopes="read:gdm_telemetry"),
+        match_keys(patient_id="patient_id"),
+    )
+)
+def get_installation_blood_glucose_meters(
+    patient_id: str, installation_id: str
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get blood glucose meters paired with a patient installation
+      description: >-
+        Get the latest verification of each blood glucose meter paired with a
+        patient's mobile installation, one per serial number
+      tags: [blood-glucose-meter]
+      parameters:
+        - in: path
+          name: patient_id
+          required: true
+          schema:
+            type: string
+            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+        - in: path
+          name: installation_id
+          required: true
+          schema:
+            type: string
+            example: a25497b1-c9aa-42bd-bdda-896821073506
+      responses:
+        '200':
+          description: Latest blood glucose meter verifications
+          content:
+            application/json:
+              schema:
+                type: array
+                items: BloodGlucoseMeterResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_latest_blood_glucose_meters(
+            patient_id=patient_id, mobile_id=installation_id
+        )
+    )
+
+
+@api_blueprint.route(
+    "/dhos/v1/patient/<patient_id>/blood_glucose_meter_series", methods=["GET"]
+)
+@protected_route(
+    and_(
+        scopes_present(required_scopes="read:gdm_telemetry"),
+        match_keys(patient_id="patient_id"),
+    )
+)
+def get_blood_glucose_meter_series(
+    patient_id: str,
+    start: str,
+    end: str,
+    interval: str = "day",
+    serial_number: Optional[str] = None,
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get patient blood glucose meter time series
+      description: >-
+        Get a patient's blood glucose meter verifications in a time range, summarised
+        per meter and per UTC hour, day or week. Periods without verifications are
+        omitted. A range may cover at most 2000 periods.
+      tags: [blood-glucose-meter]
+      parameters:
+        - in: path
+          name: patient_id
+          required: true
+          schema:
+            type: string
+            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+        - in: query
+          name: start
+          description: Inclusive start of the range
+          required: true
+          schema:
+            type: string
+            format: date-time
+            example: '2021-01-01T00:00:00.000Z'
+        - in: query
+          name: end
+          description: Exclusive end of the range
+          required: true
+          schema:
+            type: string
+            format: date-time
+            example: '2021-02-01T00:00:00.000Z'
+        - in: query
+          name: interval
+          required: false
+          schema:
+            type: string
+            enum: [hour, day, week]
+            default: day
+        - in: query
+          name: serial_number
+          description: Only include verifications of this meter
+          required: false
+          schema:
+            type: string
+            example: SN132654
+      responses:
+        '200':
+          description: Blood glucose meter verification summaries
+          content:
+            application/json:
+              schema:
+                type: array
+                items: BloodGlucoseMeterSeriesBucket
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_blood_glucose_meter_series(
+            patient_id=patient_id,
+            start=timestamp.parse_iso8601_to_datetime_typesafe(start),
+            end=timestamp.parse_iso8601_to_datetime_typesafe(end),
+            interval=interval,
+            serial_number=serial_number,
+        )
+    )
+
+
+@api_blueprint.route(
+    "/dhos/v1/patient/<patient_id>/blood_glucose_meter/<meter_id>", methods=["GET"]
+)
+@protected_route(
+    and_(
+        scopes_present(required_scopes="read:gdm_telemetry"),
+        match_keys(patient_id="patient_id"),
+    )
+)
+def get_blood_glucose_meter(
+    patient_id: str, meter_id: str, created: Optional[str] = None
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get patient blood glucose meter
+      description: Get a patient blood glucose meter by UUID
+      tags: [blood-glucose-meter]
+      parameters:
+        - in: path
+          name: meter_id
+          required: true
+          schema:
+            type: string
+            example: 85:65:78:65:78
+        - in: path
+          name: patient_id
+          required: true
+          schema:
+            type: string
+            example: 5579f479-c28d-4657-b9e1-cdd36ca8ecad
+        - in: query
+          name: created
+          description: >-
+            The meter's `created` timestamp, if known, so that only the month it was
+            created in is searched first
+          required: false
+          schema:
+            type: string
+            format: date-time
+            example: '2021-01-01T00:00:00.000Z'
+      responses:
+        '200':
+          description: Blood glucose meter
+          content:
+            application/json:
+              schema: BloodGlucoseMeterResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_blood_glucose_meter(
+            patient_id=patient_id,
+            meter_id=meter_id,
+            created=timestamp.parse_iso8601_to_datetime_typesafe(created)
+            if created
+            else None,
+        )
+    )
+
+
+@api_blueprint.route("/dhos/v1/analytics/patient_installation_counts", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def get_patient_installation_counts(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    group_by: Optional[List[str]] = None,
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get patient installation counts
+      description: >-
+        Get the number of patient installations created in a date range, grouped by
+        product, version and phone details. Counts are read from daily rollups.
+      tags: [analytics]
+      parameters:
+        - in: query
+          name: start_date
+          required: false
+          schema:
+            type: string
+            format: date
+            example: '2021-01-01'
+        - in: query
+          name: end_date
+          required: false
+          schema:
+            type: string
+            format: date
+            example: '2021-12-31'
+        - in: query
+          name: group_by
+          description: >-
+            Comma-separated dimensions to group by. Defaults to all of app_product,
+            app_version, phone_os, phone_os_version and manufacturer. Include "day"
+            for a daily breakdown.
+          required: false
+          style: form
+          explode: false
+          schema:
+            type: array
+            items:
+              type: string
+            example: [app_product, app_version]
+      responses:
+        '200':
+          description: Patient installation counts
+          content:
+            application/json:
+              schema:
+                type: array
+                items: PatientInstallationCount
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_installation_counts(
+            Mobile,
+            group_by=group_by or MobileDailyRollup.dimensions,
+            start_date=date.fromisoformat(start_date) if start_date else None,
+            end_date=date.fromisoformat(end_date) if end_date else None,
+        )
+    )
+
+
+@api_blueprint.route(
+    "/dhos/v1/analytics/clinician_installation_counts", methods=["GET"]
+)
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def get_clinician_installation_counts(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    group_by: Optional[List[str]] = None,
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get clinician installation counts
+      description: >-
+        Get the number of clinician installations created in a date range, grouped by
+        product, version and desktop details. Counts are read from daily rollups.
+      tags: [analytics]
+      parameters:
+        - in: query
+          name: start_date
+          required: false
+          schema:
+            type: string
+            format: date
+            example: '2021-01-01'
+        - in: query
+          name: end_date
+          required: false
+          schema:
+            type: string
+            format: date
+            example: '2021-12-31'
+        - in: query
+          name: group_by
+          description: >-
+            Comma-separated dimensions to group by. Defaults to all of app_product,
+            app_version, desktop_os and desktop_os_version. Include "day" for a daily
+            breakdown.
+          required: false
+          style: form
+          explode: false
+          schema:
+            type: array
+            items:
+              type: string
+            example: [app_product, app_version]
+      responses:
+        '200':
+          description: Clinician installation counts
+          content:
+            application/json:
+              schema:
+                type: array
+                items: ClinicianInstallationCount
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_installation_counts(
+            Desktop,
+            group_by=group_by or DesktopDailyRollup.dimensions,
+            start_date=date.fromisoformat(start_date) if start_date else None,
+            end_date=date.fromisoformat(end_date) if end_date else None,
+        )
+    )
+
+
+@api_blueprint.route("/dhos/v1/analytics/patient_distinct_devices", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def get_patient_distinct_devices(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    group_by: Optional[List[str]] = None,
+    interval: Optional[str] = None,
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get approximate distinct patient devices
+      description: >-
+        Get the approximate number of distinct patient devices seen in a date range,
+        grouped by product and version and optionally per day or month. Estimates are
+        merged from daily HyperLogLog sketches and include their relative standard error.
+      tags: [analytics]
+      parameters:
+        - in: query
+          name: start_date
+          required: false
+          schema:
+            type: string
+            format: date
+            example: '2021-01-01'
+        - in: query
+          name: end_date
+          required: false
+          schema:
+            type: string
+            format: date
+            example: '2021-12-31'
+        - in: query
+          name: group_by
+          description: >-
+            Comma-separated dimensions to group by. Defaults to app_product and
+            app_version.
+          required: false
+          style: form
+          explode: false
+          schema:
+            type: array
+            items:
+              type: string
+              enum: [app_product, app_version]
+            example: [app_product]
+        - in: query
+          name: interval
+          description: Break the counts down per day or per calendar month
+          required: false
+          schema:
+            type: string
+            enum: [day, month]
+            example: month
+      responses:
+        '200':
+          description: Approximate distinct patient device counts
+          content:
+            application/json:
+              schema:
+                type: array
+                items: DistinctDeviceCount
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_distinct_devices(
+            Mobile,
+            group_by=group_by or device_sketch.DIMENSIONS,
+            interval=interval,
+            start_date=date.fromisoformat(start_date) if start_date else None,
+            end_date=date.fromisoformat(end_date) if end_date else None,
+        )
+    )
+
+
+@api_blueprint.route("/dhos/v1/analytics/clinician_distinct_devices", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def get_clinician_distinct_devices(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    group_by: Optional[List[str]] = None,
+    interval: Optional[str] = None,
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get approximate distinct clinician devices
+      description: >-
+        Get the approximate number of distinct clinician devices seen in a date range,
+        grouped by product and version and optionally per day or month. Estimates are
+        merged from daily HyperLogLog sketches and include their relative standard error.
+      tags: [analytics]
+      parameters:
+        - in: query
+          name: start_date
+          required: false
+          schema:
+            type: string
+            format: date
+            example: '2021-01-01'
+        - in: query
+          name: end_date
+          required: false
+          schema:
+            type: string
+            format: date
+            example: '2021-12-31'
+        - in: query
+          name: group_by
+          description: >-
+            Comma-separated dimensions to group by. Defaults to app_product and
+            app_version.
+          required: false
+          style: form
+          explode: false
+          schema:
+            type: array
+            items:
+              type: string
+              enum: [app_product, app_version]
+            example: [app_product]
+        - in: query
+          name: interval
+          description: Break the counts down per day or per calendar month
+          required: false
+          schema:
+            type: string
+            enum: [day, month]
+            example: month
+      responses:
+        '200':
+          description: Approximate distinct clinician device counts
+          content:
+            application/json:
+              schema:
+                type: array
+                items: DistinctDeviceCount
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_distinct_devices(
+            Desktop,
+            group_by=group_by or device_sketch.DIMENSIONS,
+            interval=interval,
+            start_date=date.fromisoformat(start_date) if start_date else None,
+            end_date=date.fromisoformat(end_date) if end_date else None,
+        )
+    )
+
+
+@api_blueprint.route(
+    "/dhos/v1/analytics/blood_glucose_meter_statistics", methods=["GET"]
+)
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def get_blood_glucose_meter_statistics(
+    group_by: str = "app_version", group_values: Optional[List[str]] = None
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get blood glucose meter accuracy statistics
+      description: >-
+        Get blood glucose meter verification accuracy rates, value distributions and
+        percentiles per app version or per meter serial number. Statistics are
+        maintained incrementally as verifications are created and updated.
+      tags: [analytics]
+      parameters:
+        - in: query
+          name: group_by
+          required: false
+          schema:
+            type: string
+            enum: [app_version, serial_number]
+            default: app_version
+            example: app_version
+        - in: query
+          name: group_values
+          description: Comma-separated app versions or serial numbers to include
+          required: false
+          style: form
+          explode: false
+          schema:
+            type: array
+            items:
+              type: string
+            example: [19.1.54]
+      responses:
+        '200':
+          description: Blood glucose meter statistics
+          content:
+            application/json:
+              schema:
+                type: array
+                items: BloodGlucoseMeterStatistics
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_blood_glucose_meter_statistics(
+            group_by=group_by, group_values=group_values
+        )
+    )
+
+
+@api_blueprint.route("/dhos/v1/analytics/patients_below_version", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_telemetry_all"))
+def get_patients_below_version(
+    app_product: str,
+    min_version: str,
+    page_size: int = 1000,
+    after: Optional[str] = None,
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get patients below an app version
+      description: >-
+        Get a page of the patients whose latest mobile installation of a product has
+        an app version below a minimum, for example to target a forced upgrade.
+        Numeric version components are compared numerically. Pages are in patient
+        UUID order; pass `next_after` from a page as `after` to get the next one.
+      tags: [analytics]
+      parameters:
+        - in: query
+          name: app_product
+          required: true
+          schema:
+            type: string
+            example: GDM
+        - in: query
+          name: min_version
+          required: true
+          schema:
+            type: string
+            example: 1.2.0
+        - in: query
+          name: page_size
+          required: false
+          schema:
+            type: integer
+            minimum: 1
+            maximum: 10000
+            default: 1000
+        - in: query
+          name: after
+          description: Return patients after this patient UUID
+          required: false
+          schema:
+            type: string
+            example: 2c4f1d0b-3c5a-4b8e-9a4f-8d6e2f1a7b3c
+      responses:
+        '200':
+          description: Page of patient UUIDs
+          content:
+            application/json:
+              schema: PatientCohortPage
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(
+        controller.get_patients_below_version(
+            app_product, min_version, page_size=page_size, after=after
+        )
     )
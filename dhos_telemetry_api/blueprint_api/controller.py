@@ -1,10 +1,35 @@
-from typing import Any, Collection, Dict, Type, Union
+from datetime import date, datetime
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    Union,
+)
 
 from flask_batteries_included.helpers import generate_uuid
 from flask_batteries_included.helpers.error_handler import EntityNotFoundException
 from flask_batteries_included.sqldb import db
 from she_logging import logger
 
+from dhos_telemetry_api.helpers import (
+    bulk_update,
+    cohort,
+    device_sketch,
+    erasure,
+    export,
+    ingest,
+    lookup,
+    meter_series,
+    meter_statistics,
+    network,
+    partitions,
+    rollup,
+)
 from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
 from dhos_telemetry_api.models.desktop import Desktop
 from dhos_telemetry_api.models.mobile import Mobile
@@ -47,18 +72,23 @@ def update_installation(
 ) -> Dict:
 
     installation = model.query.filter_by(**kwargs).first_or_404()
+    previous_dimensions = rollup.dimensions_of(installation)
 
     for key in update_data:
         setattr(installation, key, update_data[key])
 
+    rollup.move_installation(installation, previous_dimensions)
+    if any(
+        getattr(installation, dimension) != previous_dimensions[dimension]
+        for dimension in device_sketch.DIMENSIONS
+    ):
+        device_sketch.record_device(installation)
     db.session.commit()
 
     return installation.to_dict()
 
 
-def create_mobile_installation(patient_id: str, installation_data: Dict) -> Dict:
-    logger.debug("Creating mobile installation for patient %s", patient_id)
-
+def _new_mobile_installation(patient_id: str, installation_data: Dict) -> Mobile:
     unique_device_code = installation_data.pop("unique_device_code")
     date_first_launched = installation_data.pop("date_first_launched")
     app_product = installation_data.pop("app_product")
@@ -70,7 +100,7 @@ def create_mobile_installation(patient_id: str, installation_data: Dict) -> Dict
     display_name = installation_data.pop("display_name")
 
     # Create installation
-    mobile = Mobile(
+    return Mobile(
         uuid=generate_uuid(),
         patient_id=patient_id,
         unique_device_code=unique_device_code,
@@ -84,16 +114,65 @@ def create_mobile_installation(patient_id: str, installation_data: Dict) -> Dict
         display_name=display_name,
     )
 
+
+def _add_mobile_installation(patient_id: str, installation_data: Dict) -> Mobile:
+    mobile = _new_mobile_installation(patient_id, installation_data)
     db.session.add(mobile)
     db.session.flush()
+    rollup.record_installation(mobile)
+    device_sketch.record_device(mobile)
+
+    return mobile
+
+
+def export_patient_data(patient_id: str) -> Iterator[str]:
+    logger.debug("Exporting telemetry for patient %s", patient_id)
+    return export.export_patient(patient_id)
+
+
+def export_clinician_data(clinician_id: str) -> Iterator[str]:
+    logger.debug("Exporting telemetry for clinician %s", clinician_id)
+    return export.export_clinician(clinician_id)
+
+
+def erase_patient_data(patient_id: str) -> Dict:
+    logger.debug("Erasing telemetry for patient %s", patient_id)
+    return erasure.erase_patient(patient_id)
+
+
+def erase_clinician_data(clinician_id: str) -> Dict:
+    logger.debug("Erasing telemetry for clinician %s", clinician_id)
+    return erasure.erase_clinician(clinician_id)
+
+
+def bulk_update_records(
+    model: Union[Type[Desktop], Type[Mobile], Type[BloodGlucoseMeter]],
+    update_data: Dict,
+) -> Dict:
+    updates = update_data.get("updates")
+    filters = update_data.get("filter")
+    if updates is not None and filters is None:
+        logger.debug("Bulk updating %d %s rows by UUID", len(updates), model.__name__)
+        updated = bulk_update.update_by_uuid(model, updates)
+    elif filters is not None and updates is None:
+        logger.debug("Bulk updating %s rows matching %s", model.__name__, filters)
+        updated = bulk_update.update_by_filter(
+            model, filters, update_data.get("changes") or {}
+        )
+    else:
+        raise ValueError("Exactly one of updates and filter is required")
+    return {"updated": updated}
+
+
+def create_mobile_installation(patient_id: str, installation_data: Dict) -> Dict:
+    logger.debug("Creating mobile installation for patient %s", patient_id)
+    mobile = _add_mobile_installation(patient_id, installation_data)
     db.session.commit()
 
     return mobile.to_dict()
 
 
-def create_desktop_installation(clinician_id: str, installation_data: Dict) -> Dict:
-    logger.debug("Creating desktop installation for clinician %s", clinician_id)
-
+def _new_desktop_installation(clinician_id: str, installation_data: Dict) -> Desktop:
     unique_device_code = installation_data.pop("unique_device_code")
     date_first_used = installation_data.pop("date_first_used")
     app_product = installation_data.pop("app_product")
@@ -103,7 +182,7 @@ def create_desktop_installation(clinician_id: str, installation_data: Dict) -> D
     ip_address = installation_data.pop("ip_address")
 
     # Create installation
-    desktop = Desktop(
+    return Desktop(
         uuid=generate_uuid(),
         clinician_id=clinician_id,
         unique_device_code=unique_device_code,
@@ -115,17 +194,70 @@ def create_desktop_installation(clinician_id: str, installation_data: Dict) -> D
         ip_address=ip_address,
     )
 
+
+def create_desktop_installation(clinician_id: str, installation_data: Dict) -> Dict:
+    logger.debug("Creating desktop installation for clinician %s", clinician_id)
+    desktop = _new_desktop_installation(clinician_id, installation_data)
+
     db.session.add(desktop)
     db.session.flush()
+    rollup.record_installation(desktop)
+    device_sketch.record_device(desktop)
     db.session.commit()
 
     return desktop.to_dict()
 
 
-def create_blood_glucose_meter(patient_id: str, meter_data: Dict) -> Dict:
-    logger.debug("Creating blood glucose meter for patient %s", patient_id)
-    meter = BloodGlucoseMeter(
+def get_clinician_installations_in_network(cidr: str, limit: int) -> List[Dict]:
+    logger.debug("Getting clinician installations in network %s", cidr)
+    return network.installations_in_network(cidr, limit=limit)
+
+
+def get_installations_by_device_code(
+    model: Union[Type[Desktop], Type[Mobile]],
+    unique_device_code: str,
+    prefix: bool = False,
+    limit: int = 100,
+) -> List[Dict]:
+    logger.debug("Searching %s installations by device code", model.__name__)
+    return lookup.installations_by_device_code(
+        model, unique_device_code, prefix=prefix, limit=limit
+    )
+
+
+def get_meters_by_serial_number(
+    serial_number: str, prefix: bool = False, limit: int = 100
+) -> List[Dict]:
+    logger.debug("Searching blood glucose meters by serial number")
+    return lookup.meters_by_serial_number(serial_number, prefix=prefix, limit=limit)
+
+
+def get_latest_blood_glucose_meters(
+    patient_id: str, mobile_id: Optional[str] = None
+) -> List[Dict]:
+    logger.debug("Getting latest blood glucose meters for patient %s", patient_id)
+    return lookup.latest_meters(patient_id, mobile_id=mobile_id)
+
+
+def get_blood_glucose_meter_series(
+    patient_id: str,
+    start: datetime,
+    end: datetime,
+    interval: str,
+    serial_number: Optional[str] = None,
+) -> List[Dict]:
+    logger.debug(
+        "Getting %s blood glucose meter series for patient %s", interval, patient_id
+    )
+    return meter_series.meter_series(
+        patient_id, start, end, interval=interval, serial_number=serial_number
+    )
+
+
+def _new_blood_glucose_meter(patient_id: str, meter_data: Dict) -> BloodGlucoseMeter:
+    return BloodGlucoseMeter(
         uuid=generate_uuid(),
+        created=datetime.utcnow(),
         patient_id=patient_id,
         mobile_id=meter_data.get("mobile_id"),
         serial_number=meter_data.get("serial_number"),
@@ -136,12 +268,63 @@ def create_blood_glucose_meter(patient_id: str, meter_data: Dict) -> Dict:
         blood_glucose_value=meter_data.get("blood_glucose_value"),
     )
 
+
+def create_blood_glucose_meter(patient_id: str, meter_data: Dict) -> Dict:
+    logger.debug("Creating blood glucose meter for patient %s", patient_id)
+    meter = _new_blood_glucose_meter(patient_id, meter_data)
+
     db.session.add(meter)
+    meter_statistics.record_verification(meter)
     db.session.commit()
 
     return meter.to_dict()
 
 
+INGEST_BUILDERS: Dict[str, ingest.Builder] = {
+    "mobile": _new_mobile_installation,
+    "desktop": _new_desktop_installation,
+    "blood_glucose_meter": _new_blood_glucose_meter,
+}
+
+
+def enqueue_record(kind: str, owner_id: str, data: Dict) -> Optional[Dict]:
+    """
+    Queues a new record for a background write when ASYNC_INGEST is enabled,
+    returning its UUID. Returns None when the record should be created
+    synchronously: asynchronous ingest is disabled, or the queue is full or draining.
+    """
+    queue = ingest.ingest_queue()
+    if queue is None:
+        return None
+    uuid = queue.enqueue(kind, owner_id, data)
+    if uuid is None:
+        logger.debug("Ingest queue unavailable, creating %s synchronously", kind)
+        return None
+    logger.debug("Queued %s %s for %s", kind, uuid, owner_id)
+    return {"uuid": uuid}
+
+
+def register_mobile_device(patient_id: str, registration_data: Dict) -> Dict:
+    logger.debug("Registering mobile device for patient %s", patient_id)
+    mobile = _add_mobile_installation(patient_id, registration_data["installation"])
+
+    # Primary keys are assigned up front, so the unit of work inserts all of the
+    # meters with a single executemany, which psycopg2 sends as one multi-row INSERT.
+    meters = [
+        _new_blood_glucose_meter(patient_id, {**meter_data, "mobile_id": mobile.uuid})
+        for meter_data in registration_data.get("blood_glucose_meters", [])
+    ]
+    db.session.add_all(meters)
+    for meter in meters:
+        meter_statistics.record_verification(meter)
+    db.session.commit()
+
+    return {
+        "installation": mobile.to_dict(),
+        "blood_glucose_meters": [meter.to_dict() for meter in meters],
+    }
+
+
 def update_blood_glucose_meter(
     meter_id: str, patient_id: str, update_data: Dict
 ) -> Dict:
@@ -149,17 +332,74 @@ def update_blood_glucose_meter(
     meter = BloodGlucoseMeter.query.filter_by(
         uuid=meter_id, patient_id=patient_id
     ).first_or_404()
+    previous_verification = meter_statistics.snapshot(meter)
     for key in update_data:
         setattr(meter, key, update_data[key])
 
+    meter_statistics.update_verification(meter, previous_verification)
     db.session.commit()
 
     return meter.to_dict()
 
 
-def get_blood_glucose_meter(meter_id: str, patient_id: str) -> Dict:
+def get_blood_glucose_meter(
+    meter_id: str, patient_id: str, created: Optional[datetime] = None
+) -> Dict:
     logger.debug("Getting blood glucose meter for patient %s", patient_id)
-    meter = BloodGlucoseMeter.query.filter_by(
-        uuid=meter_id, patient_id=patient_id
-    ).first_or_404()
+    query = BloodGlucoseMeter.query.filter_by(uuid=meter_id, patient_id=patient_id)
+    meter: Optional[BloodGlucoseMeter] = None
+    if created is not None:
+        # Bounding the partition key lets Postgres search only the month's partition.
+        # A wrong hint falls back to searching them all.
+        start, end = partitions.created_bounds(created)
+        meter = query.filter(
+            BloodGlucoseMeter.created >= start, BloodGlucoseMeter.created < end
+        ).first()
+    if meter is None:
+        meter = query.first_or_404()
     return meter.to_dict()
+
+
+def get_installation_counts(
+    model: Union[Type[Desktop], Type[Mobile]],
+    group_by: Sequence[str],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict]:
+    logger.debug("Getting %s installation counts by %s", model.__name__, group_by)
+    return rollup.installation_counts(
+        model, group_by=group_by, start_date=start_date, end_date=end_date
+    )
+
+
+def get_distinct_devices(
+    model: Union[Type[Desktop], Type[Mobile]],
+    group_by: Sequence[str],
+    interval: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict]:
+    logger.debug("Estimating distinct %s devices by %s", model.__name__, group_by)
+    return device_sketch.distinct_devices(
+        model,
+        group_by=group_by,
+        interval=interval,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+def get_blood_glucose_meter_statistics(
+    group_by: str, group_values: Optional[Sequence[str]] = None
+) -> List[Dict]:
+    logger.debug("Getting blood glucose meter statistics by %s", group_by)
+    return meter_statistics.meter_statistics(group_by, group_values=group_values)
+
+
+def get_patients_below_version(
+    app_product: str, min_version: str, page_size: int, after: Optional[str] = None
+) -> Dict:
+    logger.debug("Getting %s patients below version %s", app_product, min_version)
+    return cohort.patients_below_version(
+        app_product, min_version, page_size=page_size, after=after
+    )
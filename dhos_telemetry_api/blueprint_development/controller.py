@@ -5,8 +5,12 @@ def reset_database() -> None:
 
     session = db.session
 
-    session.execute("TRUNCATE TABLE mobile cascade")
-    session.execute("TRUNCATE TABLE desktop cascade")
+    # Installation dimensions are kept, as interned ids are cached by the app.
+    session.execute(
+        "TRUNCATE TABLE mobile, desktop, blood_glucose_meter, mobile_daily_rollup,"
+        " desktop_daily_rollup, device_sketch, device_month_sketch,"
+        " blood_glucose_meter_statistics, blood_glucose_meter_histogram cascade"
+    )
     session.commit()
 
     session.close()
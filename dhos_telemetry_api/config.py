@@ -0,0 +1,88 @@
+from environs import Env
+from flask import Flask
+
+
+class Configuration:
+    env = Env()
+
+    # HyperLogLog precision for distinct device sketches: 2**precision registers,
+    # with a relative standard error of 1.04 / sqrt(2**precision).
+    DEVICE_SKETCH_PRECISION: int = env.int("DEVICE_SKETCH_PRECISION", 12)
+    # Rows each sketch is spread over, merged when read, so that concurrent writers
+    # rarely wait for the same row lock.
+    DEVICE_SKETCH_SHARDS: int = env.int("DEVICE_SKETCH_SHARDS", 16)
+    # Rows the statistics of each meter group are spread over, summed when read.
+    METER_STATISTICS_SHARDS: int = env.int("METER_STATISTICS_SHARDS", 16)
+
+    # Store low-cardinality installation strings as ids into installation_dimension
+    # instead of inline in every row.
+    INTERN_INSTALLATION_DIMENSIONS: bool = env.bool(
+        "INTERN_INSTALLATION_DIMENSIONS", False
+    )
+
+    # Acknowledge new records with 202 and write them in batches from a background
+    # thread, after ASYNC_INGEST_BATCH_SIZE records or ASYNC_INGEST_FLUSH_MILLISECONDS.
+    ASYNC_INGEST: bool = env.bool("ASYNC_INGEST", False)
+    ASYNC_INGEST_BATCH_SIZE: int = env.int("ASYNC_INGEST_BATCH_SIZE", 500)
+    ASYNC_INGEST_FLUSH_MILLISECONDS: int = env.int(
+        "ASYNC_INGEST_FLUSH_MILLISECONDS", 200
+    )
+    # Records beyond this are written synchronously, pushing back on clients.
+    ASYNC_INGEST_MAX_QUEUE: int = env.int("ASYNC_INGEST_MAX_QUEUE", 10000)
+    # Journal queued records here before acknowledging them (empty: memory only).
+    ASYNC_INGEST_JOURNAL_DIR: str = env.str("ASYNC_INGEST_JOURNAL_DIR", "")
+    ASYNC_INGEST_FSYNC: bool = env.bool("ASYNC_INGEST_FSYNC", True)
+    ASYNC_INGEST_DRAIN_SECONDS: float = env.float("ASYNC_INGEST_DRAIN_SECONDS", 30.0)
+    # Failed batches are retried this many times, then written record by record, and
+    # records that still fail go to the dead-letter journal. Batches that fail because
+    # the database is unavailable are retried until it's back.
+    ASYNC_INGEST_MAX_RETRIES: int = env.int("ASYNC_INGEST_MAX_RETRIES", 5)
+    # Retries back off exponentially from the flush interval up to this.
+    ASYNC_INGEST_MAX_BACKOFF_SECONDS: float = env.float(
+        "ASYNC_INGEST_MAX_BACKOFF_SECONDS", 30.0
+    )
+
+    # Append the shape of each API request, without identifiers or values, to this
+    # JSONL file for replay-requests, suffixed with each process's id (empty: off).
+    REQUEST_CAPTURE_FILE: str = env.str("REQUEST_CAPTURE_FILE", "")
+    # Secret keying the capture's pseudonyms, shared by all processes so that each
+    # subject has one pseudonym in all their files (empty: a random key per process).
+    REQUEST_CAPTURE_KEY: str = env.str("REQUEST_CAPTURE_KEY", "")
+
+    # Cap the API requests in flight per process (0: off). Others wait up to
+    # ADMISSION_QUEUE_MILLISECONDS, ADMISSION_MAX_QUEUE at most, then get a 503.
+    ADMISSION_MAX_IN_FLIGHT: int = env.int("ADMISSION_MAX_IN_FLIGHT", 0)
+    ADMISSION_QUEUE_MILLISECONDS: int = env.int("ADMISSION_QUEUE_MILLISECONDS", 500)
+    ADMISSION_MAX_QUEUE: int = env.int("ADMISSION_MAX_QUEUE", 50)
+    ADMISSION_RETRY_AFTER_SECONDS: int = env.int("ADMISSION_RETRY_AFTER_SECONDS", 1)
+
+
+def init_config(app: Flask) -> None:
+    app.config.from_object(Configuration)
+
+    precision: int = app.config["DEVICE_SKETCH_PRECISION"]
+    if not 4 <= precision <= 16:
+        raise EnvironmentError("DEVICE_SKETCH_PRECISION must be between 4 and 16")
+    if app.config["DEVICE_SKETCH_SHARDS"] < 1:
+        raise EnvironmentError("DEVICE_SKETCH_SHARDS must be at least 1")
+    if app.config["METER_STATISTICS_SHARDS"] < 1:
+        raise EnvironmentError("METER_STATISTICS_SHARDS must be at least 1")
+
+    if app.config["ASYNC_INGEST_BATCH_SIZE"] < 1:
+        raise EnvironmentError("ASYNC_INGEST_BATCH_SIZE must be at least 1")
+    if app.config["ASYNC_INGEST_FLUSH_MILLISECONDS"] < 1:
+        raise EnvironmentError("ASYNC_INGEST_FLUSH_MILLISECONDS must be at least 1")
+    if app.config["ASYNC_INGEST_MAX_RETRIES"] < 0:
+        raise EnvironmentError("ASYNC_INGEST_MAX_RETRIES must not be negative")
+    if app.config["ASYNC_INGEST_MAX_BACKOFF_SECONDS"] <= 0:
+        raise EnvironmentError("ASYNC_INGEST_MAX_BACKOFF_SECONDS must be positive")
+
+    if 0 < len(app.config["REQUEST_CAPTURE_KEY"]) < 32:
+        raise EnvironmentError("REQUEST_CAPTURE_KEY must be at least 32 characters")
+
+    if app.config["ADMISSION_MAX_IN_FLIGHT"] < 0:
+        raise EnvironmentError("ADMISSION_MAX_IN_FLIGHT must not be negative")
+    if app.config["ADMISSION_QUEUE_MILLISECONDS"] < 0:
+        raise EnvironmentError("ADMISSION_QUEUE_MILLISECONDS must not be negative")
+    if app.config["ADMISSION_MAX_QUEUE"] < 0:
+        raise EnvironmentError("ADMISSION_MAX_QUEUE must not be negative")
@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import Flask, Response, current_app, g, jsonify, make_response, request
+from she_logging import logger
+
+# Seconds between log lines reporting queued and shed requests.
+REPORT_INTERVAL = 10.0
+
+
+class AdmissionControl:
+    """
+    Caps the number of API requests in flight in a process, so that requests
+    wait here, within a deadline, instead of in the database connection pool,
+    with all threads blocked. A request that can't be admitted within
+    `queue_timeout` seconds, or arrives when `max_queue` requests are already
+    waiting, is shed.
+    """
+
+    def __init__(
+        self, max_in_flight: int, queue_timeout: float, max_queue: int
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._totals = {"admitted": 0, "queued": 0, "shed": 0}
+        self._reported = dict(self._totals)
+        self._last_report = time.monotonic()
+
+    def acquire(self) -> bool:
+        """Waits for a slot, returning False if the request should be shed."""
+        with self._condition:
+            try:
+                if self._in_flight < self.max_in_flight and not self._waiting:
+                    self._admit()
+                    return True
+                if self._waiting >= self.max_queue:
+                    self._totals["shed"] += 1
+                    return False
+
+                self._waiting += 1
+                self._totals["queued"] += 1
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while self._in_flight >= self.max_in_flight:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._totals["shed"] += 1
+                            return False
+                        self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                self._admit()
+                return True
+            finally:
+                self._report()
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def _admit(self) -> None:
+        self._in_flight += 1
+        self._totals["admitted"] += 1
+
+    def _report(self) -> None:
+        now = time.monotonic()
+        if now - self._last_report < REPORT_INTERVAL:
+            return
+        queued = self._totals["queued"] - self._reported["queued"]
+        shed = self._totals["shed"] - self._reported["shed"]
+        if queued or shed:
+            logger.warning(
+                "Admission control queued %d and shed %d requests in %.0fs",
+                queued,
+                shed,
+                now - self._last_report,
+                extra=self.statistics(),
+            )
+        self._reported = dict(self._totals)
+        self._last_report = now
+
+    def statistics(self) -> Dict[str, int]:
+        """Requests in flight and waiting now, and admitted, queued and shed in total."""
+        return {"in_flight": self._in_flight, "waiting": self._waiting, **self._totals}
+
+
+def _admit_request() -> Optional[Response]:
+    # Only API routes use the database; health checks are always answered.
+    if request.url_rule is None or not request.url_rule.rule.startswith("/dhos/"):
+        return None
+    if current_app.extensions["admission_control"].acquire():
+        g.admitted = True
+        return None
+    response = make_response(jsonify({"message": "Service unavailable"}), 503)
+    response.headers["Retry-After"] = str(
+        current_app.config["ADMISSION_RETRY_AFTER_SECONDS"]
+    )
+    return response
+
+
+def _release_request(error: Optional[BaseException]) -> None:
+    if g.pop("admitted", False):
+        current_app.extensions["admission_control"].release()
+
+
+def init_admission(app: Flask) -> None:
+    max_in_flight: int = app.config["ADMISSION_MAX_IN_FLIGHT"]
+    if not max_in_flight:
+        return
+    app.extensions["admission_control"] = AdmissionControl(
+        max_in_flight,
+        queue_timeout=app.config["ADMISSION_QUEUE_MILLISECONDS"] / 1000,
+        max_queue=app.config["ADMISSION_MAX_QUEUE"],
+    )
+    app.before_request(_admit_request)
+    app.teardown_request(_release_request)
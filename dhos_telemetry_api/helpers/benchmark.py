@@ -0,0 +1,451 @@
+import itertools
+import math
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from flask import current_app, json
+from flask.testing import FlaskClient
+from flask_batteries_included.config import is_not_production_environment
+from flask_batteries_included.helpers import generate_uuid, schema
+from flask_batteries_included.sqldb import db
+from jose import jwt as jose_jwt
+from sqlalchemy import event
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import device_sketch, ingest, synthetic
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+SIZES = (1000, 100000, 1000000)
+ROUNDS = 50
+WARMUP_ROUNDS = 5
+
+# A case regresses when its p95 exceeds the baseline by this fraction and by at
+# least MIN_LATENCY_REGRESSION_MS, so that noise in sub-millisecond cases isn't
+# reported, or when it issues more SQL statements per call than the baseline.
+LATENCY_TOLERANCE = 0.25
+MIN_LATENCY_REGRESSION_MS = 1.0
+
+# Shape of the seeded population: with 20 verifications per patient, each
+# patient adds about 24 rows, counting their share of clinician desktops.
+VERIFICATIONS_PER_PATIENT = 20
+ROWS_PER_PATIENT = 24
+PATIENTS_PER_CLINICIAN = 10
+SEED_DAYS = 365
+
+SCOPES = (
+    "read:gdm_telemetry write:gdm_telemetry"
+    " read:gdm_telemetry_all write:gdm_telemetry_all"
+)
+
+Case = Callable[[], Any]
+# Called with the size being benchmarked, and the case about to run.
+BenchmarkProgress = Callable[[int, str], None]
+
+
+def token(owner_column: str, owner_id: str) -> str:
+    """
+    An internal JWT for one patient or clinician, with all telemetry scopes. Refuses
+    in production, where HS_KEY signs real tokens.
+    """
+    if not is_not_production_environment():
+        raise PermissionError("Benchmark tokens can't be minted in production")
+    issuer = current_app.config["HS_ISSUER"]
+    return jose_jwt.encode(
+        {
+            "metadata": {owner_column: owner_id},
+            "iss": issuer,
+            "aud": issuer,
+            "scope": SCOPES,
+            "exp": 9_999_999_999,
+        },
+        key=current_app.config["HS_KEY"],
+        algorithm="HS512",
+    )
+
+
+def row_count() -> int:
+    return sum(model.query.count() for model in ingest.MODELS.values())
+
+
+def seed_to(builders: Dict[str, ingest.Builder], size: int) -> None:
+    """
+    Tops the database up with synthetic data to about `size` rows. Rows already
+    present count towards the size, so a benchmark database can be reused.
+    """
+    missing = size - row_count()
+    if missing <= 0:
+        return
+    patients = math.ceil(missing / ROWS_PER_PATIENT)
+    synthetic.seed(
+        builders,
+        patients=patients,
+        clinicians=math.ceil(patients / PATIENTS_PER_CLINICIAN),
+        start=date.today() - timedelta(days=SEED_DAYS),
+        days=SEED_DAYS,
+        verifications_per_patient=VERIFICATIONS_PER_PATIENT,
+        seed_value=size,
+    )
+    # As the daily compact-device-sketches run would have left a year of data.
+    device_sketch.compact_sketches()
+
+
+def _request(
+    client: FlaskClient,
+    method: str,
+    url: str,
+    token: str,
+    body: Optional[Callable[[], Dict]] = None,
+    query: Optional[Dict] = None,
+) -> Case:
+    def case() -> Any:
+        response = client.open(
+            url,
+            method=method,
+            json=body() if body is not None else None,
+            query_string=query,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        if response.status_code >= 400:
+            raise ValueError(
+                f"{method} {url} returned {response.status_code}:"
+                f" {response.get_data(as_text=True)}"
+            )
+        return response
+
+    return case
+
+
+def request_body(instance: Any) -> Dict:
+    """The fields of a stored record that a client would POST to create it."""
+    model_schema = instance.schema()
+    # As the API would return it, with dates as strings.
+    data = json.loads(json.dumps(instance.to_dict()))
+    return {
+        key: data[key]
+        for key in {**model_schema["required"], **model_schema["optional"]}
+        if data.get(key) is not None
+    }
+
+
+def _cases(client: FlaskClient) -> Dict[str, Case]:
+    """
+    Builds the benchmark cases around a sample patient, with an installation and a
+    meter, and a sample clinician. Cases run in order: serialisation and
+    validation first, then reads, then writes.
+    """
+    meter = BloodGlucoseMeter.query.first()
+    desktop = Desktop.query.first()
+    mobile = meter and Mobile.query.get(meter.mobile_id)
+    if mobile is None or desktop is None:
+        raise ValueError("The database has no meter with an installation, or desktop")
+    # Requests end by removing the session, so only the serialisation cases, which
+    # run first, use the instances.
+    patient_id, meter_id, mobile_id = meter.patient_id, meter.uuid, mobile.uuid
+    clinician_id = desktop.clinician_id
+    date_verified, created = meter.date_verified, meter.created
+    bodies = {
+        model: request_body(instance)
+        for model, instance in [
+            (Mobile, mobile),
+            (Desktop, desktop),
+            (BloodGlucoseMeter, meter),
+        ]
+    }
+    # Updates alternate between two versions, so that each one changes the row.
+    versions = itertools.cycle(synthetic.APP_VERSIONS[-2:])
+
+    def validate(model: Any) -> Case:
+        return lambda: schema.post(json_in=bodies[model], **model.schema())
+
+    def new_installation(model: Any) -> Dict:
+        # A new device each time, so that every create adds to its device sketch
+        # shard rather than depending on whether the shard has seen the device.
+        return {**bodies[model], "unique_device_code": generate_uuid()}
+
+    def update_installation() -> Dict:
+        return controller.update_installation(
+            Mobile,
+            {"app_version": next(versions)},
+            patient_id=patient_id,
+            uuid=mobile_id,
+        )
+
+    patient = token("patient_id", patient_id)
+    clinician = token("clinician_id", clinician_id)
+    patient_url = f"/dhos/v1/patient/{patient_id}"
+    clinician_url = f"/dhos/v1/clinician/{clinician_id}"
+    cases: Dict[str, Case] = {
+        "Mobile.to_dict": mobile.to_dict,
+        "Desktop.to_dict": desktop.to_dict,
+        "BloodGlucoseMeter.to_dict": meter.to_dict,
+        "schema.post[Mobile]": validate(Mobile),
+        "schema.post[Desktop]": validate(Desktop),
+        "schema.post[BloodGlucoseMeter]": validate(BloodGlucoseMeter),
+        "schema.update[Mobile]": lambda: schema.update(
+            json_in={"app_version": synthetic.APP_VERSIONS[-1]}, **Mobile.schema()
+        ),
+        "controller.retrieve_installation_by_id": lambda: (
+            controller.retrieve_installation_by_id(
+                Mobile, patient_id=patient_id, uuid=mobile_id
+            )
+        ),
+        "controller.retrieve_latest_installation[Mobile]": lambda: (
+            controller.retrieve_latest_installation(
+                Mobile, order_by=Mobile.date_first_launched_, patient_id=patient_id
+            )
+        ),
+        "controller.retrieve_latest_installation[Desktop]": lambda: (
+            controller.retrieve_latest_installation(
+                Desktop,
+                order_by=(Desktop.date_first_used_, Desktop.app_version),
+                clinician_id=clinician_id,
+            )
+        ),
+        "controller.get_blood_glucose_meter": lambda: (
+            controller.get_blood_glucose_meter(meter_id, patient_id)
+        ),
+        "controller.get_blood_glucose_meter[created]": lambda: (
+            controller.get_blood_glucose_meter(meter_id, patient_id, created=created)
+        ),
+        "controller.get_latest_blood_glucose_meters": lambda: (
+            controller.get_latest_blood_glucose_meters(patient_id)
+        ),
+        "controller.get_installation_counts": lambda: (
+            controller.get_installation_counts(
+                Mobile, group_by=["app_product", "app_version"]
+            )
+        ),
+        "controller.get_distinct_devices": lambda: (
+            controller.get_distinct_devices(Mobile, group_by=["app_product"])
+        ),
+        "controller.get_distinct_devices[long range]": lambda: (
+            controller.get_distinct_devices(
+                Mobile,
+                group_by=["app_product"],
+                interval="month",
+                start_date=date(2000, 1, 1),
+                end_date=date.today(),
+            )
+        ),
+        "controller.get_blood_glucose_meter_statistics": lambda: (
+            controller.get_blood_glucose_meter_statistics("app_version")
+        ),
+        "controller.get_patients_below_version": lambda: (
+            controller.get_patients_below_version(
+                synthetic.APP_PRODUCT, synthetic.APP_VERSIONS[-1], page_size=100
+            )
+        ),
+        "GET /dhos/v1/patient/<patient_id>/installation/<installation_id>": _request(
+            client, "GET", f"{patient_url}/installation/{mobile_id}", patient
+        ),
+        "GET /dhos/v1/patient/<patient_id>/latest_installation": _request(
+            client, "GET", f"{patient_url}/latest_installation", patient
+        ),
+        "GET /dhos/v1/clinician/<clinician_id>/latest_installation": _request(
+            client, "GET", f"{clinician_url}/latest_installation", clinician
+        ),
+        "GET /dhos/v1/patient/<patient_id>/blood_glucose_meter/<meter_id>": _request(
+            client, "GET", f"{patient_url}/blood_glucose_meter/{meter_id}", patient
+        ),
+        "GET /dhos/v1/patient/<patient_id>/blood_glucose_meter": _request(
+            client, "GET", f"{patient_url}/blood_glucose_meter", patient
+        ),
+        "GET /dhos/v1/analytics/patient_installation_counts": _request(
+            client,
+            "GET",
+            "/dhos/v1/analytics/patient_installation_counts",
+            clinician,
+            query={"group_by": "app_version"},
+        ),
+        "GET /dhos/v1/analytics/blood_glucose_meter_statistics": _request(
+            client,
+            "GET",
+            "/dhos/v1/analytics/blood_glucose_meter_statistics",
+            clinician,
+        ),
+        "controller.create_mobile_installation": lambda: (
+            controller.create_mobile_installation(patient_id, new_installation(Mobile))
+        ),
+        "controller.create_desktop_installation": lambda: (
+            controller.create_desktop_installation(
+                clinician_id, new_installation(Desktop)
+            )
+        ),
+        "controller.create_blood_glucose_meter": lambda: (
+            controller.create_blood_glucose_meter(
+                patient_id,
+                {**bodies[BloodGlucoseMeter], "date_verified": date_verified},
+            )
+        ),
+        "controller.update_installation": update_installation,
+        "POST /dhos/v1/patient/<patient_id>/installation": _request(
+            client,
+            "POST",
+            f"{patient_url}/installation",
+            patient,
+            body=lambda: new_installation(Mobile),
+        ),
+        "POST /dhos/v1/clinician/<clinician_id>/installation": _request(
+            client,
+            "POST",
+            f"{clinician_url}/installation",
+            clinician,
+            body=lambda: new_installation(Desktop),
+        ),
+        "POST /dhos/v1/patient/<patient_id>/blood_glucose_meter": _request(
+            client,
+            "POST",
+            f"{patient_url}/blood_glucose_meter",
+            patient,
+            body=lambda: bodies[BloodGlucoseMeter],
+        ),
+        "PATCH /dhos/v1/patient/<patient_id>/installation/<installation_id>": _request(
+            client,
+            "PATCH",
+            f"{patient_url}/installation/{mobile_id}",
+            patient,
+            body=lambda: {"app_version": next(versions)},
+        ),
+    }
+    if db.engine.dialect.name != "postgresql":
+        # SQLite won't store the date string that the meter route passes through.
+        del cases["POST /dhos/v1/patient/<patient_id>/blood_glucose_meter"]
+    return cases
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    # Nearest-rank percentile.
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def time_case(case: Case, rounds: int, warmup_rounds: int) -> Dict[str, Any]:
+    """
+    Calls a case `warmup_rounds` times untimed, then `rounds` times, and returns
+    statistics of the call times in milliseconds, and the median number of SQL
+    statements executed per call, which ignores calls that happen to do one-off
+    work such as creating a row for a new day.
+    """
+    for _ in range(warmup_rounds):
+        case()
+
+    statements = 0
+
+    def count_statement(*args: Any) -> None:
+        nonlocal statements
+        statements += 1
+
+    timings = []
+    counts = []
+    event.listen(db.engine, "before_cursor_execute", count_statement)
+    try:
+        for _ in range(rounds):
+            statements = 0
+            started = time.perf_counter()
+            case()
+            timings.append((time.perf_counter() - started) * 1000)
+            counts.append(statements)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count_statement)
+    timings.sort()
+    counts.sort()
+    return {
+        "rounds": rounds,
+        "min_ms": round(timings[0], 3),
+        "mean_ms": round(sum(timings) / rounds, 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "max_ms": round(timings[-1], 3),
+        "statements": percentile(counts, 50),
+    }
+
+
+def run_benchmarks(
+    builders: Dict[str, ingest.Builder],
+    sizes: Sequence[int] = SIZES,
+    rounds: int = ROUNDS,
+    warmup_rounds: int = WARMUP_ROUNDS,
+    only: Optional[Sequence[str]] = None,
+    progress: Optional[BenchmarkProgress] = None,
+) -> Dict[str, Any]:
+    """
+    Seeds the database to each size in turn (in rows, across the installation and
+    meter tables) and times the controller functions, model serialisation, schema
+    validation and complete routes through the Flask test client. `only` limits
+    the cases to those whose names contain one of its strings. Returns the results
+    as a JSON-serialisable dict, one entry per size.
+    """
+    results: List[Dict[str, Any]] = []
+    client = current_app.test_client()
+    for size in sorted(sizes):
+        seed_to(builders, size)
+        timings = {}
+        for name, case in _cases(client).items():
+            if only and not any(part in name for part in only):
+                continue
+            if progress is not None:
+                progress(size, name)
+            timings[name] = time_case(case, rounds, warmup_rounds)
+        results.append(
+            {
+                "size": size,
+                "rows": {
+                    kind: model.query.count() for kind, model in ingest.MODELS.items()
+                },
+                "cases": timings,
+            }
+        )
+    return {
+        "created": datetime.utcnow().isoformat(timespec="seconds"),
+        "dialect": db.engine.dialect.name,
+        "results": results,
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    results: Dict[str, Any],
+    latency_tolerance: Optional[float] = LATENCY_TOLERANCE,
+    min_latency_regression_ms: float = MIN_LATENCY_REGRESSION_MS,
+    statement_tolerance: float = 0,
+) -> List[str]:
+    """
+    Compares benchmark results with a baseline from `run_benchmarks`, case by case
+    at each size in both, and describes each case whose p95 latency or statement
+    count has regressed beyond the tolerances. A `latency_tolerance` of None only
+    compares statement counts. Cases missing from the baseline are ignored. Raises
+    ValueError if the two were run on different databases.
+    """
+    if baseline["dialect"] != results["dialect"]:
+        raise ValueError(
+            f"The baseline was recorded on {baseline['dialect']},"
+            f" not {results['dialect']}"
+        )
+
+    baseline_sizes = {result["size"]: result["cases"] for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        expected_cases = baseline_sizes.get(result["size"], {})
+        for name, timing in result["cases"].items():
+            expected = expected_cases.get(name)
+            if expected is None:
+                continue
+            label = f"{result['size']} rows, {name}"
+            p95, expected_p95 = timing["p95_ms"], expected["p95_ms"]
+            if (
+                latency_tolerance is not None
+                and p95 > expected_p95 * (1 + latency_tolerance)
+                and p95 - expected_p95 >= min_latency_regression_ms
+            ):
+                regressions.append(
+                    f"{label}: p95 {p95:.3f} ms, baseline {expected_p95:.3f} ms"
+                )
+            if timing["statements"] > expected["statements"] + statement_tolerance:
+                regressions.append(
+                    f"{label}: {timing['statements']:g} statements,"
+                    f" baseline {expected['statements']:g}"
+                )
+    return regressions
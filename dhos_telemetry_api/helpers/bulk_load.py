@@ -0,0 +1,261 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid5
+
+from flask_batteries_included.helpers import schema, timestamp
+from flask_batteries_included.sqldb import db
+from sqlalchemy import select
+
+from dhos_telemetry_api.helpers import ingest, partitions
+from dhos_telemetry_api.helpers.retention import Progress
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+
+CHUNK_SIZE = 10000
+FORMATS = ("csv", "ndjson")
+
+# The column holding each kind's owner, which is part of the path in the API.
+OWNER_COLUMNS: Dict[str, str] = {
+    "mobile": "patient_id",
+    "desktop": "clinician_id",
+    "blood_glucose_meter": "patient_id",
+}
+LOAD_USER = "bulk-load"
+# Namespace of the UUIDs derived for records that don't have one.
+LOAD_NAMESPACE = UUID("bc478688-4927-49fd-a645-7370025278d7")
+
+_BOOLEANS = {"true": True, "1": True, "false": False, "0": False}
+
+
+def checkpoint_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.progress")
+
+
+def _read_checkpoint(path: Path) -> int:
+    checkpoint = checkpoint_path(path)
+    return int(checkpoint.read_text()) if checkpoint.exists() else 0
+
+
+def _write_checkpoint(path: Path, records: int) -> None:
+    # Replacing the file makes the update atomic.
+    checkpoint = checkpoint_path(path)
+    temporary = checkpoint.with_name(f"{checkpoint.name}.tmp")
+    temporary.write_text(str(records))
+    os.replace(temporary, checkpoint)
+
+
+def _read_records(path: Path, format_: str) -> Iterator[Dict[str, Any]]:
+    with path.open(newline="") as file:
+        if format_ == "csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _coerce_csv(record: Dict[str, Any], types: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts CSV strings to the types in the model schema. Empty cells are
+    treated as missing.
+    """
+    values = {}
+    for key, value in record.items():
+        if value == "":
+            continue
+        if types.get(key) is bool:
+            if value.lower() not in _BOOLEANS:
+                raise ValueError(f"{key} must be true or false")
+            value = _BOOLEANS[value.lower()]
+        elif types.get(key) is float:
+            value = float(value)
+        values[key] = value
+    return values
+
+
+def record_uuid(kind: str, path: Path, number: int, data: Dict[str, Any]) -> str:
+    """
+    Derives the UUID of a record without one from the file's name, the record's
+    number and its contents, so that reloading the file, or resuming after a chunk
+    was committed but not checkpointed, skips the record instead of storing it
+    again.
+    """
+    content = json.dumps(data, sort_keys=True, default=str)
+    return str(uuid5(LOAD_NAMESPACE, f"{kind}\n{path.name}\n{number}\n{content}"))
+
+
+def _to_record(
+    kind: str,
+    data: Dict[str, Any],
+    format_: str,
+    builder: ingest.Builder,
+    default_uuid: str,
+) -> ingest.IngestRecord:
+    model = ingest.MODELS[kind]
+    model_schema = model.schema()
+    if format_ == "csv":
+        data = _coerce_csv(
+            data, {**model_schema["optional"], **model_schema["required"]}
+        )
+    else:
+        data = dict(data)
+
+    owner_column = OWNER_COLUMNS[kind]
+    if not data.get(owner_column):
+        raise ValueError(f"{owner_column} is required")
+    owner_id = data.pop(owner_column)
+    uuid = data.pop("uuid", None) or default_uuid
+    created = data.pop("created", None)
+    user = data.pop("created_by", None) or LOAD_USER
+
+    record = ingest.IngestRecord(
+        kind=kind,
+        owner_id=owner_id,
+        payload=schema.post(json_in=data, **model_schema),
+        uuid=uuid,
+        created=(
+            timestamp.parse_iso8601_to_datetime_typesafe(created)
+            .astimezone(timezone.utc)
+            .replace(tzinfo=None)
+            if created
+            else datetime.utcnow()
+        ),
+        user=user,
+    )
+    record.row = ingest.build_row(record, builder)
+    return record
+
+
+def _copy_field(value: Any) -> str:
+    # Unquoted empty fields are NULL in COPY's CSV format, quoted ones are strings.
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_rows(table: Any, rows: List[Dict[str, Any]]) -> None:
+    """
+    Streams rows into a table with COPY ... FROM STDIN, which skips per-row
+    statement parsing and planning.
+    """
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_copy_field(row[column]) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    quote = db.engine.dialect.identifier_preparer.quote
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        f"COPY {quote(table.name)} ({', '.join(quote(column) for column in columns)})"
+        " FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def insert_rows(model: Any, rows: List[Dict[str, Any]]) -> None:
+    """
+    Inserts rows of column values, which must all have the same columns, with
+    COPY on Postgres and an executemany INSERT elsewhere. Doesn't commit.
+    """
+    if db.engine.dialect.name == "postgresql":
+        _copy_rows(model.__table__, rows)
+    else:
+        db.session.execute(model.__table__.insert(), rows)
+
+
+def _partitioned(model: Any) -> bool:
+    return model is BloodGlucoseMeter and db.engine.dialect.name == "postgresql"
+
+
+def _create_partitions(records: List[ingest.IngestRecord]) -> None:
+    """
+    Creates the monthly partitions covering the records' created months, so that
+    historical rows get a partition of their own rather than the default one.
+    """
+    months = [record.created.date().replace(day=1) for record in records]
+    first, last = min(months), max(months)
+    partitions.create_partitions(
+        first,
+        months_ahead=(last.year - first.year) * 12 + last.month - first.month,
+    )
+
+
+def _write_chunk(kind: str, records: List[ingest.IngestRecord]) -> int:
+    """
+    Inserts a chunk of records that aren't already stored, adds them to the
+    aggregates and commits. Returns the number of rows inserted.
+    """
+    model = ingest.MODELS[kind]
+    if _partitioned(model):
+        _create_partitions(records)
+    existing = set(
+        db.session.execute(
+            select(model.uuid).where(
+                model.uuid.in_([record.uuid for record in records])
+            )
+        ).scalars()
+    )
+    rows = [record.row for record in records if record.uuid not in existing]
+    if rows:
+        insert_rows(model, rows)
+        ingest.count_rows(model, [row["uuid"] for row in rows])
+    db.session.commit()
+    return len(rows)
+
+
+def load_file(
+    kind: str,
+    path: Path,
+    builder: ingest.Builder,
+    format_: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+    resume: bool = False,
+    progress: Optional[Progress] = None,
+) -> Tuple[int, int]:
+    """
+    Loads a CSV or newline-delimited JSON file of records of one kind, each with
+    its owner column and the fields of the model schema, plus optional uuid,
+    created and created_by. Records are validated like API requests and written
+    `chunk_size` at a time, each chunk in its own transaction, with COPY on
+    Postgres, after creating any missing blood glucose meter partitions for the
+    chunk's months. The number of records committed is kept in a checkpoint file next to
+    the input, so `resume` continues after the last committed chunk; records whose
+    uuid is already stored are skipped, and records without one get a uuid derived
+    from the file (see `record_uuid`), so that a chunk committed just before a crash
+    isn't stored twice. Returns the numbers of records read and inserted.
+    """
+    if format_ is None:
+        format_ = "csv" if path.suffix.lower() == ".csv" else "ndjson"
+    if format_ not in FORMATS:
+        raise ValueError(f"Unknown format '{format_}'")
+
+    skip = _read_checkpoint(path) if resume else 0
+    read, inserted = skip, 0
+    chunk: List[ingest.IngestRecord] = []
+    for number, data in enumerate(_read_records(path, format_), start=1):
+        if number <= skip:
+            continue
+        try:
+            default_uuid = record_uuid(kind, path, number, data)
+            chunk.append(_to_record(kind, data, format_, builder, default_uuid))
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"Record {number}: {error}") from error
+        read = number
+        if len(chunk) == chunk_size:
+            inserted += _write_chunk(kind, chunk)
+            _write_checkpoint(path, read)
+            chunk = []
+            if progress is not None:
+                progress(read, inserted)
+    if chunk:
+        inserted += _write_chunk(kind, chunk)
+        _write_checkpoint(path, read)
+        if progress is not None:
+            progress(read, inserted)
+    return read, inserted
@@ -0,0 +1,193 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Type, Union
+
+from flask_batteries_included.helpers import schema
+from flask_batteries_included.sqldb import db
+from sqlalchemy import inspect, select
+
+from dhos_telemetry_api.helpers import device_sketch, meter_statistics, rollup
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+BulkModel = Union[Type[Mobile], Type[Desktop], Type[BloodGlucoseMeter]]
+
+BATCH_SIZE = 500
+MAX_UPDATES = 10000
+
+# Columns that a bulk update may select rows by, per model.
+FILTERS: Dict[Any, Sequence[str]] = {
+    Mobile: (
+        "patient_id",
+        "unique_device_code",
+        "app_product",
+        "app_version",
+        "phone_os",
+        "phone_os_version",
+        "manufacturer",
+        "model",
+    ),
+    Desktop: (
+        "clinician_id",
+        "unique_device_code",
+        "app_product",
+        "app_version",
+        "desktop_os",
+        "desktop_os_version",
+    ),
+    BloodGlucoseMeter: (
+        "patient_id",
+        "mobile_id",
+        "serial_number",
+        "app_product",
+        "app_version",
+    ),
+}
+
+
+def _column_values(model: BulkModel, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validates `changes` against the model's updatable fields and converts them to
+    the column values the model would store, by applying them to a transient
+    instance so that its setters, hybrids and validators run as they do for a
+    single update.
+    """
+    if not changes:
+        raise ValueError("No changes given")
+    schema.update(json_in=dict(changes), **model.schema())
+
+    probe = model()
+    for key, value in changes.items():
+        setattr(probe, key, value)
+    state = inspect(probe)
+    values = {}
+    for prop in state.mapper.column_attrs:
+        added = state.attrs[prop.key].history.added
+        if added:
+            values[prop.columns[0].name] = added[0]
+    return values
+
+
+def _filter_clauses(model: BulkModel, filters: Dict[str, Any]) -> List[Any]:
+    if not filters:
+        raise ValueError("A bulk update filter can't be empty")
+    clauses = []
+    for key, value in filters.items():
+        if key not in FILTERS[model]:
+            raise ValueError(f"Cannot filter by '{key}'")
+        column = getattr(model, key)
+        clauses.append(
+            column.in_(value) if isinstance(value, list) else column == value
+        )
+    return clauses
+
+
+def _columns(dimensions: Sequence[str]) -> Set[str]:
+    # Interned dimensions are stored in a string column and an id column.
+    return {name for dimension in dimensions for name in (dimension, f"{dimension}_id")}
+
+
+# Columns whose changes move rows between aggregates.
+STATISTICS_COLUMNS = _columns(meter_statistics.GROUP_TYPES) | {
+    "is_bg_value_correct",
+    "blood_glucose_value",
+}
+SKETCH_COLUMNS = _columns(device_sketch.DIMENSIONS)
+
+
+def _update_batch(
+    model: BulkModel, uuids: Sequence[str], values: Dict[str, Any]
+) -> int:
+    """
+    Applies one set-based UPDATE to a batch of rows, moving them between the
+    aggregates that depend on the changed columns, and commits.
+    """
+    changed = set(values)
+    is_meter = model is BloodGlucoseMeter
+    moves_statistics = is_meter and bool(changed & STATISTICS_COLUMNS)
+    moves_rollups = not is_meter and bool(
+        changed & _columns(rollup.ROLLUPS[model].dimensions)
+    )
+    moves_sketches = not is_meter and bool(changed & SKETCH_COLUMNS)
+
+    if moves_statistics:
+        meter_statistics.shift_verifications(uuids, -1)
+    if moves_rollups:
+        rollup.shift_installations(model, uuids, -1)
+
+    table = model.__table__
+    result = db.session.execute(
+        table.update().where(table.c.uuid.in_(uuids)).values(**values)
+    )
+
+    if moves_statistics:
+        meter_statistics.shift_verifications(uuids, 1)
+    if moves_rollups:
+        rollup.shift_installations(model, uuids, 1)
+    if moves_sketches:
+        # Sketches can't forget devices, so rows are only added to their new sketch.
+        device_sketch.record_devices(model, uuids)
+
+    db.session.commit()
+    return result.rowcount
+
+
+def _batches(uuids: Sequence[str]) -> Iterator[Sequence[str]]:
+    for start in range(0, len(uuids), BATCH_SIZE):
+        yield uuids[start : start + BATCH_SIZE]
+
+
+def update_by_uuid(model: BulkModel, updates: Sequence[Dict[str, Any]]) -> int:
+    """
+    Applies a list of {"uuid": ..., "changes": {...}} updates. Rows with identical
+    changes are updated together, BATCH_SIZE rows per statement and transaction.
+    Returns the number of rows updated.
+    """
+    if not 1 <= len(updates) <= MAX_UPDATES:
+        raise ValueError(f"Between 1 and {MAX_UPDATES} updates are required")
+
+    # Validate everything before writing anything.
+    groups: Dict[str, List[str]] = {}
+    values_by_group: Dict[str, Dict[str, Any]] = {}
+    for update in updates:
+        group = json.dumps(update["changes"], sort_keys=True)
+        if group not in values_by_group:
+            values_by_group[group] = _column_values(model, update["changes"])
+        groups.setdefault(group, []).append(update["uuid"])
+
+    updated = 0
+    for group, uuids in groups.items():
+        for batch in _batches(uuids):
+            updated += _update_batch(model, batch, values_by_group[group])
+    return updated
+
+
+def update_by_filter(
+    model: BulkModel, filters: Dict[str, Any], changes: Dict[str, Any]
+) -> int:
+    """
+    Applies the same changes to every row matching the equality (or, for list
+    values, membership) filters, BATCH_SIZE rows per statement and transaction, in
+    primary key order. Returns the number of rows updated.
+    """
+    clauses = _filter_clauses(model, filters)
+    values = _column_values(model, changes)
+
+    updated = 0
+    last_uuid: Optional[str] = None
+    while True:
+        batch_query = (
+            select(model.uuid).where(*clauses).order_by(model.uuid).limit(BATCH_SIZE)
+        )
+        if last_uuid is not None:
+            batch_query = batch_query.where(model.uuid > last_uuid)
+        batch: List[str] = db.session.execute(batch_query).scalars().all()
+        if not batch:
+            break
+        last_uuid = batch[-1]
+
+        updated += _update_batch(model, batch, values)
+        if len(batch) < BATCH_SIZE:
+            break
+
+    return updated
@@ -0,0 +1,135 @@
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from flask import Flask, Response, current_app, g, request
+
+# Query parameters whose values describe the shape of a request rather than a
+# patient, clinician or device, and are recorded as they are. Other values are
+# pseudonymised.
+SAFE_QUERY_PARAMETERS = {
+    "app_product",
+    "end",
+    "end_date",
+    "group_by",
+    "group_values",
+    "interval",
+    "limit",
+    "min_version",
+    "page_size",
+    "prefix",
+    "start",
+    "start_date",
+}
+PSEUDONYM_PREFIX = "p:"
+
+
+class RequestCapture:
+    """
+    Appends a line of JSON per API request to a file per process, `path` suffixed
+    with the process id: the method, route, status, duration and body size, with
+    path parameters and identifying query values replaced by pseudonyms, and the
+    names, but not the values, of the fields of JSON bodies. Pseudonyms are HMACs
+    keyed with `key`, shared by all processes, or without one a random secret for
+    the life of the process, so repeated requests for the same subject can be
+    recognised in the capture but the identifiers can't be recovered from it.
+    """
+
+    def __init__(self, path: str, key: Optional[bytes] = None) -> None:
+        self.path = path
+        self._key = key or secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        # Opened by the first write, so that workers forked from a preloaded app
+        # each get their own file.
+        self._file: Optional[TextIO] = None
+
+    @property
+    def file_path(self) -> str:
+        return f"{self.path}.{os.getpid()}"
+
+    def pseudonym(self, value: str) -> str:
+        digest = hmac.new(self._key, value.encode(), hashlib.sha256).hexdigest()
+        return PSEUDONYM_PREFIX + digest[:16]
+
+    def entry(
+        self,
+        route: str,
+        fields: Optional[List[str]],
+        response: Response,
+        duration: float,
+    ) -> Dict[str, Any]:
+        query = {
+            key: [
+                value if key in SAFE_QUERY_PARAMETERS else self.pseudonym(value)
+                for value in request.args.getlist(key)
+            ]
+            for key in request.args
+        }
+        return {
+            "time": round(time.time() - duration, 6),
+            "method": request.method,
+            "route": route,
+            "path": {
+                key: self.pseudonym(str(value))
+                for key, value in (request.view_args or {}).items()
+            },
+            "query": query,
+            "fields": fields,
+            "body_bytes": request.content_length or 0,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 3),
+        }
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.file_path, "a", buffering=1)
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _start_capture() -> None:
+    # Connexion serves the API routes, so they aren't in the api blueprint here.
+    if request.url_rule is None or not request.url_rule.rule.startswith("/dhos/"):
+        return
+    # Taken before the views run, as schema validation pops fields from the body.
+    body = request.get_json(silent=True) if request.content_length else None
+    g.capture = (
+        request.url_rule.rule,
+        sorted(body) if isinstance(body, dict) else None,
+        time.perf_counter(),
+    )
+
+
+def _record_request(response: Response) -> Response:
+    started: Optional[Tuple[str, Optional[List[str]], float]] = g.pop("capture", None)
+    if started is not None:
+        route, fields, started_at = started
+        capture: RequestCapture = current_app.extensions["request_capture"]
+        capture.write(
+            capture.entry(route, fields, response, time.perf_counter() - started_at)
+        )
+    return response
+
+
+def init_capture(app: Flask) -> None:
+    path: str = app.config["REQUEST_CAPTURE_FILE"]
+    if not path:
+        return
+    key: str = app.config["REQUEST_CAPTURE_KEY"]
+    app.extensions["request_capture"] = RequestCapture(
+        path, key=key.encode() if key else None
+    )
+    app.before_request(_start_capture)
+    app.after_request(_record_request)
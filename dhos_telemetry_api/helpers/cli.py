@@ -1,9 +1,32 @@
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple, Type, Union
+
 import click
 from flask import Flask
+from flask_batteries_included.config import is_not_production_environment
 from flask_batteries_included.helpers.apispec import generate_openapi_spec
 
 from dhos_telemetry_api import blueprint_api
+from dhos_telemetry_api.helpers import (
+    benchmark,
+    bulk_load,
+    cohort,
+    compaction,
+    device_sketch,
+    interning,
+    meter_statistics,
+    network,
+    partitions,
+    replay,
+    retention,
+    rollup,
+    synthetic,
+)
 from dhos_telemetry_api.models.api_spec import dhos_telemetry_api_spec
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
 
 
 def add_cli_command(app: Flask) -> None:
@@ -13,3 +36,554 @@ def add_cli_command(app: Flask) -> None:
         generate_openapi_spec(
             dhos_telemetry_api_spec, output, blueprint_api.api_blueprint
         )
+
+    @app.cli.command("rebuild-rollups")
+    @click.option(
+        "--start-date",
+        type=click.DateTime(formats=["%Y-%m-%d"]),
+        help="First day to rebuild (default: all history)",
+    )
+    @click.option(
+        "--end-date",
+        type=click.DateTime(formats=["%Y-%m-%d"]),
+        help="Last day to rebuild (default: today)",
+    )
+    def rebuild_rollups(
+        start_date: Optional[datetime], end_date: Optional[datetime]
+    ) -> None:
+        """Rebuild the daily installation rollups from the installation tables."""
+        models: List[Union[Type[Mobile], Type[Desktop]]] = [Mobile, Desktop]
+        for model in models:
+            written = rollup.rebuild_rollups(
+                model,
+                start_date=start_date.date() if start_date else None,
+                end_date=end_date.date() if end_date else None,
+            )
+            click.echo(f"Rebuilt {written} {model.__name__} rollup rows")
+
+    @app.cli.command("rebuild-meter-statistics")
+    def rebuild_meter_statistics() -> None:
+        """Rebuild the blood glucose meter statistics from all verifications."""
+        written = meter_statistics.rebuild_statistics()
+        click.echo(f"Rebuilt {written} blood glucose meter statistics rows")
+
+    @app.cli.command("compact-device-sketches")
+    def compact_device_sketches() -> None:
+        """Merge past device sketch shards and complete months. Run this daily."""
+        report = device_sketch.compact_sketches()
+        click.echo(
+            f"Folded {report['shards_folded']} device sketch shards and wrote"
+            f" {report['months_written']} monthly sketches"
+        )
+
+    @app.cli.command("create-meter-partitions")
+    @click.option(
+        "--months-ahead",
+        type=click.IntRange(min=0),
+        default=3,
+        show_default=True,
+        help="Number of future months to create partitions for",
+    )
+    def create_meter_partitions(months_ahead: int) -> None:
+        """Create missing monthly blood_glucose_meter partitions. Run this daily."""
+        try:
+            created = partitions.create_partitions(date.today(), months_ahead)
+        except RuntimeError as error:
+            raise click.ClickException(str(error))
+        click.echo(f"Created {len(created)} partitions: {', '.join(created)}")
+
+    @app.cli.command("drop-meter-partitions")
+    @click.option(
+        "--before",
+        type=click.DateTime(formats=["%Y-%m-%d"]),
+        required=True,
+        help="Drop partitions holding only rows created before this date",
+    )
+    @click.confirmation_option(prompt="This permanently deletes data. Continue?")
+    def drop_meter_partitions(before: datetime) -> None:
+        """Drop monthly blood_glucose_meter partitions older than a date."""
+        try:
+            dropped = partitions.drop_partitions(before.date())
+        except RuntimeError as error:
+            raise click.ClickException(str(error))
+        click.echo(f"Dropped {len(dropped)} partitions: {', '.join(dropped)}")
+
+    @app.cli.command("purge-telemetry")
+    @click.option(
+        "--installations-superseded-months",
+        type=click.IntRange(min=1),
+        help="Delete installations superseded more than this many months ago",
+    )
+    @click.option(
+        "--meters-older-than-months",
+        type=click.IntRange(min=1),
+        help="Delete meter verifications created more than this many months ago",
+    )
+    @click.option(
+        "--batch-size",
+        type=click.IntRange(min=1),
+        default=1000,
+        show_default=True,
+        help="Number of rows examined per transaction",
+    )
+    @click.option(
+        "--pause",
+        type=click.FloatRange(min=0),
+        default=0.5,
+        show_default=True,
+        help="Seconds to sleep between batches",
+    )
+    @click.option("--dry-run", is_flag=True, help="Count rows without deleting them")
+    def purge_telemetry(
+        installations_superseded_months: Optional[int],
+        meters_older_than_months: Optional[int],
+        batch_size: int,
+        pause: float,
+        dry_run: bool,
+    ) -> None:
+        """Delete old telemetry in small batches. Safe to run alongside live traffic."""
+        now = datetime.utcnow()
+        verb = "Would delete" if dry_run else "Deleted"
+
+        def report(label: str) -> retention.Progress:
+            def progress(scanned: int, deleted: int) -> None:
+                click.echo(f"{label}: scanned {scanned}, {verb.lower()} {deleted}")
+
+            return progress
+
+        if installations_superseded_months is not None:
+            cutoff = retention.months_before(now, installations_superseded_months)
+            models: List[Union[Type[Mobile], Type[Desktop]]] = [Mobile, Desktop]
+            for model in models:
+                deleted = retention.purge_superseded_installations(
+                    model,
+                    superseded_before=cutoff,
+                    batch_size=batch_size,
+                    pause_seconds=pause,
+                    dry_run=dry_run,
+                    progress=report(model.__name__),
+                )
+                click.echo(f"{verb} {deleted} superseded {model.__name__} rows")
+
+        if meters_older_than_months is not None:
+            cutoff = retention.months_before(now, meters_older_than_months)
+            dropped, deleted = retention.purge_meter_verifications(
+                created_before=cutoff,
+                batch_size=batch_size,
+                pause_seconds=pause,
+                dry_run=dry_run,
+                progress=report("BloodGlucoseMeter"),
+            )
+            if dropped:
+                click.echo(f"Dropped {len(dropped)} partitions: {', '.join(dropped)}")
+            click.echo(f"{verb} {deleted} BloodGlucoseMeter rows")
+
+    @app.cli.command("load-telemetry")
+    @click.argument("kind", type=click.Choice(list(bulk_load.OWNER_COLUMNS)))
+    @click.argument(
+        "path", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+    )
+    @click.option(
+        "--format",
+        "format_",
+        type=click.Choice(bulk_load.FORMATS),
+        help="Input format (default: csv for .csv files, otherwise ndjson)",
+    )
+    @click.option(
+        "--chunk-size",
+        type=click.IntRange(min=1),
+        default=bulk_load.CHUNK_SIZE,
+        show_default=True,
+        help="Number of records written per transaction",
+    )
+    @click.option(
+        "--resume", is_flag=True, help="Continue after the last committed chunk"
+    )
+    def load_telemetry(
+        kind: str, path: Path, format_: Optional[str], chunk_size: int, resume: bool
+    ) -> None:
+        """Bulk load a CSV or NDJSON file of records, using COPY on Postgres."""
+
+        def progress(read: int, inserted: int) -> None:
+            click.echo(f"{kind}: read {read} records, inserted {inserted}")
+
+        try:
+            read, inserted = bulk_load.load_file(
+                kind,
+                path,
+                blueprint_api.controller.INGEST_BUILDERS[kind],
+                format_=format_,
+                chunk_size=chunk_size,
+                resume=resume,
+                progress=progress,
+            )
+        except ValueError as error:
+            raise click.ClickException(
+                f"{error}. Fix the input and rerun with --resume to continue."
+            )
+        click.echo(f"Loaded {inserted} {kind} rows from {read} records")
+
+    @app.cli.command("seed-telemetry")
+    @click.option(
+        "--patients", type=click.IntRange(min=0), default=1000, show_default=True
+    )
+    @click.option(
+        "--clinicians", type=click.IntRange(min=0), default=100, show_default=True
+    )
+    @click.option(
+        "--days",
+        type=click.IntRange(min=1),
+        default=365,
+        show_default=True,
+        help="Length of the period covered, ending today",
+    )
+    @click.option(
+        "--installations-per-device",
+        type=click.IntRange(min=1),
+        default=3,
+        show_default=True,
+        help="Average number of installations (app upgrades) per device",
+    )
+    @click.option(
+        "--verifications-per-patient",
+        type=click.IntRange(min=0),
+        default=100,
+        show_default=True,
+        help="Average number of blood glucose meter verifications per patient",
+    )
+    @click.option("--seed", type=int, help="Random seed, for repeatable data")
+    @click.option(
+        "--chunk-size",
+        type=click.IntRange(min=1),
+        default=synthetic.CHUNK_SIZE,
+        show_default=True,
+        help="Number of rows written per transaction",
+    )
+    def seed_telemetry(
+        patients: int,
+        clinicians: int,
+        days: int,
+        installations_per_device: int,
+        verifications_per_patient: int,
+        seed: Optional[int],
+        chunk_size: int,
+    ) -> None:
+        """Write a synthetic telemetry population for capacity testing."""
+        if not is_not_production_environment():
+            raise click.ClickException("Synthetic data can't be seeded in production")
+
+        def progress(subjects: int, rows: int) -> None:
+            click.echo(f"Generated {subjects} patients and clinicians, {rows} rows")
+
+        counts = synthetic.seed(
+            blueprint_api.controller.INGEST_BUILDERS,
+            patients=patients,
+            clinicians=clinicians,
+            start=date.today() - timedelta(days=days),
+            days=days,
+            installations_per_device=installations_per_device,
+            verifications_per_patient=verifications_per_patient,
+            seed_value=seed,
+            chunk_size=chunk_size,
+            progress=progress,
+        )
+        for table, count in counts.items():
+            click.echo(f"Wrote {count} {table} rows")
+
+    @app.cli.command("benchmark")
+    @click.option(
+        "--size",
+        "sizes",
+        type=click.IntRange(min=1),
+        multiple=True,
+        default=benchmark.SIZES,
+        show_default=True,
+        help="Rows to seed before benchmarking; repeat for several sizes",
+    )
+    @click.option(
+        "--rounds",
+        type=click.IntRange(min=1),
+        default=benchmark.ROUNDS,
+        show_default=True,
+        help="Timed calls per case",
+    )
+    @click.option(
+        "--case",
+        "cases",
+        multiple=True,
+        help="Only run cases whose names contain this; repeat for several",
+    )
+    @click.option(
+        "--output",
+        type=click.Path(dir_okay=False, path_type=Path),
+        default="benchmark.json",
+        show_default=True,
+        help="File to write the results to, as JSON",
+    )
+    @click.option(
+        "--baseline",
+        type=click.Path(exists=True, dir_okay=False, path_type=Path),
+        help="Results to compare with; fail if any case has regressed",
+    )
+    @click.option(
+        "--tolerance",
+        type=click.FloatRange(min=0),
+        default=benchmark.LATENCY_TOLERANCE,
+        show_default=True,
+        help="Fraction by which p95 latency may exceed the baseline",
+    )
+    @click.option(
+        "--statement-tolerance",
+        type=click.FloatRange(min=0),
+        default=0,
+        show_default=True,
+        help="SQL statements per call by which a case may exceed the baseline",
+    )
+    def run_benchmark(
+        sizes: Tuple[int, ...],
+        rounds: int,
+        cases: Tuple[str, ...],
+        output: Path,
+        baseline: Optional[Path],
+        tolerance: float,
+        statement_tolerance: float,
+    ) -> None:
+        """Seed synthetic data and time controller functions and routes against it."""
+        if not is_not_production_environment():
+            raise click.ClickException("Benchmarks can't be run in production")
+
+        def progress(size: int, case: str) -> None:
+            click.echo(f"{size} rows: {case}")
+
+        results = benchmark.run_benchmarks(
+            blueprint_api.controller.INGEST_BUILDERS,
+            sizes=sizes,
+            rounds=rounds,
+            only=cases,
+            progress=progress,
+        )
+        output.write_text(json.dumps(results, indent=2))
+        click.echo(f"Wrote results to {output}")
+
+        if baseline is not None:
+            try:
+                regressions = benchmark.compare_results(
+                    json.loads(baseline.read_text()),
+                    results,
+                    latency_tolerance=tolerance,
+                    statement_tolerance=statement_tolerance,
+                )
+            except ValueError as error:
+                raise click.ClickException(str(error))
+            if regressions:
+                raise click.ClickException(
+                    f"{len(regressions)} regressions against {baseline}:\n"
+                    + "\n".join(regressions)
+                )
+            click.echo(f"No regressions against {baseline}")
+
+    @app.cli.command("replay-requests")
+    @click.argument(
+        "captures",
+        nargs=-1,
+        required=True,
+        type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    )
+    @click.option(
+        "--base-url",
+        default="http://localhost:5000",
+        show_default=True,
+        help="The service to send requests to, which must use this database",
+    )
+    @click.option(
+        "--speed",
+        default="1",
+        show_default=True,
+        help="Multiple of the captured request rate, e.g. 10, or 'max'",
+    )
+    @click.option(
+        "--concurrency",
+        type=click.IntRange(min=1),
+        default=replay.CONCURRENCY,
+        show_default=True,
+        help="Number of requests in flight at once",
+    )
+    @click.option(
+        "--output",
+        type=click.Path(dir_okay=False, path_type=Path),
+        help="Also write the results to this file, as JSON",
+    )
+    def replay_requests(
+        captures: Tuple[Path, ...],
+        base_url: str,
+        speed: str,
+        concurrency: int,
+        output: Optional[Path],
+    ) -> None:
+        """Replay requests captured with REQUEST_CAPTURE_FILE against a local service."""
+        if not is_not_production_environment():
+            raise click.ClickException("Requests can't be replayed in production")
+        try:
+            rate = None if speed == "max" else float(speed)
+        except ValueError:
+            rate = 0
+        if rate is not None and rate <= 0:
+            raise click.BadParameter(
+                "must be a positive number or 'max'", param_hint="--speed"
+            )
+
+        def progress(sent: int, completed: int) -> None:
+            click.echo(f"Sent {sent} requests, {completed} completed")
+
+        try:
+            results = replay.replay(
+                replay.read_capture(captures),
+                base_url,
+                speed=rate,
+                concurrency=concurrency,
+                progress=progress,
+            )
+        except ValueError as error:
+            raise click.ClickException(str(error))
+        for route in results["routes"]:
+            click.echo(
+                f"{route['method']} {route['route']}: {route['requests']} requests,"
+                f" {route['errors']} errors, {route['requests_per_second']}/s,"
+                f" p50 {route['p50_ms']}ms, p95 {route['p95_ms']}ms,"
+                f" p99 {route['p99_ms']}ms"
+            )
+        click.echo(
+            f"Sent {results['sent']} requests in {results['seconds']}s,"
+            f" skipped {results['skipped']}"
+        )
+        if output is not None:
+            output.write_text(json.dumps(results, indent=2))
+
+    @app.cli.command("compact-installations")
+    @click.option(
+        "--batch-size",
+        type=click.IntRange(min=1),
+        default=500,
+        show_default=True,
+        help="Number of patients or clinicians compacted per transaction",
+    )
+    @click.option(
+        "--pause",
+        type=click.FloatRange(min=0),
+        default=0.5,
+        show_default=True,
+        help="Seconds to sleep between batches",
+    )
+    @click.option(
+        "--dry-run", is_flag=True, help="Report duplicates without removing them"
+    )
+    def compact_installations(batch_size: int, pause: float, dry_run: bool) -> None:
+        """Collapse repeated identical installations of each device into one row."""
+        verb = "Would remove" if dry_run else "Removed"
+        models: List[Union[Type[Mobile], Type[Desktop]]] = [Mobile, Desktop]
+        for model in models:
+            label = model.__name__
+
+            def progress(owners: int, removed: int) -> None:
+                click.echo(
+                    f"{label}: scanned {owners} owners, {verb.lower()} {removed}"
+                )
+
+            report = compaction.compact_installations(
+                model,
+                batch_size=batch_size,
+                pause_seconds=pause,
+                dry_run=dry_run,
+                progress=progress,
+            )
+            click.echo(
+                f"{verb} {report['installations_removed']} duplicate {label} rows"
+                f" for {report['owners']} owners"
+            )
+            if model is Mobile:
+                click.echo(
+                    f"{'Would rewrite' if dry_run else 'Rewrote'}"
+                    f" {report['meter_references_rewritten']}"
+                    " blood glucose meter references"
+                )
+
+    @app.cli.command("intern-installation-dimensions")
+    @click.option(
+        "--batch-size",
+        type=click.IntRange(min=1),
+        default=1000,
+        show_default=True,
+        help="Number of installations converted per transaction",
+    )
+    @click.option(
+        "--pause",
+        type=click.FloatRange(min=0),
+        default=0.5,
+        show_default=True,
+        help="Seconds to sleep between batches",
+    )
+    def intern_installation_dimensions(batch_size: int, pause: float) -> None:
+        """Move existing inline installation strings into installation_dimension."""
+        models: List[Union[Type[Mobile], Type[Desktop]]] = [Mobile, Desktop]
+        for model in models:
+            label = model.__name__
+
+            def progress(scanned: int, converted: int) -> None:
+                click.echo(f"{label}: scanned {scanned}, converted {converted}")
+
+            converted = interning.intern_existing(
+                model, batch_size=batch_size, pause_seconds=pause, progress=progress
+            )
+            click.echo(f"Converted {converted} {label} rows")
+
+    @app.cli.command("backfill-desktop-ip-addresses")
+    @click.option(
+        "--batch-size",
+        type=click.IntRange(min=1),
+        default=1000,
+        show_default=True,
+        help="Number of installations parsed per transaction",
+    )
+    @click.option(
+        "--pause",
+        type=click.FloatRange(min=0),
+        default=0.5,
+        show_default=True,
+        help="Seconds to sleep between batches",
+    )
+    def backfill_desktop_ip_addresses(batch_size: int, pause: float) -> None:
+        """Parse existing desktop IP addresses for subnet queries."""
+
+        def progress(scanned: int, updated: int) -> None:
+            click.echo(f"Desktop: scanned {scanned}, parsed {updated}")
+
+        updated = network.backfill_ip_addresses(
+            batch_size=batch_size, pause_seconds=pause, progress=progress
+        )
+        click.echo(f"Parsed {updated} Desktop IP addresses")
+
+    @app.cli.command("backfill-app-version-keys")
+    @click.option(
+        "--batch-size",
+        type=click.IntRange(min=1),
+        default=1000,
+        show_default=True,
+        help="Number of installations updated per transaction",
+    )
+    @click.option(
+        "--pause",
+        type=click.FloatRange(min=0),
+        default=0.5,
+        show_default=True,
+        help="Seconds to sleep between batches",
+    )
+    def backfill_app_version_keys(batch_size: int, pause: float) -> None:
+        """Fill the sortable app version of existing mobile installations."""
+
+        def progress(scanned: int, updated: int) -> None:
+            click.echo(f"Mobile: updated {updated}")
+
+        updated = cohort.backfill_version_keys(
+            batch_size=batch_size, pause_seconds=pause, progress=progress
+        )
+        click.echo(f"Updated {updated} Mobile app version keys")
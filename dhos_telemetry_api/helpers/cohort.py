@@ -0,0 +1,115 @@
+import time
+from typing import Dict, List, Optional
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import and_, case, exists, or_, select
+from sqlalchemy.orm import aliased
+
+from dhos_telemetry_api.helpers.retention import Progress
+from dhos_telemetry_api.models.mobile import Mobile
+
+MAX_PAGE_SIZE = 10000
+
+
+def patients_below_version(
+    app_product: str,
+    min_version: str,
+    page_size: int = 1000,
+    after: Optional[str] = None,
+) -> Dict:
+    """
+    Returns a page of the IDs of patients whose latest mobile installation of
+    `app_product` has an app version below `min_version`, in patient ID order.
+    Pass the returned `next_after` as `after` to get the next page; it is null on
+    the last page.
+    """
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    min_version_key = Mobile.version_sort_key(min_version)
+    if not min_version_key:
+        raise ValueError(f"'{min_version}' is not a valid version")
+
+    # An installation is the latest if no installation of the same product for
+    # the same patient was first launched after it (ties broken by uuid). The
+    # probe uses the (patient_id, date_first_launched_) index.
+    later = aliased(Mobile)
+    superseded = exists().where(
+        later.patient_id == Mobile.patient_id,
+        later.app_product == app_product,
+        or_(
+            later.date_first_launched_ > Mobile.date_first_launched_,
+            and_(
+                later.date_first_launched_ == Mobile.date_first_launched_,
+                later.uuid > Mobile.uuid,
+            ),
+        ),
+    )
+    # The (app_product, app_version_key) indexes find a sparse cohort directly;
+    # for a large one, walking the patient index in order lets each page stop early.
+    query = (
+        select(Mobile.patient_id)
+        .where(
+            Mobile.app_product == app_product,
+            Mobile.app_version_key < min_version_key,
+            ~superseded,
+        )
+        .order_by(Mobile.patient_id)
+        .limit(page_size)
+    )
+    if after is not None:
+        query = query.where(Mobile.patient_id > after)
+
+    patient_ids: List[str] = db.session.execute(query).scalars().all()
+    return {
+        "patient_ids": patient_ids,
+        "next_after": patient_ids[-1] if len(patient_ids) == page_size else None,
+    }
+
+
+def backfill_version_keys(
+    batch_size: int, pause_seconds: float, progress: Optional[Progress] = None
+) -> int:
+    """
+    Fills app_version_key for mobile installations written before the column
+    existed, `batch_size` rows per transaction. Returns the number updated.
+    """
+    table = Mobile.__table__
+    scanned = 0
+    last_uuid: Optional[str] = None
+    while True:
+        batch_query = (
+            select(Mobile.uuid, Mobile.app_version)
+            .where(Mobile.app_version_key.is_(None))
+            .order_by(Mobile.uuid)
+            .limit(batch_size)
+        )
+        if last_uuid is not None:
+            batch_query = batch_query.where(Mobile.uuid > last_uuid)
+        batch = db.session.execute(batch_query).all()
+        if not batch:
+            break
+        last_uuid = batch[-1].uuid
+
+        db.session.execute(
+            table.update()
+            .where(table.c.uuid.in_([uuid for uuid, _ in batch]))
+            .values(
+                app_version_key=case(
+                    {
+                        uuid: Mobile.version_sort_key(app_version)
+                        for uuid, app_version in batch
+                    },
+                    value=table.c.uuid,
+                )
+            )
+        )
+        db.session.commit()
+
+        scanned += len(batch)
+        if progress is not None:
+            progress(scanned, scanned)
+        if len(batch) < batch_size:
+            break
+        time.sleep(pause_seconds)
+
+    return scanned
@@ -0,0 +1,166 @@
+import time
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from flask_batteries_included.sqldb import ModelIdentifier, db
+from sqlalchemy import Column, case, cast, select
+
+from dhos_telemetry_api.helpers import rollup
+from dhos_telemetry_api.helpers.retention import Progress
+from dhos_telemetry_api.helpers.sql import UUIDString
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.installation_dimension import resolved_columns
+from dhos_telemetry_api.models.mobile import Mobile
+
+# The owner column (used to walk the table) and the first-use timestamp columns
+# (used to order each device's installations) of each installation model.
+OWNER_COLUMNS: Dict[Any, str] = {Mobile: "patient_id", Desktop: "clinician_id"}
+FIRST_USE_COLUMNS: Dict[Any, Tuple[str, str]] = {
+    Mobile: ("date_first_launched_", "date_first_launched_time_zone_"),
+    Desktop: ("date_first_used_", "date_first_used_time_zone_"),
+}
+
+# Columns that may differ between installations that are otherwise duplicates:
+# the identifier and audit columns (uuid, created, created_by_ and so on).
+_IGNORED_COLUMNS = {
+    name for name, value in vars(ModelIdentifier).items() if isinstance(value, Column)
+}
+
+
+def _compared_columns(model: Union[Type[Mobile], Type[Desktop]]) -> List[str]:
+    # Interned columns are named once, by their inline column, and compared by value.
+    ignored = _IGNORED_COLUMNS.union(FIRST_USE_COLUMNS[model])
+    return [
+        column.name
+        for column in model.__table__.columns
+        if column.name not in ignored
+        and not (column.name.endswith("_id") and hasattr(model, f"{column.name[:-3]}_"))
+    ]
+
+
+def _compared_values(
+    model: Union[Type[Mobile], Type[Desktop]], owners: List[str]
+) -> Dict[str, Tuple]:
+    # The resolved string values, so that rows written before and after interning
+    # compare equal.
+    columns, from_clause = resolved_columns(model, _compared_columns(model))
+    owner = getattr(model, OWNER_COLUMNS[model])
+    rows = db.session.execute(
+        select([model.uuid, *columns]).select_from(from_clause).where(owner.in_(owners))
+    )
+    return {uuid: tuple(values) for uuid, *values in rows}
+
+
+def find_duplicates(
+    installations: List[Union[Mobile, Desktop]], values: Dict[str, Tuple]
+) -> Dict[str, str]:
+    """
+    Given one device's installations in first-use order, and the compared values
+    of each by uuid, returns a map from the uuid of each installation that repeats
+    the one before it to the uuid of the earliest installation in that run of
+    identical installations.
+    """
+    duplicates: Dict[str, str] = {}
+    survivor: Optional[Union[Mobile, Desktop]] = None
+    for installation in installations:
+        if survivor is not None and values[installation.uuid] == values[survivor.uuid]:
+            duplicates[installation.uuid] = survivor.uuid
+        else:
+            survivor = installation
+    return duplicates
+
+
+def _rewrite_meter_references(duplicates: Dict[str, str], dry_run: bool) -> int:
+    mobile_id = BloodGlucoseMeter.mobile_id
+    if dry_run:
+        return BloodGlucoseMeter.query.filter(mobile_id.in_(duplicates)).count()
+    return db.session.execute(
+        BloodGlucoseMeter.__table__.update()
+        .where(mobile_id.in_(duplicates))
+        .values(
+            mobile_id=case(
+                {
+                    duplicate: cast(survivor, UUIDString)
+                    for duplicate, survivor in duplicates.items()
+                },
+                value=mobile_id,
+            )
+        )
+    ).rowcount
+
+
+def compact_installations(
+    model: Union[Type[Mobile], Type[Desktop]],
+    batch_size: int,
+    pause_seconds: float,
+    dry_run: bool = False,
+    progress: Optional[Progress] = None,
+) -> Dict[str, int]:
+    """
+    Collapses each run of consecutive identical installations of a device (same
+    owner and unique_device_code) into its earliest installation. Owners are
+    processed `batch_size` at a time, each batch in its own transaction followed
+    by a pause. Blood glucose meter verifications that referenced a removed
+    mobile installation are pointed at the one that was kept, and the removed
+    installations are uncounted from the daily rollups.
+    """
+    owner = getattr(model, OWNER_COLUMNS[model])
+    first_use, _ = FIRST_USE_COLUMNS[model]
+    report = {"owners": 0, "installations_removed": 0, "meter_references_rewritten": 0}
+    last_owner: Optional[str] = None
+
+    while True:
+        owner_query = db.session.query(owner).distinct().order_by(owner)
+        if last_owner is not None:
+            owner_query = owner_query.filter(owner > last_owner)
+        owners = [row[0] for row in owner_query.limit(batch_size)]
+        if not owners:
+            break
+        last_owner = owners[-1]
+
+        installations = (
+            model.query.filter(owner.in_(owners))
+            .order_by(
+                owner,
+                model.unique_device_code,
+                getattr(model, first_use),
+                model.created,
+                model.uuid,
+            )
+            .with_for_update()
+            .all()
+        )
+        values = _compared_values(model, owners)
+        duplicates: Dict[str, str] = {}
+        for _, device_installations in groupby(
+            installations, key=lambda i: (getattr(i, owner.key), i.unique_device_code)
+        ):
+            duplicates.update(find_duplicates(list(device_installations), values))
+
+        if duplicates and model is Mobile:
+            report["meter_references_rewritten"] += _rewrite_meter_references(
+                duplicates, dry_run
+            )
+        if duplicates and not dry_run:
+            for installation in installations:
+                if installation.uuid in duplicates:
+                    rollup.remove_installation(installation)
+            model.query.filter(model.uuid.in_(duplicates)).delete(
+                synchronize_session=False
+            )
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+
+        report["owners"] += len(owners)
+        report["installations_removed"] += len(duplicates)
+        if progress is not None:
+            progress(report["owners"], report["installations_removed"])
+        if len(owners) < batch_size:
+            break
+        time.sleep(pause_seconds)
+
+    return report
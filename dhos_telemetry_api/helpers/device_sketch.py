@@ -0,0 +1,372 @@
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from flask import current_app
+from flask_batteries_included.sqldb import db
+
+from dhos_telemetry_api.helpers.hyperloglog import HyperLogLog
+from dhos_telemetry_api.helpers.partitions import add_months
+from dhos_telemetry_api.helpers.sql import dialect_insert
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.device_sketch import DeviceMonthSketch, DeviceSketch
+from dhos_telemetry_api.models.mobile import Mobile
+
+DIMENSIONS: Tuple[str, ...] = ("app_product", "app_version")
+INTERVALS: Tuple[str, ...] = ("day", "month")
+
+INSTALLATION_TYPES: Dict[Any, str] = {Mobile: "mobile", Desktop: "desktop"}
+
+
+def record_device(installation: Union[Mobile, Desktop]) -> None:
+    """
+    Adds the installation's device code to its shard of the sketch for its day,
+    product and version, in the caller's transaction.
+    """
+    created: datetime = installation.created or datetime.utcnow()
+    key = {
+        "installation_type": INSTALLATION_TYPES[type(installation)],
+        "day": created.date(),
+        **{dimension: getattr(installation, dimension) for dimension in DIMENSIONS},
+        "shard": shard_of(installation.uuid),
+    }
+    _add_devices(key, [installation.unique_device_code])
+
+
+def shard_of(uuid: str) -> int:
+    """
+    Spreads writes to each sketch over DEVICE_SKETCH_SHARDS rows, so that concurrent
+    installations of the same version don't all wait for one row lock.
+    """
+    shards: int = current_app.config["DEVICE_SKETCH_SHARDS"]
+    return zlib.crc32(uuid.encode()) % shards
+
+
+def record_devices(
+    model: Union[Type[Mobile], Type[Desktop]], uuids: Sequence[str]
+) -> None:
+    """
+    Adds the device codes of the installations with the given UUIDs to the sketches
+    for their current day, product and version, locking each sketch shard once.
+    """
+    rows = db.session.execute(
+        db.select(
+            [
+                model.uuid,
+                model.created,
+                model.unique_device_code,
+                *(getattr(model, dimension) for dimension in DIMENSIONS),
+            ]
+        ).where(model.uuid.in_(uuids))
+    )
+    device_codes: Dict[Tuple, List[str]] = {}
+    for uuid, created, unique_device_code, *values in rows:
+        device_codes.setdefault((created.date(), shard_of(uuid), *values), []).append(
+            unique_device_code
+        )
+    for (day, shard, *values), codes in device_codes.items():
+        key = {
+            "installation_type": INSTALLATION_TYPES[model],
+            "day": day,
+            **dict(zip(DIMENSIONS, values)),
+            "shard": shard,
+        }
+        _add_devices(key, codes)
+
+
+def _add_devices(key: Dict[str, Any], device_codes: Sequence[str]) -> None:
+    precision: int = current_app.config["DEVICE_SKETCH_PRECISION"]
+    db.session.execute(
+        dialect_insert(DeviceSketch.__table__)
+        .values(precision=precision, registers=bytes(1 << precision), **key)
+        .on_conflict_do_nothing()
+    )
+
+    # Lock the row so that concurrent writers don't lose each other's registers.
+    row: DeviceSketch = (
+        db.session.query(DeviceSketch).filter_by(**key).with_for_update().one()
+    )
+    sketch = HyperLogLog(row.precision, row.registers)
+    changed = False
+    for device_code in device_codes:
+        changed = sketch.add(device_code) or changed
+    if changed:
+        row.registers = sketch.to_bytes()
+        _update_month_sketch(row.installation_type, key, sketch)
+
+
+def merge_sketch(key: Dict[str, Any], sketch: HyperLogLog) -> None:
+    """
+    Merges a sketch built elsewhere (e.g. while seeding data) into the first shard
+    of the stored sketch for `key`, at the lower of the two precisions. Doesn't
+    commit.
+    """
+    precision: int = current_app.config["DEVICE_SKETCH_PRECISION"]
+    key = {**key, "shard": 0}
+    db.session.execute(
+        dialect_insert(DeviceSketch.__table__)
+        .values(precision=precision, registers=bytes(1 << precision), **key)
+        .on_conflict_do_nothing()
+    )
+    row: DeviceSketch = (
+        db.session.query(DeviceSketch).filter_by(**key).with_for_update().one()
+    )
+    merged = HyperLogLog(row.precision, row.registers).merge(sketch)
+    row.precision = merged.precision
+    row.registers = merged.to_bytes()
+    _update_month_sketch(row.installation_type, key, merged)
+
+
+def compacted_through(installation_type: str) -> Optional[date]:
+    """
+    Returns the last month with monthly sketches for the installation type. Every
+    month up to and including it has been compacted.
+    """
+    return (
+        db.session.query(db.func.max(DeviceMonthSketch.month))
+        .filter(DeviceMonthSketch.installation_type == installation_type)
+        .scalar()
+    )
+
+
+def _update_month_sketch(
+    installation_type: str, key: Dict[str, Any], sketch: HyperLogLog
+) -> None:
+    # Writes backdated into a compacted month also go into its monthly sketch, which
+    # reads use in place of the month's daily sketches.
+    month: date = key["day"].replace(day=1)
+    if month >= datetime.utcnow().date().replace(day=1):
+        return
+    watermark = compacted_through(installation_type)
+    if watermark is None or month > watermark:
+        return
+    month_key = {
+        "installation_type": installation_type,
+        "month": month,
+        **{dimension: key[dimension] for dimension in DIMENSIONS},
+    }
+    db.session.execute(
+        dialect_insert(DeviceMonthSketch.__table__)
+        .values(
+            precision=sketch.precision,
+            registers=bytes(1 << sketch.precision),
+            **month_key,
+        )
+        .on_conflict_do_nothing()
+    )
+    row: DeviceMonthSketch = (
+        db.session.query(DeviceMonthSketch)
+        .filter_by(**month_key)
+        .with_for_update()
+        .one()
+    )
+    merged = HyperLogLog(row.precision, row.registers).merge(sketch)
+    row.precision = merged.precision
+    row.registers = merged.to_bytes()
+
+
+def _merge_rows(
+    rows: Iterable[Union[DeviceSketch, DeviceMonthSketch]],
+    key: Any,
+    merged: Optional[Dict[Tuple, HyperLogLog]] = None,
+) -> Dict[Tuple, HyperLogLog]:
+    merged = {} if merged is None else merged
+    for row in rows:
+        row_key = key(row)
+        sketch = HyperLogLog(row.precision, row.registers)
+        merged[row_key] = merged[row_key].merge(sketch) if row_key in merged else sketch
+    return merged
+
+
+def _dimensions(row: Union[DeviceSketch, DeviceMonthSketch]) -> Tuple:
+    return tuple(getattr(row, dimension) for dimension in DIMENSIONS)
+
+
+def compact_sketches(today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Folds the shards of each past day's sketches into shard 0, then merges the daily
+    sketches of every complete month after the last compacted one into monthly
+    sketches, committing per day and per month. Daily sketches are kept, so that
+    ranges starting or ending mid-month and per-day results stay exact.
+    """
+    today = today or datetime.utcnow().date()
+    report = {"shards_folded": 0, "months_written": 0}
+
+    days = [
+        day
+        for (day,) in db.session.query(DeviceSketch.day)
+        .filter(DeviceSketch.day < today, DeviceSketch.shard != 0)
+        .distinct()
+        .order_by(DeviceSketch.day)
+    ]
+    for day in days:
+        rows = (
+            db.session.query(DeviceSketch)
+            .filter(DeviceSketch.day == day)
+            .order_by(DeviceSketch.shard)
+            .with_for_update()
+            .all()
+        )
+        folded = _merge_rows(
+            rows, key=lambda row: (row.installation_type, *_dimensions(row))
+        )
+        for row in rows:
+            if row.shard != 0:
+                db.session.delete(row)
+                report["shards_folded"] += 1
+        db.session.flush()
+        for (installation_type, *values), sketch in folded.items():
+            db.session.merge(
+                DeviceSketch(
+                    installation_type=installation_type,
+                    day=day,
+                    **dict(zip(DIMENSIONS, values)),
+                    shard=0,
+                    precision=sketch.precision,
+                    registers=sketch.to_bytes(),
+                )
+            )
+        db.session.commit()
+
+    last_month = add_months(today.replace(day=1), -1)
+    for installation_type in INSTALLATION_TYPES.values():
+        watermark = compacted_through(installation_type)
+        first_day = db.session.query(db.func.min(DeviceSketch.day)).filter(
+            DeviceSketch.installation_type == installation_type
+        )
+        if watermark is not None:
+            first_day = first_day.filter(DeviceSketch.day >= add_months(watermark, 1))
+        start: Optional[date] = first_day.scalar()
+        if start is None:
+            continue
+        month = start.replace(day=1)
+        while month <= last_month:
+            rows = (
+                db.session.query(DeviceSketch)
+                .filter(
+                    DeviceSketch.installation_type == installation_type,
+                    DeviceSketch.day >= month,
+                    DeviceSketch.day < add_months(month, 1),
+                )
+                .with_for_update()
+            )
+            for dimensions, sketch in _merge_rows(rows, key=_dimensions).items():
+                db.session.add(
+                    DeviceMonthSketch(
+                        installation_type=installation_type,
+                        month=month,
+                        **dict(zip(DIMENSIONS, dimensions)),
+                        precision=sketch.precision,
+                        registers=sketch.to_bytes(),
+                    )
+                )
+                report["months_written"] += 1
+            db.session.commit()
+            month = add_months(month, 1)
+    return report
+
+
+def _covered_months(
+    watermark: Optional[date], start_date: Optional[date], end_date: Optional[date]
+) -> Optional[Tuple[Optional[date], date]]:
+    # The first and last compacted months that lie wholly inside the date range, or
+    # None if there aren't any. The first is None for a range without a start.
+    if watermark is None:
+        return None
+    first: Optional[date] = None
+    if start_date is not None:
+        first = start_date.replace(day=1)
+        if start_date.day != 1:
+            first = add_months(first, 1)
+    last = watermark
+    if end_date is not None:
+        end_month = end_date.replace(day=1)
+        if (end_date + timedelta(days=1)).day != 1:
+            end_month = add_months(end_month, -1)
+        last = min(last, end_month)
+    if first is not None and first > last:
+        return None
+    return first, last
+
+
+def distinct_devices(
+    model: Union[Type[Mobile], Type[Desktop]],
+    group_by: Sequence[str],
+    interval: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict]:
+    """
+    Estimates the number of distinct devices in the (inclusive) date range by merging
+    the shards of daily sketches, grouped by the requested dimensions and optionally per day or
+    calendar month. Whole compacted months in the range are read from their monthly
+    sketches, so only the days outside them read daily rows.
+    """
+    for dimension in group_by:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Cannot group devices by '{dimension}'")
+    if interval is not None and interval not in INTERVALS:
+        raise ValueError(f"Unknown interval '{interval}'")
+
+    installation_type = INSTALLATION_TYPES[model]
+    query = db.session.query(DeviceSketch).filter(
+        DeviceSketch.installation_type == installation_type
+    )
+    if start_date is not None:
+        query = query.filter(DeviceSketch.day >= start_date)
+    if end_date is not None:
+        query = query.filter(DeviceSketch.day <= end_date)
+
+    merged: Dict[Tuple, HyperLogLog] = {}
+    covered = None
+    if interval != "day":
+        covered = _covered_months(
+            compacted_through(installation_type), start_date, end_date
+        )
+    if covered is not None:
+        first, last = covered
+        months = db.session.query(DeviceMonthSketch).filter(
+            DeviceMonthSketch.installation_type == installation_type,
+            DeviceMonthSketch.month <= last,
+        )
+        outside = DeviceSketch.day >= add_months(last, 1)
+        if first is not None:
+            months = months.filter(DeviceMonthSketch.month >= first)
+            outside = db.or_(DeviceSketch.day < first, outside)
+        query = query.filter(outside)
+        _merge_rows(
+            months.yield_per(500),
+            key=lambda row: (
+                row.month if interval else None,
+                *(getattr(row, dimension) for dimension in group_by),
+            ),
+            merged=merged,
+        )
+
+    def period(row: DeviceSketch) -> Optional[date]:
+        if interval == "day":
+            return row.day
+        if interval == "month":
+            return row.day.replace(day=1)
+        return None
+
+    _merge_rows(
+        query.yield_per(500),
+        key=lambda row: (
+            period(row),
+            *(getattr(row, dimension) for dimension in group_by),
+        ),
+        merged=merged,
+    )
+
+    return [
+        {
+            **({"period_start": key[0]} if interval else {}),
+            **dict(zip(group_by, key[1:])),
+            "distinct_devices": round(sketch.cardinality()),
+            "standard_error": round(sketch.standard_error, 4),
+        }
+        for key, sketch in sorted(
+            merged.items(), key=lambda item: (item[0][0] or date.min, *item[0][1:])
+        )
+    ]
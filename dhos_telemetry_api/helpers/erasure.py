@@ -0,0 +1,110 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from flask_batteries_included.sqldb import db
+from she_logging import logger
+from sqlalchemy import delete, select, text
+
+from dhos_telemetry_api.helpers import meter_statistics, rollup
+from dhos_telemetry_api.helpers.ingest import ingest_queue
+from dhos_telemetry_api.helpers.retention import LOCK_TIMEOUT
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+BATCH_SIZE = 1000
+
+
+def _delete_in_batches(
+    model: Any,
+    subject_filter: Any,
+    batch_size: int,
+    before_delete: Optional[Callable[[Sequence[str]], None]] = None,
+) -> int:
+    """
+    Deletes the rows matching `subject_filter`, found through the owner index,
+    `batch_size` at a time so that no single statement grows with the size of the
+    subject. Doesn't commit. Returns the number of rows deleted.
+    """
+    deleted = 0
+    while True:
+        batch: List[str] = (
+            db.session.execute(
+                select(model.uuid).where(subject_filter).limit(batch_size)
+            )
+            .scalars()
+            .all()
+        )
+        if not batch:
+            break
+        if before_delete is not None:
+            before_delete(batch)
+        deleted += db.session.execute(
+            delete(model).where(subject_filter, model.uuid.in_(batch))
+        ).rowcount
+        if len(batch) < batch_size:
+            break
+    return deleted
+
+
+def _begin(kinds: Sequence[str], owner_id: str) -> None:
+    # Records still queued for writing would recreate the subject's data.
+    queue = ingest_queue()
+    if queue is not None:
+        discarded = queue.discard(kinds, owner_id)
+        if discarded:
+            logger.info("Discarded %d queued records for erasure", discarded)
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+
+
+def erase_patient(patient_id: str, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """
+    Deletes all of a patient's mobile installations and blood glucose meter
+    verifications in one transaction, and removes them from the installation
+    rollups and meter statistics, including the statistics of meters that no one
+    else has verified. Returns the number of rows deleted per table.
+    """
+    _begin(["mobile", "blood_glucose_meter"], patient_id)
+    serial_numbers: Set[str] = set()
+
+    def remove_verifications(uuids: Sequence[str]) -> None:
+        serial_numbers.update(
+            db.session.execute(
+                select(BloodGlucoseMeter.serial_number)
+                .where(BloodGlucoseMeter.uuid.in_(uuids))
+                .distinct()
+            ).scalars()
+        )
+        meter_statistics.shift_verifications(uuids, -1)
+
+    meters = _delete_in_batches(
+        BloodGlucoseMeter,
+        BloodGlucoseMeter.patient_id == patient_id,
+        batch_size,
+        before_delete=remove_verifications,
+    )
+    meter_statistics.remove_empty_groups("serial_number", serial_numbers)
+    installations = _delete_in_batches(
+        Mobile,
+        Mobile.patient_id == patient_id,
+        batch_size,
+        before_delete=lambda uuids: rollup.shift_installations(Mobile, uuids, -1),
+    )
+    db.session.commit()
+    return {"mobile": installations, "blood_glucose_meter": meters}
+
+
+def erase_clinician(clinician_id: str, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """
+    Deletes all of a clinician's desktop installations in one transaction, and
+    removes them from the installation rollups. Returns the number of rows deleted.
+    """
+    _begin(["desktop"], clinician_id)
+    installations = _delete_in_batches(
+        Desktop,
+        Desktop.clinician_id == clinician_id,
+        batch_size,
+        before_delete=lambda uuids: rollup.shift_installations(Desktop, uuids, -1),
+    )
+    db.session.commit()
+    return {"desktop": installations}
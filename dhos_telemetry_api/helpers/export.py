@@ -0,0 +1,81 @@
+from typing import Any, Iterable, Iterator, List, Tuple
+
+from flask import json
+
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+# Rows fetched per round trip from the server-side cursor, and records per chunk
+# of the response.
+FETCH_SIZE = 500
+CHUNK_RECORDS = 100
+
+
+def _stream_document(
+    subject: Tuple[str, str], sections: Iterable[Tuple[str, Any]]
+) -> Iterator[str]:
+    """
+    Yields a JSON object with the subject's id and, for each section, an array of
+    the records returned by its query, a chunk at a time. Only one chunk of
+    records is held in memory.
+    """
+    key, value = subject
+    yield "{" + f"{json.dumps(key)}: {json.dumps(value)}"
+    for name, query in sections:
+        yield f", {json.dumps(name)}: ["
+        chunk: List[str] = []
+        first = True
+        # yield_per streams results from a server-side cursor on Postgres.
+        for record in query.yield_per(FETCH_SIZE):
+            chunk.append(json.dumps(record.to_dict()))
+            if len(chunk) == CHUNK_RECORDS:
+                yield ("" if first else ", ") + ", ".join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield ("" if first else ", ") + ", ".join(chunk)
+        yield "]"
+    yield "}\n"
+
+
+def export_patient(patient_id: str) -> Iterator[str]:
+    """
+    Streams all of a patient's mobile installations and blood glucose meter
+    verifications as one JSON document, each read in (patient_id, ...) index order.
+    """
+    return _stream_document(
+        ("patient_id", patient_id),
+        [
+            (
+                "mobile",
+                Mobile.query.filter(Mobile.patient_id == patient_id).order_by(
+                    Mobile.date_first_launched_, Mobile.uuid
+                ),
+            ),
+            (
+                "blood_glucose_meter",
+                BloodGlucoseMeter.query.filter(
+                    BloodGlucoseMeter.patient_id == patient_id
+                ).order_by(BloodGlucoseMeter.date_verified, BloodGlucoseMeter.uuid),
+            ),
+        ],
+    )
+
+
+def export_clinician(clinician_id: str) -> Iterator[str]:
+    """
+    Streams all of a clinician's desktop installations as one JSON document, read
+    in (clinician_id, date_first_used_) index order.
+    """
+    return _stream_document(
+        ("clinician_id", clinician_id),
+        [
+            (
+                "desktop",
+                Desktop.query.filter(Desktop.clinician_id == clinician_id).order_by(
+                    Desktop.date_first_used_, Desktop.uuid
+                ),
+            )
+        ],
+    )
@@ -0,0 +1,90 @@
+import hashlib
+import math
+from typing import Optional
+
+_HASH_BITS = 64
+
+
+class HyperLogLog:
+    """
+    A HyperLogLog sketch for approximate distinct counts.
+
+    The sketch keeps 2**precision one-byte registers, so it can be stored as a
+    bytes value and merged with any other sketch by taking the register-wise
+    maximum. Sketches of different precisions are merged by folding the more
+    precise one down. The relative standard error of an estimate is
+    1.04 / sqrt(2**precision).
+    """
+
+    def __init__(self, precision: int, registers: Optional[bytes] = None) -> None:
+        self.precision = precision
+        self.registers = bytearray(registers or bytes(1 << precision))
+        if len(self.registers) != 1 << precision:
+            raise ValueError(f"Expected {1 << precision} registers for precision")
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, value: str) -> bool:
+        """
+        Adds a value to the sketch, returning True if any register changed.
+        """
+        hashed = int.from_bytes(
+            hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        remaining_bits = _HASH_BITS - self.precision
+        index = hashed >> remaining_bits
+        remainder = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - remainder.bit_length() + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def folded(self, precision: int) -> "HyperLogLog":
+        """
+        Returns an equivalent sketch with fewer registers.
+        """
+        if precision > self.precision:
+            raise ValueError("Cannot fold a sketch to a higher precision")
+        shift = self.precision - precision
+        folded = HyperLogLog(precision)
+        for index, rank in enumerate(self.registers):
+            if rank == 0:
+                continue
+            # The low bits of the old index become the leading bits of the new
+            # remainder, so they contribute to the rank when non-zero.
+            low_bits = index & ((1 << shift) - 1)
+            new_rank = shift - low_bits.bit_length() + 1 if low_bits else rank + shift
+            new_index = index >> shift
+            if new_rank > folded.registers[new_index]:
+                folded.registers[new_index] = new_rank
+        return folded
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Returns the union of this sketch and another.
+        """
+        precision = min(self.precision, other.precision)
+        left = self if self.precision == precision else self.folded(precision)
+        right = other if other.precision == precision else other.folded(precision)
+        return HyperLogLog(
+            precision,
+            bytes(max(a, b) for a, b in zip(left.registers, right.registers)),
+        )
+
+    def cardinality(self) -> float:
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / sum(2.0**-rank for rank in self.registers)
+
+        # Linear counting is more accurate for small cardinalities.
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return estimate
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
@@ -0,0 +1,572 @@
+import atexit
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from flask import Flask, current_app, json
+from flask_batteries_included.helpers import generate_uuid
+from flask_batteries_included.helpers.security.jwt import current_jwt_user
+from flask_batteries_included.sqldb import db
+from she_logging import logger
+from sqlalchemy import inspect, select
+from sqlalchemy.exc import (
+    DataError,
+    DBAPIError,
+    DisconnectionError,
+    IntegrityError,
+    InterfaceError,
+    OperationalError,
+)
+
+from dhos_telemetry_api.helpers import device_sketch, meter_statistics, rollup
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+# Builds an unsaved model instance from an owner id and a validated request body.
+Builder = Callable[[str, Dict], Any]
+
+MODELS: Dict[str, Any] = {
+    "mobile": Mobile,
+    "desktop": Desktop,
+    "blood_glucose_meter": BloodGlucoseMeter,
+}
+
+JOURNAL_PATTERN = "ingest-*.jsonl*"
+
+
+def is_unavailable(error: Exception) -> bool:
+    """
+    Whether a write failed because the database couldn't be reached or couldn't
+    serve it (connection lost, server shutting down, lock timeouts and so on),
+    rather than because of the records written.
+    """
+    if isinstance(error, (OperationalError, InterfaceError, DisconnectionError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+class IngestRecord:
+    def __init__(
+        self,
+        kind: str,
+        owner_id: str,
+        payload: Dict,
+        uuid: str,
+        created: datetime,
+        user: str,
+    ) -> None:
+        self.kind = kind
+        self.owner_id = owner_id
+        self.payload = payload
+        self.uuid = uuid
+        self.created = created
+        self.user = user
+        self.row: Dict[str, Any] = {}
+        self.journal: Optional[Path] = None
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "kind": self.kind,
+                "owner_id": self.owner_id,
+                "payload": self.payload,
+                "uuid": self.uuid,
+                "created": self.created.isoformat(),
+                "user": self.user,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "IngestRecord":
+        data = json.loads(line)
+        return cls(
+            kind=data["kind"],
+            owner_id=data["owner_id"],
+            payload=data["payload"],
+            uuid=data["uuid"],
+            created=datetime.fromisoformat(data["created"]),
+            user=data["user"],
+        )
+
+
+def build_row(record: IngestRecord, builder: Builder) -> Dict[str, Any]:
+    """
+    Converts a record into the column values of its row, running the model's
+    setters, hybrids and validators on a transient instance as a synchronous create
+    would. Every column is present, so rows of the same kind share one INSERT.
+    """
+    instance = builder(record.owner_id, dict(record.payload))
+    instance.uuid = record.uuid
+    instance.created = instance.modified = record.created
+    instance.created_by_ = instance.modified_by_ = record.user
+    state = inspect(instance)
+    row = {}
+    for prop in state.mapper.column_attrs:
+        added = state.attrs[prop.key].history.added
+        row[prop.columns[0].name] = added[0] if added else None
+    return row
+
+
+def count_rows(model: Any, uuids: Sequence[str]) -> None:
+    """
+    Adds newly inserted rows to the installation rollups and device sketches, or
+    to the meter statistics. Doesn't commit.
+    """
+    if model is BloodGlucoseMeter:
+        meter_statistics.shift_verifications(uuids, 1)
+    else:
+        rollup.shift_installations(model, uuids, 1)
+        device_sketch.record_devices(model, uuids)
+
+
+def write_records(records: List[IngestRecord]) -> None:
+    """
+    Inserts a batch of records with one executemany per kind, which psycopg2 sends
+    as multi-row INSERTs, and counts them in the rollups, device sketches and meter
+    statistics, in one transaction. Records that are already stored (e.g. replayed
+    from a journal) are skipped, so writing a record twice is harmless.
+    """
+    by_kind: Dict[str, List[IngestRecord]] = {}
+    for record in records:
+        by_kind.setdefault(record.kind, []).append(record)
+
+    for kind, kind_records in by_kind.items():
+        model = MODELS[kind]
+        existing = set(
+            db.session.execute(
+                select(model.uuid).where(
+                    model.uuid.in_([record.uuid for record in kind_records])
+                )
+            ).scalars()
+        )
+        rows = [record.row for record in kind_records if record.uuid not in existing]
+        if not rows:
+            continue
+        db.session.execute(model.__table__.insert(), rows)
+        count_rows(model, [row["uuid"] for row in rows])
+    db.session.commit()
+
+
+class IngestQueue:
+    """
+    An in-process write-behind queue. Request handlers enqueue validated records
+    and a background thread writes them in batches of `batch_size`, or whatever
+    has arrived after `flush_interval` seconds. With a journal directory, each
+    record is appended to a journal file before it's acknowledged, and journals
+    left by a process that died are written when the queue next starts. Failed
+    batches stay at the head of the queue and are retried after an exponential
+    backoff of up to `max_backoff` seconds. While the database is unavailable they
+    are retried indefinitely; a batch that fails for any other reason
+    `max_retries` times in a row is written record by record, and the records that
+    still fail are moved to a dead-letter journal.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        builders: Dict[str, Builder],
+        batch_size: int,
+        flush_interval: float,
+        max_size: int,
+        journal_dir: Optional[Path] = None,
+        fsync: bool = True,
+        max_retries: int = 5,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self._app = app
+        self._builders = builders
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.journal_dir = journal_dir
+        self.fsync = fsync
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+
+        self._records: Deque[IngestRecord] = deque()
+        self._condition = threading.Condition()
+        # Held while a batch is being written, so records can be discarded safely.
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._replayed = threading.Event()
+        # Consecutive failed flushes, and those of them not due to an outage.
+        self._attempts = 0
+        self._failures = 0
+        self._accepting = True
+        self._stopping = False
+
+        self._journal: Optional[Path] = None
+        self._journal_file: Optional[IO[str]] = None
+        self._journal_records = 0
+        self._journal_sequence = 0
+        self._outstanding: Dict[Path, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def enqueue(self, kind: str, owner_id: str, payload: Dict) -> Optional[str]:
+        """
+        Validates and queues a record, returning its UUID, or None if the queue is
+        full or draining and the caller should write the record itself.
+        """
+        if not self._accepting or len(self._records) >= self.max_size:
+            return None
+        self.start()
+
+        record = IngestRecord(
+            kind=kind,
+            owner_id=owner_id,
+            payload=payload,
+            uuid=generate_uuid(),
+            created=datetime.utcnow(),
+            user=current_jwt_user(),
+        )
+        # Invalid bodies fail here, while the client is still waiting.
+        record.row = build_row(record, self._builders[kind])
+
+        with self._condition:
+            if not self._accepting or len(self._records) >= self.max_size:
+                return None
+            if self.journal_dir is not None:
+                self._append_to_journal(record)
+            self._records.append(record)
+            if len(self._records) >= self.batch_size:
+                self._condition.notify()
+        return record.uuid
+
+    def start(self) -> None:
+        """
+        Starts the flusher thread, once, which first replays orphaned journals.
+        Called on the first enqueue so that CLI commands and migrations never start a
+        thread.
+        """
+        if self._thread is not None:
+            return
+        with self._condition:
+            if self._thread is not None:
+                return
+            journals: List[Path] = []
+            if self.journal_dir is not None:
+                self.journal_dir.mkdir(parents=True, exist_ok=True)
+                # Listed now, before this queue starts journals of its own.
+                journals = sorted(self.journal_dir.glob(JOURNAL_PATTERN))
+            self._thread = threading.Thread(
+                target=self._run, args=(journals,), name="ingest-flusher", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.drain)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stops accepting records and waits up to `timeout` seconds (default: the
+        app's ASYNC_INGEST_DRAIN_SECONDS) for the queue to be written. Returns
+        whether it was emptied; anything left is still in the journal, if any.
+        """
+        if timeout is None:
+            timeout = self._app.config["ASYNC_INGEST_DRAIN_SECONDS"]
+        with self._condition:
+            self._accepting = False
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._records:
+            logger.warning("Ingest queue drained with %d records left", len(self))
+            return False
+        return True
+
+    def retry_delay(self) -> float:
+        """
+        Seconds to wait before retrying after the failed flushes so far: doubling
+        from the flush interval, up to `max_backoff`.
+        """
+        if self._attempts == 0:
+            return self.flush_interval
+        doublings = min(self._attempts - 1, 32)
+        return min(self.flush_interval * 2**doublings, self.max_backoff)
+
+    def flush(self) -> int:
+        """
+        Writes the records at the head of the queue, up to one batch, and releases
+        them. Returns the number of records written or dead-lettered. Raises if the
+        batch failed and will be retried, which it always is while the database is
+        unavailable.
+        """
+        with self._flush_lock:
+            with self._condition:
+                batch = [
+                    self._records[index]
+                    for index in range(min(self.batch_size, len(self._records)))
+                ]
+            if not batch:
+                return 0
+            try:
+                try:
+                    write_records(batch)
+                except (DataError, IntegrityError):
+                    db.session.rollback()
+                    self._write_individually(batch)
+                except Exception as error:
+                    db.session.rollback()
+                    # An outage isn't the records' fault, however long it lasts.
+                    if is_unavailable(error):
+                        raise
+                    # e.g. a record fails in a way that retrying won't fix.
+                    self._failures += 1
+                    if self._failures <= self.max_retries:
+                        raise
+                    logger.exception(
+                        "Failed to write queued records %d times", self._failures
+                    )
+                    self._write_individually(batch)
+            except Exception:
+                self._attempts += 1
+                raise
+            self._attempts = 0
+            self._failures = 0
+            self._release(len(batch))
+            return len(batch)
+
+    def discard(self, kinds: Sequence[str], owner_id: str) -> int:
+        """
+        Removes the queued records of `kinds` for `owner_id`, e.g. before the
+        subject's data is erased, and rewrites the journals and dead-letter journal
+        holding them. Waits for any batch being written, so none of them can be
+        written afterwards. Returns the number of queued records removed.
+        """
+
+        def owned(record: IngestRecord) -> bool:
+            return record.kind in kinds and record.owner_id == owner_id
+
+        with self._flush_lock, self._condition:
+            dead_letters = self._dead_letters()
+            if dead_letters is not None and dead_letters.exists():
+                self._rewrite_journal(dead_letters, owned)
+            discarded = [record for record in self._records if owned(record)]
+            if not discarded:
+                return 0
+            uuids = {record.uuid for record in discarded}
+            self._records = deque(
+                record for record in self._records if record.uuid not in uuids
+            )
+
+            journals = set()
+            for record in discarded:
+                if record.journal is not None:
+                    self._outstanding[record.journal] -= 1
+                    journals.add(record.journal)
+            if self._journal in journals:
+                # The open journal is about to be rewritten, so start another.
+                self._close_journal()
+            for journal in journals:
+                if journal not in self._outstanding:
+                    continue
+                if self._outstanding[journal] == 0:
+                    del self._outstanding[journal]
+                    journal.unlink(missing_ok=True)
+                else:
+                    self._rewrite_journal(journal, lambda record: record.uuid in uuids)
+        return len(discarded)
+
+    def _rewrite_journal(
+        self, journal: Path, remove: Callable[[IngestRecord], bool]
+    ) -> None:
+        kept = []
+        for line in journal.read_text().splitlines():
+            try:
+                if not remove(IngestRecord.from_json(line)):
+                    kept.append(line + "\n")
+            except ValueError:
+                continue
+        # The leading dot keeps the temporary file out of JOURNAL_PATTERN.
+        rewritten = journal.with_name(f".{journal.name}")
+        with rewritten.open("w") as file:
+            file.writelines(kept)
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+        rewritten.replace(journal)
+
+    def _write_individually(self, batch: List[IngestRecord]) -> None:
+        # One bad record mustn't block the rest of its batch forever. If the database
+        # becomes unavailable the batch is retried, skipping the records written.
+        for record in batch:
+            try:
+                write_records([record])
+            except Exception as error:
+                db.session.rollback()
+                if is_unavailable(error):
+                    raise
+                logger.exception(
+                    "Failed to write queued %s record %s", record.kind, record.uuid
+                )
+                self._dead_letter(record)
+
+    def _dead_letters(self) -> Optional[Path]:
+        if self.journal_dir is None:
+            return None
+        return self.journal_dir / f"dead-{os.getpid()}.jsonl"
+
+    def _dead_letter(self, record: IngestRecord) -> None:
+        dead_letters = self._dead_letters()
+        if dead_letters is None:
+            logger.error("Dropping queued %s record %s", record.kind, record.uuid)
+            return
+        with dead_letters.open("a") as file:
+            file.write(record.to_json() + "\n")
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+
+    def _run(self, journals: List[Path]) -> None:
+        with self._app.app_context():
+            # Erasure waits for the replay, so it can discard replayed records.
+            try:
+                with self._flush_lock:
+                    self._replay_journals(journals)
+            finally:
+                db.session.remove()
+            self._replayed.set()
+            while True:
+                with self._condition:
+                    if not self._stopping:
+                        self._condition.wait_for(
+                            lambda: self._stopping
+                            or len(self._records) >= self.batch_size,
+                            timeout=self.flush_interval,
+                        )
+                    if not self._records and self._stopping:
+                        self._close_journal()
+                        return
+                try:
+                    self.flush()
+                except Exception:
+                    # e.g. the database is unavailable; keep the records and retry.
+                    db.session.rollback()
+                    delay = self.retry_delay()
+                    logger.exception(
+                        "Failed to write queued records, retrying in %.1fs", delay
+                    )
+                    with self._condition:
+                        self._condition.wait_for(lambda: self._stopping, timeout=delay)
+                finally:
+                    db.session.remove()
+
+    def _release(self, count: int) -> None:
+        with self._condition:
+            for _ in range(count):
+                journal = self._records.popleft().journal
+                if journal is None:
+                    continue
+                self._outstanding[journal] -= 1
+                if self._outstanding[journal] == 0 and journal != self._journal:
+                    del self._outstanding[journal]
+                    journal.unlink(missing_ok=True)
+
+    def _append_to_journal(self, record: IngestRecord) -> None:
+        if self._journal_file is None or self._journal_records >= self.batch_size:
+            self._rotate_journal()
+        assert self._journal is not None and self._journal_file is not None
+        self._journal_file.write(record.to_json() + "\n")
+        self._journal_file.flush()
+        if self.fsync:
+            os.fsync(self._journal_file.fileno())
+        self._journal_records += 1
+        self._outstanding[self._journal] = self._outstanding.get(self._journal, 0) + 1
+        record.journal = self._journal
+
+    def _rotate_journal(self) -> None:
+        # Journals hold about one batch each, so they can be deleted once written.
+        self._close_journal()
+        assert self.journal_dir is not None
+        self._journal_sequence += 1
+        self._journal = (
+            self.journal_dir / f"ingest-{os.getpid()}-{self._journal_sequence}.jsonl"
+        )
+        self._journal_file = self._journal.open("a")
+        self._journal_records = 0
+        self._outstanding[self._journal] = 0
+
+    def _close_journal(self) -> None:
+        if self._journal_file is None or self._journal is None:
+            return
+        self._journal_file.close()
+        if self._outstanding.get(self._journal) == 0:
+            del self._outstanding[self._journal]
+            self._journal.unlink(missing_ok=True)
+        self._journal_file = None
+        self._journal = None
+
+    def _replay_journals(self, journals: List[Path]) -> None:
+        # Runs on the flusher thread without holding the queue's lock, so that
+        # building rows doesn't hold up requests enqueueing records.
+        for path in journals:
+            pid = int(path.name.split("-")[1])
+            if pid != os.getpid() and _is_running(pid):
+                continue
+            # Renaming claims the journal, so only one process replays it.
+            claimed = path.with_name(f"{path.name}.replay-{os.getpid()}")
+            try:
+                path.rename(claimed)
+            except FileNotFoundError:
+                continue
+            records = []
+            for line in claimed.read_text().splitlines():
+                # A torn final line was never acknowledged.
+                try:
+                    record = IngestRecord.from_json(line)
+                except ValueError:
+                    continue
+                try:
+                    record.row = build_row(record, self._builders[record.kind])
+                except Exception:
+                    db.session.rollback()
+                    logger.exception(
+                        "Failed to replay queued %s record %s", record.kind, record.uuid
+                    )
+                    self._dead_letter(record)
+                    continue
+                record.journal = claimed
+                records.append(record)
+            if not records:
+                claimed.unlink()
+                continue
+            logger.info("Replaying %d queued records from %s", len(records), path)
+            with self._condition:
+                self._records.extend(records)
+                self._outstanding[claimed] = len(records)
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def init_ingest(app: Flask, builders: Dict[str, Builder]) -> None:
+    if not app.config["ASYNC_INGEST"]:
+        return
+    journal_dir: str = app.config["ASYNC_INGEST_JOURNAL_DIR"]
+    app.extensions["ingest_queue"] = IngestQueue(
+        app,
+        builders,
+        batch_size=app.config["ASYNC_INGEST_BATCH_SIZE"],
+        flush_interval=app.config["ASYNC_INGEST_FLUSH_MILLISECONDS"] / 1000,
+        max_size=app.config["ASYNC_INGEST_MAX_QUEUE"],
+        journal_dir=Path(journal_dir) if journal_dir else None,
+        fsync=app.config["ASYNC_INGEST_FSYNC"],
+        max_retries=app.config["ASYNC_INGEST_MAX_RETRIES"],
+        max_backoff=app.config["ASYNC_INGEST_MAX_BACKOFF_SECONDS"],
+    )
+
+
+def ingest_queue() -> Optional[IngestQueue]:
+    return current_app.extensions.get("ingest_queue")
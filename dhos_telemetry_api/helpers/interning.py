@@ -0,0 +1,83 @@
+import time
+from typing import Any, Dict, Optional, Tuple, Type, Union
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import case, literal, select
+
+from dhos_telemetry_api.helpers.retention import Progress
+from dhos_telemetry_api.helpers.sql import dialect_insert
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.installation_dimension import InstallationDimension
+from dhos_telemetry_api.models.mobile import Mobile
+
+INTERNED_COLUMNS: Dict[Any, Tuple[str, ...]] = {
+    Mobile: ("app_product", "phone_os", "manufacturer", "model", "display_name"),
+    Desktop: ("desktop_os",),
+}
+
+
+def intern_existing(
+    model: Union[Type[Mobile], Type[Desktop]],
+    batch_size: int,
+    pause_seconds: float,
+    progress: Optional[Progress] = None,
+) -> int:
+    """
+    Moves inline dimension strings of existing installations into
+    installation_dimension, `batch_size` rows per transaction. Returns the number
+    of installations converted.
+    """
+    dimension = InstallationDimension.__table__
+    for name in INTERNED_COLUMNS[model]:
+        inline = getattr(model, f"{name}_")
+        db.session.execute(
+            dialect_insert(dimension)
+            .from_select(
+                ["name", "value"],
+                select(literal(name), inline).where(inline.isnot(None)).distinct(),
+            )
+            .on_conflict_do_nothing(index_elements=["name", "value"])
+        )
+    db.session.commit()
+
+    values = {}
+    for name in INTERNED_COLUMNS[model]:
+        inline = getattr(model, f"{name}_")
+        values[getattr(model, f"{name}_id")] = case(
+            (inline.is_(None), getattr(model, f"{name}_id")),
+            else_=select(dimension.c.id)
+            .where(dimension.c.name == name, dimension.c.value == inline)
+            .scalar_subquery(),
+        )
+        values[inline] = None
+    has_inline_values = db.or_(
+        *(getattr(model, f"{name}_").isnot(None) for name in INTERNED_COLUMNS[model])
+    )
+
+    scanned = 0
+    converted = 0
+    last_uuid: Optional[str] = None
+    while True:
+        batch_query = select(model.uuid).order_by(model.uuid).limit(batch_size)
+        if last_uuid is not None:
+            batch_query = batch_query.where(model.uuid > last_uuid)
+        batch = db.session.execute(batch_query).scalars().all()
+        if not batch:
+            break
+        last_uuid = batch[-1]
+
+        converted += db.session.execute(
+            model.__table__.update()
+            .where(model.uuid.in_(batch), has_inline_values)
+            .values(values)
+        ).rowcount
+        db.session.commit()
+
+        scanned += len(batch)
+        if progress is not None:
+            progress(scanned, converted)
+        if len(batch) < batch_size:
+            break
+        time.sleep(pause_seconds)
+
+    return converted
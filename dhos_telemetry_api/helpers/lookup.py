@@ -0,0 +1,89 @@
+from typing import Any, Dict, List, Optional, Type, Union
+
+from flask_batteries_included.sqldb import db
+
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+MAX_LIMIT = 1000
+
+
+def _matching(column: Any, value: str, prefix: bool) -> Any:
+    if not value:
+        raise ValueError(f"Cannot search by an empty {column.key}")
+    if not prefix:
+        return column == value
+    # A constant 'prefix%' pattern lets Postgres use the text_pattern_ops index.
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.like(f"{escaped}%", escape="\\")
+
+
+def _check_limit(limit: int) -> None:
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+
+
+def installations_by_device_code(
+    model: Union[Type[Mobile], Type[Desktop]],
+    unique_device_code: str,
+    prefix: bool = False,
+    limit: int = 100,
+) -> List[Dict]:
+    """
+    Returns installations with a unique_device_code equal to (or, with `prefix`,
+    starting with) the one given, most recently created first.
+    """
+    _check_limit(limit)
+    installations = (
+        model.query.filter(
+            _matching(model.unique_device_code, unique_device_code, prefix)
+        )
+        .order_by(model.unique_device_code, model.created.desc())
+        .limit(limit)
+    )
+    return [installation.to_dict() for installation in installations]
+
+
+def meters_by_serial_number(
+    serial_number: str, prefix: bool = False, limit: int = 100
+) -> List[Dict]:
+    """
+    Returns blood glucose meter verifications with a serial_number equal to (or,
+    with `prefix`, starting with) the one given, most recently created first.
+    """
+    _check_limit(limit)
+    meters = (
+        BloodGlucoseMeter.query.filter(
+            _matching(BloodGlucoseMeter.serial_number, serial_number, prefix)
+        )
+        .order_by(BloodGlucoseMeter.serial_number, BloodGlucoseMeter.created.desc())
+        .limit(limit)
+    )
+    return [meter.to_dict() for meter in meters]
+
+
+def latest_meters(patient_id: str, mobile_id: Optional[str] = None) -> List[Dict]:
+    """
+    Returns the latest verification of each of a patient's blood glucose meters,
+    optionally only those paired with a mobile installation, in serial number order.
+    """
+    query = BloodGlucoseMeter.query.filter(BloodGlucoseMeter.patient_id == patient_id)
+    if mobile_id is not None:
+        query = query.filter(BloodGlucoseMeter.mobile_id == mobile_id)
+    query = query.order_by(
+        BloodGlucoseMeter.serial_number,
+        BloodGlucoseMeter.date_verified.desc(),
+        BloodGlucoseMeter.created.desc(),
+    )
+
+    if db.engine.dialect.name == "postgresql":
+        # Reads the (patient_id|mobile_id, serial_number, date_verified DESC) index
+        # in order and keeps the first row of each meter.
+        meters = query.distinct(BloodGlucoseMeter.serial_number).all()
+    else:
+        latest: Dict[str, BloodGlucoseMeter] = {}
+        for meter in query:
+            latest.setdefault(meter.serial_number, meter)
+        meters = list(latest.values())
+    return [meter.to_dict() for meter in meters]
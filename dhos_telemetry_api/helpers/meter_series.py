@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import case, func, select
+
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+
+INTERVALS: Dict[str, timedelta] = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+MAX_BUCKETS = 2000
+
+# strftime() arguments giving the start of the (UTC) hour, day or ISO week.
+_SQLITE_BUCKETS: Dict[str, List[str]] = {
+    "hour": ["%Y-%m-%d %H:00:00"],
+    "day": ["%Y-%m-%d 00:00:00"],
+    "week": ["%Y-%m-%d 00:00:00", "weekday 0", "-6 days"],
+}
+
+
+def _bucket(interval: str) -> Any:
+    if db.engine.dialect.name == "postgresql":
+        return func.date_trunc(
+            interval, func.timezone("UTC", BloodGlucoseMeter.date_verified)
+        )
+    format_, *modifiers = _SQLITE_BUCKETS[interval]
+    return func.strftime(format_, BloodGlucoseMeter.date_verified, *modifiers)
+
+
+def _period_start(value: Any) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=timezone.utc)
+
+
+def meter_series(
+    patient_id: str,
+    start: datetime,
+    end: datetime,
+    interval: str = "day",
+    serial_number: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Returns a patient's blood glucose meter verifications in [start, end) summarised
+    per meter and per UTC hour, day or week, in time order. Only non-empty periods
+    are included. Value statistics are null for periods without any readings.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval '{interval}'")
+    if end <= start:
+        raise ValueError("end must be after start")
+    if (end - start) / INTERVALS[interval] > MAX_BUCKETS:
+        raise ValueError(
+            f"Range covers more than {MAX_BUCKETS} {interval}s, use a longer interval"
+        )
+
+    bucket = _bucket(interval).label("period_start")
+    query = (
+        select(
+            bucket,
+            BloodGlucoseMeter.serial_number,
+            func.count().label("verification_count"),
+            func.sum(
+                case((BloodGlucoseMeter.is_bg_value_correct.is_(True), 1), else_=0)
+            ).label("correct_count"),
+            func.sum(
+                case((BloodGlucoseMeter.is_bg_value_correct.is_(False), 1), else_=0)
+            ).label("incorrect_count"),
+            func.min(BloodGlucoseMeter.blood_glucose_value).label("value_min"),
+            func.max(BloodGlucoseMeter.blood_glucose_value).label("value_max"),
+            func.avg(BloodGlucoseMeter.blood_glucose_value).label("value_mean"),
+        )
+        # A range scan of the (patient_id, date_verified) index.
+        .where(
+            BloodGlucoseMeter.patient_id == patient_id,
+            BloodGlucoseMeter.date_verified >= start,
+            BloodGlucoseMeter.date_verified < end,
+        )
+        .group_by(bucket, BloodGlucoseMeter.serial_number)
+        .order_by(bucket, BloodGlucoseMeter.serial_number)
+    )
+    if serial_number is not None:
+        query = query.where(BloodGlucoseMeter.serial_number == serial_number)
+
+    return [
+        {
+            "period_start": _period_start(row.period_start),
+            "serial_number": row.serial_number,
+            "verification_count": row.verification_count,
+            "correct_count": row.correct_count,
+            "incorrect_count": row.incorrect_count,
+            "value_min": row.value_min,
+            "value_max": row.value_max,
+            # Readings are optional, so a period may have none.
+            "value_mean": None if row.value_mean is None else round(row.value_mean, 2),
+        }
+        for row in db.session.execute(query)
+    ]
@@ -0,0 +1,378 @@
+import math
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from flask_batteries_included.sqldb import db
+from sqlalchemy import Integer, case, cast, func, literal, tuple_
+
+from dhos_telemetry_api.helpers.sql import upsert_increments
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.blood_glucose_meter_statistics import (
+    BloodGlucoseMeterHistogram,
+    BloodGlucoseMeterStatistics,
+)
+
+GROUP_TYPES: Tuple[str, ...] = ("app_version", "serial_number")
+PERCENTILES: Tuple[int, ...] = (5, 25, 50, 75, 95)
+
+# Fixed-width bins of blood glucose values (mmol/L). The last bin also holds any
+# values above the histogram range.
+HISTOGRAM_BIN_WIDTH = 0.5
+HISTOGRAM_BINS = 80
+
+SUMMED_COLUMNS: Tuple[str, ...] = (
+    "verification_count",
+    "correct_count",
+    "incorrect_count",
+    "value_count",
+    "value_sum",
+    "value_sum_of_squares",
+)
+
+
+def snapshot(meter: BloodGlucoseMeter) -> Dict[str, Any]:
+    return {
+        "app_version": meter.app_version,
+        "serial_number": meter.serial_number,
+        "is_bg_value_correct": meter.is_bg_value_correct,
+        "blood_glucose_value": meter.blood_glucose_value,
+        "shard": shard_of(meter.uuid),
+    }
+
+
+def shard_of(uuid: str) -> int:
+    """
+    Spreads the statistics of each group over METER_STATISTICS_SHARDS rows, summed
+    when read, so that concurrent verifications of the same app version don't all
+    wait for one row lock.
+    """
+    shards: int = current_app.config["METER_STATISTICS_SHARDS"]
+    return zlib.crc32(uuid.encode()) % shards
+
+
+def _bin(value: float) -> int:
+    return min(max(int(value // HISTOGRAM_BIN_WIDTH), 0), HISTOGRAM_BINS - 1)
+
+
+def _increments(
+    correct: Optional[bool], value: Optional[float], sign: int
+) -> Dict[str, Any]:
+    return {
+        "verification_count": sign,
+        "correct_count": sign if correct is True else 0,
+        "incorrect_count": sign if correct is False else 0,
+        "value_count": sign if value is not None else 0,
+        "value_sum": sign * value if value is not None else 0.0,
+        "value_sum_of_squares": sign * value * value if value is not None else 0.0,
+    }
+
+
+def _accumulate(verification: Dict[str, Any], sign: int) -> None:
+    correct: Optional[bool] = verification["is_bg_value_correct"]
+    value: Optional[float] = verification["blood_glucose_value"]
+
+    for group_type in GROUP_TYPES:
+        key = {
+            "group_type": group_type,
+            "group_value": verification[group_type],
+            "shard": verification["shard"],
+        }
+        upsert_increments(
+            BloodGlucoseMeterStatistics,
+            key=key,
+            increments=_increments(correct, value, sign),
+        )
+        if value is not None:
+            upsert_increments(
+                BloodGlucoseMeterHistogram,
+                key={**key, "bin": _bin(value)},
+                increments={"value_count": sign},
+            )
+
+
+def record_verification(meter: BloodGlucoseMeter) -> None:
+    """
+    Adds a new meter verification to the statistics, in the caller's transaction.
+    """
+    _accumulate(snapshot(meter), 1)
+
+
+def update_verification(meter: BloodGlucoseMeter, previous: Dict[str, Any]) -> None:
+    """
+    Replaces the contribution of a meter verification described by `previous` (as
+    returned by `snapshot` before the update) with its current values.
+    """
+    current = snapshot(meter)
+    if current == previous:
+        return
+    _accumulate(previous, -1)
+    _accumulate(current, 1)
+
+
+def shift_verifications(uuids: Sequence[str], sign: int) -> None:
+    """
+    Adds (sign 1) or removes (sign -1) the contributions of the meter verifications
+    with the given UUIDs, aggregated per group and shard, in the caller's
+    transaction. Bulk updates remove rows before changing them and add them back
+    after.
+    """
+    meters = db.session.execute(
+        db.select(
+            [
+                BloodGlucoseMeter.uuid,
+                *(getattr(BloodGlucoseMeter, group_type) for group_type in GROUP_TYPES),
+                BloodGlucoseMeter.is_bg_value_correct,
+                BloodGlucoseMeter.blood_glucose_value,
+            ]
+        ).where(BloodGlucoseMeter.uuid.in_(uuids))
+    )
+    statistics: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+    bins: Dict[Tuple[str, str, int, int], int] = {}
+    for uuid, *group_values, correct, value in meters:
+        shard = shard_of(uuid)
+        increments = _increments(correct, value, sign)
+        for group_type, group_value in zip(GROUP_TYPES, group_values):
+            key = (group_type, group_value, shard)
+            totals = statistics.setdefault(key, dict.fromkeys(increments, 0))
+            for column, increment in increments.items():
+                totals[column] += increment
+            if value is not None:
+                bin_key = (*key, _bin(value))
+                bins[bin_key] = bins.get(bin_key, 0) + sign
+
+    for (group_type, group_value, shard), totals in statistics.items():
+        upsert_increments(
+            BloodGlucoseMeterStatistics,
+            key={"group_type": group_type, "group_value": group_value, "shard": shard},
+            increments=totals,
+        )
+    for (group_type, group_value, shard, value_bin), count in bins.items():
+        upsert_increments(
+            BloodGlucoseMeterHistogram,
+            key={
+                "group_type": group_type,
+                "group_value": group_value,
+                "shard": shard,
+                "bin": value_bin,
+            },
+            increments={"value_count": count},
+        )
+
+
+def remove_empty_groups(group_type: str, group_values: Iterable[str]) -> None:
+    """
+    Deletes the statistics and histogram rows of the given groups that no longer
+    count any verifications, e.g. so that an erased patient's meter serial numbers
+    aren't kept. Doesn't commit.
+    """
+    group_values = list(group_values)
+    if not group_values:
+        return
+    counts: List[Tuple[Any, Any, List[Any]]] = [
+        (
+            BloodGlucoseMeterStatistics,
+            BloodGlucoseMeterStatistics.verification_count,
+            [BloodGlucoseMeterStatistics.group_value],
+        ),
+        (
+            BloodGlucoseMeterHistogram,
+            BloodGlucoseMeterHistogram.value_count,
+            [BloodGlucoseMeterHistogram.group_value, BloodGlucoseMeterHistogram.bin],
+        ),
+    ]
+    for model, count, key in counts:
+        # Individual shards may be negative, e.g. after a rebuild, so only groups
+        # (or bins) whose shards sum to zero are empty.
+        empty = (
+            db.session.query(*key)
+            .filter(model.group_type == group_type, model.group_value.in_(group_values))
+            .group_by(*key)
+            .having(func.sum(count) <= 0)
+            .all()
+        )
+        if empty:
+            db.session.query(model).filter(
+                model.group_type == group_type,
+                tuple_(*key).in_([tuple(row) for row in empty]),
+            ).delete(synchronize_session=False)
+
+
+def _floor(expression: Any) -> Any:
+    # SQLite has no FLOOR, but truncation is equivalent for non-negative values.
+    if db.engine.dialect.name == "postgresql":
+        return cast(func.floor(expression), Integer)
+    return cast(expression, Integer)
+
+
+def rebuild_statistics() -> int:
+    """
+    Recalculates all meter statistics from the blood_glucose_meter table using
+    set-based aggregation, into shard 0 of each group. Returns the number of
+    statistics rows written.
+    """
+    db.session.query(BloodGlucoseMeterHistogram).delete(synchronize_session=False)
+    db.session.query(BloodGlucoseMeterStatistics).delete(synchronize_session=False)
+
+    correct = BloodGlucoseMeter.is_bg_value_correct
+    value = BloodGlucoseMeter.blood_glucose_value
+    value_bin = case(
+        (value >= HISTOGRAM_BIN_WIDTH * HISTOGRAM_BINS, HISTOGRAM_BINS - 1),
+        (value < 0, 0),
+        else_=_floor(value / HISTOGRAM_BIN_WIDTH),
+    )
+
+    written = 0
+    for group_type in GROUP_TYPES:
+        group_value = getattr(BloodGlucoseMeter, group_type)
+        statistics = db.select(
+            [
+                literal(group_type),
+                group_value,
+                func.count(),
+                func.count(case((correct.is_(True), 1))),
+                func.count(case((correct.is_(False), 1))),
+                func.count(value),
+                func.coalesce(func.sum(value), 0.0),
+                func.coalesce(func.sum(value * value), 0.0),
+            ]
+        ).group_by(group_value)
+        result = db.session.execute(
+            BloodGlucoseMeterStatistics.__table__.insert().from_select(
+                [
+                    "group_type",
+                    "group_value",
+                    "verification_count",
+                    "correct_count",
+                    "incorrect_count",
+                    "value_count",
+                    "value_sum",
+                    "value_sum_of_squares",
+                ],
+                statistics,
+            )
+        )
+        written += result.rowcount
+
+        histogram = (
+            db.select([literal(group_type), group_value, value_bin, func.count()])
+            .where(value.isnot(None))
+            .group_by(group_value, value_bin)
+        )
+        db.session.execute(
+            BloodGlucoseMeterHistogram.__table__.insert().from_select(
+                ["group_type", "group_value", "bin", "value_count"], histogram
+            )
+        )
+
+    db.session.commit()
+
+    return written
+
+
+def _percentiles(bins: List[Tuple[int, int]], total: int) -> Dict[str, float]:
+    """
+    Estimates percentiles by linear interpolation within histogram bins.
+    """
+    percentiles: Dict[str, float] = {}
+    if total <= 0:
+        return percentiles
+
+    for percentile in PERCENTILES:
+        target = total * percentile / 100
+        cumulative = 0
+        for value_bin, count in bins:
+            if count > 0 and cumulative + count >= target:
+                fraction = (target - cumulative) / count
+                percentiles[f"p{percentile}"] = round(
+                    (value_bin + fraction) * HISTOGRAM_BIN_WIDTH, 2
+                )
+                break
+            cumulative += count
+    return percentiles
+
+
+def _summarise(statistics: Any, bins: List[Tuple[int, int]]) -> Dict[str, Any]:
+    answered = statistics.correct_count + statistics.incorrect_count
+    summary: Dict[str, Any] = {
+        statistics.group_type: statistics.group_value,
+        "verification_count": statistics.verification_count,
+        "correct_count": statistics.correct_count,
+        "incorrect_count": statistics.incorrect_count,
+        "accuracy_rate": round(statistics.correct_count / answered, 4)
+        if answered
+        else None,
+        "value_mean": None,
+        "value_standard_deviation": None,
+        "value_percentiles": _percentiles(
+            bins, sum(count for _, count in bins if count > 0)
+        ),
+        "value_histogram": [
+            {
+                "lower": value_bin * HISTOGRAM_BIN_WIDTH,
+                "upper": (value_bin + 1) * HISTOGRAM_BIN_WIDTH,
+                "count": count,
+            }
+            for value_bin, count in bins
+            if count > 0
+        ],
+    }
+    if statistics.value_count > 0:
+        mean = statistics.value_sum / statistics.value_count
+        variance = statistics.value_sum_of_squares / statistics.value_count - mean**2
+        summary["value_mean"] = round(mean, 2)
+        summary["value_standard_deviation"] = round(math.sqrt(max(variance, 0.0)), 2)
+    return summary
+
+
+def meter_statistics(
+    group_type: str, group_values: Optional[Sequence[str]] = None
+) -> List[Dict]:
+    """
+    Returns accuracy rates and value distributions per app version or per meter,
+    read from the incrementally maintained statistics tables.
+    """
+    if group_type not in GROUP_TYPES:
+        raise ValueError(f"Cannot group meter statistics by '{group_type}'")
+
+    statistics = BloodGlucoseMeterStatistics
+    histogram = BloodGlucoseMeterHistogram
+    # Each group's shards are summed.
+    statistics_query = (
+        db.session.query(
+            statistics.group_type,
+            statistics.group_value,
+            *(
+                func.sum(getattr(statistics, column)).label(column)
+                for column in SUMMED_COLUMNS
+            ),
+        )
+        .filter(statistics.group_type == group_type)
+        .group_by(statistics.group_type, statistics.group_value)
+    )
+    histogram_query = (
+        db.session.query(
+            histogram.group_value,
+            histogram.bin,
+            func.sum(histogram.value_count).label("value_count"),
+        )
+        .filter(histogram.group_type == group_type)
+        .group_by(histogram.group_value, histogram.bin)
+    )
+    if group_values:
+        statistics_query = statistics_query.filter(
+            statistics.group_value.in_(group_values)
+        )
+        histogram_query = histogram_query.filter(
+            histogram.group_value.in_(group_values)
+        )
+
+    bins: Dict[str, List[Tuple[int, int]]] = {}
+    for row in histogram_query.order_by(histogram.bin):
+        bins.setdefault(row.group_value, []).append((row.bin, row.value_count))
+
+    return [
+        _summarise(row, bins.get(row.group_value, []))
+        for row in statistics_query.order_by(statistics.group_value)
+        if row.verification_count > 0
+    ]
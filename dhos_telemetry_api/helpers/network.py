@@ -0,0 +1,101 @@
+import ipaddress
+import time
+from typing import Dict, List, Optional
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import case, cast, select
+
+from dhos_telemetry_api.helpers.lookup import MAX_LIMIT
+from dhos_telemetry_api.helpers.retention import Progress
+from dhos_telemetry_api.models.desktop import Desktop
+
+
+def backfill_ip_addresses(
+    batch_size: int, pause_seconds: float, progress: Optional[Progress] = None
+) -> int:
+    """
+    Parses ip_address into ip_address_inet for desktop installations written before
+    the column existed, `batch_size` rows per transaction. Returns the number of
+    installations with a parseable address that were updated.
+    """
+    table = Desktop.__table__
+    scanned = 0
+    updated = 0
+    last_uuid: Optional[str] = None
+    while True:
+        batch_query = (
+            select(Desktop.uuid, Desktop.ip_address)
+            .where(Desktop.ip_address_inet.is_(None))
+            .order_by(Desktop.uuid)
+            .limit(batch_size)
+        )
+        if last_uuid is not None:
+            batch_query = batch_query.where(Desktop.uuid > last_uuid)
+        batch = db.session.execute(batch_query).all()
+        if not batch:
+            break
+        last_uuid = batch[-1].uuid
+
+        parsed = {
+            uuid: address
+            for uuid, address in (
+                (uuid, Desktop.parse_ip_address(ip_address))
+                for uuid, ip_address in batch
+            )
+            if address is not None
+        }
+        if parsed:
+            updated += db.session.execute(
+                table.update()
+                .where(table.c.uuid.in_(parsed))
+                .values(
+                    ip_address_inet=case(
+                        {
+                            uuid: cast(address, table.c.ip_address_inet.type)
+                            for uuid, address in parsed.items()
+                        },
+                        value=table.c.uuid,
+                    )
+                )
+            ).rowcount
+        db.session.commit()
+
+        scanned += len(batch)
+        if progress is not None:
+            progress(scanned, updated)
+        if len(batch) < batch_size:
+            break
+        time.sleep(pause_seconds)
+
+    return updated
+
+
+def installations_in_network(network: str, limit: int = 100) -> List[Dict]:
+    """
+    Returns up to `limit` desktop installations whose IP address is within a CIDR
+    range, e.g. 10.20.0.0/16, ordered by clinician and most recent first use.
+    """
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    try:
+        cidr = ipaddress.ip_network(network.strip(), strict=False)
+    except ValueError:
+        raise ValueError(f"'{network}' is not a valid CIDR network")
+
+    query = Desktop.query.filter(Desktop.ip_address_inet.isnot(None)).order_by(
+        Desktop.clinician_id, Desktop.date_first_used_.desc()
+    )
+    if db.engine.dialect.name == "postgresql":
+        # "is contained by or equals", which can use the GiST index.
+        installations = (
+            query.filter(Desktop.ip_address_inet.op("<<=")(str(cidr)))
+            .limit(limit)
+            .all()
+        )
+    else:
+        installations = [
+            installation
+            for installation in query
+            if ipaddress.ip_address(installation.ip_address_inet) in cidr
+        ][:limit]
+    return [installation.to_dict() for installation in installations]
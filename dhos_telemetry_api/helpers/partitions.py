@@ -0,0 +1,185 @@
+import re
+from datetime import date, datetime, timezone
+from typing import Any, List, Tuple
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import text
+
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+
+PARTITIONED_TABLE = "blood_glucose_meter"
+# Catches rows for months without a partition, so that inserts never fail.
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+
+_PARTITION_NAME = re.compile(rf"^{PARTITIONED_TABLE}_(\d{{4}})_(\d{{2}})$")
+
+
+def _require_postgres() -> None:
+    if db.engine.dialect.name != "postgresql":
+        raise RuntimeError("Table partitioning requires PostgreSQL")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def created_bounds(created: datetime) -> Tuple[datetime, datetime]:
+    """
+    Returns the bounds of the monthly partition holding rows created at `created`,
+    as naive UTC datetimes like the column.
+    """
+    if created.tzinfo is not None:
+        created = created.astimezone(timezone.utc).replace(tzinfo=None)
+    month = created.date().replace(day=1)
+    end = add_months(month, 1)
+    return (
+        datetime(month.year, month.month, 1),
+        datetime(end.year, end.month, 1),
+    )
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def child_tables(connection: Any, table: str) -> List[str]:
+    """
+    Returns the names of the partitions of `table`, or none if it isn't partitioned.
+    `connection` may be a session or, in migrations, a connection.
+    """
+    return (
+        connection.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits"
+                " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+                " WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+            ),
+            {"table": table},
+        )
+        .scalars()
+        .all()
+    )
+
+
+def create_partitioned_index(
+    connection: Any, name: str, table: str, columns: str, partition_suffix: str
+) -> None:
+    """
+    Creates index `name` on `columns` of partitioned `table` without blocking
+    writes. Indexes on a partitioned table can't be built concurrently, so this
+    creates an (initially invalid) index on the parent only, then builds each
+    partition's index, named `ix_<partition>_<partition_suffix>`, concurrently and
+    attaches it. Must run outside a transaction, e.g. in an autocommit block.
+    """
+    connection.execute(text(f"CREATE INDEX {name} ON ONLY {table} ({columns})"))
+    for partition in child_tables(connection, table):
+        partition_index = f"ix_{partition}_{partition_suffix}"
+        connection.execute(
+            text(
+                f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition} ({columns})"
+            )
+        )
+        connection.execute(
+            text(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+        )
+
+
+def list_partitions() -> List[date]:
+    """
+    Returns the first day of the month covered by each monthly partition.
+    """
+    _require_postgres()
+    months = []
+    for name in child_tables(db.session, PARTITIONED_TABLE):
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partitions(today: date, months_ahead: int) -> List[str]:
+    """
+    Creates any missing monthly partitions from the current month to `months_ahead`
+    months in the future. Returns the names of the partitions created.
+    """
+    _require_postgres()
+    existing = set(list_partitions())
+    current_month = today.replace(day=1)
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current_month, offset)
+        if month in existing:
+            continue
+        _create_partition(month)
+        created.append(partition_name(month))
+    db.session.commit()
+
+    return created
+
+
+def _create_partition(month: date) -> None:
+    name = partition_name(month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    create = text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARTITIONED_TABLE}"
+        f" FOR VALUES FROM ('{bounds['start'].isoformat()}')"
+        f" TO ('{bounds['end'].isoformat()}')"
+    )
+    in_range = "created >= :start AND created < :end"
+    misplaced = db.session.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"),
+        bounds,
+    ).scalar()
+    if not misplaced:
+        db.session.execute(create)
+        return
+
+    # The partition can't be created while the default partition holds rows for
+    # its month, so detach the default partition and move them across.
+    db.session.execute(
+        text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+    )
+    db.session.execute(create)
+    columns = ", ".join(BloodGlucoseMeter.__table__.columns.keys())
+    db.session.execute(
+        text(
+            f"INSERT INTO {name} ({columns})"
+            f" SELECT {columns} FROM {DEFAULT_PARTITION} WHERE {in_range}"
+        ),
+        bounds,
+    )
+    db.session.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"),
+        bounds,
+    )
+    db.session.execute(
+        text(
+            f"ALTER TABLE {PARTITIONED_TABLE}"
+            f" ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"
+        )
+    )
+
+
+def drop_partitions(before: date) -> List[str]:
+    """
+    Drops every monthly partition that only holds rows created before `before`.
+    Returns the names of the partitions dropped.
+    """
+    _require_postgres()
+
+    dropped = []
+    for month in list_partitions():
+        if add_months(month, 1) > before:
+            continue
+        name = partition_name(month)
+        # Detaching first keeps the exclusive lock on the parent table short.
+        db.session.execute(
+            text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}")
+        )
+        db.session.execute(text(f"DROP TABLE {name}"))
+        db.session.commit()
+        dropped.append(name)
+
+    return dropped
@@ -0,0 +1,355 @@
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import select
+
+from dhos_telemetry_api.helpers import benchmark
+from dhos_telemetry_api.helpers.capture import PSEUDONYM_PREFIX
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+CONCURRENCY = 8
+SAMPLE_SUBJECTS = 1000
+
+# Not replayed: erasure would delete the records that captured requests are mapped
+# onto, and bulk updates carry record-specific bodies that aren't captured.
+SKIPPED_ROUTES = {
+    ("DELETE", "/dhos/v1/patient/<patient_id>/telemetry"),
+    ("DELETE", "/dhos/v1/clinician/<clinician_id>/telemetry"),
+    ("PATCH", "/dhos/v1/patient_installations"),
+    ("PATCH", "/dhos/v1/clinician_installations"),
+    ("PATCH", "/dhos/v1/blood_glucose_meters"),
+}
+
+# (method, route, status or None on a connection error, milliseconds)
+Outcome = Tuple[str, str, Optional[int], float]
+# Called with the number of requests sent and completed so far.
+ReplayProgress = Callable[[int, int], None]
+
+
+def read_capture(paths: Sequence[Path]) -> List[Dict[str, Any]]:
+    """Reads capture files, e.g. one per process, merged in the order captured."""
+    entries: List[Dict[str, Any]] = []
+    for path in paths:
+        with path.open() as file:
+            entries.extend(json.loads(line) for line in file if line.strip())
+    return sorted(entries, key=lambda entry: entry["time"])
+
+
+def _pick(values: List[Any], pseudonym: str) -> Any:
+    """Maps a pseudonym onto one of `values`, the same one every time."""
+    return values[int(pseudonym[len(PSEUDONYM_PREFIX) :], 16) % len(values)]
+
+
+class Targets:
+    """
+    Records in the local database that captured requests are mapped onto. Each
+    pseudonymised patient or clinician in the capture becomes one of a sample of
+    local subjects, and their installations and meters become that subject's, so
+    that reads find records and repeated requests hit the same rows.
+    """
+
+    def __init__(self, sample_subjects: int = SAMPLE_SUBJECTS) -> None:
+        patient_ids = list(
+            db.session.execute(
+                select(BloodGlucoseMeter.patient_id)
+                .distinct()
+                .order_by(BloodGlucoseMeter.patient_id)
+                .limit(sample_subjects)
+            ).scalars()
+        )
+        clinician_ids = list(
+            db.session.execute(
+                select(Desktop.clinician_id)
+                .distinct()
+                .order_by(Desktop.clinician_id)
+                .limit(sample_subjects)
+            ).scalars()
+        )
+        if not patient_ids or not clinician_ids:
+            raise ValueError("The database has no patients with meters, or clinicians")
+
+        self.records: Dict[str, Dict[str, List[str]]] = {}
+        for patient_id, uuid in db.session.execute(
+            select(Mobile.patient_id, Mobile.uuid).where(
+                Mobile.patient_id.in_(patient_ids)
+            )
+        ):
+            self._add(patient_id, "installation_id", uuid)
+        for patient_id, uuid in db.session.execute(
+            select(BloodGlucoseMeter.patient_id, BloodGlucoseMeter.uuid).where(
+                BloodGlucoseMeter.patient_id.in_(patient_ids)
+            )
+        ):
+            self._add(patient_id, "meter_id", uuid)
+        for clinician_id, uuid in db.session.execute(
+            select(Desktop.clinician_id, Desktop.uuid).where(
+                Desktop.clinician_id.in_(clinician_ids)
+            )
+        ):
+            self._add(clinician_id, "installation_id", uuid)
+        self.owners = {
+            "patient_id": [
+                id_
+                for id_ in patient_ids
+                if "installation_id" in self.records.get(id_, {})
+            ],
+            "clinician_id": clinician_ids,
+        }
+
+        # Bodies for new records are copies of these.
+        patient_id = self.owners["patient_id"][0]
+        mobile = Mobile.query.get(self.records[patient_id]["installation_id"][0])
+        meter = BloodGlucoseMeter.query.filter_by(
+            uuid=self.records[patient_id]["meter_id"][0]
+        ).one()
+        desktop = Desktop.query.get(
+            self.records[clinician_ids[0]]["installation_id"][0]
+        )
+        self.bodies = {
+            "mobile": benchmark.request_body(mobile),
+            "desktop": benchmark.request_body(desktop),
+            "meter": benchmark.request_body(meter),
+        }
+        self.query_values = {
+            "patient_installations": [mobile.unique_device_code],
+            "clinician_installations": [desktop.unique_device_code],
+            "serial_number": [meter.serial_number],
+            "network": [f"{desktop.ip_address}/32"],
+        }
+        self._tokens: Dict[str, str] = {}
+
+    def _add(self, owner_id: str, key: str, uuid: str) -> None:
+        self.records.setdefault(owner_id, {}).setdefault(key, []).append(uuid)
+
+    def token(self, owner_column: str, owner_id: str) -> str:
+        if owner_id not in self._tokens:
+            self._tokens[owner_id] = benchmark.token(owner_column, owner_id)
+        return self._tokens[owner_id]
+
+    def path(self, parameters: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """Local values for a request's path parameters, or None if there are none."""
+        values = {}
+        owner_id = None
+        for owner_column in ("patient_id", "clinician_id"):
+            if owner_column in parameters:
+                owner_id = _pick(self.owners[owner_column], parameters[owner_column])
+                values[owner_column] = owner_id
+        for key, pseudonym in parameters.items():
+            if key in values:
+                continue
+            records = self.records.get(owner_id or "", {}).get(key)
+            if not records:
+                return None
+            values[key] = _pick(records, pseudonym)
+        return values
+
+    def query(self, route: str, query: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Local values for a request's query, dropping pseudonyms with no local values."""
+        values = {}
+        for key, items in query.items():
+            if key == "unique_device_code":
+                local = self.query_values[route.rsplit("/", 1)[-1]]
+            else:
+                local = self.query_values.get(key, [])
+            replaced = [
+                _pick(local, item) if item.startswith(PSEUDONYM_PREFIX) else item
+                for item in items
+                if local or not item.startswith(PSEUDONYM_PREFIX)
+            ]
+            if replaced:
+                values[key] = replaced
+        return values
+
+    def body(
+        self, method: str, route: str, path: Dict[str, str], fields: Optional[List[str]]
+    ) -> Optional[Dict[str, Any]]:
+        """A request body with the captured fields, built from local records."""
+        if method not in ("POST", "PATCH"):
+            return None
+        if route.endswith("/device_registration"):
+            meter = dict(self.bodies["meter"])
+            del meter["mobile_id"]
+            return {
+                "installation": self.bodies["mobile"],
+                "blood_glucose_meters": [meter]
+                if "blood_glucose_meters" in (fields or [])
+                else [],
+            }
+        if "blood_glucose_meter" in route:
+            template = {
+                **self.bodies["meter"],
+                "mobile_id": self.records[path["patient_id"]]["installation_id"][0],
+            }
+        elif "clinician_id" in path:
+            template = self.bodies["desktop"]
+        else:
+            template = self.bodies["mobile"]
+        if method == "POST":
+            return template
+        return {key: template[key] for key in fields or [] if key in template}
+
+
+class Replayer:
+    """
+    Sends requests over one keep-alive connection per worker thread and records
+    their outcomes.
+    """
+
+    def __init__(self, base_url: str) -> None:
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.https = parts.scheme == "https"
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection_type = (
+                http.client.HTTPSConnection
+                if self.https
+                else http.client.HTTPConnection
+            )
+            connection = connection_type(self.host, self.port, timeout=60)
+            self._local.connection = connection
+        return connection
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        token: str,
+        body: Optional[Dict[str, Any]],
+    ) -> Tuple[Optional[int], float]:
+        """Returns the response status, or None on a connection error, and the latency."""
+        headers = {"Authorization": f"Bearer {token}"}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        started = time.perf_counter()
+        try:
+            connection = self._connection()
+            connection.request(method, self.prefix + url, body=data, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status: Optional[int] = response.status
+        except (OSError, http.client.HTTPException):
+            self._local.connection = None
+            status = None
+        return status, (time.perf_counter() - started) * 1000
+
+
+def _url(route: str, path: Dict[str, str], query: Dict[str, List[str]]) -> str:
+    url = route
+    for key, value in path.items():
+        url = url.replace(f"<{key}>", value)
+    if query:
+        url += "?" + urlencode(query, doseq=True)
+    return url
+
+
+def summarise(outcomes: List[Outcome], elapsed: float) -> List[Dict[str, Any]]:
+    by_route: Dict[Tuple[str, str], List[Outcome]] = {}
+    for outcome in outcomes:
+        by_route.setdefault((outcome[0], outcome[1]), []).append(outcome)
+
+    rows = []
+    for (method, route), group in sorted(by_route.items()):
+        latencies = sorted(latency for _, _, _, latency in group)
+        statuses = Counter(str(status) for _, _, status, _ in group)
+        rows.append(
+            {
+                "method": method,
+                "route": route,
+                "requests": len(group),
+                "errors": sum(
+                    status is None or status >= 400 for _, _, status, _ in group
+                ),
+                "statuses": dict(sorted(statuses.items())),
+                "requests_per_second": round(len(group) / elapsed, 1),
+                "p50_ms": round(benchmark.percentile(latencies, 50), 1),
+                "p95_ms": round(benchmark.percentile(latencies, 95), 1),
+                "p99_ms": round(benchmark.percentile(latencies, 99), 1),
+            }
+        )
+    return rows
+
+
+def replay(
+    entries: List[Dict[str, Any]],
+    base_url: str,
+    speed: Optional[float] = 1.0,
+    concurrency: int = CONCURRENCY,
+    targets: Optional[Targets] = None,
+    progress: Optional[ReplayProgress] = None,
+) -> Dict[str, Any]:
+    """
+    Replays captured requests against the service at `base_url`, which uses this
+    database, from `concurrency` worker threads. Requests are sent at their
+    captured times compressed by `speed` (1 for real time, 10 for ten times as
+    fast), or as fast as the workers allow when `speed` is None. Identifiers are
+    mapped onto local records (see Targets), and bodies built from them with the
+    captured fields. Returns the elapsed time, the numbers of requests sent and
+    skipped, and throughput, status counts and latency percentiles per route.
+    """
+    if targets is None:
+        targets = Targets()
+    replayer = Replayer(base_url)
+    outcomes: List[Outcome] = []
+    futures: List[Future] = []
+    skipped = 0
+
+    def send(method: str, route: str, url: str, token: str, body: Any) -> None:
+        status, latency = replayer.send(method, url, token, body)
+        outcomes.append((method, route, status, latency))
+
+    started = time.monotonic()
+    first = entries[0]["time"] if entries else 0.0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for entry in entries:
+            method, route = entry["method"], entry["route"]
+            path = (
+                None
+                if (method, route) in SKIPPED_ROUTES
+                else targets.path(entry["path"])
+            )
+            if path is None:
+                skipped += 1
+                continue
+            owner_column = "clinician_id"
+            if "patient_id" in path:
+                owner_column = "patient_id"
+            owner_id = path.get(owner_column) or targets.owners["clinician_id"][0]
+            url = _url(route, path, targets.query(route, entry["query"]))
+            body = targets.body(method, route, path, entry.get("fields"))
+            token = targets.token(owner_column, owner_id)
+
+            if speed is not None:
+                delay = (entry["time"] - first) / speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(executor.submit(send, method, route, url, token, body))
+            if progress is not None and len(futures) % 1000 == 0:
+                progress(len(futures), len(outcomes))
+        for future in futures:
+            future.result()
+    elapsed = time.monotonic() - started
+
+    return {
+        "seconds": round(elapsed, 3),
+        "sent": len(outcomes),
+        "skipped": skipped,
+        "routes": summarise(outcomes, elapsed),
+    }
@@ -0,0 +1,183 @@
+import calendar
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import and_, delete, exists, func, select, text, tuple_
+from sqlalchemy.orm import aliased
+
+from dhos_telemetry_api.helpers import partitions
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.installation_dimension import InstallationDimension
+from dhos_telemetry_api.models.mobile import Mobile
+
+# Each batch runs in its own short transaction and gives up rather than queueing
+# behind (and blocking) live traffic if it can't get its row locks quickly.
+LOCK_TIMEOUT = "5s"
+
+# The owner and ordering columns used to find later installations.
+SUPERSEDING_COLUMNS: Dict[Any, Tuple[str, str]] = {
+    Mobile: ("patient_id", "date_first_launched_"),
+    Desktop: ("clinician_id", "date_first_used_"),
+}
+# An installation is only superseded by a later one of the same app on the same
+# device, so that an owner's other devices in use are kept.
+DEVICE_COLUMNS: Tuple[str, ...] = ("unique_device_code", "app_product")
+
+Progress = Callable[[int, int], None]
+
+
+def months_before(moment: datetime, months: int) -> datetime:
+    month = partitions.add_months(moment.date().replace(day=1), -months)
+    day = min(moment.day, calendar.monthrange(month.year, month.month)[1])
+    return moment.replace(year=month.year, month=month.month, day=day)
+
+
+def _resolved(cls: Any, name: str) -> Any:
+    # The string value of a column that may be interned, looked up in its own alias
+    # of installation_dimension so that it can be compared with another row's.
+    interned_id = getattr(cls, f"{name}_id", None)
+    if interned_id is None:
+        return getattr(cls, name)
+    dimension = aliased(InstallationDimension)
+    return func.coalesce(
+        getattr(cls, f"{name}_"),
+        select(dimension.value).where(dimension.id == interned_id).scalar_subquery(),
+    )
+
+
+def _key_expression(keys: Sequence[Any]) -> Any:
+    return keys[0] if len(keys) == 1 else tuple_(*keys)
+
+
+def _delete_in_batches(
+    model: Any,
+    keys: Sequence[Any],
+    scan_filter: Optional[Any],
+    delete_filter: Optional[Any],
+    batch_size: int,
+    pause_seconds: float,
+    dry_run: bool,
+    progress: Optional[Progress],
+) -> int:
+    """
+    Walks the table in primary key order, `batch_size` keys at a time, deleting the
+    rows in each batch that match `delete_filter`. Each batch is committed
+    separately and followed by a pause, so locks are short-lived and WAL is
+    written at a bounded rate. Returns the number of rows deleted (or, for a dry
+    run, that would have been).
+    """
+    key = _key_expression(keys)
+    last_key: Optional[Any] = None
+    scanned = 0
+    deleted = 0
+
+    while True:
+        batch_query = select(keys).order_by(*keys).limit(batch_size)
+        if scan_filter is not None:
+            batch_query = batch_query.where(scan_filter)
+        if last_key is not None:
+            batch_query = batch_query.where(key > last_key)
+        batch = [
+            row[0] if len(keys) == 1 else tuple(row)
+            for row in db.session.execute(batch_query)
+        ]
+        if not batch:
+            break
+        last_key = batch[-1] if len(keys) == 1 else tuple_(*batch[-1])
+
+        condition = key.in_(batch)
+        if delete_filter is not None:
+            condition = and_(condition, delete_filter)
+
+        if dry_run:
+            deleted += db.session.execute(
+                select([func.count()]).select_from(model).where(condition)
+            ).scalar()
+            db.session.rollback()
+        else:
+            if db.engine.dialect.name == "postgresql":
+                db.session.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            deleted += db.session.execute(
+                delete(model.__table__).where(condition)
+            ).rowcount
+            db.session.commit()
+
+        scanned += len(batch)
+        if progress is not None:
+            progress(scanned, deleted)
+        if len(batch) < batch_size:
+            break
+        time.sleep(pause_seconds)
+
+    return deleted
+
+
+def purge_superseded_installations(
+    model: Union[Type[Mobile], Type[Desktop]],
+    superseded_before: datetime,
+    batch_size: int,
+    pause_seconds: float,
+    dry_run: bool = False,
+    progress: Optional[Progress] = None,
+) -> int:
+    """
+    Deletes installations for which the same patient or clinician had a later
+    installation of the same product on the same device created before
+    `superseded_before`. The latest installation on each of an owner's devices is
+    never deleted.
+    """
+    owner, ordering = SUPERSEDING_COLUMNS[model]
+    later = aliased(model)
+    superseded = exists().where(
+        getattr(later, owner) == getattr(model, owner),
+        *(
+            _resolved(later, column) == _resolved(model, column)
+            for column in DEVICE_COLUMNS
+        ),
+        getattr(later, ordering) > getattr(model, ordering),
+        later.created < superseded_before,
+    )
+    return _delete_in_batches(
+        model,
+        keys=[model.uuid],
+        scan_filter=None,
+        delete_filter=and_(model.created < superseded_before, superseded),
+        batch_size=batch_size,
+        pause_seconds=pause_seconds,
+        dry_run=dry_run,
+        progress=progress,
+    )
+
+
+def purge_meter_verifications(
+    created_before: datetime,
+    batch_size: int,
+    pause_seconds: float,
+    dry_run: bool = False,
+    progress: Optional[Progress] = None,
+) -> Tuple[List[str], int]:
+    """
+    Deletes blood glucose meter verifications created before `created_before`.
+    On Postgres whole monthly partitions are dropped first, leaving only the
+    remainder of the boundary month to delete in batches. Returns the names of
+    the dropped partitions and the number of rows deleted in batches.
+    """
+    dropped: List[str] = []
+    if not dry_run and db.engine.dialect.name == "postgresql":
+        dropped = partitions.drop_partitions(created_before.date())
+
+    deleted = _delete_in_batches(
+        BloodGlucoseMeter,
+        keys=[BloodGlucoseMeter.uuid, BloodGlucoseMeter.created],
+        # Filtering on the partition key lets Postgres prune newer partitions.
+        scan_filter=BloodGlucoseMeter.created < created_before,
+        delete_filter=None,
+        batch_size=batch_size,
+        pause_seconds=pause_seconds,
+        dry_run=dry_run,
+        progress=progress,
+    )
+    return dropped, deleted
@@ -0,0 +1,202 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import case, func
+
+from dhos_telemetry_api.helpers.sql import upsert_increments
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.installation_dimension import resolved_columns
+from dhos_telemetry_api.models.installation_rollup import (
+    DesktopDailyRollup,
+    MobileDailyRollup,
+)
+from dhos_telemetry_api.models.mobile import Mobile
+
+RollupModel = Union[Type[MobileDailyRollup], Type[DesktopDailyRollup]]
+
+ROLLUPS: Dict[Any, RollupModel] = {
+    Mobile: MobileDailyRollup,
+    Desktop: DesktopDailyRollup,
+}
+
+
+def dimensions_of(installation: Union[Mobile, Desktop]) -> Dict[str, Any]:
+    rollup = ROLLUPS[type(installation)]
+    # `created` is only populated by the column default once the row is flushed.
+    created: datetime = installation.created or datetime.utcnow()
+    return {
+        "day": created.date(),
+        **{
+            dimension: getattr(installation, dimension)
+            for dimension in rollup.dimensions
+        },
+    }
+
+
+def record_installation(installation: Union[Mobile, Desktop]) -> None:
+    """
+    Counts a newly flushed installation in its daily rollup, in the caller's transaction.
+    """
+    upsert_increments(
+        ROLLUPS[type(installation)],
+        key=dimensions_of(installation),
+        increments={"installation_count": 1},
+    )
+
+
+def move_installation(
+    installation: Union[Mobile, Desktop], previous: Dict[str, Any]
+) -> None:
+    """
+    Moves an updated installation from the rollup bucket described by `previous`
+    (as returned by `dimensions_of` before the update) to its current bucket.
+    """
+    if dimensions_of(installation) == previous:
+        return
+
+    _decrement(ROLLUPS[type(installation)], previous)
+    record_installation(installation)
+
+
+def remove_installation(installation: Union[Mobile, Desktop]) -> None:
+    """
+    Uncounts an installation that is about to be deleted, in the caller's transaction.
+    """
+    _decrement(ROLLUPS[type(installation)], dimensions_of(installation))
+
+
+def shift_installations(
+    model: Union[Type[Mobile], Type[Desktop]], uuids: Sequence[str], sign: int
+) -> None:
+    """
+    Counts (sign 1) or uncounts (sign -1) the installations with the given UUIDs in
+    their current rollup buckets, one statement per bucket, in the caller's
+    transaction. Bulk updates uncount rows before changing them and count them after.
+    """
+    rollup = ROLLUPS[model]
+    day = func.date(model.created)
+    dimensions, from_clause = resolved_columns(model, rollup.dimensions)
+    buckets = db.session.execute(
+        db.select([day, *dimensions, func.count()])
+        .select_from(from_clause)
+        .where(model.uuid.in_(uuids))
+        .group_by(day, *dimensions)
+    )
+    for bucket_day, *values, count in buckets:
+        key = {
+            # SQLite's date() returns a string.
+            "day": date.fromisoformat(bucket_day)
+            if isinstance(bucket_day, str)
+            else bucket_day,
+            **dict(zip(rollup.dimensions, values)),
+        }
+        if sign > 0:
+            upsert_increments(rollup, key=key, increments={"installation_count": count})
+        else:
+            _decrement(rollup, key, count)
+
+
+def _decrement(rollup: RollupModel, dimensions: Dict[str, Any], count: int = 1) -> None:
+    # Clamped at zero, as a bucket may have drifted below the rows it's uncounting
+    # until rebuild-rollups runs.
+    db.session.query(rollup).filter_by(**dimensions).filter(
+        rollup.installation_count > 0
+    ).update(
+        {
+            rollup.installation_count: case(
+                (
+                    rollup.installation_count > count,
+                    rollup.installation_count - count,
+                ),
+                else_=0,
+            )
+        },
+        synchronize_session=False,
+    )
+
+
+def _day_range_filters(
+    column: Any, start_date: Optional[date], end_date: Optional[date]
+) -> List[Any]:
+    filters = []
+    if start_date is not None:
+        filters.append(column >= datetime.combine(start_date, time.min))
+    if end_date is not None:
+        filters.append(
+            column < datetime.combine(end_date + timedelta(days=1), time.min)
+        )
+    return filters
+
+
+def rebuild_rollups(
+    model: Union[Type[Mobile], Type[Desktop]],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> int:
+    """
+    Recalculates the daily rollup for `model` from the installation table, replacing
+    any existing rollup rows in the (inclusive) date range. Returns the number of
+    rollup rows written.
+    """
+    rollup = ROLLUPS[model]
+
+    delete_query = db.session.query(rollup)
+    if start_date is not None:
+        delete_query = delete_query.filter(rollup.day >= start_date)
+    if end_date is not None:
+        delete_query = delete_query.filter(rollup.day <= end_date)
+    delete_query.delete(synchronize_session=False)
+
+    day = func.date(model.created)
+    dimensions, from_clause = resolved_columns(model, rollup.dimensions)
+    source = (
+        db.select([day, *dimensions, func.count()])
+        .select_from(from_clause)
+        .where(*_day_range_filters(model.created, start_date, end_date))
+        .group_by(day, *dimensions)
+    )
+    result = db.session.execute(
+        rollup.__table__.insert().from_select(
+            ["day", *rollup.dimensions, "installation_count"], source
+        )
+    )
+    db.session.commit()
+
+    return result.rowcount
+
+
+def installation_counts(
+    model: Union[Type[Mobile], Type[Desktop]],
+    group_by: Sequence[str],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict]:
+    """
+    Sums the daily rollup for `model` over the (inclusive) date range, grouped by the
+    requested dimensions. "day" may be used as a dimension to get a daily breakdown.
+    """
+    rollup = ROLLUPS[model]
+
+    for dimension in group_by:
+        if dimension != "day" and dimension not in rollup.dimensions:
+            raise ValueError(f"Cannot group installations by '{dimension}'")
+
+    columns = [getattr(rollup, dimension) for dimension in group_by]
+    query = db.session.query(
+        *columns, func.sum(rollup.installation_count).label("installation_count")
+    )
+    if start_date is not None:
+        query = query.filter(rollup.day >= start_date)
+    if end_date is not None:
+        query = query.filter(rollup.day <= end_date)
+    query = query.group_by(*columns).order_by(*columns)
+
+    return [
+        {
+            **{dimension: row[i] for i, dimension in enumerate(group_by)},
+            "installation_count": int(row[-1]),
+        }
+        for row in query
+        if row[-1]
+    ]
@@ -0,0 +1,62 @@
+from typing import Any, Dict
+
+from flask_batteries_included.sqldb import db
+from sqlalchemy import String
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Dialect
+from sqlalchemy.types import TypeDecorator, TypeEngine
+
+
+class UUIDString(TypeDecorator):
+    """
+    A UUID held as a string in Python, stored as the native 16 byte uuid type on
+    PostgreSQL and as a 36 character string elsewhere.
+    """
+
+    impl = String(length=36)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: Dialect) -> TypeEngine:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(String(length=36))
+
+
+class InetString(TypeDecorator):
+    """
+    An IP address held as a string in Python, stored as the native inet type on
+    PostgreSQL (so it can be matched against subnets) and as a string elsewhere.
+    """
+
+    impl = String(length=45)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: Dialect) -> TypeEngine:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.INET())
+        return dialect.type_descriptor(String(length=45))
+
+
+def dialect_insert(table: db.Table) -> Any:
+    """
+    Returns an INSERT construct supporting ON CONFLICT for the bound database.
+    """
+    if db.engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def upsert_increments(
+    model: Any, key: Dict[str, Any], increments: Dict[str, Any]
+) -> None:
+    """
+    Adds `increments` to the counter columns of the row identified by the primary
+    key values in `key`, inserting the row if it doesn't exist yet.
+    """
+    table = model.__table__
+    stmt = dialect_insert(table).values(**key, **increments)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[column.name for column in table.primary_key],
+        set_={name: table.c[name] + stmt.excluded[name] for name in increments},
+    )
+    db.session.execute(stmt)
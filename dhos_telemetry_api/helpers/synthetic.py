@@ -0,0 +1,372 @@
+import bisect
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from flask_batteries_included.sqldb import db
+
+from dhos_telemetry_api.helpers import (
+    bulk_load,
+    device_sketch,
+    ingest,
+    meter_statistics,
+    partitions,
+    rollup,
+)
+from dhos_telemetry_api.helpers.hyperloglog import HyperLogLog
+from dhos_telemetry_api.helpers.retention import Progress
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+CHUNK_SIZE = 10000
+SEED_USER = "synthetic"
+
+# Value distributions, around the examples in api_spec.py.
+APP_PRODUCT = "GDM"
+APP_VERSIONS = [
+    "19.1.31",
+    "19.1.54",
+    "19.2.0",
+    "19.2.7",
+    "20.0.1",
+    "20.1.3",
+    "20.2.0",
+    "21.0.0",
+]
+PHONES: List[Tuple[Dict[str, str], float]] = [
+    (
+        {
+            "phone_os": "iOS",
+            "phone_os_version": "11.0",
+            "manufacturer": "Apple, Inc.",
+            "model": "6",
+            "display_name": "Apple iPhone 6S",
+        },
+        0.3,
+    ),
+    (
+        {
+            "phone_os": "iOS",
+            "phone_os_version": "14.4",
+            "manufacturer": "Apple, Inc.",
+            "model": "12",
+            "display_name": "Apple iPhone 12",
+        },
+        0.2,
+    ),
+    (
+        {
+            "phone_os": "Android",
+            "phone_os_version": "10",
+            "manufacturer": "samsung",
+            "model": "SM-G973F",
+            "display_name": "Samsung Galaxy S10",
+        },
+        0.35,
+    ),
+    (
+        {
+            "phone_os": "Android",
+            "phone_os_version": "11",
+            "manufacturer": "Google",
+            "model": "Pixel 4a",
+            "display_name": "Google Pixel 4a",
+        },
+        0.15,
+    ),
+]
+DESKTOPS: List[Tuple[Dict[str, str], float]] = [
+    ({"desktop_os": "Windows", "desktop_os_version": "10"}, 0.85),
+    ({"desktop_os": "macOS", "desktop_os_version": "11.2"}, 0.15),
+]
+# Clinicians use one hospital site's 10.<site>.0.0/16 network.
+SITES = 20
+GLUCOSE_MEAN = 5.5
+GLUCOSE_SD = 1.5
+GLUCOSE_RANGE = (2.0, 25.0)
+CORRECT_RATE = 0.95
+
+# Placeholders for the per-row fields of template rows.
+_PER_ROW_FIELDS: Dict[str, Dict[str, Any]] = {
+    "mobile": {
+        "unique_device_code": "",
+        "date_first_launched": "1970-01-01T00:00:00.000Z",
+        "app_version": "",
+    },
+    "desktop": {
+        "unique_device_code": "",
+        "date_first_used": "1970-01-01T00:00:00.000Z",
+        "ip_address": "",
+    },
+    "blood_glucose_meter": {},
+}
+
+
+class _Seeder:
+    """
+    Generates rows from a handful of template rows, built once per distinct set of
+    dimension values through the model (so that interning, version keys and other
+    derived columns are as the API would store them), by overwriting the per-row
+    columns. Rows are written CHUNK_SIZE at a time.
+    """
+
+    def __init__(
+        self,
+        builders: Dict[str, ingest.Builder],
+        rng: random.Random,
+        chunk_size: int,
+        progress: Optional[Progress],
+    ) -> None:
+        self.builders = builders
+        self.rng = rng
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.precision: int = current_app.config["DEVICE_SKETCH_PRECISION"]
+        self.templates: Dict[Tuple, Dict[str, Any]] = {}
+        self.buffers: Dict[str, List[Dict[str, Any]]] = {
+            kind: [] for kind in ingest.MODELS
+        }
+        self.counts: Dict[str, int] = {kind: 0 for kind in ingest.MODELS}
+        self.sketches: Dict[Tuple, HyperLogLog] = {}
+        self.subjects = 0
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def template(self, kind: str, fields: Dict[str, str]) -> Dict[str, Any]:
+        key = (kind, *sorted(fields.items()))
+        if key not in self.templates:
+            record = ingest.IngestRecord(
+                kind=kind,
+                owner_id=str(uuid.UUID(int=0)),
+                payload={**_PER_ROW_FIELDS[kind], **fields},
+                uuid=str(uuid.UUID(int=0)),
+                created=datetime(1970, 1, 1),
+                user=SEED_USER,
+            )
+            self.templates[key] = ingest.build_row(record, self.builders[kind])
+        return self.templates[key]
+
+    def add(self, kind: str, row: Dict[str, Any]) -> None:
+        buffer = self.buffers[kind]
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self.flush(kind)
+
+    def flush(self, kind: str) -> None:
+        rows = self.buffers[kind]
+        if not rows:
+            return
+        bulk_load.insert_rows(ingest.MODELS[kind], rows)
+        db.session.commit()
+        self.counts[kind] += len(rows)
+        self.buffers[kind] = []
+        if self.progress is not None:
+            self.progress(self.subjects, sum(self.counts.values()))
+
+    def sketch(self, kind: str, created: datetime, version: str, code: str) -> None:
+        key = (kind, created.date(), APP_PRODUCT, version)
+        if key not in self.sketches:
+            self.sketches[key] = HyperLogLog(self.precision)
+        self.sketches[key].add(code)
+
+    def weighted(self, choices: List[Tuple[Dict[str, str], float]]) -> Dict[str, str]:
+        return self.rng.choices(
+            [choice for choice, _ in choices], [weight for _, weight in choices]
+        )[0]
+
+    def history(
+        self, start: datetime, span: timedelta, installations_per_device: int
+    ) -> List[Tuple[datetime, str]]:
+        """
+        Returns a device's installations as (first launched, app version) pairs:
+        upgrades through increasing versions at random times in the period.
+        """
+        count = min(
+            self.rng.randint(1, 2 * installations_per_device - 1), len(APP_VERSIONS)
+        )
+        versions = sorted(self.rng.sample(range(len(APP_VERSIONS)), count))
+        times = sorted(start + self.rng.random() * span for _ in range(count))
+        return [(time, APP_VERSIONS[index]) for time, index in zip(times, versions)]
+
+    def patient(
+        self,
+        start: datetime,
+        span: timedelta,
+        installations_per_device: int,
+        verifications_per_patient: int,
+    ) -> None:
+        patient_id = self.uuid()
+        installations: List[Tuple[datetime, str, str]] = []
+        for _ in range(1 + (self.rng.random() < 0.2)):
+            code = f"{self.rng.getrandbits(64):016x}"
+            template = self.template(
+                "mobile", {"app_product": APP_PRODUCT, **self.weighted(PHONES)}
+            )
+            for launched, version in self.history(
+                start, span, installations_per_device
+            ):
+                installation_id = self.uuid()
+                row = {
+                    **template,
+                    "uuid": installation_id,
+                    "patient_id": patient_id,
+                    "unique_device_code": code,
+                    "date_first_launched_": launched,
+                    "date_first_launched_time_zone_": 0,
+                    "app_version": version,
+                    "app_version_key": Mobile.version_sort_key(version),
+                    "created": launched,
+                    "modified": launched,
+                }
+                self.add("mobile", row)
+                self.sketch("mobile", launched, version, code)
+                installations.append((launched, installation_id, version))
+        installations.sort()
+        self.meters(patient_id, installations, start + span, verifications_per_patient)
+        self.subjects += 1
+
+    def meters(
+        self,
+        patient_id: str,
+        installations: Sequence[Tuple[datetime, str, str]],
+        end: datetime,
+        verifications_per_patient: int,
+    ) -> None:
+        launches = [launched for launched, _, _ in installations]
+        serial_numbers = [
+            f"SN{self.rng.randrange(10**9):09d}"
+            for _ in range(1 + (self.rng.random() < 0.1))
+        ]
+        templates = {
+            version: self.template(
+                "blood_glucose_meter",
+                {"app_product": APP_PRODUCT, "app_version": version},
+            )
+            for _, _, version in installations
+        }
+        first = launches[0]
+        for _ in range(self.rng.randint(0, 2 * verifications_per_patient)):
+            verified = first + self.rng.random() * (end - first)
+            # Verifications come from the installation in use at the time.
+            _, mobile_id, version = installations[
+                max(bisect.bisect_right(launches, verified) - 1, 0)
+            ]
+            created = verified + timedelta(seconds=self.rng.randint(1, 600))
+            value = self.rng.gauss(GLUCOSE_MEAN, GLUCOSE_SD)
+            self.add(
+                "blood_glucose_meter",
+                {
+                    **templates[version],
+                    "uuid": self.uuid(),
+                    "patient_id": patient_id,
+                    "mobile_id": mobile_id,
+                    "serial_number": self.rng.choice(serial_numbers),
+                    "date_verified": verified.replace(tzinfo=timezone.utc),
+                    "is_bg_value_correct": self.rng.random() < CORRECT_RATE,
+                    "blood_glucose_value": round(
+                        min(max(value, GLUCOSE_RANGE[0]), GLUCOSE_RANGE[1]), 1
+                    ),
+                    "created": created,
+                    "modified": created,
+                },
+            )
+
+    def clinician(
+        self, start: datetime, span: timedelta, installations_per_device: int
+    ) -> None:
+        clinician_id = self.uuid()
+        site = self.rng.randrange(SITES)
+        for _ in range(1 + (self.rng.random() < 0.3)):
+            code = f"{self.rng.getrandbits(64):016x}"
+            desktop = self.weighted(DESKTOPS)
+            for launched, version in self.history(
+                start, span, installations_per_device
+            ):
+                ip_address = (
+                    f"10.{site}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}"
+                )
+                self.add(
+                    "desktop",
+                    {
+                        **self.template(
+                            "desktop",
+                            {
+                                "app_product": APP_PRODUCT,
+                                "app_version": version,
+                                **desktop,
+                            },
+                        ),
+                        "uuid": self.uuid(),
+                        "clinician_id": clinician_id,
+                        "unique_device_code": code,
+                        "date_first_used_": launched,
+                        "date_first_used_time_zone_": 0,
+                        "ip_address": ip_address,
+                        "ip_address_inet": Desktop.parse_ip_address(ip_address),
+                        "created": launched,
+                        "modified": launched,
+                    },
+                )
+                self.sketch("desktop", launched, version, code)
+        self.subjects += 1
+
+    def merge_sketches(self) -> None:
+        for (kind, day, app_product, app_version), sketch in self.sketches.items():
+            device_sketch.merge_sketch(
+                {
+                    "installation_type": kind,
+                    "day": day,
+                    "app_product": app_product,
+                    "app_version": app_version,
+                },
+                sketch,
+            )
+        db.session.commit()
+
+
+def seed(
+    builders: Dict[str, ingest.Builder],
+    patients: int,
+    clinicians: int,
+    start: date,
+    days: int,
+    installations_per_device: int = 3,
+    verifications_per_patient: int = 100,
+    seed_value: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    progress: Optional[Progress] = None,
+) -> Dict[str, int]:
+    """
+    Writes a synthetic population over `days` days from `start`: patients with one
+    or two phones, clinicians with one or two desktops, each device with a history
+    of app upgrades (on average `installations_per_device` installations), and on
+    average `verifications_per_patient` meter verifications per patient. Rows are
+    written in bulk, then the rollups, device sketches and meter statistics are
+    brought up to date. The same `seed_value` gives the same data. Returns the
+    number of rows written per table.
+    """
+    if installations_per_device < 1 or verifications_per_patient < 0 or days < 1:
+        raise ValueError("Invalid population parameters")
+
+    begin = datetime.combine(start, datetime.min.time())
+    span = timedelta(days=days)
+    if db.engine.dialect.name == "postgresql":
+        partitions.create_partitions(start, months_ahead=days // 28 + 2)
+
+    seeder = _Seeder(builders, random.Random(seed_value), chunk_size, progress)
+    for _ in range(patients):
+        seeder.patient(begin, span, installations_per_device, verifications_per_patient)
+    for _ in range(clinicians):
+        seeder.clinician(begin, span, installations_per_device)
+    for kind in ingest.MODELS:
+        seeder.flush(kind)
+
+    end = (begin + span).date()
+    rollup.rebuild_rollups(Mobile, start_date=start, end_date=end)
+    rollup.rebuild_rollups(Desktop, start_date=start, end_date=end)
+    meter_statistics.rebuild_statistics()
+    seeder.merge_sketches()
+    return seeder.counts
@@ -225,9 +225,9 @@ class ClinicianInstallationUpdateRequest(SharedInstallationUpdateSchema):
 
 
 @openapi_schema(dhos_telemetry_api_spec)
-class BloodGlucoseMeterRequest(Schema):
+class BloodGlucoseMeterRegistration(Schema):
     class Meta:
-        title = "Bluetooth meter request"
+        title = "Bluetooth meter registration"
         unknown = EXCLUDE
         ordered = True
 
@@ -249,14 +249,6 @@ class BloodGlucoseMeterRequest(Schema):
         },
     )
 
-    mobile_id = fields.String(
-        required=True,
-        metadata={
-            "description": "Mobile device UUID",
-            "example": "c28eb1cb-ca58-41b8-8acb-15721553f4f2",
-        },
-    )
-
     serial_number = fields.String(
         required=True,
         metadata={
@@ -279,6 +271,22 @@ class BloodGlucoseMeterRequest(Schema):
     )
 
 
+@openapi_schema(dhos_telemetry_api_spec)
+class BloodGlucoseMeterRequest(BloodGlucoseMeterRegistration):
+    class Meta:
+        title = "Bluetooth meter request"
+        unknown = EXCLUDE
+        ordered = True
+
+    mobile_id = fields.String(
+        required=True,
+        metadata={
+            "description": "Mobile device UUID",
+            "example": "c28eb1cb-ca58-41b8-8acb-15721553f4f2",
+        },
+    )
+
+
 @openapi_schema(dhos_telemetry_api_spec)
 class BloodGlucoseMeterResponse(BloodGlucoseMeterRequest, Identifier):
     class Meta:
@@ -295,6 +303,46 @@ class BloodGlucoseMeterResponse(BloodGlucoseMeterRequest, Identifier):
     )
 
 
+@openapi_schema(dhos_telemetry_api_spec)
+class DeviceRegistrationRequest(Schema):
+    class Meta:
+        title = "Device registration request"
+        unknown = EXCLUDE
+        ordered = True
+
+    installation = fields.Nested(
+        PatientInstallationRequest,
+        required=True,
+        metadata={"description": "The new mobile installation"},
+    )
+
+    blood_glucose_meters = fields.List(
+        fields.Nested(BloodGlucoseMeterRegistration),
+        required=False,
+        metadata={"description": "Blood glucose meters paired with the installation"},
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class DeviceRegistrationResponse(Schema):
+    class Meta:
+        title = "Device registration response"
+        unknown = EXCLUDE
+        ordered = True
+
+    installation = fields.Nested(
+        PatientInstallationResponse,
+        required=True,
+        metadata={"description": "The new mobile installation"},
+    )
+
+    blood_glucose_meters = fields.List(
+        fields.Nested(BloodGlucoseMeterResponse),
+        required=True,
+        metadata={"description": "The new blood glucose meters"},
+    )
+
+
 @openapi_schema(dhos_telemetry_api_spec)
 class BloodGlucoseMeterUpdate(Schema):
     class Meta:
@@ -356,3 +404,410 @@ class BloodGlucoseMeterUpdate(Schema):
         required=False,
         metadata={"description": "Blood glucose value", "example": "5.5"},
     )
+
+
+class SharedInstallationCountSchema(Schema):
+    class Meta:
+        ordered = True
+
+    day = fields.Date(
+        required=False,
+        metadata={
+            "description": "Day the installations were created, if grouped by day",
+            "example": "2021-01-01",
+        },
+    )
+
+    app_product = fields.String(
+        required=False,
+        metadata={"description": "Product name for the installation", "example": "GDM"},
+    )
+
+    app_version = fields.String(
+        required=False,
+        metadata={"description": "Version string of app", "example": "v19.1.31"},
+    )
+
+    installation_count = fields.Integer(
+        required=True,
+        metadata={"description": "Number of installations", "example": 42},
+    )
+
+
+class BulkUpdateItem(Schema):
+    class Meta:
+        ordered = True
+
+    uuid = fields.String(
+        required=True,
+        metadata={
+            "description": "UUID of the row to update",
+            "example": "2c4f1d24-2952-4d4e-b1d1-3637e33cc161",
+        },
+    )
+
+    changes = fields.Dict(
+        required=True,
+        metadata={
+            "description": "Updatable fields and their new values",
+            "example": {"app_product": "GDM"},
+        },
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class BulkUpdateRequest(Schema):
+    class Meta:
+        title = "Bulk update request"
+        unknown = EXCLUDE
+        ordered = True
+
+    updates = fields.List(
+        fields.Nested(BulkUpdateItem),
+        required=False,
+        metadata={"description": "Per-row changes; not allowed with filter"},
+    )
+
+    filter = fields.Dict(
+        required=False,
+        metadata={
+            "description": (
+                "Fields and values selecting the rows to update. A list of values "
+                "matches any of them. Not allowed with updates."
+            ),
+            "example": {"app_product": "gdm", "app_version": ["1.2.0", "1.2.1"]},
+        },
+    )
+
+    changes = fields.Dict(
+        required=False,
+        metadata={
+            "description": "Changes to apply to every row matching filter",
+            "example": {"app_product": "GDM"},
+        },
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class BulkUpdateResult(Schema):
+    class Meta:
+        title = "Bulk update result"
+        unknown = EXCLUDE
+        ordered = True
+
+    updated = fields.Integer(
+        required=True,
+        metadata={"description": "Number of rows updated", "example": 1200},
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class ErasureResult(Schema):
+    class Meta:
+        title = "Erasure result"
+        unknown = EXCLUDE
+        ordered = True
+
+    mobile = fields.Integer(
+        required=False,
+        metadata={"description": "Patient installations deleted", "example": 2},
+    )
+
+    blood_glucose_meter = fields.Integer(
+        required=False,
+        metadata={
+            "description": "Blood glucose meter verifications deleted",
+            "example": 14,
+        },
+    )
+
+    desktop = fields.Integer(
+        required=False,
+        metadata={"description": "Clinician installations deleted", "example": 3},
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class PatientInstallationCount(SharedInstallationCountSchema):
+    class Meta:
+        title = "Patient Installation Count"
+        unknown = EXCLUDE
+        ordered = True
+
+    phone_os = fields.String(
+        required=False,
+        metadata={"description": "Phone operating system", "example": "iOS"},
+    )
+
+    phone_os_version = fields.String(
+        required=False,
+        metadata={"description": "Phone operating system version", "example": "11.0"},
+    )
+
+    manufacturer = fields.String(
+        required=False,
+        metadata={"description": "Phone manufacturer", "example": "Apple, Inc."},
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class ClinicianInstallationCount(SharedInstallationCountSchema):
+    class Meta:
+        title = "Clinician Installation Count"
+        unknown = EXCLUDE
+        ordered = True
+
+    desktop_os = fields.String(
+        required=False,
+        metadata={"description": "Desktop operating system", "example": "Windows"},
+    )
+
+    desktop_os_version = fields.String(
+        required=False,
+        metadata={"description": "Desktop operating system version", "example": "10"},
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class DistinctDeviceCount(Schema):
+    class Meta:
+        title = "Distinct Device Count"
+        unknown = EXCLUDE
+        ordered = True
+
+    period_start = fields.Date(
+        required=False,
+        metadata={
+            "description": "First day of the period, if an interval was requested",
+            "example": "2021-01-01",
+        },
+    )
+
+    app_product = fields.String(
+        required=False,
+        metadata={"description": "Product name for the installation", "example": "GDM"},
+    )
+
+    app_version = fields.String(
+        required=False,
+        metadata={"description": "Version string of app", "example": "v19.1.31"},
+    )
+
+    distinct_devices = fields.Integer(
+        required=True,
+        metadata={
+            "description": "Estimated number of distinct unique device codes",
+            "example": 1024,
+        },
+    )
+
+    standard_error = fields.Float(
+        required=True,
+        metadata={
+            "description": "Relative standard error of the estimate",
+            "example": 0.0163,
+        },
+    )
+
+
+class BloodGlucoseValuePercentiles(Schema):
+    class Meta:
+        ordered = True
+
+    p5 = fields.Float(required=False, metadata={"example": 4.1})
+    p25 = fields.Float(required=False, metadata={"example": 4.9})
+    p50 = fields.Float(required=False, metadata={"example": 5.5})
+    p75 = fields.Float(required=False, metadata={"example": 6.4})
+    p95 = fields.Float(required=False, metadata={"example": 8.2})
+
+
+class BloodGlucoseValueHistogramBin(Schema):
+    class Meta:
+        ordered = True
+
+    lower = fields.Float(
+        required=True,
+        metadata={"description": "Inclusive lower bound of the bin", "example": 5.5},
+    )
+    upper = fields.Float(
+        required=True,
+        metadata={"description": "Exclusive upper bound of the bin", "example": 6.0},
+    )
+    count = fields.Integer(
+        required=True,
+        metadata={"description": "Number of values in the bin", "example": 12},
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class BloodGlucoseMeterStatistics(Schema):
+    class Meta:
+        title = "Blood glucose meter statistics"
+        unknown = EXCLUDE
+        ordered = True
+
+    app_version = fields.String(
+        required=False,
+        metadata={"description": "Application version number", "example": "19.1.54"},
+    )
+
+    serial_number = fields.String(
+        required=False,
+        metadata={
+            "description": "Bluetooth device serial number",
+            "example": "SN987654321",
+        },
+    )
+
+    verification_count = fields.Integer(
+        required=True,
+        metadata={"description": "Number of verifications", "example": 20},
+    )
+
+    correct_count = fields.Integer(
+        required=True,
+        metadata={"description": "Verifications with a correct reading", "example": 18},
+    )
+
+    incorrect_count = fields.Integer(
+        required=True,
+        metadata={
+            "description": "Verifications with an incorrect reading",
+            "example": 1,
+        },
+    )
+
+    accuracy_rate = fields.Float(
+        required=True,
+        allow_none=True,
+        metadata={
+            "description": "Proportion of answered verifications that were correct",
+            "example": 0.9474,
+        },
+    )
+
+    value_mean = fields.Float(
+        required=True,
+        allow_none=True,
+        metadata={"description": "Mean blood glucose value", "example": 5.8},
+    )
+
+    value_standard_deviation = fields.Float(
+        required=True,
+        allow_none=True,
+        metadata={"description": "Standard deviation of values", "example": 1.2},
+    )
+
+    value_percentiles = fields.Nested(
+        BloodGlucoseValuePercentiles,
+        required=True,
+        metadata={"description": "Value percentiles estimated from the histogram"},
+    )
+
+    value_histogram = fields.List(
+        fields.Nested(BloodGlucoseValueHistogramBin),
+        required=True,
+        metadata={"description": "Non-empty 0.5 mmol/L histogram bins"},
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class BloodGlucoseMeterSeriesBucket(Schema):
+    class Meta:
+        title = "Blood glucose meter series bucket"
+        unknown = EXCLUDE
+        ordered = True
+
+    period_start = fields.DateTime(
+        required=True,
+        metadata={
+            "description": "Start of the (UTC) hour, day or week",
+            "example": "2021-01-01T00:00:00.000Z",
+        },
+    )
+
+    serial_number = fields.String(
+        required=True,
+        metadata={
+            "description": "Bluetooth device serial number",
+            "example": "SN987654321",
+        },
+    )
+
+    verification_count = fields.Integer(
+        required=True,
+        metadata={"description": "Number of verifications", "example": 4},
+    )
+
+    correct_count = fields.Integer(
+        required=True,
+        metadata={"description": "Verifications with a correct reading", "example": 3},
+    )
+
+    incorrect_count = fields.Integer(
+        required=True,
+        metadata={
+            "description": "Verifications with an incorrect reading",
+            "example": 1,
+        },
+    )
+
+    value_min = fields.Float(
+        required=True,
+        allow_none=True,
+        metadata={"description": "Lowest blood glucose value", "example": 4.2},
+    )
+
+    value_max = fields.Float(
+        required=True,
+        allow_none=True,
+        metadata={"description": "Highest blood glucose value", "example": 7.9},
+    )
+
+    value_mean = fields.Float(
+        required=True,
+        allow_none=True,
+        metadata={"description": "Mean blood glucose value", "example": 5.8},
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class PatientCohortPage(Schema):
+    class Meta:
+        title = "Patient Cohort Page"
+        unknown = EXCLUDE
+        ordered = True
+
+    patient_ids = fields.List(
+        fields.String(),
+        required=True,
+        metadata={
+            "description": "Patient UUIDs in this page, in ascending order",
+            "example": ["2c4f1d0b-3c5a-4b8e-9a4f-8d6e2f1a7b3c"],
+        },
+    )
+
+    next_after = fields.String(
+        required=True,
+        allow_none=True,
+        metadata={
+            "description": "Value of `after` for the next page, or null on the last page",
+            "example": "2c4f1d0b-3c5a-4b8e-9a4f-8d6e2f1a7b3c",
+        },
+    )
+
+
+@openapi_schema(dhos_telemetry_api_spec)
+class QueuedRecordResponse(Schema):
+    class Meta:
+        title = "Queued record response"
+        unknown = EXCLUDE
+        ordered = True
+
+    uuid = fields.String(
+        required=True,
+        metadata={
+            "description": "UUID the record will be stored with",
+            "example": "2c4f1d68-2094-4e4d-a9a7-8b8fe0d4b0f6",
+        },
+    )
@@ -1,28 +1,63 @@
 from datetime import datetime
 from typing import Dict
 
-from flask_batteries_included.helpers import timestamp
+from flask_batteries_included.helpers import generate_uuid, timestamp
 from flask_batteries_included.sqldb import ModelIdentifier, db
-from sqlalchemy import UniqueConstraint
+
+from dhos_telemetry_api.helpers.sql import UUIDString
 
 
 class BloodGlucoseMeter(ModelIdentifier, db.Model):
+    # Range partitioned by month of creation in Postgres, see helpers/partitions.py.
     __table_args__ = (
-        UniqueConstraint(
+        db.Index(
+            "ix_blood_glucose_meter_serial_number",
+            "serial_number",
+            postgresql_ops={"serial_number": "text_pattern_ops"},
+        ),
+        # Time range reads of a patient's verifications.
+        db.Index(
+            "ix_blood_glucose_meter_patient_id_date_verified",
+            "patient_id",
+            "date_verified",
+        ),
+        # Newest verification of each meter first, for the latest-per-meter reads.
+        db.Index(
+            "ix_blood_glucose_meter_patient_id_serial_number_date_verified",
             "patient_id",
             "serial_number",
-            name="uix_blood_glucose_meter_patient_id_serial_number",
+            db.text("date_verified DESC"),
+            db.text("created DESC"),
         ),
+        db.Index(
+            "ix_blood_glucose_meter_mobile_id_serial_number_date_verified",
+            "mobile_id",
+            "serial_number",
+            db.text("date_verified DESC"),
+            db.text("created DESC"),
+        ),
+        {"postgresql_partition_by": "RANGE (created)"},
+    )
+
+    uuid = db.Column(UUIDString, primary_key=True, default=generate_uuid)
+    # The partition key has to be part of the primary key.
+    created = db.Column(
+        db.DateTime,
+        primary_key=True,
+        unique=False,
+        nullable=False,
+        default=datetime.utcnow,
     )
 
-    mobile_id = db.Column(db.String(length=36), unique=False, nullable=False)
-    patient_id = db.Column(db.String(length=36), unique=False, nullable=False)
+    mobile_id = db.Column(UUIDString, unique=False, nullable=False)
+    patient_id = db.Column(UUIDString, unique=False, nullable=False)
     serial_number = db.Column(db.String, unique=False, nullable=False)
     date_verified = db.Column(db.DateTime(timezone=True), unique=False, nullable=False)
     is_bg_value_correct = db.Column(db.Boolean, unique=False, nullable=True)
     app_product = db.Column(db.String, unique=False, nullable=False)
     app_version = db.Column(db.String, unique=False, nullable=False)
-    blood_glucose_value = db.Column(db.Float, unique=False, nullable=False)
+    # Nullable in the database since it was created, and optional in the API.
+    blood_glucose_value = db.Column(db.Float, unique=False, nullable=True)
 
     @staticmethod
     def schema() -> Dict:
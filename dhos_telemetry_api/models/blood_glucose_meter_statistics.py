@@ -0,0 +1,23 @@
+from flask_batteries_included.sqldb import db
+
+
+class BloodGlucoseMeterStatistics(db.Model):
+
+    group_type = db.Column(db.String, primary_key=True)
+    group_value = db.Column(db.String, primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True, default=0)
+    verification_count = db.Column(db.Integer, unique=False, nullable=False)
+    correct_count = db.Column(db.Integer, unique=False, nullable=False)
+    incorrect_count = db.Column(db.Integer, unique=False, nullable=False)
+    value_count = db.Column(db.Integer, unique=False, nullable=False)
+    value_sum = db.Column(db.Float, unique=False, nullable=False)
+    value_sum_of_squares = db.Column(db.Float, unique=False, nullable=False)
+
+
+class BloodGlucoseMeterHistogram(db.Model):
+
+    group_type = db.Column(db.String, primary_key=True)
+    group_value = db.Column(db.String, primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True, default=0)
+    bin = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    value_count = db.Column(db.Integer, unique=False, nullable=False)
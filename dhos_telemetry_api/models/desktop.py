@@ -1,21 +1,64 @@
+import ipaddress
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 
-from flask_batteries_included.helpers import timestamp
+from flask_batteries_included.helpers import generate_uuid, timestamp
 from flask_batteries_included.sqldb import ModelIdentifier, db
+from sqlalchemy.orm import validates
+
+from dhos_telemetry_api.helpers.sql import InetString, UUIDString
+from dhos_telemetry_api.models.installation_dimension import interned
 
 
 class Desktop(ModelIdentifier, db.Model):
 
-    clinician_id = db.Column(db.String(length=36), unique=False, nullable=False)
+    __table_args__ = (
+        db.Index(
+            "ix_desktop_unique_device_code",
+            "unique_device_code",
+            postgresql_ops={"unique_device_code": "text_pattern_ops"},
+        ),
+        db.Index(
+            "ix_desktop_clinician_id_date_first_used_",
+            "clinician_id",
+            "date_first_used_",
+        ),
+        db.Index(
+            "ix_desktop_ip_address_inet",
+            "ip_address_inet",
+            postgresql_using="gist",
+            postgresql_ops={"ip_address_inet": "inet_ops"},
+        ),
+    )
+
+    uuid = db.Column(UUIDString, primary_key=True, default=generate_uuid)
+    clinician_id = db.Column(UUIDString, unique=False, nullable=False)
     unique_device_code = db.Column(db.String, unique=False, nullable=False)
     date_first_used_ = db.Column(db.DateTime, unique=False, nullable=False)
     date_first_used_time_zone_ = db.Column(db.Integer, unique=False, nullable=False)
     app_product = db.Column(db.String, unique=False, nullable=False)
     app_version = db.Column(db.String, unique=False, nullable=False)
-    desktop_os = db.Column(db.String, unique=False, nullable=False)
+    desktop_os_ = db.Column("desktop_os", db.String, unique=False, nullable=True)
+    desktop_os_id = db.Column(
+        db.Integer, db.ForeignKey("installation_dimension.id"), nullable=True
+    )
+    desktop_os = interned("desktop_os")
     desktop_os_version = db.Column(db.String, unique=False, nullable=False)
     ip_address = db.Column(db.String, unique=False, nullable=False)
+    # Parsed copy of ip_address for subnet queries, null if it isn't an address.
+    ip_address_inet = db.Column(InetString, unique=False, nullable=True)
+
+    @staticmethod
+    def parse_ip_address(value: Optional[str]) -> Optional[str]:
+        try:
+            return str(ipaddress.ip_address((value or "").strip()))
+        except ValueError:
+            return None
+
+    @validates("ip_address")
+    def validate_ip_address(self, key: str, value: str) -> str:
+        self.ip_address_inet = self.parse_ip_address(value)
+        return value
 
     @property
     def date_first_used(self) -> datetime:
@@ -0,0 +1,26 @@
+from flask_batteries_included.sqldb import db
+
+
+class DeviceSketch(db.Model):
+
+    installation_type = db.Column(db.String, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    app_product = db.Column(db.String, primary_key=True)
+    app_version = db.Column(db.String, primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True, default=0)
+    precision = db.Column(db.Integer, unique=False, nullable=False)
+    registers = db.Column(db.LargeBinary, unique=False, nullable=False)
+
+
+class DeviceMonthSketch(db.Model):
+    """
+    The daily sketches of a past calendar month merged into one, written by
+    compact-device-sketches so that long ranges read one row per month.
+    """
+
+    installation_type = db.Column(db.String, primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    app_product = db.Column(db.String, primary_key=True)
+    app_version = db.Column(db.String, primary_key=True)
+    precision = db.Column(db.Integer, unique=False, nullable=False)
+    registers = db.Column(db.LargeBinary, unique=False, nullable=False)
@@ -0,0 +1,143 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from flask_batteries_included.sqldb import db
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.hybrid import Comparator, hybrid_property
+
+from dhos_telemetry_api.helpers.sql import dialect_insert
+
+
+class InstallationDimension(db.Model):
+
+    __table_args__ = (db.UniqueConstraint("name", "value"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String, nullable=False)
+    value = db.Column(db.String, nullable=False)
+
+
+def _cache() -> Dict[str, Dict]:
+    return current_app.extensions.setdefault(
+        "installation_dimensions", {"ids": {}, "values": {}}
+    )
+
+
+def intern(name: str, value: str) -> int:
+    """
+    Returns the id of a dimension value, creating it if necessary. New values are
+    committed in their own transaction, so cached ids always refer to rows that
+    exist whatever happens to the caller's transaction.
+    """
+    cache = _cache()
+    key: Tuple[str, str] = (name, value)
+    if key not in cache["ids"]:
+        table = InstallationDimension.__table__
+        with db.engine.begin() as connection:
+            connection.execute(
+                dialect_insert(table)
+                .values(name=name, value=value)
+                .on_conflict_do_nothing(index_elements=["name", "value"])
+            )
+            dimension_id = connection.execute(
+                select(table.c.id).where(table.c.name == name, table.c.value == value)
+            ).scalar_one()
+        cache["ids"][key] = dimension_id
+        cache["values"][dimension_id] = value
+    return cache["ids"][key]
+
+
+def lookup(dimension_id: int) -> str:
+    cache = _cache()
+    if dimension_id not in cache["values"]:
+        dimension = InstallationDimension.query.get(dimension_id)
+        cache["values"][dimension_id] = dimension.value
+        cache["ids"][(dimension.name, dimension.value)] = dimension_id
+    return cache["values"][dimension_id]
+
+
+class _InternedComparator(Comparator):
+    """
+    Compares the string value of a column that may be interned. Equality and `IN`
+    become conditions on the inline column or on the id column, with the ids of
+    the compared values looked up once, so that both can use an index. Other
+    operators resolve each row's value.
+    """
+
+    def __init__(self, cls: Any, name: str) -> None:
+        self.name = name
+        self.inline = getattr(cls, f"{name}_")
+        self.interned_id = getattr(cls, f"{name}_id")
+        super().__init__(
+            db.func.coalesce(
+                self.inline,
+                select(InstallationDimension.value)
+                .where(InstallationDimension.id == self.interned_id)
+                .scalar_subquery(),
+            )
+        )
+
+    def _ids(self, values: Sequence[str]) -> Any:
+        return select(InstallationDimension.id).where(
+            InstallationDimension.name == self.name,
+            InstallationDimension.value.in_(values),
+        )
+
+    def __eq__(self, other: Any) -> Any:  # type: ignore[override]
+        if other is None:
+            return and_(self.inline.is_(None), self.interned_id.is_(None))
+        return or_(self.inline == other, self.interned_id.in_(self._ids([other])))
+
+    def in_(self, other: Iterable[str]) -> Any:
+        values = list(other)
+        return or_(self.inline.in_(values), self.interned_id.in_(self._ids(values)))
+
+
+def interned(name: str) -> Any:
+    """
+    Returns a hybrid property for a string column that may be stored inline, in
+    the `<name>_` column, or interned, as an `InstallationDimension` id in the
+    `<name>_id` column, depending on INTERN_INSTALLATION_DIMENSIONS. Either way it
+    reads and writes plain strings, and in queries it compares as the string value
+    (see `_InternedComparator`; use `resolved_columns` to group by it).
+    """
+    inline = f"{name}_"
+    interned_id = f"{name}_id"
+
+    def getter(self: Any) -> Optional[str]:
+        value = getattr(self, inline)
+        dimension_id = getattr(self, interned_id)
+        if value is None and dimension_id is not None:
+            return lookup(dimension_id)
+        return value
+
+    def setter(self: Any, value: Optional[str]) -> None:
+        if value is not None and current_app.config["INTERN_INSTALLATION_DIMENSIONS"]:
+            setattr(self, interned_id, intern(name, value))
+            setattr(self, inline, None)
+        else:
+            setattr(self, inline, value)
+            setattr(self, interned_id, None)
+
+    prop = hybrid_property(getter, setter)
+    return prop.comparator(lambda cls: _InternedComparator(cls, name))
+
+
+def resolved_columns(model: Any, names: Sequence[str]) -> Tuple[List[Any], Any]:
+    """
+    Returns expressions for the string values of the columns `names` of `model`,
+    and the model's table outer joined to installation_dimension once per interned
+    column, to select them from. Unlike the hybrid properties, these don't look up
+    each row's value in a subquery, so they suit large GROUP BY queries.
+    """
+    from_clause = model.__table__
+    columns = []
+    for name in names:
+        interned_id = getattr(model, f"{name}_id", None)
+        if interned_id is None:
+            columns.append(getattr(model, name))
+            continue
+        dimension = InstallationDimension.__table__.alias(f"{name}_dimension")
+        from_clause = from_clause.outerjoin(dimension, dimension.c.id == interned_id)
+        columns.append(db.func.coalesce(getattr(model, f"{name}_"), dimension.c.value))
+    return columns, from_clause
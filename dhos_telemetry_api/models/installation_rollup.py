@@ -0,0 +1,39 @@
+from typing import Tuple
+
+from flask_batteries_included.sqldb import db
+
+
+class MobileDailyRollup(db.Model):
+
+    dimensions: Tuple[str, ...] = (
+        "app_product",
+        "app_version",
+        "phone_os",
+        "phone_os_version",
+        "manufacturer",
+    )
+
+    day = db.Column(db.Date, primary_key=True)
+    app_product = db.Column(db.String, primary_key=True)
+    app_version = db.Column(db.String, primary_key=True)
+    phone_os = db.Column(db.String, primary_key=True)
+    phone_os_version = db.Column(db.String, primary_key=True)
+    manufacturer = db.Column(db.String, primary_key=True)
+    installation_count = db.Column(db.Integer, unique=False, nullable=False)
+
+
+class DesktopDailyRollup(db.Model):
+
+    dimensions: Tuple[str, ...] = (
+        "app_product",
+        "app_version",
+        "desktop_os",
+        "desktop_os_version",
+    )
+
+    day = db.Column(db.Date, primary_key=True)
+    app_product = db.Column(db.String, primary_key=True)
+    app_version = db.Column(db.String, primary_key=True)
+    desktop_os = db.Column(db.String, primary_key=True)
+    desktop_os_version = db.Column(db.String, primary_key=True)
+    installation_count = db.Column(db.Integer, unique=False, nullable=False)
@@ -1,23 +1,97 @@
+import re
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 
-from flask_batteries_included.helpers import timestamp
+from flask_batteries_included.helpers import generate_uuid, timestamp
 from flask_batteries_included.sqldb import ModelIdentifier, db
+from sqlalchemy.orm import validates
+
+from dhos_telemetry_api.helpers.sql import UUIDString
+from dhos_telemetry_api.models.installation_dimension import interned
 
 
 class Mobile(ModelIdentifier, db.Model):
 
-    patient_id = db.Column(db.String(length=36), unique=False, nullable=False)
+    __table_args__ = (
+        db.Index(
+            "ix_mobile_unique_device_code",
+            "unique_device_code",
+            postgresql_ops={"unique_device_code": "text_pattern_ops"},
+        ),
+        db.Index(
+            "ix_mobile_patient_id_date_first_launched_",
+            "patient_id",
+            "date_first_launched_",
+        ),
+        # Cohort queries filter by product, inline or interned, and version.
+        db.Index(
+            "ix_mobile_app_product_app_version_key",
+            "app_product",
+            "app_version_key",
+            "patient_id",
+        ),
+        db.Index(
+            "ix_mobile_app_product_id_app_version_key",
+            "app_product_id",
+            "app_version_key",
+            "patient_id",
+        ),
+    )
+
+    uuid = db.Column(UUIDString, primary_key=True, default=generate_uuid)
+    patient_id = db.Column(UUIDString, unique=False, nullable=False)
     unique_device_code = db.Column(db.String, unique=False, nullable=False)
     date_first_launched_ = db.Column(db.DateTime, unique=False, nullable=False)
     date_first_launched_time_zone_ = db.Column(db.Integer, unique=False, nullable=False)
-    app_product = db.Column(db.String, unique=False, nullable=False)
+    app_product_ = db.Column("app_product", db.String, unique=False, nullable=True)
+    app_product_id = db.Column(
+        db.Integer, db.ForeignKey("installation_dimension.id"), nullable=True
+    )
+    app_product = interned("app_product")
     app_version = db.Column(db.String, unique=False, nullable=False)
-    phone_os = db.Column(db.String, unique=False, nullable=False)
+    # Sortable form of app_version for version range queries.
+    app_version_key = db.Column(db.String, unique=False, nullable=True)
+    phone_os_ = db.Column("phone_os", db.String, unique=False, nullable=True)
+    phone_os_id = db.Column(
+        db.Integer, db.ForeignKey("installation_dimension.id"), nullable=True
+    )
+    phone_os = interned("phone_os")
     phone_os_version = db.Column(db.String, unique=False, nullable=False)
-    manufacturer = db.Column(db.String, unique=False, nullable=False)
-    model = db.Column(db.String, unique=False, nullable=False)
-    display_name = db.Column(db.String, unique=False, nullable=False)
+    manufacturer_ = db.Column("manufacturer", db.String, unique=False, nullable=True)
+    manufacturer_id = db.Column(
+        db.Integer, db.ForeignKey("installation_dimension.id"), nullable=True
+    )
+    manufacturer = interned("manufacturer")
+    model_ = db.Column("model", db.String, unique=False, nullable=True)
+    model_id = db.Column(
+        db.Integer, db.ForeignKey("installation_dimension.id"), nullable=True
+    )
+    model = interned("model")
+    display_name_ = db.Column("display_name", db.String, unique=False, nullable=True)
+    display_name_id = db.Column(
+        db.Integer, db.ForeignKey("installation_dimension.id"), nullable=True
+    )
+    display_name = interned("display_name")
+
+    @staticmethod
+    def version_sort_key(version: Optional[str]) -> str:
+        """
+        Returns a string that sorts in version order: numeric components are zero
+        padded, other components (like the "x" in "18.1.x") count as zero and
+        trailing zero components are dropped, so "18.1" == "18.1.0" < "18.10".
+        """
+        components = [
+            part.zfill(8) if part.isdigit() else "0" * 8
+            for part in re.split(r"[.\-+_]", (version or "").strip())
+        ]
+        while components and components[-1] == "0" * 8:
+            components.pop()
+        return ".".join(components)
+
+    @validates("app_version")
+    def validate_app_version(self, key: str, value: str) -> str:
+        self.app_version_key = self.version_sort_key(value)
+        return value
 
     @property
     def date_first_launched(self) -> datetime:
@@ -3,10 +3,29 @@ import subprocess
 
 import sadisplay
 
-from dhos_telemetry_api.models import blood_glucose_meter, desktop, mobile
+from dhos_telemetry_api.models import (
+    blood_glucose_meter,
+    blood_glucose_meter_statistics,
+    desktop,
+    device_sketch,
+    installation_dimension,
+    installation_rollup,
+    mobile,
+)
 
 desc = sadisplay.describe(
-    [blood_glucose_meter.BloodGlucoseMeter, desktop.Desktop, mobile.Mobile]
+    [
+        blood_glucose_meter.BloodGlucoseMeter,
+        desktop.Desktop,
+        mobile.Mobile,
+        installation_dimension.InstallationDimension,
+        installation_rollup.MobileDailyRollup,
+        installation_rollup.DesktopDailyRollup,
+        device_sketch.DeviceSketch,
+        device_sketch.DeviceMonthSketch,
+        blood_glucose_meter_statistics.BloodGlucoseMeterStatistics,
+        blood_glucose_meter_statistics.BloodGlucoseMeterHistogram,
+    ]
 )
 with codecs.open("docs/schema.plantuml", "w", encoding="utf-8") as f:
     f.write(sadisplay.plantuml(desc).rstrip() + "\n")
@@ -1,18 +1,29 @@
+import threading
 from typing import Dict
 
 import requests
 from environs import Env
-from requests import Response
+from requests import Response, Session
+
+_local = threading.local()
 
 
 def _get_base_url() -> str:
     return Env().str("DHOS_TELEMETRY_BASE_URL", "http://dhos-telemetry-api:5000")
 
 
+def _get_session() -> Session:
+    # One Session per thread keeps connections alive between calls.
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
 def post_clinician_installation(
     request_body: Dict, clinician_id: str, jwt: str
 ) -> Response:
-    return requests.post(
+    return _get_session().post(
         url=f"{_get_base_url()}/dhos/v1/clinician/{clinician_id}/installation",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
@@ -23,7 +34,7 @@ def post_clinician_installation(
 def get_clinician_installation(
     clinician_id: str, installation_id: str, jwt: str
 ) -> Response:
-    return requests.get(
+    return _get_session().get(
         url=f"{_get_base_url()}/dhos/v1/clinician/{clinician_id}/installation/{installation_id}",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
@@ -31,7 +42,7 @@ def get_clinician_installation(
 
 
 def get_latest_clinician_installation(clinician_id: str, jwt: str) -> Response:
-    return requests.get(
+    return _get_session().get(
         url=f"{_get_base_url()}/dhos/v1/clinician/{clinician_id}/latest_installation",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
@@ -41,7 +52,7 @@ def get_latest_clinician_installation(clinician_id: str, jwt: str) -> Response:
 def patch_clinician_installation(
     clinician_id: str, installation_id: str, request_body: Dict, jwt: str
 ) -> Response:
-    return requests.patch(
+    return _get_session().patch(
         url=f"{_get_base_url()}/dhos/v1/clinician/{clinician_id}/installation/{installation_id}",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
@@ -52,7 +63,7 @@ def patch_clinician_installation(
 def post_patient_installation(
     request_body: Dict, patient_id: str, jwt: str
 ) -> Response:
-    return requests.post(
+    return _get_session().post(
         url=f"{_get_base_url()}/dhos/v1/patient/{patient_id}/installation",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
@@ -63,7 +74,7 @@ def post_patient_installation(
 def get_patient_installation(
     patient_id: str, installation_id: str, jwt: str
 ) -> Response:
-    return requests.get(
+    return _get_session().get(
         url=f"{_get_base_url()}/dhos/v1/patient/{patient_id}/installation/{installation_id}",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
@@ -71,7 +82,7 @@ def get_patient_installation(
 
 
 def get_latest_patient_installation(patient_id: str, jwt: str) -> Response:
-    return requests.get(
+    return _get_session().get(
         url=f"{_get_base_url()}/dhos/v1/patient/{patient_id}/latest_installation",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
@@ -81,7 +92,7 @@ def get_latest_patient_installation(patient_id: str, jwt: str) -> Response:
 def patch_patient_installation(
     patient_id: str, installation_id: str, request_body: Dict, jwt: str
 ) -> Response:
-    return requests.patch(
+    return _get_session().patch(
         url=f"{_get_base_url()}/dhos/v1/patient/{patient_id}/installation/{installation_id}",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
@@ -90,7 +101,7 @@ def patch_patient_installation(
 
 
 def post_bg_meter(request_body: Dict, patient_id: str, jwt: str) -> Response:
-    return requests.post(
+    return _get_session().post(
         url=f"{_get_base_url()}/dhos/v1/patient/{patient_id}/blood_glucose_meter",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
@@ -99,7 +110,7 @@ def post_bg_meter(request_body: Dict, patient_id: str, jwt: str) -> Response:
 
 
 def get_bg_meter(meter_id: str, patient_id: str, jwt: str) -> Response:
-    return requests.get(
+    return _get_session().get(
         url=f"{_get_base_url()}/dhos/v1/patient/{patient_id}/blood_glucose_meter/{meter_id}",
         timeout=15,
         headers={"Authorization": f"Bearer {jwt}"},
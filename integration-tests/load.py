@@ -0,0 +1,414 @@
+"""
+Load test for a running dhos-telemetry-api, built on the integration test clients
+and request helpers. Each worker thread sends a weighted mix of requests over its
+own keep-alive connection; throughput and latency percentiles are reported per
+route.
+
+$ DHOS_TELEMETRY_BASE_URL=http://localhost:5000 \\
+  HS_ISSUER=http://localhost/ HS_KEY=secret PROXY_URL=http://localhost \\
+  python load.py --concurrency 16 --duration 60 \\
+  --mix post_patient_installation=1,get_latest_patient_installation=4
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from clients.dhos_telemetry_client import (
+    get_bg_meter,
+    get_clinician_installation,
+    get_latest_clinician_installation,
+    get_latest_patient_installation,
+    get_patient_installation,
+    post_bg_meter,
+    post_clinician_installation,
+    post_patient_installation,
+)
+from faker import Faker
+from helpers.jwt_helper import get_clinician_token, get_patient_token
+from helpers.request_helper import (
+    generate_bg_meter_request,
+    generate_clinician_installation_request,
+    generate_patient_installation_request,
+)
+from requests import Response
+
+# Request bodies are generated before the run, as Faker is slow.
+BODY_POOL_SIZE = 200
+
+DEFAULT_MIX = (
+    "post_patient_installation=2,get_patient_installation=2,"
+    "get_latest_patient_installation=4,post_bg_meter=4,get_bg_meter=2,"
+    "post_clinician_installation=1,get_clinician_installation=1,"
+    "get_latest_clinician_installation=2"
+)
+
+# (subject id, token)
+Subject = Tuple[str, str]
+# (subject id, token, record uuid)
+Record = Tuple[str, str, str]
+
+
+class Population:
+    """
+    Patients and clinicians with their tokens, request bodies to send, and the
+    records created during the run, for the GET requests to read back.
+    """
+
+    def __init__(self, subjects: int) -> None:
+        fake = Faker()
+        patient_ids = [fake.uuid4() for _ in range(subjects)]
+        clinician_ids = [fake.uuid4() for _ in range(subjects)]
+        self.patients = [(id_, get_patient_token(id_)) for id_ in patient_ids]
+        self.clinicians = [(id_, get_clinician_token(id_)) for id_ in clinician_ids]
+        self.bodies: Dict[str, List[Dict]] = {
+            "patient": [
+                generate_patient_installation_request() for _ in range(BODY_POOL_SIZE)
+            ],
+            "clinician": [
+                generate_clinician_installation_request() for _ in range(BODY_POOL_SIZE)
+            ],
+            "meter": [generate_bg_meter_request() for _ in range(BODY_POOL_SIZE)],
+        }
+        self.records: Dict[str, List[Record]] = {
+            "patient": [],
+            "clinician": [],
+            "meter": [],
+        }
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, record: Record) -> None:
+        with self._lock:
+            self.records[kind].append(record)
+
+    def pick(self, kind: str, rng: random.Random) -> Record:
+        with self._lock:
+            return rng.choice(self.records[kind])
+
+
+def _created_uuid(response: Response) -> Optional[str]:
+    # 202 means the service queued the record (ASYNC_INGEST).
+    if response.status_code in (200, 201, 202):
+        return response.json()["uuid"]
+    return None
+
+
+def _post_patient_installation(
+    population: Population, rng: random.Random, patient: Optional[Subject] = None
+) -> Response:
+    patient_id, jwt = patient or rng.choice(population.patients)
+    response = post_patient_installation(
+        request_body=rng.choice(population.bodies["patient"]),
+        patient_id=patient_id,
+        jwt=jwt,
+    )
+    uuid = _created_uuid(response)
+    if uuid is not None:
+        population.add("patient", (patient_id, jwt, uuid))
+    return response
+
+
+def _get_patient_installation(population: Population, rng: random.Random) -> Response:
+    patient_id, jwt, installation_id = population.pick("patient", rng)
+    return get_patient_installation(
+        patient_id=patient_id, installation_id=installation_id, jwt=jwt
+    )
+
+
+def _get_latest_patient_installation(
+    population: Population, rng: random.Random
+) -> Response:
+    patient_id, jwt = rng.choice(population.patients)
+    return get_latest_patient_installation(patient_id=patient_id, jwt=jwt)
+
+
+def _post_bg_meter(
+    population: Population, rng: random.Random, installation: Optional[Record] = None
+) -> Response:
+    patient_id, jwt, installation_id = installation or population.pick("patient", rng)
+    response = post_bg_meter(
+        request_body={
+            **rng.choice(population.bodies["meter"]),
+            "mobile_id": installation_id,
+        },
+        patient_id=patient_id,
+        jwt=jwt,
+    )
+    uuid = _created_uuid(response)
+    if uuid is not None:
+        population.add("meter", (patient_id, jwt, uuid))
+    return response
+
+
+def _get_bg_meter(population: Population, rng: random.Random) -> Response:
+    patient_id, jwt, meter_id = population.pick("meter", rng)
+    return get_bg_meter(meter_id=meter_id, patient_id=patient_id, jwt=jwt)
+
+
+def _post_clinician_installation(
+    population: Population, rng: random.Random, clinician: Optional[Subject] = None
+) -> Response:
+    clinician_id, jwt = clinician or rng.choice(population.clinicians)
+    response = post_clinician_installation(
+        request_body=rng.choice(population.bodies["clinician"]),
+        clinician_id=clinician_id,
+        jwt=jwt,
+    )
+    uuid = _created_uuid(response)
+    if uuid is not None:
+        population.add("clinician", (clinician_id, jwt, uuid))
+    return response
+
+
+def _get_clinician_installation(population: Population, rng: random.Random) -> Response:
+    clinician_id, jwt, installation_id = population.pick("clinician", rng)
+    return get_clinician_installation(
+        clinician_id=clinician_id, installation_id=installation_id, jwt=jwt
+    )
+
+
+def _get_latest_clinician_installation(
+    population: Population, rng: random.Random
+) -> Response:
+    clinician_id, jwt = rng.choice(population.clinicians)
+    return get_latest_clinician_installation(clinician_id=clinician_id, jwt=jwt)
+
+
+Operation = Callable[[Population, random.Random], Response]
+
+# Operation name: (route, operation).
+OPERATIONS: Dict[str, Tuple[str, Operation]] = {
+    "post_patient_installation": (
+        "POST /dhos/v1/patient/{id}/installation",
+        _post_patient_installation,
+    ),
+    "get_patient_installation": (
+        "GET /dhos/v1/patient/{id}/installation/{id}",
+        _get_patient_installation,
+    ),
+    "get_latest_patient_installation": (
+        "GET /dhos/v1/patient/{id}/latest_installation",
+        _get_latest_patient_installation,
+    ),
+    "post_bg_meter": (
+        "POST /dhos/v1/patient/{id}/blood_glucose_meter",
+        _post_bg_meter,
+    ),
+    "get_bg_meter": (
+        "GET /dhos/v1/patient/{id}/blood_glucose_meter/{id}",
+        _get_bg_meter,
+    ),
+    "post_clinician_installation": (
+        "POST /dhos/v1/clinician/{id}/installation",
+        _post_clinician_installation,
+    ),
+    "get_clinician_installation": (
+        "GET /dhos/v1/clinician/{id}/installation/{id}",
+        _get_clinician_installation,
+    ),
+    "get_latest_clinician_installation": (
+        "GET /dhos/v1/clinician/{id}/latest_installation",
+        _get_latest_clinician_installation,
+    ),
+}
+
+# (operation name, seconds, succeeded)
+Sample = Tuple[str, float, bool]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}'")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    # Nearest-rank percentile.
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _worker(
+    population: Population,
+    weights: Dict[str, float],
+    deadline: float,
+    remaining: List[int],
+    lock: threading.Lock,
+    seed: int,
+) -> List[Sample]:
+    rng = random.Random(seed)
+    names = list(weights)
+    relative = list(weights.values())
+    samples: List[Sample] = []
+    while time.monotonic() < deadline:
+        with lock:
+            if remaining[0] == 0:
+                break
+            remaining[0] -= 1
+        name = rng.choices(names, relative)[0]
+        started = time.perf_counter()
+        try:
+            response = OPERATIONS[name][1](population, rng)
+        except requests.RequestException:
+            samples.append((name, time.perf_counter() - started, False))
+            continue
+        samples.append((name, time.perf_counter() - started, response.ok))
+    return samples
+
+
+def _created(response: Response) -> str:
+    response.raise_for_status()
+    uuid = _created_uuid(response)
+    assert uuid is not None
+    return uuid
+
+
+def warm_up(population: Population, rng: random.Random) -> None:
+    """
+    Gives every patient an installation and a blood glucose meter, and every
+    clinician an installation, before timing starts, so that every read has records
+    to find. Raises if any of them fails.
+    """
+    for patient_id, jwt in population.patients:
+        installation_id = _created(
+            _post_patient_installation(population, rng, patient=(patient_id, jwt))
+        )
+        _created(
+            _post_bg_meter(
+                population, rng, installation=(patient_id, jwt, installation_id)
+            )
+        )
+    for clinician in population.clinicians:
+        _created(_post_clinician_installation(population, rng, clinician=clinician))
+
+
+def run(
+    population: Population,
+    weights: Dict[str, float],
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Tuple[List[Sample], float]:
+    """
+    Sends requests from `concurrency` threads for `duration` seconds, or until
+    `max_requests` have been sent. Returns the samples and the elapsed time.
+    """
+    rng = random.Random(seed)
+    remaining = [-1 if max_requests is None else max_requests]
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                _worker,
+                population,
+                weights,
+                deadline,
+                remaining,
+                lock,
+                rng.getrandbits(32),
+            )
+            for _ in range(concurrency)
+        ]
+        samples = [sample for future in futures for sample in future.result()]
+    return samples, time.monotonic() - started
+
+
+def summarise(samples: Sequence[Sample], elapsed: float) -> List[Dict]:
+    by_name: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        by_name.setdefault(sample[0], []).append(sample)
+
+    rows = []
+    for name, group in [*sorted(by_name.items()), ("total", list(samples))]:
+        if not group:
+            continue
+        latencies = sorted(seconds * 1000 for _, seconds, _ in group)
+        rows.append(
+            {
+                "operation": name,
+                "route": OPERATIONS[name][0] if name in OPERATIONS else "",
+                "requests": len(group),
+                "errors": sum(not succeeded for _, _, succeeded in group),
+                "requests_per_second": round(len(group) / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 50), 1),
+                "p95_ms": round(percentile(latencies, 95), 1),
+                "p99_ms": round(percentile(latencies, 99), 1),
+            }
+        )
+    return rows
+
+
+def _print_report(rows: List[Dict]) -> None:
+    columns = [
+        "operation",
+        "requests",
+        "errors",
+        "requests_per_second",
+        "p50_ms",
+        "p95_ms",
+        "p99_ms",
+    ]
+    widths = [
+        max(len(column), *(len(str(row[column])) for row in rows)) for column in columns
+    ]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print(
+            "  ".join(
+                str(row[column]).ljust(width) for column, width in zip(columns, widths)
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument(
+        "--subjects", type=int, default=50, help="Patients and clinicians to use"
+    )
+    parser.add_argument(
+        "--mix", default=DEFAULT_MIX, help="Comma separated operation=weight pairs"
+    )
+    parser.add_argument("--seed", type=int, help="Random seed for the request mix")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    population = Population(args.subjects)
+    warm_up(population, random.Random(args.seed))
+
+    samples, elapsed = run(
+        population,
+        weights,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        max_requests=args.requests,
+        seed=args.seed,
+    )
+    rows = summarise(samples, elapsed)
+    _print_report(rows)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(
+                {"concurrency": args.concurrency, "seconds": elapsed, "routes": rows},
+                file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
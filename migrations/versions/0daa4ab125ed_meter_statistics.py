@@ -0,0 +1,45 @@
+"""meter statistics
+
+Revision ID: 0daa4ab125ed
+Revises: fbfb732e7398
+Create Date: 2026-10-19 13:41:09.672118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0daa4ab125ed"
+down_revision = "fbfb732e7398"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Run `flask rebuild-meter-statistics` after upgrading to include existing rows.
+    op.create_table(
+        "blood_glucose_meter_statistics",
+        sa.Column("group_type", sa.String(), nullable=False),
+        sa.Column("group_value", sa.String(), nullable=False),
+        sa.Column("verification_count", sa.Integer(), nullable=False),
+        sa.Column("correct_count", sa.Integer(), nullable=False),
+        sa.Column("incorrect_count", sa.Integer(), nullable=False),
+        sa.Column("value_count", sa.Integer(), nullable=False),
+        sa.Column("value_sum", sa.Float(), nullable=False),
+        sa.Column("value_sum_of_squares", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("group_type", "group_value"),
+    )
+    op.create_table(
+        "blood_glucose_meter_histogram",
+        sa.Column("group_type", sa.String(), nullable=False),
+        sa.Column("group_value", sa.String(), nullable=False),
+        sa.Column("bin", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("value_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("group_type", "group_value", "bin"),
+    )
+
+
+def downgrade():
+    op.drop_table("blood_glucose_meter_histogram")
+    op.drop_table("blood_glucose_meter_statistics")
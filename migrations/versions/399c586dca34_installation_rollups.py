@@ -0,0 +1,55 @@
+"""installation rollups
+
+Revision ID: 399c586dca34
+Revises: 0374bb6b95f6
+Create Date: 2026-10-19 09:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "399c586dca34"
+down_revision = "0374bb6b95f6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Run `flask rebuild-rollups` after upgrading to backfill existing installations.
+    op.create_table(
+        "mobile_daily_rollup",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("app_product", sa.String(), nullable=False),
+        sa.Column("app_version", sa.String(), nullable=False),
+        sa.Column("phone_os", sa.String(), nullable=False),
+        sa.Column("phone_os_version", sa.String(), nullable=False),
+        sa.Column("manufacturer", sa.String(), nullable=False),
+        sa.Column("installation_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "day",
+            "app_product",
+            "app_version",
+            "phone_os",
+            "phone_os_version",
+            "manufacturer",
+        ),
+    )
+    op.create_table(
+        "desktop_daily_rollup",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("app_product", sa.String(), nullable=False),
+        sa.Column("app_version", sa.String(), nullable=False),
+        sa.Column("desktop_os", sa.String(), nullable=False),
+        sa.Column("desktop_os_version", sa.String(), nullable=False),
+        sa.Column("installation_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "day", "app_product", "app_version", "desktop_os", "desktop_os_version"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("desktop_daily_rollup")
+    op.drop_table("mobile_daily_rollup")
@@ -0,0 +1,65 @@
+"""meter default partition
+
+Revision ID: 3f8a6d0c2e91
+Revises: 9c4e7a2f1b38
+Create Date: 2026-10-20 10:04:51.663027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f8a6d0c2e91"
+down_revision = "9c4e7a2f1b38"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "uuid, created, created_by_, modified, modified_by_, mobile_id, serial_number,"
+    " patient_id, date_verified, is_bg_value_correct, app_product, app_version,"
+    " blood_glucose_value"
+)
+
+
+def upgrade():
+    # Rows for months without a partition land here instead of failing to insert.
+    # `flask create-meter-partitions` moves them into their monthly partition.
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS blood_glucose_meter_default"
+        " PARTITION OF blood_glucose_meter DEFAULT"
+    )
+
+
+def downgrade():
+    # Move any rows in the default partition into monthly partitions first.
+    op.execute(
+        "ALTER TABLE blood_glucose_meter DETACH PARTITION blood_glucose_meter_default"
+    )
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            partition_start timestamp;
+        BEGIN
+            FOR partition_start IN
+                SELECT DISTINCT date_trunc('month', created)
+                FROM blood_glucose_meter_default
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF blood_glucose_meter'
+                    ' FOR VALUES FROM (%L) TO (%L)',
+                    'blood_glucose_meter_' || to_char(partition_start, 'YYYY_MM'),
+                    partition_start,
+                    partition_start + interval '1 month'
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute(
+        f"INSERT INTO blood_glucose_meter ({COLUMNS})"
+        f" SELECT {COLUMNS} FROM blood_glucose_meter_default"
+    )
+    op.drop_table("blood_glucose_meter_default")
@@ -0,0 +1,47 @@
+"""installation owner indexes
+
+Revision ID: 5b2e9c41d7a3
+Revises: cdf854041dcc
+Create Date: 2026-10-19 16:42:11.208377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5b2e9c41d7a3"
+down_revision = "cdf854041dcc"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Build the indexes without blocking writes to the installation tables.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_mobile_patient_id_date_first_launched_",
+            "mobile",
+            ["patient_id", "date_first_launched_"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_desktop_clinician_id_date_first_used_",
+            "desktop",
+            ["clinician_id", "date_first_used_"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_desktop_clinician_id_date_first_used_",
+            table_name="desktop",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_mobile_patient_id_date_first_launched_",
+            table_name="mobile",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,37 @@
+"""mobile cohort indexes
+
+Revision ID: 6d1b8e4f9a27
+Revises: 3f8a6d0c2e91
+Create Date: 2026-10-20 11:26:08.934512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6d1b8e4f9a27"
+down_revision = "3f8a6d0c2e91"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_mobile_app_product_app_version_key": "app_product",
+    "ix_mobile_app_product_id_app_version_key": "app_product_id",
+}
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, product_column in INDEXES.items():
+            op.create_index(
+                name,
+                "mobile",
+                [product_column, "app_version_key", "patient_id"],
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name="mobile")
@@ -0,0 +1,59 @@
+"""installation dimensions
+
+Revision ID: 8e1f4a2b6c90
+Revises: 5b2e9c41d7a3
+Create Date: 2026-10-19 18:05:37.914265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8e1f4a2b6c90"
+down_revision = "5b2e9c41d7a3"
+branch_labels = None
+depends_on = None
+
+INTERNED_COLUMNS = {
+    "mobile": ["app_product", "phone_os", "manufacturer", "model", "display_name"],
+    "desktop": ["desktop_os"],
+}
+
+
+def upgrade():
+    # Existing rows keep their inline strings. Set INTERN_INSTALLATION_DIMENSIONS
+    # and run `flask intern-installation-dimensions` to convert them.
+    op.create_table(
+        "installation_dimension",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name", "value"),
+    )
+    for table, columns in INTERNED_COLUMNS.items():
+        for column in columns:
+            op.add_column(table, sa.Column(f"{column}_id", sa.Integer(), nullable=True))
+            op.create_foreign_key(
+                f"{table}_{column}_id_fkey",
+                table,
+                "installation_dimension",
+                [f"{column}_id"],
+                ["id"],
+            )
+            op.alter_column(table, column, existing_type=sa.String(), nullable=True)
+
+
+def downgrade():
+    for table, columns in INTERNED_COLUMNS.items():
+        for column in columns:
+            op.execute(
+                f"UPDATE {table} SET {column} = installation_dimension.value"
+                f" FROM installation_dimension"
+                f" WHERE installation_dimension.id = {table}.{column}_id"
+            )
+            op.alter_column(table, column, existing_type=sa.String(), nullable=False)
+            op.drop_constraint(f"{table}_{column}_id_fkey", table, type_="foreignkey")
+            op.drop_column(table, f"{column}_id")
+    op.drop_table("installation_dimension")
@@ -0,0 +1,37 @@
+"""device sketch shards
+
+Revision ID: 9c4e7a2f1b38
+Revises: c8e2b4d6f0a3
+Create Date: 2026-10-20 09:12:44.207116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9c4e7a2f1b38"
+down_revision = "c8e2b4d6f0a3"
+branch_labels = None
+depends_on = None
+
+KEY = ["installation_type", "day", "app_product", "app_version"]
+
+
+def upgrade():
+    # Existing sketches become shard 0.
+    op.add_column(
+        "device_sketch",
+        sa.Column("shard", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.drop_constraint("device_sketch_pkey", "device_sketch", type_="primary")
+    op.create_primary_key("device_sketch_pkey", "device_sketch", KEY + ["shard"])
+
+
+def downgrade():
+    # Registers can't be merged in SQL, so only the first shard of each sketch is
+    # kept and distinct devices are undercounted afterwards.
+    op.execute("DELETE FROM device_sketch WHERE shard <> 0")
+    op.drop_constraint("device_sketch_pkey", "device_sketch", type_="primary")
+    op.drop_column("device_sketch", "shard")
+    op.create_primary_key("device_sketch_pkey", "device_sketch", KEY)
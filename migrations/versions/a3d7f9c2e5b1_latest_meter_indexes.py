@@ -0,0 +1,41 @@
+"""latest meter indexes
+
+Revision ID: a3d7f9c2e5b1
+Revises: f2c5d8e1a4b6
+Create Date: 2026-10-19 23:08:12.417306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from dhos_telemetry_api.helpers.partitions import create_partitioned_index
+
+
+# revision identifiers, used by Alembic.
+revision = "a3d7f9c2e5b1"
+down_revision = "f2c5d8e1a4b6"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "patient_id": "ix_blood_glucose_meter_patient_id_serial_number_date_verified",
+    "mobile_id": "ix_blood_glucose_meter_mobile_id_serial_number_date_verified",
+}
+
+
+def upgrade():
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        for column, name in INDEXES.items():
+            create_partitioned_index(
+                connection,
+                name,
+                "blood_glucose_meter",
+                f"{column}, serial_number, date_verified DESC, created DESC",
+                partition_suffix=f"{column}_latest",
+            )
+
+
+def downgrade():
+    for name in INDEXES.values():
+        op.drop_index(name, table_name="blood_glucose_meter")
@@ -0,0 +1,35 @@
+"""device month sketches
+
+Revision ID: a7d3f5c9e2b4
+Revises: 6d1b8e4f9a27
+Create Date: 2026-10-21 09:42:51.307216
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a7d3f5c9e2b4"
+down_revision = "6d1b8e4f9a27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "device_month_sketch",
+        sa.Column("installation_type", sa.String(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("app_product", sa.String(), nullable=False),
+        sa.Column("app_version", sa.String(), nullable=False),
+        sa.Column("precision", sa.Integer(), nullable=False),
+        sa.Column("registers", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "installation_type", "month", "app_product", "app_version"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("device_month_sketch")
@@ -0,0 +1,260 @@
+"""native uuid identifiers
+
+Revision ID: b7d3e0f5a218
+Revises: 8e1f4a2b6c90
+Create Date: 2026-10-19 19:26:48.103552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from dhos_telemetry_api.helpers.partitions import child_tables
+
+
+# revision identifiers, used by Alembic.
+revision = "b7d3e0f5a218"
+down_revision = "8e1f4a2b6c90"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# The forms of uuid that Postgres accepts: hex digits, optionally hyphenated
+# between groups of four and wrapped in braces.
+UUID_PATTERN = r"^\{?[0-9a-f]{4}(-?[0-9a-f]{4}){7}\}?$"
+
+# Identifier columns to convert from varchar(36) to uuid, per table.
+COLUMNS = {
+    "mobile": ["uuid", "patient_id"],
+    "desktop": ["uuid", "clinician_id"],
+    "blood_glucose_meter": ["uuid", "patient_id", "mobile_id"],
+}
+
+# Indexes over converted columns, rebuilt on the new columns before the swap.
+INDEXES = {
+    "mobile": [
+        (
+            "ix_mobile_patient_id_date_first_launched_",
+            "patient_id, date_first_launched_",
+        )
+    ],
+    "desktop": [
+        ("ix_desktop_clinician_id_date_first_used_", "clinician_id, date_first_used_")
+    ],
+    "blood_glucose_meter": [],
+}
+
+
+def _leaf_tables(connection, table):
+    return child_tables(connection, table) or [table]
+
+
+def _check_identifiers(connection, table):
+    """
+    Fails before anything is changed if an identifier can't be cast to a uuid,
+    as identifiers were never validated, listing a few of the offending values.
+    """
+    problems = []
+    for column in COLUMNS[table]:
+        malformed = (
+            connection.execute(
+                sa.text(
+                    f"SELECT DISTINCT {column} FROM {table}"
+                    f" WHERE {column} !~* :pattern LIMIT 5"
+                ),
+                {"pattern": UUID_PATTERN},
+            )
+            .scalars()
+            .all()
+        )
+        if malformed:
+            problems.append(f"{table}.{column}: {', '.join(map(repr, malformed))}")
+    if problems:
+        raise RuntimeError(
+            "Identifiers that aren't UUIDs must be fixed or removed before"
+            " migrating: " + "; ".join(problems)
+        )
+
+
+def _expand(connection, table):
+    """
+    Adds a nullable uuid column alongside each identifier column and a trigger
+    that keeps it in step with writes. Adding nullable columns without defaults
+    doesn't rewrite the table. Safe to rerun after a failure.
+    """
+    columns = COLUMNS[table]
+    for column in columns:
+        connection.execute(
+            sa.text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}_new uuid")
+        )
+    assignments = " ".join(
+        f"NEW.{column}_new := NEW.{column}::uuid;" for column in columns
+    )
+    connection.execute(
+        sa.text(
+            f"CREATE OR REPLACE FUNCTION {table}_uuid_sync() RETURNS trigger AS $$"
+            f" BEGIN {assignments} RETURN NEW; END $$ LANGUAGE plpgsql"
+        )
+    )
+    # Postgres 12 only supports row triggers on the partitions themselves.
+    for leaf in _leaf_tables(connection, table):
+        connection.execute(
+            sa.text(f"DROP TRIGGER IF EXISTS {leaf}_uuid_sync ON {leaf}")
+        )
+        connection.execute(
+            sa.text(
+                f"CREATE TRIGGER {leaf}_uuid_sync BEFORE INSERT OR UPDATE ON {leaf}"
+                f" FOR EACH ROW EXECUTE FUNCTION {table}_uuid_sync()"
+            )
+        )
+
+
+def _backfill(connection, table):
+    """
+    Fills the new columns in short primary key ordered batches, each committed
+    on its own, so no lock is held for long and WAL is written gradually. The
+    trigger does the conversion. Rows filled by an earlier attempt are skipped.
+    """
+    for leaf in _leaf_tables(connection, table):
+        last = ""
+        while True:
+            keys = (
+                connection.execute(
+                    sa.text(
+                        f"SELECT uuid FROM {leaf} WHERE uuid > :last"
+                        " AND uuid_new IS NULL ORDER BY uuid LIMIT :limit"
+                    ),
+                    {"last": last, "limit": BATCH_SIZE},
+                )
+                .scalars()
+                .all()
+            )
+            if not keys:
+                break
+            connection.execute(
+                sa.text(f"UPDATE {leaf} SET uuid = uuid WHERE uuid = ANY(:keys)"),
+                {"keys": keys},
+            )
+            last = keys[-1]
+
+
+def _prepare_constraints(connection, table):
+    """
+    Builds the replacement indexes and proves the new columns are never null
+    without blocking writes, so the swap itself doesn't need to scan the table.
+    Anything left by an earlier attempt, such as an invalid index from a failed
+    concurrent build, is dropped and rebuilt.
+    """
+    for leaf in _leaf_tables(connection, table):
+        for column in COLUMNS[table]:
+            connection.execute(
+                sa.text(
+                    f"ALTER TABLE {leaf}"
+                    f" DROP CONSTRAINT IF EXISTS {leaf}_{column}_new_not_null"
+                )
+            )
+            connection.execute(
+                sa.text(
+                    f"ALTER TABLE {leaf} ADD CONSTRAINT {leaf}_{column}_new_not_null"
+                    f" CHECK ({column}_new IS NOT NULL) NOT VALID"
+                )
+            )
+            connection.execute(
+                sa.text(
+                    f"ALTER TABLE {leaf} VALIDATE CONSTRAINT {leaf}_{column}_new_not_null"
+                )
+            )
+    if table != "blood_glucose_meter":
+        connection.execute(
+            sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {table}_uuid_new_key")
+        )
+        connection.execute(
+            sa.text(
+                f"CREATE UNIQUE INDEX CONCURRENTLY {table}_uuid_new_key ON {table} (uuid_new)"
+            )
+        )
+    for name, columns in INDEXES[table]:
+        new_columns = columns.replace(COLUMNS[table][1], f"{COLUMNS[table][1]}_new")
+        connection.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}_new"))
+        connection.execute(
+            sa.text(f"CREATE INDEX CONCURRENTLY {name}_new ON {table} ({new_columns})")
+        )
+
+
+def _swap(connection, table):
+    """
+    Replaces the old columns with the new ones, in the migration's transaction.
+    """
+    leaves = _leaf_tables(connection, table)
+    for leaf in leaves:
+        connection.execute(
+            sa.text(f"DROP TRIGGER IF EXISTS {leaf}_uuid_sync ON {leaf}")
+        )
+    connection.execute(sa.text(f"DROP FUNCTION IF EXISTS {table}_uuid_sync()"))
+    for column in COLUMNS[table]:
+        connection.execute(sa.text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+        connection.execute(
+            sa.text(f"ALTER TABLE {table} RENAME COLUMN {column}_new TO {column}")
+        )
+        # Uses the validated check constraints instead of scanning.
+        connection.execute(
+            sa.text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+        )
+        for leaf in leaves:
+            connection.execute(
+                sa.text(
+                    f"ALTER TABLE {leaf} DROP CONSTRAINT {leaf}_{column}_new_not_null"
+                )
+            )
+    if table == "blood_glucose_meter":
+        # Partitioned tables can't adopt a prebuilt index as their primary key,
+        # so this builds each partition's key while the lock is held.
+        connection.execute(
+            sa.text(
+                "ALTER TABLE blood_glucose_meter"
+                " ADD CONSTRAINT blood_glucose_meter_pkey PRIMARY KEY (uuid, created)"
+            )
+        )
+    else:
+        connection.execute(
+            sa.text(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey"
+                f" PRIMARY KEY USING INDEX {table}_uuid_new_key"
+            )
+        )
+    for name, _ in INDEXES[table]:
+        connection.execute(sa.text(f"ALTER INDEX {name}_new RENAME TO {name}"))
+
+
+def upgrade():
+    # Run as a sequence of short transactions rather than one long rewrite under
+    # an ACCESS EXCLUSIVE lock: expand, backfill in batches, then swap. Each step
+    # can be rerun, so a failed upgrade can simply be retried.
+    connection = op.get_bind()
+    for table in COLUMNS:
+        _check_identifiers(connection, table)
+    with op.get_context().autocommit_block():
+        for table in COLUMNS:
+            _expand(connection, table)
+            _backfill(connection, table)
+            _prepare_constraints(connection, table)
+
+    # Apart from blood_glucose_meter's primary key, the swap only touches catalogs,
+    # so its locks are brief. Give up rather than queue behind long-running
+    # queries and block everything else.
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    for table in COLUMNS:
+        _swap(connection, table)
+
+
+def downgrade():
+    for table, columns in COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table,
+                column,
+                existing_type=postgresql.UUID(),
+                type_=sa.String(length=36),
+                postgresql_using=f"{column}::text",
+            )
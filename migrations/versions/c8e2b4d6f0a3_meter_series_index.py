@@ -0,0 +1,36 @@
+"""meter series index
+
+Revision ID: c8e2b4d6f0a3
+Revises: a3d7f9c2e5b1
+Create Date: 2026-10-19 23:41:37.902815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from dhos_telemetry_api.helpers.partitions import create_partitioned_index
+
+
+# revision identifiers, used by Alembic.
+revision = "c8e2b4d6f0a3"
+down_revision = "a3d7f9c2e5b1"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_blood_glucose_meter_patient_id_date_verified"
+
+
+def upgrade():
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        create_partitioned_index(
+            connection,
+            INDEX,
+            "blood_glucose_meter",
+            "patient_id, date_verified",
+            partition_suffix="patient_id_date_verified",
+        )
+
+
+def downgrade():
+    op.drop_index(INDEX, table_name="blood_glucose_meter")
@@ -0,0 +1,93 @@
+"""partition blood_glucose_meter
+
+Revision ID: cdf854041dcc
+Revises: 0daa4ab125ed
+Create Date: 2026-10-19 15:20:54.330871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "cdf854041dcc"
+down_revision = "0daa4ab125ed"
+branch_labels = None
+depends_on = None
+
+# Listed rather than `SELECT *`, as later migrations change the column order.
+COLUMNS = (
+    "uuid, created, created_by_, modified, modified_by_, mobile_id, serial_number,"
+    " patient_id, date_verified, is_bg_value_correct, app_product, app_version,"
+    " blood_glucose_value"
+)
+
+
+def upgrade():
+    # Replace the table with one range partitioned by month of `created`, copying
+    # the existing rows into monthly partitions. Keep future partitions topped up
+    # by scheduling `flask create-meter-partitions`.
+    op.execute(
+        "ALTER TABLE blood_glucose_meter RENAME TO blood_glucose_meter_unpartitioned"
+    )
+    op.execute(
+        "ALTER TABLE blood_glucose_meter_unpartitioned"
+        " RENAME CONSTRAINT blood_glucose_meter_pkey"
+        " TO blood_glucose_meter_unpartitioned_pkey"
+    )
+    op.execute(
+        """
+        CREATE TABLE blood_glucose_meter (
+            LIKE blood_glucose_meter_unpartitioned INCLUDING DEFAULTS,
+            CONSTRAINT blood_glucose_meter_pkey PRIMARY KEY (uuid, created)
+        ) PARTITION BY RANGE (created)
+        """
+    )
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            partition_start timestamp := date_trunc(
+                'month',
+                coalesce(
+                    (SELECT min(created) FROM blood_glucose_meter_unpartitioned),
+                    now()
+                )
+            );
+        BEGIN
+            WHILE partition_start < date_trunc('month', now()) + interval '4 months'
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF blood_glucose_meter'
+                    ' FOR VALUES FROM (%L) TO (%L)',
+                    'blood_glucose_meter_' || to_char(partition_start, 'YYYY_MM'),
+                    partition_start,
+                    partition_start + interval '1 month'
+                );
+                partition_start := partition_start + interval '1 month';
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute(
+        f"INSERT INTO blood_glucose_meter ({COLUMNS})"
+        f" SELECT {COLUMNS} FROM blood_glucose_meter_unpartitioned"
+    )
+    op.drop_table("blood_glucose_meter_unpartitioned")
+
+
+def downgrade():
+    op.execute(
+        "CREATE TABLE blood_glucose_meter_unpartitioned"
+        " (LIKE blood_glucose_meter INCLUDING DEFAULTS)"
+    )
+    op.execute(
+        f"INSERT INTO blood_glucose_meter_unpartitioned ({COLUMNS})"
+        f" SELECT {COLUMNS} FROM blood_glucose_meter"
+    )
+    op.drop_table("blood_glucose_meter")
+    op.execute(
+        "ALTER TABLE blood_glucose_meter_unpartitioned RENAME TO blood_glucose_meter"
+    )
+    op.create_primary_key("blood_glucose_meter_pkey", "blood_glucose_meter", ["uuid"])
@@ -0,0 +1,39 @@
+"""desktop ip_address inet
+
+Revision ID: d41c8a7f9e02
+Revises: b7d3e0f5a218
+Create Date: 2026-10-19 20:48:02.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "d41c8a7f9e02"
+down_revision = "b7d3e0f5a218"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Run `flask backfill-desktop-ip-addresses` after upgrading to parse the
+    # addresses of existing installations in batches.
+    op.add_column(
+        "desktop", sa.Column("ip_address_inet", postgresql.INET(), nullable=True)
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_desktop_ip_address_inet",
+            "desktop",
+            ["ip_address_inet"],
+            postgresql_using="gist",
+            postgresql_ops={"ip_address_inet": "inet_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_desktop_ip_address_inet", table_name="desktop")
+    op.drop_column("desktop", "ip_address_inet")
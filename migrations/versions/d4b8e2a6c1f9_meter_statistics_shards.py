@@ -0,0 +1,42 @@
+"""meter statistics shards
+
+Revision ID: d4b8e2a6c1f9
+Revises: a7d3f5c9e2b4
+Create Date: 2026-10-21 14:05:37.829140
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d4b8e2a6c1f9"
+down_revision = "a7d3f5c9e2b4"
+branch_labels = None
+depends_on = None
+
+KEYS = {
+    "blood_glucose_meter_statistics": ["group_type", "group_value"],
+    "blood_glucose_meter_histogram": ["group_type", "group_value", "bin"],
+}
+
+
+def upgrade():
+    # Existing rows become shard 0.
+    for table, key in KEYS.items():
+        op.add_column(
+            table,
+            sa.Column("shard", sa.Integer(), server_default="0", nullable=False),
+        )
+        op.drop_constraint(f"{table}_pkey", table, type_="primary")
+        op.create_primary_key(f"{table}_pkey", table, key[:2] + ["shard"] + key[2:])
+
+
+def downgrade():
+    # Run `flask rebuild-meter-statistics` after downgrading, as only the first shard
+    # of each group is kept.
+    for table, key in KEYS.items():
+        op.execute(f"DELETE FROM {table} WHERE shard <> 0")
+        op.drop_constraint(f"{table}_pkey", table, type_="primary")
+        op.drop_column(table, "shard")
+        op.create_primary_key(f"{table}_pkey", table, key)
@@ -0,0 +1,26 @@
+"""mobile app_version_key
+
+Revision ID: e6a9b1c3d5f7
+Revises: d41c8a7f9e02
+Create Date: 2026-10-19 21:37:15.486203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e6a9b1c3d5f7"
+down_revision = "d41c8a7f9e02"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Run `flask backfill-app-version-keys` after upgrading to fill the key for
+    # existing installations in batches.
+    op.add_column("mobile", sa.Column("app_version_key", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("mobile", "app_version_key")
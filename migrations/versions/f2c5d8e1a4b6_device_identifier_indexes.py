@@ -0,0 +1,49 @@
+"""device identifier indexes
+
+Revision ID: f2c5d8e1a4b6
+Revises: e6a9b1c3d5f7
+Create Date: 2026-10-19 22:24:51.730164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from dhos_telemetry_api.helpers.partitions import create_partitioned_index
+
+
+# revision identifiers, used by Alembic.
+revision = "f2c5d8e1a4b6"
+down_revision = "e6a9b1c3d5f7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # text_pattern_ops indexes serve both equality and 'prefix%' LIKE searches
+    # whatever the database collation.
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        for table in ["mobile", "desktop"]:
+            op.create_index(
+                f"ix_{table}_unique_device_code",
+                table,
+                ["unique_device_code"],
+                postgresql_ops={"unique_device_code": "text_pattern_ops"},
+                postgresql_concurrently=True,
+            )
+
+        create_partitioned_index(
+            connection,
+            "ix_blood_glucose_meter_serial_number",
+            "blood_glucose_meter",
+            "serial_number text_pattern_ops",
+            partition_suffix="serial_number",
+        )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_blood_glucose_meter_serial_number", table_name="blood_glucose_meter"
+    )
+    op.drop_index("ix_desktop_unique_device_code", table_name="desktop")
+    op.drop_index("ix_mobile_unique_device_code", table_name="mobile")
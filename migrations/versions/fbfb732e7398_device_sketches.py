@@ -0,0 +1,35 @@
+"""device sketches
+
+Revision ID: fbfb732e7398
+Revises: 399c586dca34
+Create Date: 2026-10-19 11:03:27.518304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "fbfb732e7398"
+down_revision = "399c586dca34"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "device_sketch",
+        sa.Column("installation_type", sa.String(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("app_product", sa.String(), nullable=False),
+        sa.Column("app_version", sa.String(), nullable=False),
+        sa.Column("precision", sa.Integer(), nullable=False),
+        sa.Column("registers", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "installation_type", "day", "app_product", "app_version"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("device_sketch")
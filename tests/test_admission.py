@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.helpers import generate_uuid
+from pytest_mock import MockFixture
+
+from dhos_telemetry_api.helpers import admission
+
+
+class TestAdmissionControl:
+    def test_admits_up_to_limit(self) -> None:
+        control = admission.AdmissionControl(2, queue_timeout=0, max_queue=0)
+        assert control.acquire()
+        assert control.acquire()
+        assert not control.acquire()
+        control.release()
+        assert control.acquire()
+        assert control.statistics() == {
+            "in_flight": 2,
+            "waiting": 0,
+            "admitted": 3,
+            "queued": 0,
+            "shed": 1,
+        }
+
+    def test_queued_request_admitted_on_release(self) -> None:
+        control = admission.AdmissionControl(1, queue_timeout=5, max_queue=1)
+        assert control.acquire()
+        admitted = []
+        waiter = threading.Thread(target=lambda: admitted.append(control.acquire()))
+        waiter.start()
+        while not control.statistics()["waiting"]:
+            time.sleep(0.001)
+
+        control.release()
+        waiter.join()
+
+        assert admitted == [True]
+        assert control.statistics()["queued"] == 1
+        assert control.statistics()["in_flight"] == 1
+
+    def test_sheds_after_deadline(self) -> None:
+        control = admission.AdmissionControl(1, queue_timeout=0.05, max_queue=1)
+        assert control.acquire()
+
+        started = time.monotonic()
+        assert not control.acquire()
+        assert time.monotonic() - started >= 0.05
+        assert control.statistics()["queued"] == 1
+        assert control.statistics()["shed"] == 1
+        assert control.statistics()["waiting"] == 0
+
+    def test_reports_queued_and_shed(self, mocker: MockFixture) -> None:
+        warning = mocker.patch.object(admission.logger, "warning")
+        control = admission.AdmissionControl(1, queue_timeout=0, max_queue=0)
+        control.acquire()
+        control.acquire()
+        mocker.patch.object(admission, "REPORT_INTERVAL", 0)
+        control.acquire()
+
+        assert warning.call_args[0][1:3] == (0, 2)
+
+
+@pytest.mark.usefixtures("mock_bearer_validation")
+class TestAdmissionApi:
+    @pytest.fixture
+    def control(self, app: Flask) -> admission.AdmissionControl:
+        app.config["ADMISSION_MAX_IN_FLIGHT"] = 1
+        app.config["ADMISSION_QUEUE_MILLISECONDS"] = 10
+        app.config["ADMISSION_RETRY_AFTER_SECONDS"] = 3
+        admission.init_admission(app)
+        return app.extensions["admission_control"]
+
+    def test_sheds_with_retry_after(
+        self, client: FlaskClient, control: admission.AdmissionControl
+    ) -> None:
+        url = f"/dhos/v1/patient/{generate_uuid()}/latest_installation"
+        headers = {"Authorization": "Bearer TOKEN"}
+        assert client.get(url, headers=headers).status_code == 200
+        assert control.statistics()["in_flight"] == 0
+
+        control.acquire()
+        response = client.get(url, headers=headers)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+        assert control.statistics()["shed"] == 1
+        # Health checks aren't held up.
+        assert client.get("/running").status_code == 200
+
+    def test_releases_after_error(
+        self, client: FlaskClient, control: admission.AdmissionControl
+    ) -> None:
+        response = client.get(
+            f"/dhos/v1/patient/{generate_uuid()}/installation/{generate_uuid()}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 404
+        assert control.statistics()["in_flight"] == 0
+
+
+def test_admission_control_is_off_by_default(app: Flask) -> None:
+    assert "admission_control" not in app.extensions
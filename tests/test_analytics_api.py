@@ -0,0 +1,134 @@
+from datetime import date
+from typing import Dict, List
+from unittest.mock import Mock
+
+import pytest
+from flask.testing import FlaskClient
+from pytest_mock import MockFixture
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.installation_rollup import DesktopDailyRollup
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+@pytest.mark.usefixtures("mock_bearer_validation")
+class TestAnalyticsApi:
+    def test_get_patient_installation_counts(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        expected: List[Dict] = [
+            {"app_product": "GDM", "app_version": "1.0", "installation_count": 3}
+        ]
+        mock_get: Mock = mocker.patch.object(
+            controller, "get_installation_counts", return_value=expected
+        )
+        response = client.get(
+            "/dhos/v1/analytics/patient_installation_counts"
+            "?start_date=2021-01-01&group_by=app_product,app_version",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == expected
+        mock_get.assert_called_with(
+            Mobile,
+            group_by=["app_product", "app_version"],
+            start_date=date(2021, 1, 1),
+            end_date=None,
+        )
+
+    def test_get_clinician_installation_counts_defaults(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        mock_get: Mock = mocker.patch.object(
+            controller, "get_installation_counts", return_value=[]
+        )
+        response = client.get(
+            "/dhos/v1/analytics/clinician_installation_counts",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        mock_get.assert_called_with(
+            Desktop,
+            group_by=DesktopDailyRollup.dimensions,
+            start_date=None,
+            end_date=None,
+        )
+
+    def test_get_installation_counts_invalid_date(self, client: FlaskClient) -> None:
+        response = client.get(
+            "/dhos/v1/analytics/patient_installation_counts?start_date=yesterday",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_get_patient_distinct_devices(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        mock_get: Mock = mocker.patch.object(
+            controller, "get_distinct_devices", return_value=[]
+        )
+        response = client.get(
+            "/dhos/v1/analytics/patient_distinct_devices"
+            "?interval=month&group_by=app_version&end_date=2021-12-31",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        mock_get.assert_called_with(
+            Mobile,
+            group_by=["app_version"],
+            interval="month",
+            start_date=None,
+            end_date=date(2021, 12, 31),
+        )
+
+    def test_get_clinician_distinct_devices_invalid_interval(
+        self, client: FlaskClient
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/analytics/clinician_distinct_devices?interval=year",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_get_blood_glucose_meter_statistics(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        mock_get: Mock = mocker.patch.object(
+            controller, "get_blood_glucose_meter_statistics", return_value=[]
+        )
+        response = client.get(
+            "/dhos/v1/analytics/blood_glucose_meter_statistics"
+            "?group_by=serial_number&group_values=SN1,SN2",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        mock_get.assert_called_with(
+            group_by="serial_number", group_values=["SN1", "SN2"]
+        )
+
+    def test_get_patients_below_version(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        expected: Dict = {"patient_ids": ["patient-1"], "next_after": None}
+        mock_get: Mock = mocker.patch.object(
+            controller, "get_patients_below_version", return_value=expected
+        )
+        response = client.get(
+            "/dhos/v1/analytics/patients_below_version"
+            "?app_product=GDM&min_version=1.2.0&page_size=50&after=patient-0",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == expected
+        mock_get.assert_called_with("GDM", "1.2.0", page_size=50, after="patient-0")
+
+    def test_get_patients_below_version_page_size_too_large(
+        self, client: FlaskClient
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/analytics/patients_below_version"
+            "?app_product=GDM&min_version=1.2.0&page_size=100000",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
@@ -0,0 +1,175 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from flask import Flask
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import benchmark
+
+BASELINE = Path(__file__).parent / "benchmark_baseline.json"
+BASELINE_SIZE = 1000
+BASELINE_ROUNDS = 20
+
+
+@pytest.mark.usefixtures("app")
+class TestBenchmark:
+    def test_run_benchmarks(self) -> None:
+        progress: List[Tuple[int, str]] = []
+
+        results = benchmark.run_benchmarks(
+            controller.INGEST_BUILDERS,
+            sizes=[200, 100],
+            rounds=3,
+            warmup_rounds=1,
+            progress=lambda size, case: progress.append((size, case)),
+        )
+
+        assert results["dialect"] == "sqlite"
+        assert [result["size"] for result in results["results"]] == [100, 200]
+        small, large = results["results"]
+        assert sum(small["rows"].values()) >= 100
+        assert sum(large["rows"].values()) >= 200
+        assert set(small["cases"]) == set(large["cases"])
+        assert "controller.retrieve_latest_installation[Desktop]" in small["cases"]
+        assert "PATCH /dhos/v1/patient/<patient_id>/installation/<installation_id>" in (
+            small["cases"]
+        )
+        timing = small["cases"]["Mobile.to_dict"]
+        assert timing["rounds"] == 3
+        assert timing["min_ms"] <= timing["p50_ms"] <= timing["p95_ms"]
+        assert timing["p95_ms"] <= timing["max_ms"]
+        assert progress[0] == (100, "Mobile.to_dict")
+
+    def test_seed_to_counts_existing_rows(self) -> None:
+        benchmark.seed_to(controller.INGEST_BUILDERS, 100)
+        rows = benchmark.row_count()
+
+        benchmark.seed_to(controller.INGEST_BUILDERS, 100)
+        assert benchmark.row_count() == rows
+
+    def test_benchmark_command(self, app: Flask, tmp_path: Path) -> None:
+        output = tmp_path / "benchmark.json"
+        result = app.test_cli_runner().invoke(
+            args=[
+                "benchmark",
+                "--size",
+                "100",
+                "--rounds",
+                "2",
+                "--case",
+                "to_dict",
+                "--case",
+                "POST /dhos/v1/patient",
+                "--output",
+                str(output),
+            ]
+        )
+        assert result.exit_code == 0, result.output
+
+        cases = json.loads(output.read_text())["results"][0]["cases"]
+        assert set(cases) == {
+            "Mobile.to_dict",
+            "Desktop.to_dict",
+            "BloodGlucoseMeter.to_dict",
+            "POST /dhos/v1/patient/<patient_id>/installation",
+        }
+
+
+def test_token_refused_in_production(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ENVIRONMENT", "PRODUCTION")
+    with pytest.raises(PermissionError):
+        benchmark.token("patient_id", "P1")
+
+
+def test_percentile() -> None:
+    values = [float(value) for value in range(1, 101)]
+    assert benchmark.percentile(values, 50) == 50
+    assert benchmark.percentile(values, 95) == 95
+    assert benchmark.percentile([3.0], 99) == 3.0
+
+
+def _results(dialect: str = "sqlite", **timing: float) -> Dict[str, Any]:
+    return {
+        "dialect": dialect,
+        "results": [
+            {
+                "size": 1000,
+                "cases": {
+                    "Mobile.to_dict": {"p95_ms": 0.1, "statements": 0},
+                    "GET /route": {"p95_ms": 10.0, "statements": 2, **timing},
+                },
+            }
+        ],
+    }
+
+
+class TestCompareResults:
+    def test_no_regressions(self) -> None:
+        baseline = _results()
+        assert benchmark.compare_results(baseline, _results(p95_ms=12.0)) == []
+        # Small absolute changes aren't regressions, however large relatively.
+        assert (
+            benchmark.compare_results(
+                baseline, _results(p95_ms=10.5), latency_tolerance=0
+            )
+            == []
+        )
+
+    def test_latency_regression(self) -> None:
+        assert benchmark.compare_results(_results(), _results(p95_ms=13.0)) == [
+            "1000 rows, GET /route: p95 13.000 ms, baseline 10.000 ms"
+        ]
+
+    def test_statement_regression(self) -> None:
+        assert benchmark.compare_results(_results(), _results(statements=3)) == [
+            "1000 rows, GET /route: 3 statements, baseline 2"
+        ]
+        assert (
+            benchmark.compare_results(
+                _results(), _results(statements=3), statement_tolerance=1
+            )
+            == []
+        )
+
+    def test_ignores_new_cases_and_sizes(self) -> None:
+        results = _results(statements=3)
+        results["results"][0]["size"] = 2000
+        assert benchmark.compare_results(_results(), results) == []
+
+    def test_statements_only(self) -> None:
+        assert (
+            benchmark.compare_results(
+                _results(p95_ms=1.0),
+                _results(p95_ms=100.0),
+                latency_tolerance=None,
+            )
+            == []
+        )
+
+    def test_different_dialects(self) -> None:
+        with pytest.raises(ValueError, match="recorded on postgresql"):
+            benchmark.compare_results(_results("postgresql"), _results())
+
+
+@pytest.mark.usefixtures("app")
+def test_statement_baseline() -> None:
+    """
+    Fails when a case issues more SQL statements than in the committed baseline.
+    Latency isn't checked here, as it varies between machines and runs; see
+    `tox -e benchmark`. After an intended change, rewrite the baseline with
+    `tox -e benchmark-baseline`.
+    """
+    results = benchmark.run_benchmarks(
+        controller.INGEST_BUILDERS,
+        sizes=[BASELINE_SIZE],
+        rounds=BASELINE_ROUNDS,
+    )
+
+    assert (
+        benchmark.compare_results(
+            json.loads(BASELINE.read_text()), results, latency_tolerance=None
+        )
+        == []
+    )
@@ -0,0 +1,190 @@
+import csv
+import json
+from datetime import date
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+from flask import Flask
+from flask_batteries_included.helpers import generate_uuid
+from pytest_mock import MockFixture
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import bulk_load, partitions, rollup
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+def _write_csv(path: Path, records: List[Dict]) -> Path:
+    with path.open("w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+    return path
+
+
+@pytest.mark.usefixtures("app")
+class TestBulkLoad:
+    @pytest.fixture
+    def mobile_records(self, mobile_telemetry_in_dict: Dict) -> List[Dict]:
+        return [
+            {
+                "patient_id": generate_uuid(),
+                "uuid": generate_uuid(),
+                **mobile_telemetry_in_dict,
+                "app_version": f"1.{index}.0",
+            }
+            for index in range(5)
+        ]
+
+    def test_load_csv(self, tmp_path: Path, mobile_records: List[Dict]) -> None:
+        path = _write_csv(tmp_path / "mobile.csv", mobile_records)
+        progress: List[int] = []
+
+        read, inserted = bulk_load.load_file(
+            "mobile",
+            path,
+            controller.INGEST_BUILDERS["mobile"],
+            chunk_size=2,
+            progress=lambda read, inserted: progress.append(read),
+        )
+
+        assert (read, inserted) == (5, 5)
+        assert progress == [2, 4, 5]
+        assert {mobile.uuid for mobile in Mobile.query} == {
+            record["uuid"] for record in mobile_records
+        }
+        mobile = Mobile.query.get(mobile_records[0]["uuid"])
+        assert mobile.patient_id == mobile_records[0]["patient_id"]
+        assert mobile.created_by == bulk_load.LOAD_USER
+        assert rollup.installation_counts(Mobile, group_by=["app_product"]) == [
+            {"app_product": "GDM", "installation_count": 5}
+        ]
+        assert bulk_load.checkpoint_path(path).read_text() == "5"
+
+    def test_resume_after_invalid_record(
+        self, app: Flask, tmp_path: Path, mobile_records: List[Dict]
+    ) -> None:
+        invalid = [*mobile_records]
+        invalid[2] = {**invalid[2], "date_first_launched": "yesterday"}
+        path = _write_csv(tmp_path / "mobile.csv", invalid)
+
+        result = app.test_cli_runner().invoke(
+            args=["load-telemetry", "mobile", str(path), "--chunk-size", "2"]
+        )
+        assert result.exit_code == 1
+        assert "Record 3" in result.output
+        assert Mobile.query.count() == 2
+
+        _write_csv(path, mobile_records)
+        result = app.test_cli_runner().invoke(
+            args=["load-telemetry", "mobile", str(path), "--resume"]
+        )
+        assert result.exit_code == 0, result.output
+        assert "Loaded 3 mobile rows from 5 records" in result.output
+        assert Mobile.query.count() == 5
+
+    def test_reload_skips_stored_records(
+        self, tmp_path: Path, mobile_records: List[Dict]
+    ) -> None:
+        path = _write_csv(tmp_path / "mobile.csv", mobile_records)
+        bulk_load.load_file("mobile", path, controller.INGEST_BUILDERS["mobile"])
+
+        assert bulk_load.load_file(
+            "mobile", path, controller.INGEST_BUILDERS["mobile"]
+        ) == (5, 0)
+        assert Mobile.query.count() == 5
+
+    def test_resume_after_lost_checkpoint_skips_committed_chunk(
+        self, tmp_path: Path, mobile_records: List[Dict]
+    ) -> None:
+        records = [
+            {key: value for key, value in record.items() if key != "uuid"}
+            for record in mobile_records
+        ]
+        path = _write_csv(tmp_path / "mobile.csv", records)
+        builder = controller.INGEST_BUILDERS["mobile"]
+        assert bulk_load.load_file("mobile", path, builder, chunk_size=2) == (5, 5)
+
+        # As if the process died after committing the second chunk but before
+        # recording it.
+        bulk_load.checkpoint_path(path).write_text("2")
+
+        assert bulk_load.load_file(
+            "mobile", path, builder, chunk_size=2, resume=True
+        ) == (5, 0)
+        assert Mobile.query.count() == 5
+
+    def test_load_ndjson(
+        self, tmp_path: Path, clinician_telemetry_in_dict: Dict
+    ) -> None:
+        clinician_id = generate_uuid()
+        path = tmp_path / "desktop.ndjson"
+        path.write_text(
+            "\n".join(
+                json.dumps(
+                    {
+                        "clinician_id": clinician_id,
+                        **clinician_telemetry_in_dict,
+                        "created": "2021-01-01T12:00:00.000+01:00",
+                    }
+                )
+                for _ in range(3)
+            )
+        )
+
+        assert bulk_load.load_file(
+            "desktop", path, controller.INGEST_BUILDERS["desktop"]
+        ) == (3, 3)
+        desktop = Desktop.query.filter_by(clinician_id=clinician_id).first()
+        assert desktop.created.isoformat() == "2021-01-01T11:00:00"
+
+    def test_load_creates_historical_partitions(
+        self, tmp_path: Path, mocker: MockFixture, meter_in_dict: Dict
+    ) -> None:
+        # Stands in for COPY into the partitioned table on Postgres.
+        mocker.patch.object(bulk_load, "_partitioned", return_value=True)
+        insert_rows = mocker.patch.object(bulk_load, "insert_rows")
+        create_partitions = mocker.patch.object(partitions, "create_partitions")
+        path = tmp_path / "blood_glucose_meter.ndjson"
+        path.write_text(
+            "\n".join(
+                json.dumps(
+                    {"patient_id": generate_uuid(), **meter_in_dict, "created": created}
+                )
+                for created in [
+                    "2015-03-31T23:00:00.000Z",
+                    "2016-05-02T00:00:00.000Z",
+                    "2016-01-15T00:00:00.000Z",
+                ]
+            )
+        )
+
+        assert bulk_load.load_file(
+            "blood_glucose_meter",
+            path,
+            controller.INGEST_BUILDERS["blood_glucose_meter"],
+            chunk_size=2,
+        ) == (3, 3)
+        assert create_partitions.call_args_list == [
+            mocker.call(date(2015, 3, 1), months_ahead=14),
+            mocker.call(date(2016, 1, 1), months_ahead=0),
+        ]
+        assert insert_rows.call_count == 2
+
+    def test_load_rejects_unknown_fields(
+        self, tmp_path: Path, mobile_records: List[Dict]
+    ) -> None:
+        path = _write_csv(
+            tmp_path / "mobile.csv", [{**mobile_records[0], "colour": "blue"}]
+        )
+        with pytest.raises(ValueError, match="Record 1"):
+            bulk_load.load_file("mobile", path, controller.INGEST_BUILDERS["mobile"])
+        assert Mobile.query.count() == 0
+
+
+def test_copy_field() -> None:
+    assert bulk_load._copy_field(None) == ""
+    assert bulk_load._copy_field("") == '""'
+    assert bulk_load._copy_field('say "hi", twice') == '"say ""hi"", twice"'
+    assert bulk_load._copy_field(1.5) == '"1.5"'
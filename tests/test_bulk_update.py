@@ -0,0 +1,149 @@
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+from flask_batteries_included.helpers import generate_uuid
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import bulk_update, meter_statistics, rollup
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+def _counts(group_by: List[str]) -> List[Dict]:
+    return [
+        row
+        for row in rollup.installation_counts(Mobile, group_by=group_by)
+        if row["installation_count"]
+    ]
+
+
+@pytest.mark.usefixtures("app")
+class TestBulkUpdate:
+    @pytest.fixture
+    def installations(self, mobile_telemetry_in_dict: Dict) -> List[str]:
+        uuids = []
+        for app_product, app_version in [
+            ("gdm", "1.2.0"),
+            ("gdm", "1.2.1"),
+            ("gdm", "1.3.0"),
+            ("GDM", "1.3.0"),
+        ]:
+            installation = controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={
+                    **mobile_telemetry_in_dict,
+                    "app_product": app_product,
+                    "app_version": app_version,
+                },
+            )
+            uuids.append(installation["uuid"])
+        return uuids
+
+    @pytest.fixture
+    def meters(self, meter_in_dict: Dict) -> List[str]:
+        uuids = []
+        for serial_number, value in [("SN1", 5.0), ("SN1", 6.0), ("SN2", 7.0)]:
+            meter = controller.create_blood_glucose_meter(
+                patient_id=generate_uuid(),
+                meter_data={
+                    **meter_in_dict,
+                    "serial_number": serial_number,
+                    "blood_glucose_value": value,
+                    "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+                },
+            )
+            uuids.append(meter["uuid"])
+        return uuids
+
+    def test_update_by_filter(
+        self, installations: List[str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(bulk_update, "BATCH_SIZE", 2)
+
+        updated = bulk_update.update_by_filter(
+            Mobile,
+            {"app_product": "gdm", "app_version": ["1.2.0", "1.2.1", "1.3.0"]},
+            {"app_product": "GDM"},
+        )
+
+        assert updated == 3
+        assert {mobile.app_product for mobile in Mobile.query} == {"GDM"}
+        assert _counts(["app_product"]) == [
+            {"app_product": "GDM", "installation_count": 4}
+        ]
+
+    def test_update_by_uuid(self, installations: List[str]) -> None:
+        updated = bulk_update.update_by_uuid(
+            Mobile,
+            [
+                {"uuid": installations[0], "changes": {"app_version": "1.10.0"}},
+                {"uuid": installations[1], "changes": {"app_version": "1.10.0"}},
+                {"uuid": installations[2], "changes": {"phone_os_version": "15.1"}},
+            ],
+        )
+
+        assert updated == 3
+        mobile = Mobile.query.filter_by(uuid=installations[0]).one()
+        assert mobile.app_version == "1.10.0"
+        # Derived columns are kept in step, as for a single update.
+        assert mobile.app_version_key == Mobile.version_sort_key("1.10.0")
+        assert (
+            Mobile.query.filter_by(uuid=installations[2]).one().phone_os_version
+            == "15.1"
+        )
+
+    def test_rollups_match_rebuild(self, installations: List[str]) -> None:
+        bulk_update.update_by_filter(
+            Mobile, {"app_product": "gdm"}, {"app_product": "GDM", "app_version": "2"}
+        )
+        incremental = _counts(["app_product", "app_version"])
+
+        rollup.rebuild_rollups(Mobile)
+
+        assert incremental == _counts(["app_product", "app_version"])
+
+    def test_meter_statistics_match_rebuild(self, meters: List[str]) -> None:
+        bulk_update.update_by_uuid(
+            BloodGlucoseMeter,
+            [
+                {"uuid": meters[0], "changes": {"serial_number": "SN2"}},
+                {"uuid": meters[2], "changes": {"blood_glucose_value": 9.5}},
+            ],
+        )
+        incremental = [
+            row
+            for row in meter_statistics.meter_statistics("serial_number")
+            if row["verification_count"]
+        ]
+
+        meter_statistics.rebuild_statistics()
+
+        assert incremental == meter_statistics.meter_statistics("serial_number")
+
+    @pytest.mark.parametrize(
+        "filters,changes",
+        [
+            ({}, {"app_product": "GDM"}),
+            ({"display_name": "x"}, {"app_product": "GDM"}),
+            ({"app_product": "gdm"}, {}),
+            ({"app_product": "gdm"}, {"unique_device_code": "x"}),
+        ],
+    )
+    def test_invalid_update_by_filter(
+        self, installations: List[str], filters: Dict, changes: Dict
+    ) -> None:
+        with pytest.raises(ValueError):
+            bulk_update.update_by_filter(Mobile, filters, changes)
+
+    def test_invalid_update_writes_nothing(self, installations: List[str]) -> None:
+        with pytest.raises(TypeError):
+            bulk_update.update_by_uuid(
+                Mobile,
+                [
+                    {"uuid": installations[0], "changes": {"app_version": "2.0.0"}},
+                    {"uuid": installations[1], "changes": {"app_version": 2}},
+                ],
+            )
+
+        assert Mobile.query.filter_by(app_version="2.0.0").count() == 0
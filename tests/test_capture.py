@@ -0,0 +1,95 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.helpers import generate_uuid
+
+from dhos_telemetry_api.helpers import capture
+
+
+@pytest.mark.usefixtures("mock_bearer_validation")
+class TestRequestCapture:
+    @pytest.fixture
+    def capture_file(self, app: Flask, tmp_path: Path) -> Path:
+        path = tmp_path / "requests.jsonl"
+        app.config["REQUEST_CAPTURE_FILE"] = str(path)
+        capture.init_capture(app)
+        return path
+
+    def _entries(self, app: Flask, path: Path) -> List[Dict]:
+        request_capture = app.extensions["request_capture"]
+        request_capture.close()
+        lines = Path(request_capture.file_path).read_text().splitlines()
+        return [json.loads(line) for line in lines]
+
+    def test_captures_request_shapes(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        capture_file: Path,
+        mobile_telemetry_in_dict: Dict,
+    ) -> None:
+        patient_id = generate_uuid()
+        headers = {"Authorization": "Bearer TOKEN"}
+        client.post(
+            f"/dhos/v1/patient/{patient_id}/installation",
+            json=mobile_telemetry_in_dict,
+            headers=headers,
+        )
+        client.get(
+            f"/dhos/v1/patient/{patient_id}/latest_installation", headers=headers
+        )
+        client.get(
+            "/dhos/v1/patient_installations",
+            query_string={"unique_device_code": "0987", "prefix": "true"},
+            headers=headers,
+        )
+        client.get("/running")
+
+        created, latest, lookup = self._entries(app, capture_file)
+        assert created["method"] == "POST"
+        assert created["route"] == "/dhos/v1/patient/<patient_id>/installation"
+        assert created["status"] == 200
+        assert created["fields"] == sorted(mobile_telemetry_in_dict)
+        assert created["body_bytes"] > 0
+        assert created["duration_ms"] > 0
+        assert latest["fields"] is None
+        # The same subject gets the same pseudonym, and no identifiers are recorded.
+        assert created["path"]["patient_id"].startswith(capture.PSEUDONYM_PREFIX)
+        assert latest["path"] == created["path"]
+        assert lookup["query"]["prefix"] == ["true"]
+        assert lookup["query"]["unique_device_code"] != ["0987"]
+        text = Path(app.extensions["request_capture"].file_path).read_text()
+        assert patient_id not in text
+        assert mobile_telemetry_in_dict["unique_device_code"] not in text
+
+    def test_pseudonyms_differ_between_processes(self, tmp_path: Path) -> None:
+        first = capture.RequestCapture(str(tmp_path / "first.jsonl"))
+        second = capture.RequestCapture(str(tmp_path / "second.jsonl"))
+        assert first.pseudonym("value") == first.pseudonym("value")
+        assert first.pseudonym("value") != second.pseudonym("value")
+
+    def test_pseudonyms_with_shared_key(self, tmp_path: Path) -> None:
+        key = b"k" * 32
+        first = capture.RequestCapture(str(tmp_path / "first.jsonl"), key=key)
+        second = capture.RequestCapture(str(tmp_path / "second.jsonl"), key=key)
+        assert first.pseudonym("value") == second.pseudonym("value")
+
+    def test_file_per_process(self, tmp_path: Path) -> None:
+        request_capture = capture.RequestCapture(str(tmp_path / "requests.jsonl"))
+        assert list(tmp_path.iterdir()) == []
+
+        request_capture.write({"route": "/dhos/v1/patient"})
+        request_capture.close()
+
+        assert [path.name for path in tmp_path.iterdir()] == [
+            f"requests.jsonl.{os.getpid()}"
+        ]
+
+
+def test_capture_is_off_by_default(app: Flask) -> None:
+    assert "request_capture" not in app.extensions
@@ -0,0 +1,85 @@
+from typing import Dict
+
+import pytest
+from flask_batteries_included.sqldb import db
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import cohort
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+@pytest.mark.usefixtures("app")
+class TestCohort:
+    @pytest.fixture(autouse=True)
+    def installations(self, mobile_telemetry_in_dict: Dict) -> None:
+        for patient_id, product, version, launched in [
+            # Upgraded from an old version, so not in the cohort.
+            ("patient-1", "GDM", "1.9.0", "2020-01-01T00:00:00.000Z"),
+            ("patient-1", "GDM", "1.10.0", "2020-02-01T00:00:00.000Z"),
+            # Downgraded to an old version.
+            ("patient-2", "GDM", "1.10.0", "2020-01-01T00:00:00.000Z"),
+            ("patient-2", "GDM", "1.2", "2020-02-01T00:00:00.000Z"),
+            # Latest GDM installation is old; other products don't count.
+            ("patient-3", "GDM", "1.0.x", "2020-01-01T00:00:00.000Z"),
+            ("patient-3", "DBM", "5.0.0", "2020-03-01T00:00:00.000Z"),
+            ("patient-4", "GDM", "1.9.99", "2020-01-01T00:00:00.000Z"),
+            ("patient-5", "DBM", "1.0.0", "2020-01-01T00:00:00.000Z"),
+        ]:
+            controller.create_mobile_installation(
+                patient_id=patient_id,
+                installation_data={
+                    **mobile_telemetry_in_dict,
+                    "app_product": product,
+                    "app_version": version,
+                    "date_first_launched": launched,
+                },
+            )
+
+    @pytest.mark.parametrize(
+        "lower,higher",
+        [("1.9", "1.10"), ("1.2", "1.2.1"), ("1.0.x", "1.0.1"), ("9", "10.0")],
+    )
+    def test_version_sort_key_order(self, lower: str, higher: str) -> None:
+        assert Mobile.version_sort_key(lower) < Mobile.version_sort_key(higher)
+
+    def test_version_sort_key_ignores_trailing_zeros(self) -> None:
+        assert Mobile.version_sort_key("1.2") == Mobile.version_sort_key("1.2.0")
+
+    def test_patients_below_version(self) -> None:
+        result = cohort.patients_below_version("GDM", "1.10")
+
+        assert result == {
+            "patient_ids": ["patient-2", "patient-3", "patient-4"],
+            "next_after": None,
+        }
+
+    def test_pages(self) -> None:
+        first = cohort.patients_below_version("GDM", "1.10", page_size=2)
+        second = cohort.patients_below_version(
+            "GDM", "1.10", page_size=2, after=first["next_after"]
+        )
+
+        assert first == {
+            "patient_ids": ["patient-2", "patient-3"],
+            "next_after": "patient-3",
+        }
+        assert second == {"patient_ids": ["patient-4"], "next_after": None}
+
+    @pytest.mark.parametrize(
+        "min_version,page_size", [("", 10), ("1.0", 0), ("1.0", 10001)]
+    )
+    def test_invalid_arguments(self, min_version: str, page_size: int) -> None:
+        with pytest.raises(ValueError):
+            cohort.patients_below_version("GDM", min_version, page_size=page_size)
+
+    def test_backfill_version_keys(self) -> None:
+        db.session.query(Mobile).update(
+            {Mobile.app_version_key: None}, synchronize_session=False
+        )
+        db.session.commit()
+
+        updated = cohort.backfill_version_keys(batch_size=3, pause_seconds=0)
+
+        assert updated == 8
+        result = cohort.patients_below_version("GDM", "1.10")
+        assert result["patient_ids"] == ["patient-2", "patient-3", "patient-4"]
@@ -0,0 +1,143 @@
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+from flask import Flask
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import compaction
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+@pytest.mark.usefixtures("app")
+class TestCompaction:
+    @pytest.fixture
+    def installations(self, mobile_telemetry_in_dict: Dict) -> List[str]:
+        """Creates one patient's installations, returning their uuids in order."""
+        uuids = []
+        for device, version, launched in [
+            ("device-1", "18.1.x", "2020-01-01T00:00:00.000Z"),
+            ("device-1", "18.1.x", "2020-01-02T00:00:00.000Z"),
+            ("device-1", "18.1.x", "2020-01-03T00:00:00.000Z"),
+            ("device-1", "18.2.x", "2020-02-01T00:00:00.000Z"),
+            ("device-1", "18.1.x", "2020-03-01T00:00:00.000Z"),
+            ("device-2", "18.1.x", "2020-01-05T00:00:00.000Z"),
+            ("device-2", "18.1.x", "2020-01-06T00:00:00.000Z"),
+        ]:
+            installation = controller.create_mobile_installation(
+                patient_id="patient-1",
+                installation_data={
+                    **mobile_telemetry_in_dict,
+                    "unique_device_code": device,
+                    "app_version": version,
+                    "date_first_launched": launched,
+                },
+            )
+            uuids.append(installation["uuid"])
+        return uuids
+
+    def test_compact_installations(
+        self, installations: List[str], meter_in_dict: Dict
+    ) -> None:
+        meter = controller.create_blood_glucose_meter(
+            patient_id="patient-1",
+            meter_data={
+                **meter_in_dict,
+                "mobile_id": installations[2],
+                "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+            },
+        )
+
+        report = compaction.compact_installations(
+            Mobile, batch_size=10, pause_seconds=0
+        )
+
+        assert report == {
+            "owners": 1,
+            "installations_removed": 3,
+            "meter_references_rewritten": 1,
+        }
+        # Runs are only collapsed while consecutive, so the later 18.1.x is kept.
+        remaining = {row.uuid for row in Mobile.query}
+        assert remaining == {
+            installations[0],
+            installations[3],
+            installations[4],
+            installations[5],
+        }
+        rewritten = BloodGlucoseMeter.query.filter_by(uuid=meter["uuid"]).one()
+        assert rewritten.mobile_id == installations[0]
+        counts = controller.get_installation_counts(Mobile, group_by=["app_version"])
+        assert counts == [
+            {"app_version": "18.1.x", "installation_count": 3},
+            {"app_version": "18.2.x", "installation_count": 1},
+        ]
+
+    def test_dry_run_changes_nothing(self, installations: List[str]) -> None:
+        report = compaction.compact_installations(
+            Mobile, batch_size=10, pause_seconds=0, dry_run=True
+        )
+
+        assert report["installations_removed"] == 3
+        assert Mobile.query.count() == len(installations)
+
+    def test_batches_by_owner(self, mobile_telemetry_in_dict: Dict) -> None:
+        for patient_id in ["patient-1", "patient-1", "patient-2", "patient-3"]:
+            controller.create_mobile_installation(
+                patient_id=patient_id,
+                installation_data={**mobile_telemetry_in_dict},
+            )
+        progress = []
+
+        report = compaction.compact_installations(
+            Mobile,
+            batch_size=2,
+            pause_seconds=0,
+            progress=lambda owners, removed: progress.append((owners, removed)),
+        )
+
+        assert report["installations_removed"] == 1
+        assert progress == [(2, 1), (3, 1)]
+
+    def test_ignores_audit_columns(self, mobile_telemetry_in_dict: Dict) -> None:
+        for user in ["user-1", "user-2"]:
+            installation = controller.create_mobile_installation(
+                patient_id="patient-1", installation_data={**mobile_telemetry_in_dict}
+            )
+            Mobile.query.filter_by(uuid=installation["uuid"]).update(
+                {"created_by_": user, "modified_by_": user}
+            )
+
+        report = compaction.compact_installations(
+            Mobile, batch_size=10, pause_seconds=0
+        )
+
+        assert report["installations_removed"] == 1
+        assert Mobile.query.one().created_by_ == "user-1"
+
+    def test_compares_interned_values(
+        self, app: Flask, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        for intern in [False, True]:
+            app.config["INTERN_INSTALLATION_DIMENSIONS"] = intern
+            controller.create_mobile_installation(
+                patient_id="patient-1", installation_data={**mobile_telemetry_in_dict}
+            )
+
+        report = compaction.compact_installations(
+            Mobile, batch_size=10, pause_seconds=0
+        )
+
+        assert report["installations_removed"] == 1
+        assert Mobile.query.one().app_product_id is None
+
+    @pytest.mark.usefixtures("installations")
+    def test_compact_command(self, app: Flask) -> None:
+        result = app.test_cli_runner().invoke(
+            args=["compact-installations", "--pause", "0"]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Removed 3 duplicate Mobile rows for 1 owners" in result.output
+        assert "Removed 0 duplicate Desktop rows for 0 owners" in result.output
@@ -182,3 +182,95 @@ class TestDesktopApi:
             clinician_id=clinician_id,
             uuid=installation_id,
         )
+
+    def test_get_clinician_installations_in_network(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        expected_response = [{"uuid": generate_uuid()}]
+        mock_get: Mock = mocker.patch.object(
+            controller,
+            "get_clinician_installations_in_network",
+            return_value=expected_response,
+        )
+        response = client.get(
+            "/dhos/v1/clinician_installations?network=10.20.0.0/16&limit=5",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == expected_response
+        mock_get.assert_called_with("10.20.0.0/16", limit=5)
+
+    def test_get_clinician_installations_requires_network(
+        self, client: FlaskClient
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/clinician_installations",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_search_clinician_installations_by_device_code(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        expected_response = [{"uuid": generate_uuid()}]
+        mock_get: Mock = mocker.patch.object(
+            controller,
+            "get_installations_by_device_code",
+            return_value=expected_response,
+        )
+        response = client.get(
+            "/dhos/v1/clinician_installations?unique_device_code=DESK&prefix=true",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == expected_response
+        mock_get.assert_called_with(Desktop, "DESK", prefix=True, limit=100)
+
+    def test_search_clinician_installations_rejects_both_filters(
+        self, client: FlaskClient
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/clinician_installations?network=10.0.0.0/8&unique_device_code=DESK",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_bulk_update_requires_updates_or_filter(self, client: FlaskClient) -> None:
+        response = client.patch(
+            "/dhos/v1/clinician_installations",
+            json={"changes": {"app_version": "2.0.0"}},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_erase_clinician_telemetry(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        mock_erase: Mock = mocker.patch.object(
+            controller, "erase_clinician_data", return_value={"desktop": 1}
+        )
+        clinician_id: str = generate_uuid()
+        response = client.delete(
+            f"/dhos/v1/clinician/{clinician_id}/telemetry",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == {"desktop": 1}
+        mock_erase.assert_called_with(clinician_id=clinician_id)
+
+    def test_export_clinician_telemetry(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        mock_export: Mock = mocker.patch.object(
+            controller,
+            "export_clinician_data",
+            return_value=iter(['{"clinician_id": "c", "desktop": [', "]", "}"]),
+        )
+        clinician_id: str = generate_uuid()
+        response = client.get(
+            f"/dhos/v1/clinician/{clinician_id}/telemetry",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == {"clinician_id": "c", "desktop": []}
+        mock_export.assert_called_with(clinician_id=clinician_id)
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Generator, List
+
+import pytest
+from flask_batteries_included.helpers import generate_uuid
+from flask_batteries_included.sqldb import db
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import meter_statistics
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+@pytest.mark.usefixtures("app")
+class TestDeviceRegistration:
+    @pytest.fixture
+    def registration_data(
+        self, mobile_telemetry_in_dict: Dict, meter_in_dict: Dict
+    ) -> Dict:
+        meter = {
+            key: value for key, value in meter_in_dict.items() if key != "mobile_id"
+        }
+        return {
+            "installation": mobile_telemetry_in_dict,
+            "blood_glucose_meters": [
+                {
+                    **meter,
+                    "serial_number": serial_number,
+                    "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+                }
+                for serial_number in ["SN1", "SN2", "SN3"]
+            ],
+        }
+
+    @pytest.fixture
+    def meter_inserts(self) -> Generator[List[bool], None, None]:
+        inserts: List[bool] = []
+
+        def record(
+            conn: Any,
+            cursor: Any,
+            statement: str,
+            parameters: Any,
+            context: Any,
+            executemany: bool,
+        ) -> None:
+            if statement.startswith("INSERT INTO blood_glucose_meter "):
+                inserts.append(executemany)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        yield inserts
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    def test_register_mobile_device(
+        self, registration_data: Dict, meter_inserts: List[bool]
+    ) -> None:
+        patient_id = generate_uuid()
+
+        result = controller.register_mobile_device(patient_id, registration_data)
+
+        mobile_id = result["installation"]["uuid"]
+        assert result["installation"]["patient_id"] == patient_id
+        assert [
+            (meter["serial_number"], meter["mobile_id"], meter["patient_id"])
+            for meter in result["blood_glucose_meters"]
+        ] == [
+            ("SN1", mobile_id, patient_id),
+            ("SN2", mobile_id, patient_id),
+            ("SN3", mobile_id, patient_id),
+        ]
+        assert BloodGlucoseMeter.query.filter_by(mobile_id=mobile_id).count() == 3
+        assert meter_inserts == [True]
+        assert {
+            row["serial_number"]: row["verification_count"]
+            for row in meter_statistics.meter_statistics("serial_number")
+        } == {"SN1": 1, "SN2": 1, "SN3": 1}
+
+    def test_register_without_meters(self, mobile_telemetry_in_dict: Dict) -> None:
+        result = controller.register_mobile_device(
+            generate_uuid(), {"installation": mobile_telemetry_in_dict}
+        )
+
+        assert result["blood_glucose_meters"] == []
+        assert Mobile.query.count() == 1
+
+    def test_registration_is_atomic(self, registration_data: Dict) -> None:
+        registration_data["blood_glucose_meters"][1]["serial_number"] = None
+
+        with pytest.raises(IntegrityError):
+            controller.register_mobile_device(generate_uuid(), registration_data)
+        db.session.rollback()
+
+        assert Mobile.query.count() == 0
+        assert BloodGlucoseMeter.query.count() == 0
@@ -0,0 +1,231 @@
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import pytest
+from flask import Flask
+from flask_batteries_included.helpers import generate_uuid
+from flask_batteries_included.sqldb import db
+from pytest_mock import MockFixture
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import device_sketch
+from dhos_telemetry_api.helpers.hyperloglog import HyperLogLog
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.device_sketch import DeviceMonthSketch, DeviceSketch
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+@pytest.mark.usefixtures("app")
+class TestDeviceSketch:
+    def test_distinct_devices(self, mobile_telemetry_in_dict: Dict) -> None:
+        for device in ["a", "b", "c", "a", "b"]:
+            controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={
+                    **mobile_telemetry_in_dict,
+                    "unique_device_code": device,
+                },
+            )
+        controller.create_mobile_installation(
+            patient_id=generate_uuid(),
+            installation_data={**mobile_telemetry_in_dict, "app_version": "18.2.x"},
+        )
+
+        result = controller.get_distinct_devices(
+            Mobile, group_by=["app_product", "app_version"]
+        )
+
+        assert [(r["app_version"], r["distinct_devices"]) for r in result] == [
+            ("18.1.x", 3),
+            ("18.2.x", 1),
+        ]
+        assert result[0]["standard_error"] == 0.0163
+
+    def test_distinct_devices_per_month(
+        self, clinician_telemetry_in_dict: Dict
+    ) -> None:
+        controller.create_desktop_installation(
+            clinician_id=generate_uuid(), installation_data=clinician_telemetry_in_dict
+        )
+
+        result = controller.get_distinct_devices(
+            Desktop, group_by=["app_product"], interval="month"
+        )
+
+        assert result == [
+            {
+                "period_start": date.today().replace(day=1),
+                "app_product": "GDM",
+                "distinct_devices": 1,
+                "standard_error": 0.0163,
+            }
+        ]
+        assert controller.get_distinct_devices(Mobile, group_by=["app_product"]) == []
+
+    def test_mixed_precisions_are_merged(
+        self, app: Flask, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        controller.create_mobile_installation(
+            patient_id=generate_uuid(), installation_data={**mobile_telemetry_in_dict}
+        )
+        app.config["DEVICE_SKETCH_PRECISION"] = 8
+        controller.create_mobile_installation(
+            patient_id=generate_uuid(),
+            installation_data={
+                **mobile_telemetry_in_dict,
+                "unique_device_code": "other",
+                "app_version": "18.2.x",
+            },
+        )
+
+        result = controller.get_distinct_devices(Mobile, group_by=["app_product"])
+
+        assert {row.precision for row in DeviceSketch.query} == {8, 12}
+        assert result[0]["distinct_devices"] == 2
+        assert result[0]["standard_error"] == 0.065
+
+    def test_distinct_devices_invalid_interval(self) -> None:
+        with pytest.raises(ValueError):
+            controller.get_distinct_devices(Mobile, group_by=[], interval="year")
+
+    def test_shards_are_merged(
+        self, app: Flask, mocker: MockFixture, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        app.config["DEVICE_SKETCH_SHARDS"] = 4
+        # Fixed UUIDs, which land in every shard.
+        mocker.patch.object(
+            controller,
+            "generate_uuid",
+            side_effect=[f"mobile-{device}" for device in range(20)],
+        )
+        for device in range(20):
+            controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={
+                    **mobile_telemetry_in_dict,
+                    "unique_device_code": str(device),
+                },
+            )
+
+        result = controller.get_distinct_devices(Mobile, group_by=["app_version"])
+
+        assert {row.shard for row in DeviceSketch.query} == {0, 1, 2, 3}
+        assert [(r["app_version"], r["distinct_devices"]) for r in result] == [
+            ("18.1.x", 20)
+        ]
+
+
+def _add_sketch(day: date, devices: Sequence[str], shard: int = 0) -> None:
+    sketch = HyperLogLog(12)
+    for device in devices:
+        sketch.add(device)
+    db.session.add(
+        DeviceSketch(
+            installation_type="mobile",
+            day=day,
+            app_product="GDM",
+            app_version="18.1.x",
+            shard=shard,
+            precision=sketch.precision,
+            registers=sketch.to_bytes(),
+        )
+    )
+    db.session.commit()
+
+
+@pytest.mark.usefixtures("app")
+class TestCompactSketches:
+    @pytest.fixture
+    def sketches(self) -> None:
+        _add_sketch(date(2026, 1, 5), ["a", "b"])
+        _add_sketch(date(2026, 1, 5), ["c"], shard=1)
+        _add_sketch(date(2026, 1, 20), ["a", "d"], shard=2)
+        _add_sketch(date(2026, 2, 1), ["e"])
+        _add_sketch(date(2026, 3, 1), ["f"], shard=3)
+
+    def distinct(
+        self, start_date: Optional[date] = None, end_date: Optional[date] = None
+    ) -> int:
+        result = controller.get_distinct_devices(
+            Mobile, group_by=[], start_date=start_date, end_date=end_date
+        )
+        return result[0]["distinct_devices"]
+
+    @pytest.mark.usefixtures("sketches")
+    def test_compaction_keeps_estimates(self) -> None:
+        ranges: List[Dict[str, date]] = [
+            {},
+            {"start_date": date(2026, 1, 1), "end_date": date(2026, 2, 28)},
+            {"start_date": date(2026, 1, 6), "end_date": date(2026, 3, 1)},
+            {"start_date": date(2026, 1, 20), "end_date": date(2026, 1, 31)},
+        ]
+        before = [self.distinct(**dates) for dates in ranges]
+
+        report = device_sketch.compact_sketches(today=date(2026, 3, 15))
+
+        assert report == {"shards_folded": 3, "months_written": 2}
+        assert {(row.day, row.shard) for row in DeviceSketch.query} == {
+            (date(2026, 1, 5), 0),
+            (date(2026, 1, 20), 0),
+            (date(2026, 2, 1), 0),
+            (date(2026, 3, 1), 0),
+        }
+        assert [row.month for row in DeviceMonthSketch.query] == [
+            date(2026, 1, 1),
+            date(2026, 2, 1),
+        ]
+        assert device_sketch.compacted_through("mobile") == date(2026, 2, 1)
+        assert [self.distinct(**dates) for dates in ranges] == before == [6, 5, 4, 2]
+
+    @pytest.mark.usefixtures("sketches")
+    def test_compacted_months_replace_daily_rows(self) -> None:
+        device_sketch.compact_sketches(today=date(2026, 3, 15))
+        # Daily rows inside the compacted months are no longer read.
+        DeviceSketch.query.filter(DeviceSketch.day < date(2026, 3, 1)).delete()
+
+        assert self.distinct(end_date=date(2026, 2, 28)) == 5
+        assert controller.get_distinct_devices(
+            Mobile, group_by=[], interval="month"
+        ) == [
+            {
+                "period_start": date(2026, month, 1),
+                "distinct_devices": devices,
+                "standard_error": 0.0163,
+            }
+            for month, devices in [(1, 4), (2, 1), (3, 1)]
+        ]
+        assert controller.get_distinct_devices(Mobile, group_by=[], interval="day")[
+            -1
+        ] == {
+            "period_start": date(2026, 3, 1),
+            "distinct_devices": 1,
+            "standard_error": 0.0163,
+        }
+
+    @pytest.mark.usefixtures("sketches")
+    def test_compaction_resumes_after_last_month(self) -> None:
+        device_sketch.compact_sketches(today=date(2026, 3, 15))
+        report = device_sketch.compact_sketches(today=date(2026, 4, 2))
+
+        assert report == {"shards_folded": 0, "months_written": 1}
+        assert device_sketch.compacted_through("mobile") == date(2026, 3, 1)
+        assert device_sketch.compacted_through("desktop") is None
+
+    @pytest.mark.usefixtures("sketches")
+    def test_backdated_writes_update_month(self) -> None:
+        device_sketch.compact_sketches(today=date(2026, 3, 15))
+        sketch = HyperLogLog(12)
+        sketch.add("z")
+
+        device_sketch.merge_sketch(
+            {
+                "installation_type": "mobile",
+                "day": date(2026, 1, 9),
+                "app_product": "GDM",
+                "app_version": "18.1.x",
+            },
+            sketch,
+        )
+        db.session.commit()
+
+        assert self.distinct(end_date=date(2026, 1, 31)) == 5
@@ -0,0 +1,130 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import pytest
+from flask import Flask
+from flask_batteries_included.helpers import generate_uuid
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import erasure, ingest, meter_statistics, rollup
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.blood_glucose_meter_statistics import (
+    BloodGlucoseMeterHistogram,
+    BloodGlucoseMeterStatistics,
+)
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+PATIENT_ID = generate_uuid()
+OTHER_PATIENT_ID = generate_uuid()
+CLINICIAN_ID = generate_uuid()
+
+
+@pytest.mark.usefixtures("app")
+class TestErasure:
+    @pytest.fixture(autouse=True)
+    def telemetry(
+        self,
+        mobile_telemetry_in_dict: Dict,
+        clinician_telemetry_in_dict: Dict,
+        meter_in_dict: Dict,
+    ) -> None:
+        for patient_id, count in [(PATIENT_ID, 3), (OTHER_PATIENT_ID, 1)]:
+            for _ in range(count):
+                mobile = controller.create_mobile_installation(
+                    patient_id=patient_id,
+                    installation_data=dict(mobile_telemetry_in_dict),
+                )
+                controller.create_blood_glucose_meter(
+                    patient_id=patient_id,
+                    meter_data={
+                        **meter_in_dict,
+                        "mobile_id": mobile["uuid"],
+                        "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+                    },
+                )
+        for _ in range(2):
+            controller.create_desktop_installation(
+                clinician_id=CLINICIAN_ID,
+                installation_data=dict(clinician_telemetry_in_dict),
+            )
+
+    def test_erase_patient(self) -> None:
+        result = erasure.erase_patient(PATIENT_ID, batch_size=2)
+
+        assert result == {"mobile": 3, "blood_glucose_meter": 3}
+        assert Mobile.query.filter_by(patient_id=PATIENT_ID).count() == 0
+        assert BloodGlucoseMeter.query.filter_by(patient_id=PATIENT_ID).count() == 0
+        assert Mobile.query.filter_by(patient_id=OTHER_PATIENT_ID).count() == 1
+        assert (
+            BloodGlucoseMeter.query.filter_by(patient_id=OTHER_PATIENT_ID).count() == 1
+        )
+
+    def test_erase_patient_updates_aggregates(self) -> None:
+        erasure.erase_patient(PATIENT_ID)
+
+        assert [
+            row["installation_count"]
+            for row in rollup.installation_counts(Mobile, group_by=["app_product"])
+        ] == [1]
+        assert [
+            row["verification_count"]
+            for row in meter_statistics.meter_statistics("serial_number")
+        ] == [1]
+
+    def test_erase_patient_removes_serial_numbers(self, meter_in_dict: Dict) -> None:
+        controller.create_blood_glucose_meter(
+            patient_id=PATIENT_ID,
+            meter_data={
+                **meter_in_dict,
+                "serial_number": "SN-ERASED",
+                "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+            },
+        )
+
+        erasure.erase_patient(PATIENT_ID)
+
+        models: List[Any] = [BloodGlucoseMeterStatistics, BloodGlucoseMeterHistogram]
+        for model in models:
+            assert model.query.filter_by(group_value="SN-ERASED").count() == 0
+        assert [
+            row["verification_count"]
+            for row in meter_statistics.meter_statistics("serial_number")
+        ] == [1]
+
+    def test_erase_patient_discards_queued_records(
+        self, app: Flask, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        queue = ingest.IngestQueue(
+            app,
+            controller.INGEST_BUILDERS,
+            batch_size=10,
+            flush_interval=3600,
+            max_size=100,
+        )
+        app.extensions["ingest_queue"] = queue
+        try:
+            queue.enqueue("mobile", PATIENT_ID, dict(mobile_telemetry_in_dict))
+            queue.enqueue("mobile", OTHER_PATIENT_ID, dict(mobile_telemetry_in_dict))
+
+            erasure.erase_patient(PATIENT_ID)
+            queue.flush()
+        finally:
+            del app.extensions["ingest_queue"]
+            queue.drain(timeout=5)
+
+        assert Mobile.query.filter_by(patient_id=PATIENT_ID).count() == 0
+        assert Mobile.query.filter_by(patient_id=OTHER_PATIENT_ID).count() == 2
+
+    def test_erase_clinician(self) -> None:
+        result = erasure.erase_clinician(CLINICIAN_ID)
+
+        assert result == {"desktop": 2}
+        assert Desktop.query.count() == 0
+        assert Mobile.query.count() == 4
+
+    def test_erase_unknown_subject(self) -> None:
+        assert erasure.erase_patient(generate_uuid()) == {
+            "mobile": 0,
+            "blood_glucose_meter": 0,
+        }
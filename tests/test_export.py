@@ -0,0 +1,90 @@
+import json
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+from flask_batteries_included.helpers import generate_uuid
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import export
+
+PATIENT_ID = generate_uuid()
+CLINICIAN_ID = generate_uuid()
+
+
+@pytest.mark.usefixtures("app")
+class TestExport:
+    @pytest.fixture
+    def mobile_ids(self, mobile_telemetry_in_dict: Dict) -> List[str]:
+        return [
+            controller.create_mobile_installation(
+                patient_id=patient_id,
+                installation_data={
+                    **mobile_telemetry_in_dict,
+                    "date_first_launched": f"2020-01-0{day}T00:00:00.000Z",
+                },
+            )["uuid"]
+            for patient_id, day in [
+                (PATIENT_ID, 2),
+                (PATIENT_ID, 1),
+                (generate_uuid(), 1),
+            ]
+        ]
+
+    def test_export_patient(
+        self,
+        mobile_ids: List[str],
+        meter_in_dict: Dict,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(export, "CHUNK_RECORDS", 2)
+        for day in range(1, 6):
+            controller.create_blood_glucose_meter(
+                patient_id=PATIENT_ID,
+                meter_data={
+                    **meter_in_dict,
+                    "mobile_id": mobile_ids[0],
+                    "blood_glucose_value": float(day),
+                    "date_verified": datetime(2021, 1, day, tzinfo=timezone.utc),
+                },
+            )
+
+        chunks = list(export.export_patient(PATIENT_ID))
+        document = json.loads("".join(chunks))
+
+        assert document["patient_id"] == PATIENT_ID
+        assert [row["uuid"] for row in document["mobile"]] == [
+            mobile_ids[1],
+            mobile_ids[0],
+        ]
+        assert [
+            row["blood_glucose_value"] for row in document["blood_glucose_meter"]
+        ] == [
+            1.0,
+            2.0,
+            3.0,
+            4.0,
+            5.0,
+        ]
+        # Records are sent a chunk at a time rather than as one string.
+        assert len(chunks) > 5
+
+    def test_export_patient_without_telemetry(self) -> None:
+        assert json.loads("".join(export.export_patient(PATIENT_ID))) == {
+            "patient_id": PATIENT_ID,
+            "mobile": [],
+            "blood_glucose_meter": [],
+        }
+
+    def test_export_clinician(self, clinician_telemetry_in_dict: Dict) -> None:
+        installation = controller.create_desktop_installation(
+            clinician_id=CLINICIAN_ID,
+            installation_data=dict(clinician_telemetry_in_dict),
+        )
+
+        document = json.loads("".join(export.export_clinician(CLINICIAN_ID)))
+
+        assert document["clinician_id"] == CLINICIAN_ID
+        assert [row["uuid"] for row in document["desktop"]] == [installation["uuid"]]
+        # Dates are serialised as the API does.
+        assert document["desktop"][0]["date_first_used"] == "1970-01-01T00:00:00.000Z"
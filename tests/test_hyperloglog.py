@@ -0,0 +1,54 @@
+import pytest
+
+from dhos_telemetry_api.helpers.hyperloglog import HyperLogLog
+
+
+class TestHyperLogLog:
+    @pytest.mark.parametrize("cardinality", [0, 10, 1000, 50_000])
+    def test_cardinality_within_error_bound(self, cardinality: int) -> None:
+        sketch = HyperLogLog(precision=12)
+        for i in range(cardinality):
+            sketch.add(f"device-{i}")
+
+        assert sketch.cardinality() == pytest.approx(
+            cardinality, rel=3 * sketch.standard_error, abs=1
+        )
+
+    def test_add_duplicate_does_not_change_registers(self) -> None:
+        sketch = HyperLogLog(precision=8)
+        assert sketch.add("device") is True
+        assert sketch.add("device") is False
+
+    def test_merge_is_union(self) -> None:
+        left = HyperLogLog(precision=12)
+        right = HyperLogLog(precision=12)
+        for i in range(2000):
+            left.add(f"device-{i}")
+            right.add(f"device-{i + 1000}")
+
+        merged = left.merge(right)
+
+        assert merged.cardinality() == pytest.approx(
+            3000, rel=3 * merged.standard_error
+        )
+
+    def test_merge_folds_to_lower_precision(self) -> None:
+        precise = HyperLogLog(precision=14)
+        coarse = HyperLogLog(precision=10)
+        for i in range(5000):
+            precise.add(f"device-{i}")
+            coarse.add(f"device-{i}")
+
+        merged = precise.merge(coarse)
+
+        assert merged.precision == 10
+        assert merged.registers == coarse.registers
+
+    def test_round_trip_bytes(self) -> None:
+        sketch = HyperLogLog(precision=6)
+        sketch.add("device")
+        assert HyperLogLog(6, sketch.to_bytes()).registers == sketch.registers
+
+    def test_invalid_register_length(self) -> None:
+        with pytest.raises(ValueError):
+            HyperLogLog(precision=6, registers=bytes(10))
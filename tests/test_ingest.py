@@ -0,0 +1,274 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Generator, List, Optional
+from unittest.mock import Mock
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.helpers import generate_uuid
+from pytest_mock import MockFixture
+from sqlalchemy.exc import OperationalError
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import ingest, rollup
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.mobile import Mobile
+
+PATIENT_ID = generate_uuid()
+
+
+def _queue(
+    app: Flask,
+    journal_dir: Optional[Path] = None,
+    max_size: int = 100,
+    max_retries: int = 5,
+) -> ingest.IngestQueue:
+    # A long flush interval leaves flushing to the tests.
+    return ingest.IngestQueue(
+        app,
+        controller.INGEST_BUILDERS,
+        batch_size=10,
+        flush_interval=3600,
+        max_size=max_size,
+        journal_dir=journal_dir,
+        fsync=False,
+        max_retries=max_retries,
+    )
+
+
+@pytest.mark.usefixtures("app")
+class TestIngestQueue:
+    @pytest.fixture
+    def queues(self) -> Generator[List[ingest.IngestQueue], None, None]:
+        queues: List[ingest.IngestQueue] = []
+        yield queues
+        for queue in queues:
+            queue.drain(timeout=5)
+
+    def test_enqueue_and_flush(
+        self,
+        app: Flask,
+        queues: List[ingest.IngestQueue],
+        mobile_telemetry_in_dict: Dict,
+        meter_in_dict: Dict,
+    ) -> None:
+        queue = _queue(app)
+        queues.append(queue)
+        mobile_id = queue.enqueue("mobile", PATIENT_ID, mobile_telemetry_in_dict)
+        meter_id = queue.enqueue(
+            "blood_glucose_meter",
+            PATIENT_ID,
+            {
+                **meter_in_dict,
+                "mobile_id": mobile_id,
+                "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+            },
+        )
+        assert Mobile.query.count() == 0
+
+        assert queue.flush() == 2
+
+        assert len(queue) == 0
+        mobile = Mobile.query.one()
+        assert mobile.uuid == mobile_id
+        assert mobile.patient_id == PATIENT_ID
+        assert mobile.app_version == mobile_telemetry_in_dict["app_version"]
+        assert BloodGlucoseMeter.query.one().uuid == meter_id
+        assert rollup.installation_counts(Mobile, group_by=["app_product"]) == [
+            {"app_product": "GDM", "installation_count": 1}
+        ]
+
+    def test_enqueue_rejects_invalid_record(
+        self,
+        app: Flask,
+        queues: List[ingest.IngestQueue],
+        mobile_telemetry_in_dict: Dict,
+    ) -> None:
+        queue = _queue(app)
+        queues.append(queue)
+        with pytest.raises(ValueError):
+            queue.enqueue(
+                "mobile",
+                PATIENT_ID,
+                {**mobile_telemetry_in_dict, "date_first_launched": "yesterday"},
+            )
+        assert len(queue) == 0
+
+    def test_full_queue_is_bypassed(
+        self,
+        app: Flask,
+        queues: List[ingest.IngestQueue],
+        mobile_telemetry_in_dict: Dict,
+    ) -> None:
+        queue = _queue(app, max_size=1)
+        queues.append(queue)
+        assert queue.enqueue("mobile", PATIENT_ID, dict(mobile_telemetry_in_dict))
+        assert (
+            queue.enqueue("mobile", PATIENT_ID, dict(mobile_telemetry_in_dict)) is None
+        )
+
+    def test_journal_is_replayed_once(
+        self,
+        app: Flask,
+        tmp_path: Path,
+        queues: List[ingest.IngestQueue],
+        mobile_telemetry_in_dict: Dict,
+    ) -> None:
+        crashed = _queue(app, journal_dir=tmp_path)
+        queues.append(crashed)
+        uuids = {
+            crashed.enqueue("mobile", PATIENT_ID, dict(mobile_telemetry_in_dict))
+            for _ in range(3)
+        }
+        assert len(list(tmp_path.iterdir())) == 1
+
+        # A new queue takes over the journal left behind.
+        restarted = _queue(app, journal_dir=tmp_path)
+        queues.append(restarted)
+        restarted.start()
+        assert restarted._replayed.wait(timeout=5)
+        assert len(restarted) == 3
+        assert restarted.flush() == 3
+        assert {mobile.uuid for mobile in Mobile.query} == uuids
+        assert list(tmp_path.iterdir()) == []
+
+        # Writing the same records again doesn't duplicate them or their counts.
+        assert crashed.flush() == 3
+        assert Mobile.query.count() == 3
+        assert rollup.installation_counts(Mobile, group_by=["app_product"]) == [
+            {"app_product": "GDM", "installation_count": 3}
+        ]
+
+    def test_discard_removes_records_and_journal_lines(
+        self,
+        app: Flask,
+        tmp_path: Path,
+        queues: List[ingest.IngestQueue],
+        mobile_telemetry_in_dict: Dict,
+    ) -> None:
+        queue = _queue(app, journal_dir=tmp_path)
+        queues.append(queue)
+        other_patient_id = generate_uuid()
+        for patient_id in [PATIENT_ID, other_patient_id, PATIENT_ID]:
+            queue.enqueue("mobile", patient_id, dict(mobile_telemetry_in_dict))
+
+        assert queue.discard(["mobile"], PATIENT_ID) == 2
+
+        assert len(queue) == 1
+        [journal] = tmp_path.iterdir()
+        [line] = journal.read_text().splitlines()
+        assert ingest.IngestRecord.from_json(line).owner_id == other_patient_id
+
+        assert queue.discard(["mobile"], other_patient_id) == 1
+        assert list(tmp_path.iterdir()) == []
+        assert queue.flush() == 0
+
+    def test_failing_record_is_dead_lettered(
+        self,
+        app: Flask,
+        tmp_path: Path,
+        queues: List[ingest.IngestQueue],
+        mocker: MockFixture,
+        mobile_telemetry_in_dict: Dict,
+    ) -> None:
+        queue = _queue(app, journal_dir=tmp_path, max_retries=1)
+        queues.append(queue)
+        poison = queue.enqueue("mobile", PATIENT_ID, dict(mobile_telemetry_in_dict))
+        healthy = queue.enqueue("mobile", PATIENT_ID, dict(mobile_telemetry_in_dict))
+        write_records = ingest.write_records
+
+        def fail_on_poison(records: List[ingest.IngestRecord]) -> None:
+            if any(record.uuid == poison for record in records):
+                raise RuntimeError("poison")
+            write_records(records)
+
+        mocker.patch.object(ingest, "write_records", side_effect=fail_on_poison)
+
+        with pytest.raises(RuntimeError):
+            queue.flush()
+        assert len(queue) == 2
+
+        assert queue.flush() == 2
+        assert len(queue) == 0
+        assert Mobile.query.one().uuid == healthy
+        dead_letters = list(tmp_path.glob("dead-*.jsonl"))
+        assert [
+            ingest.IngestRecord.from_json(line).uuid
+            for line in dead_letters[0].read_text().splitlines()
+        ] == [poison]
+
+        # Erasure removes dead-lettered records too.
+        queue.discard(["mobile"], PATIENT_ID)
+        assert dead_letters[0].read_text() == ""
+
+    def test_outage_is_retried_without_dead_lettering(
+        self,
+        app: Flask,
+        tmp_path: Path,
+        queues: List[ingest.IngestQueue],
+        mocker: MockFixture,
+        mobile_telemetry_in_dict: Dict,
+    ) -> None:
+        queue = _queue(app, journal_dir=tmp_path, max_retries=1)
+        queue.flush_interval, queue.max_backoff = 0.5, 4
+        queues.append(queue)
+        uuids = [
+            queue.enqueue("mobile", PATIENT_ID, dict(mobile_telemetry_in_dict))
+            for _ in range(2)
+        ]
+        outage = OperationalError(
+            "INSERT", {}, Exception("server closed the connection")
+        )
+        write_records = ingest.write_records
+        failing_write = mocker.patch.object(ingest, "write_records", side_effect=outage)
+
+        # Far longer than the retry budget.
+        delays = []
+        for _ in range(10):
+            with pytest.raises(OperationalError):
+                queue.flush()
+            delays.append(queue.retry_delay())
+        assert len(queue) == 2
+        assert delays[:5] == [0.5, 1, 2, 4, 4]
+        assert list(tmp_path.glob("dead-*.jsonl")) == []
+
+        failing_write.side_effect = write_records
+        assert queue.flush() == 2
+        assert {row.uuid for row in Mobile.query} == set(uuids)
+        assert queue.retry_delay() == 0.5
+        assert list(tmp_path.glob("dead-*.jsonl")) == []
+
+    def test_enqueue_record_without_queue(self, mobile_telemetry_in_dict: Dict) -> None:
+        assert (
+            controller.enqueue_record("mobile", PATIENT_ID, mobile_telemetry_in_dict)
+            is None
+        )
+
+
+@pytest.mark.usefixtures("mock_bearer_validation")
+class TestIngestApi:
+    def test_create_queued_installation(
+        self,
+        mocker: MockFixture,
+        client: FlaskClient,
+        mobile_telemetry_in_dict: Dict,
+    ) -> None:
+        uuid = generate_uuid()
+        mock_enqueue: Mock = mocker.patch.object(
+            controller, "enqueue_record", return_value={"uuid": uuid}
+        )
+        mock_create: Mock = mocker.patch.object(
+            controller, "create_mobile_installation"
+        )
+        response = client.post(
+            f"/dhos/v1/patient/{PATIENT_ID}/installation",
+            json=mobile_telemetry_in_dict,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 202
+        assert response.get_json() == {"uuid": uuid}
+        mock_enqueue.assert_called_once_with(
+            "mobile", PATIENT_ID, mobile_telemetry_in_dict
+        )
+        assert not mock_create.called
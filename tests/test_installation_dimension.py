@@ -0,0 +1,109 @@
+from typing import Dict
+
+import pytest
+from flask import Flask
+from flask_batteries_included.helpers import generate_uuid
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import interning, rollup
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.installation_dimension import InstallationDimension
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+class TestInstallationDimension:
+    @pytest.fixture
+    def interning_enabled(self, app: Flask) -> None:
+        app.config["INTERN_INSTALLATION_DIMENSIONS"] = True
+
+    @pytest.mark.usefixtures("interning_enabled")
+    def test_interned_installation_round_trips(
+        self, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        for _ in range(2):
+            created = controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={**mobile_telemetry_in_dict},
+            )
+            assert created["phone_os"] == "android"
+
+        installation = Mobile.query.filter(Mobile.phone_os == "android").first()
+        assert installation.phone_os_ is None
+        assert installation.phone_os_id is not None
+        assert installation.to_dict()["display_name"] == "phoneCo TheGoodOne"
+        # Each distinct value is stored once, however many installations use it.
+        assert InstallationDimension.query.count() == 5
+
+    @pytest.mark.usefixtures("interning_enabled")
+    def test_update_interned_installation(
+        self, clinician_telemetry_in_dict: Dict
+    ) -> None:
+        clinician_id: str = generate_uuid()
+        installation = controller.create_desktop_installation(
+            clinician_id=clinician_id, installation_data=clinician_telemetry_in_dict
+        )
+
+        updated = controller.update_installation(
+            Desktop,
+            {"desktop_os": "macos"},
+            clinician_id=clinician_id,
+            uuid=installation["uuid"],
+        )
+
+        assert updated["desktop_os"] == "macos"
+        assert Desktop.query.filter_by(desktop_os="macos").count() == 1
+
+    @pytest.mark.usefixtures("interning_enabled")
+    def test_rebuild_rollups_from_interned_rows(
+        self, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        for phone_os in ["android", "android", "ios"]:
+            controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={**mobile_telemetry_in_dict, "phone_os": phone_os},
+            )
+        incremental = rollup.installation_counts(Mobile, group_by=["phone_os"])
+
+        rollup.rebuild_rollups(Mobile)
+
+        assert rollup.installation_counts(Mobile, group_by=["phone_os"]) == incremental
+        assert incremental == [
+            {"phone_os": "android", "installation_count": 2},
+            {"phone_os": "ios", "installation_count": 1},
+        ]
+
+    def test_intern_existing(self, app: Flask, mobile_telemetry_in_dict: Dict) -> None:
+        for _ in range(3):
+            controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={**mobile_telemetry_in_dict},
+            )
+        assert Mobile.query.filter(Mobile.manufacturer_.isnot(None)).count() == 3
+
+        converted = interning.intern_existing(Mobile, batch_size=2, pause_seconds=0)
+
+        assert converted == 3
+        assert Mobile.query.filter(Mobile.manufacturer_.isnot(None)).count() == 0
+        assert {row.to_dict()["manufacturer"] for row in Mobile.query} == {"phoneCo"}
+
+    def test_filters_match_inline_and_interned_rows(
+        self, app: Flask, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        for phone_os, intern in [("android", False), ("android", True), ("ios", True)]:
+            app.config["INTERN_INSTALLATION_DIMENSIONS"] = intern
+            controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={**mobile_telemetry_in_dict, "phone_os": phone_os},
+            )
+
+        assert Mobile.query.filter(Mobile.phone_os == "android").count() == 2
+        assert Mobile.query.filter(Mobile.phone_os.in_(["ios", "other"])).count() == 1
+        assert Mobile.query.filter(Mobile.phone_os == "other").count() == 0
+
+    def test_filters_dont_resolve_each_row(self) -> None:
+        # The ids of compared values are looked up once, rather than each row's
+        # id being resolved, so the columns' indexes can be used.
+        condition = str(Mobile.app_product == "GDM")
+        assert "coalesce" not in condition
+        assert "mobile.app_product = :app_product_1" in condition
+        assert "mobile.app_product_id IN (SELECT" in condition
@@ -0,0 +1,133 @@
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+from flask_batteries_included.helpers import generate_uuid
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import lookup
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+@pytest.mark.usefixtures("app")
+class TestLookup:
+    @pytest.fixture
+    def installations(self, mobile_telemetry_in_dict: Dict) -> List[str]:
+        uuids = []
+        for device_code in ["ABC-1", "ABC-2", "ABCD", "AB%C", "XYZ"]:
+            installation = controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={
+                    **mobile_telemetry_in_dict,
+                    "unique_device_code": device_code,
+                },
+            )
+            uuids.append(installation["uuid"])
+        return uuids
+
+    def test_exact_match(self, installations: List[str]) -> None:
+        result = lookup.installations_by_device_code(Mobile, "ABC-1")
+
+        assert [row["uuid"] for row in result] == [installations[0]]
+
+    def test_prefix_match(self, installations: List[str]) -> None:
+        result = lookup.installations_by_device_code(Mobile, "ABC", prefix=True)
+
+        assert [row["unique_device_code"] for row in result] == [
+            "ABC-1",
+            "ABC-2",
+            "ABCD",
+        ]
+
+    def test_prefix_wildcards_are_literal(self, installations: List[str]) -> None:
+        assert [
+            row["unique_device_code"]
+            for row in lookup.installations_by_device_code(Mobile, "AB%", prefix=True)
+        ] == ["AB%C"]
+        assert lookup.installations_by_device_code(Mobile, "AB_", prefix=True) == []
+
+    def test_limit(self, installations: List[str]) -> None:
+        result = lookup.installations_by_device_code(
+            Mobile, "ABC", prefix=True, limit=2
+        )
+
+        assert len(result) == 2
+
+    @pytest.mark.parametrize("limit", [0, lookup.MAX_LIMIT + 1])
+    def test_invalid_limit(self, limit: int) -> None:
+        with pytest.raises(ValueError):
+            lookup.installations_by_device_code(Mobile, "ABC", limit=limit)
+
+    def test_empty_value(self) -> None:
+        with pytest.raises(ValueError):
+            lookup.installations_by_device_code(Mobile, "", prefix=True)
+
+    def test_clinician_installations(self, clinician_telemetry_in_dict: Dict) -> None:
+        installation = controller.create_desktop_installation(
+            clinician_id=generate_uuid(),
+            installation_data={
+                **clinician_telemetry_in_dict,
+                "unique_device_code": "DESK-1",
+            },
+        )
+
+        result = lookup.installations_by_device_code(Desktop, "DESK", prefix=True)
+
+        assert [row["uuid"] for row in result] == [installation["uuid"]]
+
+    def test_meters_by_serial_number(self, meter_in_dict: Dict) -> None:
+        for serial_number in ["SN100", "SN101", "SN200"]:
+            controller.create_blood_glucose_meter(
+                patient_id=generate_uuid(),
+                meter_data={
+                    **meter_in_dict,
+                    "serial_number": serial_number,
+                    "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+                },
+            )
+
+        assert [
+            row["serial_number"]
+            for row in lookup.meters_by_serial_number("SN10", prefix=True)
+        ] == ["SN100", "SN101"]
+        assert [
+            row["serial_number"] for row in lookup.meters_by_serial_number("SN200")
+        ] == ["SN200"]
+
+    def test_latest_meters(self, meter_in_dict: Dict) -> None:
+        patient_id = generate_uuid()
+        mobile_ids = [generate_uuid(), generate_uuid()]
+        for serial_number, mobile_id, day, value in [
+            ("SN1", mobile_ids[0], 1, 5.0),
+            ("SN1", mobile_ids[0], 3, 6.0),
+            ("SN1", mobile_ids[1], 2, 7.0),
+            ("SN2", mobile_ids[1], 1, 8.0),
+        ]:
+            controller.create_blood_glucose_meter(
+                patient_id=patient_id,
+                meter_data={
+                    **meter_in_dict,
+                    "serial_number": serial_number,
+                    "mobile_id": mobile_id,
+                    "blood_glucose_value": value,
+                    "date_verified": datetime(2021, 1, day, tzinfo=timezone.utc),
+                },
+            )
+        controller.create_blood_glucose_meter(
+            patient_id=generate_uuid(),
+            meter_data={
+                **meter_in_dict,
+                "serial_number": "SN1",
+                "date_verified": datetime(2021, 2, 1, tzinfo=timezone.utc),
+            },
+        )
+
+        assert [
+            (row["serial_number"], row["blood_glucose_value"])
+            for row in lookup.latest_meters(patient_id)
+        ] == [("SN1", 6.0), ("SN2", 8.0)]
+        assert [
+            (row["serial_number"], row["blood_glucose_value"])
+            for row in lookup.latest_meters(patient_id, mobile_id=mobile_ids[1])
+        ] == [("SN1", 7.0), ("SN2", 8.0)]
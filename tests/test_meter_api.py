@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Dict
 from unittest.mock import Mock
 
@@ -75,4 +76,121 @@ class TestMeterApi:
         assert response.status_code == 200
         assert response.get_json() == meter_out_dict
         assert mock_get.call_count == 1
-        mock_get.assert_called_with(patient_id=patient_id, meter_id=uuid)
+        mock_get.assert_called_with(patient_id=patient_id, meter_id=uuid, created=None)
+
+    def test_get_meter_with_created_hint(
+        self, mocker: MockFixture, client: FlaskClient, meter_out_dict: Dict
+    ) -> None:
+        mock_get: Mock = mocker.patch.object(
+            controller, "get_blood_glucose_meter", return_value=meter_out_dict
+        )
+        uuid: str = generate_uuid()
+        patient_id: str = generate_uuid()
+        response = client.get(
+            f"/dhos/v1/patient/{patient_id}/blood_glucose_meter/{uuid}"
+            "?created=2021-03-04T05:06:07.000Z",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        mock_get.assert_called_with(
+            patient_id=patient_id,
+            meter_id=uuid,
+            created=datetime(2021, 3, 4, 5, 6, 7, tzinfo=timezone.utc),
+        )
+
+    def test_search_meters(self, mocker: MockFixture, client: FlaskClient) -> None:
+        expected_response = [{"uuid": generate_uuid()}]
+        mock_get: Mock = mocker.patch.object(
+            controller,
+            "get_meters_by_serial_number",
+            return_value=expected_response,
+        )
+        response = client.get(
+            "/dhos/v1/blood_glucose_meters?serial_number=SN13&prefix=true",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == expected_response
+        mock_get.assert_called_with("SN13", prefix=True, limit=100)
+
+    def test_get_latest_meters(
+        self, mocker: MockFixture, client: FlaskClient, meter_out_dict: Dict
+    ) -> None:
+        mock_get: Mock = mocker.patch.object(
+            controller,
+            "get_latest_blood_glucose_meters",
+            return_value=[meter_out_dict],
+        )
+        patient_id: str = generate_uuid()
+        response = client.get(
+            f"/dhos/v1/patient/{patient_id}/blood_glucose_meter",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.get_json() == [meter_out_dict]
+        mock_get.assert_called_with(patient_id=patient_id)
+
+    def test_get_installation_meters(
+        self, mocker: MockFixture, client: FlaskClient, meter_out_dict: Dict
+    ) -> None:
+        mock_get: Mock = mocker.patch.object(
+            controller,
+            "get_latest_blood_glucose_meters",
+            return_value=[meter_out_dict],
+        )
+        patient_id: str = generate_uuid()
+        installation_id: str = generate_uuid()
+        response = client.get(
+            f"/dhos/v1/patient/{patient_id}/installation/{installation_id}/blood_glucose_meter",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.get_json() == [meter_out_dict]
+        mock_get.assert_called_with(patient_id=patient_id, mobile_id=installation_id)
+
+    def test_get_meter_series(self, mocker: MockFixture, client: FlaskClient) -> None:
+        expected_response = [{"serial_number": "SN132654", "verification_count": 2}]
+        mock_get: Mock = mocker.patch.object(
+            controller,
+            "get_blood_glucose_meter_series",
+            return_value=expected_response,
+        )
+        patient_id: str = generate_uuid()
+        response = client.get(
+            f"/dhos/v1/patient/{patient_id}/blood_glucose_meter_series"
+            "?start=2021-01-01T00:00:00.000Z&end=2021-02-01T00:00:00.000Z&interval=hour",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == expected_response
+        mock_get.assert_called_with(
+            patient_id=patient_id,
+            start=datetime(2021, 1, 1, tzinfo=timezone.utc),
+            end=datetime(2021, 2, 1, tzinfo=timezone.utc),
+            interval="hour",
+            serial_number=None,
+        )
+
+    def test_get_meter_series_invalid_interval(self, client: FlaskClient) -> None:
+        response = client.get(
+            f"/dhos/v1/patient/{generate_uuid()}/blood_glucose_meter_series"
+            "?start=2021-01-01T00:00:00.000Z&end=2021-02-01T00:00:00.000Z&interval=year",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_bulk_update_meters(self, mocker: MockFixture, client: FlaskClient) -> None:
+        mock_update: Mock = mocker.patch.object(
+            controller, "bulk_update_records", return_value={"updated": 1}
+        )
+        update_data = {
+            "updates": [{"uuid": generate_uuid(), "changes": {"app_version": "2.0.0"}}]
+        }
+        response = client.patch(
+            "/dhos/v1/blood_glucose_meters",
+            json=update_data,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == {"updated": 1}
+        mock_update.assert_called_with(BloodGlucoseMeter, update_data)
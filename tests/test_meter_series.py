@@ -0,0 +1,134 @@
+from datetime import datetime, timezone
+from typing import Dict
+
+import pytest
+from flask_batteries_included.helpers import generate_uuid
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import meter_series
+
+PATIENT_ID = generate_uuid()
+
+
+def utc(year: int, month: int, day: int, hour: int = 0, minute: int = 0) -> datetime:
+    return datetime(year, month, day, hour, minute, tzinfo=timezone.utc)
+
+
+@pytest.mark.usefixtures("app")
+class TestMeterSeries:
+    @pytest.fixture(autouse=True)
+    def verifications(self, meter_in_dict: Dict) -> None:
+        for patient_id, serial_number, date_verified, correct, value in [
+            (PATIENT_ID, "SN1", utc(2021, 1, 4, 9, 15), True, 5.0),
+            (PATIENT_ID, "SN1", utc(2021, 1, 4, 9, 45), False, 7.0),
+            (PATIENT_ID, "SN1", utc(2021, 1, 4, 18, 0), None, 6.0),
+            (PATIENT_ID, "SN2", utc(2021, 1, 4, 10, 0), True, 4.0),
+            # Sunday, so still in the week of Monday 4th.
+            (PATIENT_ID, "SN1", utc(2021, 1, 10, 23, 59), True, 8.0),
+            (PATIENT_ID, "SN1", utc(2021, 1, 11, 0, 0), True, 9.0),
+            (generate_uuid(), "SN1", utc(2021, 1, 4, 9, 0), True, 5.0),
+        ]:
+            controller.create_blood_glucose_meter(
+                patient_id=patient_id,
+                meter_data={
+                    **meter_in_dict,
+                    "serial_number": serial_number,
+                    "date_verified": date_verified,
+                    "is_bg_value_correct": correct,
+                    "blood_glucose_value": value,
+                },
+            )
+
+    def test_daily(self) -> None:
+        result = meter_series.meter_series(
+            PATIENT_ID, utc(2021, 1, 1), utc(2021, 2, 1), interval="day"
+        )
+
+        assert [
+            (row["period_start"], row["serial_number"], row["verification_count"])
+            for row in result
+        ] == [
+            (utc(2021, 1, 4), "SN1", 3),
+            (utc(2021, 1, 4), "SN2", 1),
+            (utc(2021, 1, 10), "SN1", 1),
+            (utc(2021, 1, 11), "SN1", 1),
+        ]
+        assert result[0] == {
+            "period_start": utc(2021, 1, 4),
+            "serial_number": "SN1",
+            "verification_count": 3,
+            "correct_count": 1,
+            "incorrect_count": 1,
+            "value_min": 5.0,
+            "value_max": 7.0,
+            "value_mean": 6.0,
+        }
+
+    def test_hourly_for_one_meter(self) -> None:
+        result = meter_series.meter_series(
+            PATIENT_ID,
+            utc(2021, 1, 4),
+            utc(2021, 1, 5),
+            interval="hour",
+            serial_number="SN1",
+        )
+
+        assert [(row["period_start"], row["verification_count"]) for row in result] == [
+            (utc(2021, 1, 4, 9), 2),
+            (utc(2021, 1, 4, 18), 1),
+        ]
+
+    def test_weekly(self) -> None:
+        result = meter_series.meter_series(
+            PATIENT_ID, utc(2021, 1, 1), utc(2021, 2, 1), interval="week"
+        )
+
+        assert [
+            (row["period_start"], row["serial_number"], row["verification_count"])
+            for row in result
+        ] == [
+            (utc(2021, 1, 4), "SN1", 4),
+            (utc(2021, 1, 4), "SN2", 1),
+            (utc(2021, 1, 11), "SN1", 1),
+        ]
+
+    def test_end_is_exclusive(self) -> None:
+        result = meter_series.meter_series(
+            PATIENT_ID, utc(2021, 1, 10), utc(2021, 1, 11), interval="day"
+        )
+
+        assert [row["period_start"] for row in result] == [utc(2021, 1, 10)]
+
+    def test_bucket_without_readings(self, meter_in_dict: Dict) -> None:
+        for minute in [0, 30]:
+            meter = {
+                **meter_in_dict,
+                "serial_number": "SN3",
+                "date_verified": utc(2021, 2, 1, 8, minute),
+            }
+            meter.pop("blood_glucose_value", None)
+            controller.create_blood_glucose_meter(
+                patient_id=PATIENT_ID, meter_data=meter
+            )
+
+        result = meter_series.meter_series(
+            PATIENT_ID, utc(2021, 2, 1), utc(2021, 2, 2), interval="day"
+        )
+
+        assert [
+            (row["verification_count"], row["value_min"], row["value_max"])
+            for row in result
+        ] == [(2, None, None)]
+        assert result[0]["value_mean"] is None
+
+    @pytest.mark.parametrize(
+        "start,end,interval",
+        [
+            (utc(2021, 1, 2), utc(2021, 1, 1), "day"),
+            (utc(2021, 1, 1), utc(2021, 2, 1), "minute"),
+            (utc(2020, 1, 1), utc(2021, 1, 1), "hour"),
+        ],
+    )
+    def test_invalid_range(self, start: datetime, end: datetime, interval: str) -> None:
+        with pytest.raises(ValueError):
+            meter_series.meter_series(PATIENT_ID, start, end, interval=interval)
@@ -0,0 +1,149 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import pytest
+from flask import Flask
+from flask_batteries_included.helpers import generate_uuid
+from flask_batteries_included.sqldb import db
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import meter_statistics
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.blood_glucose_meter_statistics import (
+    BloodGlucoseMeterHistogram,
+    BloodGlucoseMeterStatistics,
+)
+
+
+@pytest.mark.usefixtures("app")
+class TestMeterStatistics:
+    @pytest.fixture
+    def meter_data(self, meter_in_dict: Dict) -> Dict:
+        return {
+            **meter_in_dict,
+            "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+        }
+
+    @pytest.fixture
+    def patient_id(self, meter_data: Dict) -> str:
+        verifications = [
+            ("SN1", True, 4.2),
+            ("SN1", True, 5.1),
+            ("SN1", False, 5.3),
+            ("SN2", True, 7.8),
+            ("SN2", None, 9.9),
+        ]
+        for serial_number, correct, value in verifications:
+            controller.create_blood_glucose_meter(
+                patient_id=generate_uuid(),
+                meter_data={
+                    **meter_data,
+                    "serial_number": serial_number,
+                    "is_bg_value_correct": correct,
+                    "blood_glucose_value": value,
+                },
+            )
+        return generate_uuid()
+
+    @pytest.mark.usefixtures("patient_id")
+    def test_statistics_by_app_version(self) -> None:
+        result = controller.get_blood_glucose_meter_statistics(group_by="app_version")
+
+        assert len(result) == 1
+        summary = result[0]
+        assert summary["app_version"] == "19.1.54"
+        assert summary["verification_count"] == 5
+        assert summary["correct_count"] == 3
+        assert summary["incorrect_count"] == 1
+        assert summary["accuracy_rate"] == 0.75
+        assert summary["value_mean"] == 6.46
+        assert summary["value_standard_deviation"] == 2.09
+        assert summary["value_percentiles"]["p50"] == 5.38
+        assert summary["value_histogram"][0] == {"lower": 4.0, "upper": 4.5, "count": 1}
+
+    @pytest.mark.usefixtures("patient_id")
+    def test_statistics_by_serial_number(self) -> None:
+        result = controller.get_blood_glucose_meter_statistics(
+            group_by="serial_number", group_values=["SN2"]
+        )
+
+        assert [(r["serial_number"], r["accuracy_rate"]) for r in result] == [
+            ("SN2", 1.0)
+        ]
+
+    def test_update_moves_verification(self, patient_id: str, meter_data: Dict) -> None:
+        meter = controller.create_blood_glucose_meter(
+            patient_id=patient_id,
+            meter_data={
+                **meter_data,
+                "serial_number": "SN3",
+                "is_bg_value_correct": False,
+                "blood_glucose_value": 30.0,
+            },
+        )
+
+        controller.update_blood_glucose_meter(
+            meter_id=meter["uuid"],
+            patient_id=patient_id,
+            update_data={"is_bg_value_correct": True, "blood_glucose_value": 6.0},
+        )
+
+        (summary,) = controller.get_blood_glucose_meter_statistics(
+            group_by="serial_number", group_values=["SN3"]
+        )
+        assert summary["correct_count"] == 1
+        assert summary["incorrect_count"] == 0
+        assert summary["value_histogram"] == [{"lower": 6.0, "upper": 6.5, "count": 1}]
+
+    def test_rebuild_matches_incremental(self, app: Flask, patient_id: str) -> None:
+        incremental = {
+            group_by: controller.get_blood_glucose_meter_statistics(group_by=group_by)
+            for group_by in meter_statistics.GROUP_TYPES
+        }
+        BloodGlucoseMeterStatistics.query.delete()
+
+        result = app.test_cli_runner().invoke(args=["rebuild-meter-statistics"])
+
+        assert result.exit_code == 0
+        assert "Rebuilt 3 blood glucose meter statistics rows" in result.output
+        for group_by, expected in incremental.items():
+            assert (
+                controller.get_blood_glucose_meter_statistics(group_by=group_by)
+                == expected
+            )
+
+    @pytest.mark.usefixtures("patient_id")
+    def test_statistics_are_sharded_by_meter(self) -> None:
+        shards = {
+            meter_statistics.shard_of(meter.uuid) for meter in BloodGlucoseMeter.query
+        }
+
+        rows = BloodGlucoseMeterStatistics.query.filter_by(group_type="app_version")
+        assert {row.shard for row in rows} == shards
+        assert sum(row.verification_count for row in rows) == 5
+
+    @pytest.mark.usefixtures("patient_id")
+    def test_groups_empty_across_shards_are_removed(self) -> None:
+        meter_statistics.rebuild_statistics()
+        assert {row.shard for row in BloodGlucoseMeterStatistics.query} == {0}
+        uuids = [
+            meter.uuid
+            for meter in BloodGlucoseMeter.query.filter_by(serial_number="SN2")
+        ]
+
+        # Rebuilt counts are in shard 0, so removing them leaves negative shards.
+        meter_statistics.shift_verifications(uuids, -1)
+        meter_statistics.remove_empty_groups("serial_number", ["SN1", "SN2"])
+        db.session.commit()
+
+        models: List[Any] = [BloodGlucoseMeterStatistics, BloodGlucoseMeterHistogram]
+        for model in models:
+            assert model.query.filter_by(group_value="SN2").count() == 0
+        assert [
+            (row["serial_number"], row["verification_count"])
+            for row in controller.get_blood_glucose_meter_statistics("serial_number")
+        ] == [("SN1", 3)]
+
+    def test_invalid_group_by(self) -> None:
+        with pytest.raises(ValueError):
+            controller.get_blood_glucose_meter_statistics(group_by="patient_id")
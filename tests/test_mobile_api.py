@@ -127,3 +127,112 @@ class TestMobileApi:
             headers={"Authorization": "Bearer TOKEN"},
         )
         assert response.status_code == 400
+
+    def test_search_patient_installations(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        expected_response = [{"uuid": generate_uuid()}]
+        mock_get: Mock = mocker.patch.object(
+            controller,
+            "get_installations_by_device_code",
+            return_value=expected_response,
+        )
+        response = client.get(
+            "/dhos/v1/patient_installations?unique_device_code=ABC-1&limit=5",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == expected_response
+        mock_get.assert_called_with(Mobile, "ABC-1", prefix=False, limit=5)
+
+    def test_register_patient_device(
+        self,
+        mocker: MockFixture,
+        client: FlaskClient,
+        mobile_telemetry_in_dict: Dict,
+    ) -> None:
+        expected_response: Dict = {"installation": {}, "blood_glucose_meters": []}
+        mock_register: Mock = mocker.patch.object(
+            controller, "register_mobile_device", return_value=expected_response
+        )
+        patient_id: str = generate_uuid()
+        registration_data = {
+            "installation": mobile_telemetry_in_dict,
+            "blood_glucose_meters": [{"serial_number": "SN1"}],
+        }
+        response = client.post(
+            f"/dhos/v1/patient/{patient_id}/device_registration",
+            json=registration_data,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 201
+        assert response.json == expected_response
+        mock_register.assert_called_with(
+            patient_id=patient_id, registration_data=registration_data
+        )
+
+    def test_register_patient_device_requires_serial_number(
+        self, client: FlaskClient, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        response = client.post(
+            f"/dhos/v1/patient/{generate_uuid()}/device_registration",
+            json={
+                "installation": mobile_telemetry_in_dict,
+                "blood_glucose_meters": [{"app_version": "1.0.0"}],
+            },
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_bulk_update_patient_installations(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        mock_update: Mock = mocker.patch.object(
+            controller, "bulk_update_records", return_value={"updated": 3}
+        )
+        update_data = {
+            "filter": {"app_product": "gdm"},
+            "changes": {"app_product": "GDM"},
+        }
+        response = client.patch(
+            "/dhos/v1/patient_installations",
+            json=update_data,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == {"updated": 3}
+        mock_update.assert_called_with(Mobile, update_data)
+
+    def test_erase_patient_telemetry(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        expected_response = {"mobile": 2, "blood_glucose_meter": 5}
+        mock_erase: Mock = mocker.patch.object(
+            controller, "erase_patient_data", return_value=expected_response
+        )
+        patient_id: str = generate_uuid()
+        response = client.delete(
+            f"/dhos/v1/patient/{patient_id}/telemetry",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == expected_response
+        mock_erase.assert_called_with(patient_id=patient_id)
+
+    def test_export_patient_telemetry(
+        self, mocker: MockFixture, client: FlaskClient
+    ) -> None:
+        mock_export: Mock = mocker.patch.object(
+            controller,
+            "export_patient_data",
+            return_value=iter(['{"patient_id": "p", "mobile": [', "]", "}"]),
+        )
+        patient_id: str = generate_uuid()
+        response = client.get(
+            f"/dhos/v1/patient/{patient_id}/telemetry",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.json == {"patient_id": "p", "mobile": []}
+        mock_export.assert_called_with(patient_id=patient_id)
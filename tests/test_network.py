@@ -0,0 +1,86 @@
+from typing import Dict, List
+
+import pytest
+from flask_batteries_included.helpers import generate_uuid
+from flask_batteries_included.sqldb import db
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import network
+from dhos_telemetry_api.models.desktop import Desktop
+
+
+@pytest.mark.usefixtures("app")
+class TestNetwork:
+    @pytest.fixture
+    def installations(self, clinician_telemetry_in_dict: Dict) -> List[str]:
+        uuids = []
+        for ip_address in ["10.20.1.5", "10.20.200.7", " 10.30.0.1 ", "not an ip"]:
+            installation = controller.create_desktop_installation(
+                clinician_id=generate_uuid(),
+                installation_data={
+                    **clinician_telemetry_in_dict,
+                    "ip_address": ip_address,
+                },
+            )
+            uuids.append(installation["uuid"])
+        return uuids
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("10.0.0.1", "10.0.0.1"),
+            (" 2001:db8::1 ", "2001:db8::1"),
+            ("195.189.79.280", None),
+            ("", None),
+        ],
+    )
+    def test_parse_ip_address(self, value: str, expected: str) -> None:
+        assert Desktop.parse_ip_address(value) == expected
+
+    def test_installations_in_network(self, installations: List[str]) -> None:
+        result = network.installations_in_network("10.20.0.0/16")
+
+        assert {row["uuid"] for row in result} == set(installations[:2])
+        assert result[0]["ip_address"] in ("10.20.1.5", "10.20.200.7")
+
+    def test_host_bits_are_ignored(self, installations: List[str]) -> None:
+        result = network.installations_in_network("10.30.0.99/24")
+
+        assert [row["uuid"] for row in result] == [installations[2]]
+
+    def test_limit(self, installations: List[str]) -> None:
+        result = network.installations_in_network("10.0.0.0/8", limit=2)
+
+        assert len(result) == 2
+        with pytest.raises(ValueError):
+            network.installations_in_network("0.0.0.0/0", limit=0)
+
+    def test_invalid_network(self) -> None:
+        with pytest.raises(ValueError):
+            network.installations_in_network("10.20.0.0/33")
+
+    def test_update_reparses_address(
+        self, installations: List[str], clinician_telemetry_in_dict: Dict
+    ) -> None:
+        installation = Desktop.query.filter_by(uuid=installations[3]).one()
+        controller.update_installation(
+            Desktop,
+            {"ip_address": "10.20.3.3"},
+            clinician_id=installation.clinician_id,
+            uuid=installation.uuid,
+        )
+
+        result = network.installations_in_network("10.20.3.0/24")
+
+        assert [row["uuid"] for row in result] == [installations[3]]
+
+    def test_backfill_ip_addresses(self, installations: List[str]) -> None:
+        db.session.query(Desktop).update(
+            {Desktop.ip_address_inet: None}, synchronize_session=False
+        )
+        db.session.commit()
+
+        updated = network.backfill_ip_addresses(batch_size=2, pause_seconds=0)
+
+        assert updated == 3
+        assert len(network.installations_in_network("10.0.0.0/8")) == 3
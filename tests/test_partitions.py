@@ -0,0 +1,127 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict
+
+import pytest
+from flask import Flask
+from flask_batteries_included.helpers import generate_uuid
+from pytest_mock import MockFixture
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import partitions
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+
+
+class TestPartitions:
+    @pytest.mark.parametrize(
+        "month,months,expected",
+        [
+            (date(2021, 1, 1), 0, date(2021, 1, 1)),
+            (date(2021, 11, 1), 2, date(2022, 1, 1)),
+            (date(2021, 1, 1), -1, date(2020, 12, 1)),
+            (date(2021, 6, 1), 25, date(2023, 7, 1)),
+        ],
+    )
+    def test_add_months(self, month: date, months: int, expected: date) -> None:
+        assert partitions.add_months(month, months) == expected
+
+    def test_partition_name(self) -> None:
+        assert (
+            partitions.partition_name(date(2021, 3, 1)) == "blood_glucose_meter_2021_03"
+        )
+
+    def test_created_bounds(self) -> None:
+        created = datetime(2021, 12, 31, 23, tzinfo=timezone(timedelta(hours=-2)))
+        assert partitions.created_bounds(created) == (
+            datetime(2022, 1, 1),
+            datetime(2022, 2, 1),
+        )
+
+    def test_model_is_partitioned_on_primary_key(self) -> None:
+        table = BloodGlucoseMeter.__table__
+        assert table.dialect_options["postgresql"]["partition_by"] == "RANGE (created)"
+        assert {column.name for column in table.primary_key} == {"uuid", "created"}
+
+    def test_partitioning_requires_postgres(self, app: Flask) -> None:
+        result = app.test_cli_runner().invoke(args=["create-meter-partitions"])
+        assert result.exit_code == 1
+        assert "Table partitioning requires PostgreSQL" in result.output
+
+    def test_create_partition_moves_rows_from_default_partition(
+        self, mocker: MockFixture
+    ) -> None:
+        mocker.patch.object(partitions, "_require_postgres")
+        mocker.patch.object(partitions, "list_partitions", return_value=[])
+        execute = mocker.patch.object(partitions.db.session, "execute")
+        mocker.patch.object(partitions.db.session, "commit")
+        execute.return_value.scalar.return_value = True
+
+        created = partitions.create_partitions(date(2021, 3, 15), months_ahead=0)
+
+        assert created == ["blood_glucose_meter_2021_03"]
+        statements = [str(call.args[0]) for call in execute.call_args_list]
+        assert statements[1] == (
+            "ALTER TABLE blood_glucose_meter"
+            " DETACH PARTITION blood_glucose_meter_default"
+        )
+        assert statements[2].startswith(
+            "CREATE TABLE IF NOT EXISTS blood_glucose_meter_2021_03"
+        )
+        assert statements[3].startswith("INSERT INTO blood_glucose_meter_2021_03 (")
+        assert statements[4].startswith("DELETE FROM blood_glucose_meter_default")
+        assert statements[5] == (
+            "ALTER TABLE blood_glucose_meter"
+            " ATTACH PARTITION blood_glucose_meter_default DEFAULT"
+        )
+
+    def test_create_partitioned_index(self, mocker: MockFixture) -> None:
+        connection = mocker.Mock()
+        connection.execute.return_value.scalars.return_value.all.return_value = [
+            "blood_glucose_meter_2021_03"
+        ]
+
+        partitions.create_partitioned_index(
+            connection,
+            "ix_blood_glucose_meter_serial_number",
+            "blood_glucose_meter",
+            "serial_number",
+            partition_suffix="serial_number",
+        )
+
+        statements = [str(call.args[0]) for call in connection.execute.call_args_list]
+        assert statements[0] == (
+            "CREATE INDEX ix_blood_glucose_meter_serial_number"
+            " ON ONLY blood_glucose_meter (serial_number)"
+        )
+        assert statements[2:] == [
+            "CREATE INDEX CONCURRENTLY ix_blood_glucose_meter_2021_03_serial_number"
+            " ON blood_glucose_meter_2021_03 (serial_number)",
+            "ALTER INDEX ix_blood_glucose_meter_serial_number"
+            " ATTACH PARTITION ix_blood_glucose_meter_2021_03_serial_number",
+        ]
+
+
+@pytest.mark.usefixtures("app")
+class TestCreatedHint:
+    @pytest.fixture
+    def meter(self, meter_in_dict: Dict) -> Dict:
+        return controller.create_blood_glucose_meter(
+            patient_id=generate_uuid(),
+            meter_data={
+                **meter_in_dict,
+                "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+            },
+        )
+
+    def test_meter_found_in_hinted_month(self, meter: Dict) -> None:
+        result = controller.get_blood_glucose_meter(
+            meter["uuid"], meter["patient_id"], created=meter["created"]
+        )
+        assert result["uuid"] == meter["uuid"]
+
+    def test_wrong_hint_falls_back(self, meter: Dict) -> None:
+        result = controller.get_blood_glucose_meter(
+            meter["uuid"],
+            meter["patient_id"],
+            created=datetime(2001, 1, 1, tzinfo=timezone.utc),
+        )
+        assert result["uuid"] == meter["uuid"]
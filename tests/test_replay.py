@@ -0,0 +1,158 @@
+import json
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Generator, List
+
+import pytest
+from flask import Flask
+from werkzeug.serving import make_server
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import replay, synthetic
+
+
+def _entry(method: str, route: str, time: float, **path: str) -> Dict:
+    return {
+        "time": time,
+        "method": method,
+        "route": route,
+        "path": path,
+        "query": {},
+        "fields": None,
+    }
+
+
+@pytest.fixture
+def base_url(app: Flask) -> Generator[str, None, None]:
+    synthetic.seed(
+        controller.INGEST_BUILDERS,
+        patients=5,
+        clinicians=2,
+        start=date(2021, 1, 1),
+        days=30,
+        verifications_per_patient=5,
+        seed_value=1,
+    )
+    server = make_server("127.0.0.1", 0, app)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    thread.join()
+
+
+@pytest.mark.usefixtures("app")
+class TestReplay:
+    def test_replay(self, base_url: str) -> None:
+        patient = "p:00000000000000a1"
+        installation = "p:00000000000000b2"
+        entries: List[Dict] = [
+            _entry(
+                "GET",
+                "/dhos/v1/patient/<patient_id>/latest_installation",
+                0.0,
+                patient_id=patient,
+            ),
+            _entry(
+                "GET",
+                "/dhos/v1/patient/<patient_id>/installation/<installation_id>",
+                0.01,
+                patient_id=patient,
+                installation_id=installation,
+            ),
+            {
+                **_entry(
+                    "PATCH",
+                    "/dhos/v1/patient/<patient_id>/installation/<installation_id>",
+                    0.02,
+                    patient_id=patient,
+                    installation_id=installation,
+                ),
+                "fields": ["app_version"],
+            },
+            _entry(
+                "POST",
+                "/dhos/v1/patient/<patient_id>/installation",
+                0.03,
+                patient_id=patient,
+            ),
+            _entry(
+                "POST",
+                "/dhos/v1/clinician/<clinician_id>/installation",
+                0.04,
+                clinician_id="p:0c",
+            ),
+            {
+                **_entry("GET", "/dhos/v1/analytics/patient_installation_counts", 0.05),
+                "query": {"group_by": ["app_version"]},
+            },
+            {
+                **_entry("GET", "/dhos/v1/patient_installations", 0.06),
+                "query": {"unique_device_code": ["p:0d"], "prefix": ["true"]},
+            },
+            _entry(
+                "DELETE",
+                "/dhos/v1/patient/<patient_id>/telemetry",
+                0.07,
+                patient_id=patient,
+            ),
+        ]
+
+        results = replay.replay(entries, base_url, speed=None, concurrency=1)
+
+        assert results["sent"] == 7
+        assert results["skipped"] == 1
+        statuses = {
+            (route["method"], route["route"]): route["statuses"]
+            for route in results["routes"]
+        }
+        assert all(set(status) == {"200"} for status in statuses.values()), statuses
+        assert len(statuses) == 7
+
+    def test_replay_command(self, app: Flask, base_url: str, tmp_path: Path) -> None:
+        # One capture file per process, merged by time.
+        captures = [tmp_path / "requests.jsonl.1", tmp_path / "requests.jsonl.2"]
+        for index, capture in enumerate(captures):
+            capture.write_text(
+                "\n".join(
+                    json.dumps(
+                        _entry(
+                            "GET",
+                            "/dhos/v1/patient/<patient_id>/latest_installation",
+                            time / 100,
+                            patient_id=f"p:{time:016x}",
+                        )
+                    )
+                    for time in range(index, 5, 2)
+                )
+            )
+        output = tmp_path / "replay.json"
+
+        result = app.test_cli_runner().invoke(
+            args=[
+                "replay-requests",
+                *[str(capture) for capture in captures],
+                "--base-url",
+                base_url,
+                "--speed",
+                "10",
+                "--concurrency",
+                "1",
+                "--output",
+                str(output),
+            ]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Sent 5 requests" in result.output
+        assert json.loads(output.read_text())["routes"][0]["statuses"] == {"200": 5}
+
+    def test_invalid_speed(self, app: Flask, tmp_path: Path) -> None:
+        capture = tmp_path / "requests.jsonl"
+        capture.write_text("")
+        result = app.test_cli_runner().invoke(
+            args=["replay-requests", str(capture), "--speed", "fast"]
+        )
+        assert result.exit_code == 2
+        assert "--speed" in result.output
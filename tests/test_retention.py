@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import pytest
+from flask import Flask
+from flask_batteries_included.helpers import generate_uuid
+from flask_batteries_included.sqldb import db
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import retention
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+@pytest.mark.usefixtures("app")
+class TestRetention:
+    @pytest.fixture
+    def installations(self, mobile_telemetry_in_dict: Dict) -> Dict[str, str]:
+        """Creates installations, returning a map of uuid to description."""
+        installations = {}
+        for patient, launched, created in [
+            ("a", "2020-01-01T00:00:00.000Z", datetime(2020, 1, 1)),
+            ("a", "2020-02-01T00:00:00.000Z", datetime(2020, 2, 1)),
+            ("a", "2020-03-01T00:00:00.000Z", datetime(2020, 3, 1)),
+            ("b", "2020-01-01T00:00:00.000Z", datetime(2020, 1, 1)),
+            ("b", "2020-12-01T00:00:00.000Z", datetime(2020, 12, 1)),
+            ("c", "2020-01-01T00:00:00.000Z", datetime(2020, 1, 1)),
+        ]:
+            installation = controller.create_mobile_installation(
+                patient_id=f"patient-{patient}",
+                installation_data={
+                    **mobile_telemetry_in_dict,
+                    "date_first_launched": launched,
+                },
+            )
+            Mobile.query.filter_by(uuid=installation["uuid"]).update(
+                {"created": created}
+            )
+            installations[installation["uuid"]] = f"{patient} {created:%Y-%m}"
+        db.session.commit()
+        return installations
+
+    @pytest.mark.parametrize(
+        "moment,months,expected",
+        [
+            (datetime(2021, 3, 31, 12), 1, datetime(2021, 2, 28, 12)),
+            (datetime(2021, 3, 15), 12, datetime(2020, 3, 15)),
+            (datetime(2021, 1, 10), 2, datetime(2020, 11, 10)),
+        ],
+    )
+    def test_months_before(
+        self, moment: datetime, months: int, expected: datetime
+    ) -> None:
+        assert retention.months_before(moment, months) == expected
+
+    def test_purge_superseded_installations(
+        self, installations: Dict[str, str]
+    ) -> None:
+        progress: List[Tuple[int, int]] = []
+
+        deleted = retention.purge_superseded_installations(
+            Mobile,
+            superseded_before=datetime(2020, 6, 1),
+            batch_size=2,
+            pause_seconds=0,
+            progress=lambda scanned, deleted: progress.append((scanned, deleted)),
+        )
+
+        assert deleted == 2
+        remaining = sorted(installations[row.uuid] for row in Mobile.query)
+        # b 2020-01 was superseded after the cutoff, so it is kept.
+        assert remaining == ["a 2020-03", "b 2020-01", "b 2020-12", "c 2020-01"]
+        assert [scanned for scanned, _ in progress] == [2, 4, 6]
+        assert progress[-1][1] == 2
+
+    def test_other_devices_are_not_superseded(
+        self, app: Flask, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        app.config["INTERN_INSTALLATION_DIMENSIONS"] = True
+        installations = {}
+        for device, product, created in [
+            ("phone", "GDM", datetime(2020, 1, 1)),
+            ("tablet", "GDM", datetime(2020, 2, 1)),
+            ("phone", "DBM", datetime(2020, 2, 15)),
+            ("phone", "GDM", datetime(2020, 3, 1)),
+        ]:
+            installation = controller.create_mobile_installation(
+                patient_id="patient-d",
+                installation_data={
+                    **mobile_telemetry_in_dict,
+                    "unique_device_code": device,
+                    "app_product": product,
+                    "date_first_launched": f"{created:%Y-%m-%d}T00:00:00.000Z",
+                },
+            )
+            Mobile.query.filter_by(uuid=installation["uuid"]).update(
+                {"created": created}
+            )
+            installations[installation["uuid"]] = f"{device} {product} {created:%m}"
+            # The first installation is interned, and the rest stored inline.
+            app.config["INTERN_INSTALLATION_DIMENSIONS"] = False
+        db.session.commit()
+
+        deleted = retention.purge_superseded_installations(
+            Mobile,
+            superseded_before=datetime(2020, 6, 1),
+            batch_size=10,
+            pause_seconds=0,
+        )
+
+        assert deleted == 1
+        assert sorted(installations[row.uuid] for row in Mobile.query) == [
+            "phone DBM 02",
+            "phone GDM 03",
+            "tablet GDM 02",
+        ]
+
+    def test_dry_run_deletes_nothing(self, installations: Dict[str, str]) -> None:
+        deleted = retention.purge_superseded_installations(
+            Mobile,
+            superseded_before=datetime(2021, 1, 1),
+            batch_size=10,
+            pause_seconds=0,
+            dry_run=True,
+        )
+
+        assert deleted == 3
+        assert Mobile.query.count() == len(installations)
+
+    def test_purge_meter_verifications(self, meter_in_dict: Dict) -> None:
+        for created in [datetime(2020, 1, 1), datetime(2020, 5, 1), datetime.utcnow()]:
+            meter = controller.create_blood_glucose_meter(
+                patient_id=generate_uuid(),
+                meter_data={
+                    **meter_in_dict,
+                    "date_verified": datetime(2021, 1, 1, tzinfo=timezone.utc),
+                },
+            )
+            BloodGlucoseMeter.query.filter_by(uuid=meter["uuid"]).update(
+                {"created": created}
+            )
+        db.session.commit()
+
+        dropped, deleted = retention.purge_meter_verifications(
+            created_before=datetime(2021, 1, 1), batch_size=1, pause_seconds=0
+        )
+
+        assert dropped == []
+        assert deleted == 2
+        assert BloodGlucoseMeter.query.count() == 1
+
+    @pytest.mark.usefixtures("installations")
+    def test_purge_command(self, app: Flask) -> None:
+        result = app.test_cli_runner().invoke(
+            args=[
+                "purge-telemetry",
+                "--installations-superseded-months",
+                "1",
+                "--pause",
+                "0",
+            ]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Deleted 3 superseded Mobile rows" in result.output
+        assert "Deleted 0 superseded Desktop rows" in result.output
+        assert Mobile.query.count() == 3
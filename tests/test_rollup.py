@@ -0,0 +1,124 @@
+from datetime import date
+from typing import Dict
+
+import pytest
+from flask import Flask
+from flask_batteries_included.helpers import generate_uuid
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import rollup
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.installation_rollup import MobileDailyRollup
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+@pytest.mark.usefixtures("app")
+class TestRollup:
+    def test_create_installation_updates_rollup(
+        self, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        for _ in range(3):
+            controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={**mobile_telemetry_in_dict},
+            )
+        controller.create_mobile_installation(
+            patient_id=generate_uuid(),
+            installation_data={**mobile_telemetry_in_dict, "app_version": "18.2.x"},
+        )
+
+        result = controller.get_installation_counts(
+            Mobile, group_by=["app_product", "app_version"]
+        )
+
+        assert result == [
+            {"app_product": "GDM", "app_version": "18.1.x", "installation_count": 3},
+            {"app_product": "GDM", "app_version": "18.2.x", "installation_count": 1},
+        ]
+
+    def test_update_installation_moves_rollup(
+        self, clinician_telemetry_in_dict: Dict
+    ) -> None:
+        clinician_id: str = generate_uuid()
+        installation = controller.create_desktop_installation(
+            clinician_id=clinician_id, installation_data=clinician_telemetry_in_dict
+        )
+
+        controller.update_installation(
+            Desktop,
+            {"app_version": "18.2.x"},
+            clinician_id=clinician_id,
+            uuid=installation["uuid"],
+        )
+
+        result = controller.get_installation_counts(Desktop, group_by=["app_version"])
+        assert result == [{"app_version": "18.2.x", "installation_count": 1}]
+
+    def test_rebuild_rollups(self, mobile_telemetry_in_dict: Dict) -> None:
+        for _ in range(2):
+            controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={**mobile_telemetry_in_dict},
+            )
+        incremental = controller.get_installation_counts(
+            Mobile, group_by=["day", *MobileDailyRollup.dimensions]
+        )
+        MobileDailyRollup.query.delete()
+
+        written = rollup.rebuild_rollups(Mobile)
+
+        assert written == 1
+        assert (
+            controller.get_installation_counts(
+                Mobile, group_by=["day", *MobileDailyRollup.dimensions]
+            )
+            == incremental
+        )
+        assert incremental[0]["day"] == date.today()
+
+    def test_uncounting_drifted_bucket_stops_at_zero(
+        self, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        uuids = [
+            controller.create_mobile_installation(
+                patient_id=generate_uuid(),
+                installation_data={**mobile_telemetry_in_dict},
+            )["uuid"]
+            for _ in range(3)
+        ]
+        # The bucket has drifted to fewer installations than it holds.
+        MobileDailyRollup.query.update({MobileDailyRollup.installation_count: 1})
+
+        rollup.shift_installations(Mobile, uuids, -1)
+
+        assert [row.installation_count for row in MobileDailyRollup.query] == [0]
+
+    def test_installation_counts_date_range(
+        self, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        controller.create_mobile_installation(
+            patient_id=generate_uuid(), installation_data=mobile_telemetry_in_dict
+        )
+        result = controller.get_installation_counts(
+            Mobile, group_by=["app_product"], end_date=date(2020, 1, 1)
+        )
+        assert result == []
+
+    def test_installation_counts_invalid_dimension(self) -> None:
+        with pytest.raises(ValueError):
+            controller.get_installation_counts(Mobile, group_by=["model"])
+
+    def test_rebuild_rollups_cli(
+        self, app: Flask, mobile_telemetry_in_dict: Dict
+    ) -> None:
+        controller.create_mobile_installation(
+            patient_id=generate_uuid(), installation_data=mobile_telemetry_in_dict
+        )
+
+        result = app.test_cli_runner().invoke(
+            args=["rebuild-rollups", "--start-date", date.today().isoformat()]
+        )
+
+        assert result.exit_code == 0
+        assert "Rebuilt 1 Mobile rollup rows" in result.output
+        assert "Rebuilt 0 Desktop rollup rows" in result.output
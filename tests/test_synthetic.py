@@ -0,0 +1,89 @@
+from datetime import date
+from typing import Dict
+
+import pytest
+from flask import Flask
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import device_sketch, rollup, synthetic
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+def _seed(seed_value: int = 1) -> Dict[str, int]:
+    return synthetic.seed(
+        controller.INGEST_BUILDERS,
+        patients=20,
+        clinicians=5,
+        start=date(2021, 1, 1),
+        days=60,
+        verifications_per_patient=10,
+        seed_value=seed_value,
+        chunk_size=50,
+    )
+
+
+@pytest.mark.usefixtures("app")
+class TestSynthetic:
+    def test_seed(self) -> None:
+        counts = _seed()
+
+        assert counts == {
+            "mobile": Mobile.query.count(),
+            "desktop": Desktop.query.count(),
+            "blood_glucose_meter": BloodGlucoseMeter.query.count(),
+        }
+        assert len({mobile.patient_id for mobile in Mobile.query}) == 20
+        assert len({desktop.clinician_id for desktop in Desktop.query}) == 5
+        assert counts["blood_glucose_meter"] > 0
+
+        # Stored through the models' derived columns.
+        mobile = Mobile.query.first()
+        assert mobile.app_product == synthetic.APP_PRODUCT
+        assert mobile.app_version_key == Mobile.version_sort_key(mobile.app_version)
+        assert Desktop.query.first().ip_address_inet.startswith("10.")
+
+        # Meters reference an installation of the same patient.
+        installations = {mobile.uuid: mobile.patient_id for mobile in Mobile.query}
+        for meter in BloodGlucoseMeter.query:
+            assert installations[meter.mobile_id] == meter.patient_id
+            assert 2.0 <= meter.blood_glucose_value <= 25.0
+
+        assert (
+            sum(
+                row["installation_count"]
+                for row in rollup.installation_counts(Mobile, group_by=["app_product"])
+            )
+            == counts["mobile"]
+        )
+        distinct = device_sketch.distinct_devices(Mobile, group_by=["app_product"])
+        devices = len({mobile.unique_device_code for mobile in Mobile.query})
+        assert distinct[0]["distinct_devices"] == pytest.approx(devices, rel=0.1)
+
+    def test_seed_is_repeatable(self) -> None:
+        counts = _seed(seed_value=7)
+        uuids = {mobile.uuid for mobile in Mobile.query}
+        Mobile.query.delete()
+        BloodGlucoseMeter.query.delete()
+        Desktop.query.delete()
+
+        assert _seed(seed_value=7) == counts
+        assert {mobile.uuid for mobile in Mobile.query} == uuids
+
+    def test_seed_command(self, app: Flask) -> None:
+        result = app.test_cli_runner().invoke(
+            args=[
+                "seed-telemetry",
+                "--patients",
+                "3",
+                "--clinicians",
+                "2",
+                "--verifications-per-patient",
+                "2",
+                "--seed",
+                "1",
+            ]
+        )
+        assert result.exit_code == 0, result.output
+        assert f"Wrote {Mobile.query.count()} mobile rows" in result.output
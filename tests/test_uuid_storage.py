@@ -0,0 +1,43 @@
+from typing import Any, Dict
+
+import pytest
+from flask_batteries_included.helpers import generate_uuid
+from sqlalchemy.dialects import postgresql, sqlite
+
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.models.blood_glucose_meter import BloodGlucoseMeter
+from dhos_telemetry_api.models.desktop import Desktop
+from dhos_telemetry_api.models.mobile import Mobile
+
+
+class TestUUIDStorage:
+    @pytest.mark.parametrize(
+        "column",
+        [
+            Mobile.uuid,
+            Mobile.patient_id,
+            Desktop.uuid,
+            Desktop.clinician_id,
+            BloodGlucoseMeter.uuid,
+            BloodGlucoseMeter.patient_id,
+            BloodGlucoseMeter.mobile_id,
+        ],
+    )
+    def test_identifier_column_types(self, column: Any) -> None:
+        column_type = column.type
+        assert column_type.compile(dialect=postgresql.dialect()) == "UUID"
+        assert column_type.compile(dialect=sqlite.dialect()) == "VARCHAR(36)"
+
+    @pytest.mark.usefixtures("app")
+    def test_identifiers_are_strings(self, mobile_telemetry_in_dict: Dict) -> None:
+        patient_id: str = generate_uuid()
+        installation = controller.create_mobile_installation(
+            patient_id=patient_id, installation_data=mobile_telemetry_in_dict
+        )
+
+        result = controller.retrieve_installation_by_id(
+            Mobile, patient_id=patient_id, uuid=installation["uuid"]
+        )
+
+        assert result["patient_id"] == patient_id
+        assert isinstance(result["uuid"], str)
@@ -0,0 +1,27 @@
+"""
+Rewrites tests/benchmark_baseline.json, the SQL statements per call of each
+benchmark case that test_benchmark checks, on SQLite as the unit tests run. Run it
+after an intended change with `tox -e benchmark-baseline` and commit the result.
+"""
+import json
+
+from dhos_telemetry_api.app import create_app
+from dhos_telemetry_api.blueprint_api import controller
+from dhos_telemetry_api.helpers import benchmark
+from tests.test_benchmark import BASELINE, BASELINE_ROUNDS, BASELINE_SIZE
+
+
+def main() -> None:
+    app = create_app(testing=True, use_pgsql=False, use_sqlite=True)
+    with app.app_context():
+        results = benchmark.run_benchmarks(
+            controller.INGEST_BUILDERS,
+            sizes=[BASELINE_SIZE],
+            rounds=BASELINE_ROUNDS,
+        )
+    BASELINE.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Wrote {BASELINE}")
+
+
+if __name__ == "__main__":
+    main()